@@ -0,0 +1,627 @@
+##########################################################################
+#
+#  Copyright (c) 2018, Image Engine Design Inc. All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are
+#  met:
+#
+#      * Redistributions of source code must retain the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer.
+#
+#      * Redistributions in binary form must reproduce the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer in the documentation and/or other materials provided with
+#        the distribution.
+#
+#      * Neither the name of John Haddon nor the names of
+#        any other contributors to this software may be used to endorse or
+#        promote products derived from this software without specific prior
+#        written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+#  IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+#  THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+#  PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+#  CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+##########################################################################
+
+import os
+import sys
+import math
+import json
+import shutil
+import tempfile
+import resource
+import collections
+import multiprocessing
+
+import imath
+
+import IECore
+
+import Gaffer
+import Gaffer._Timing
+
+class benchmark( Gaffer.Application ) :
+
+	def __init__( self ) :
+
+		Gaffer.Application.__init__(
+			self,
+			"""
+			Runs a suite of synthetic reference workloads, each
+			exercising a different part of Gaffer, and outputs the
+			timings in JSON format. The workloads are generated
+			procedurally rather than loaded from disk, so the
+			results are reproducible on any machine, and may be
+			compared across builds to measure the effect of
+			performance work.
+
+			To run all the workloads :
+
+			```
+			gaffer benchmark -outputFile results.json
+			```
+
+			To list the available workloads :
+
+			```
+			gaffer benchmark -list
+			```
+
+			To run specific workloads several times at a reduced size :
+
+			```
+			gaffer benchmark sceneDeep imageChain -repeat 5 -scale 0.5
+			```
+
+			To save the reference scripts so they can be examined
+			in more detail using `gaffer stats` or `gaffer gui` :
+
+			```
+			gaffer benchmark -scriptDirectory /tmp/benchmarks
+			```
+			"""
+		)
+
+		self.parameters().addParameters(
+
+			[
+				IECore.StringVectorParameter(
+					name = "workloads",
+					description = "The names of the workloads to run. If unspecified, "
+						"all workloads are run.",
+					defaultValue = IECore.StringVectorData(),
+				),
+
+				IECore.BoolParameter(
+					name = "list",
+					description = "Lists the available workloads instead of running them.",
+					defaultValue = False,
+				),
+
+				IECore.FloatParameter(
+					name = "scale",
+					description = "Scales the size of each workload. Values less than "
+						"1 are useful for quick checks, and values greater than 1 for "
+						"stress testing.",
+					defaultValue = 1.0,
+					minValue = 0.0,
+				),
+
+				IECore.IntParameter(
+					name = "repeat",
+					description = "The number of times to run each workload. The "
+						"minimum, median and standard deviation of the timings are "
+						"reported.",
+					defaultValue = 1,
+					minValue = 1,
+				),
+
+				IECore.BoolParameter(
+					name = "clearCache",
+					description = "Clears the caches before each run, so that every "
+						"run measures the full cost of computation.",
+					defaultValue = True,
+				),
+
+				IECore.FileNameParameter(
+					name = "outputFile",
+					description = "Output the results to this file on disk rather than stdout.",
+					defaultValue = "",
+					allowEmptyString = True,
+					extensions = "json",
+				),
+
+				IECore.FileNameParameter(
+					name = "scriptDirectory",
+					description = "Saves the script for each workload into this directory.",
+					defaultValue = "",
+					allowEmptyString = True,
+					check = IECore.FileNameParameter.CheckType.DontCare,
+				),
+			]
+
+		)
+
+		self.parameters().userData()["parser"] = IECore.CompoundObject(
+			{
+				"flagless" : IECore.StringVectorData( [ "workloads" ] )
+			}
+		)
+
+	def _run( self, args ) :
+
+		if args["list"].value :
+			width = max( len( w.name ) for w in _workloads ) + 4
+			for w in _workloads :
+				sys.stdout.write( "{name:<{width}}{description}\n".format( name = w.name, width = width, description = w.description ) )
+			return 0
+
+		workloads = _workloads
+		if args["workloads"] :
+			names = [ w.name for w in _workloads ]
+			for name in args["workloads"] :
+				if name not in names :
+					IECore.msg( IECore.Msg.Level.Error, "benchmark", "Workload \"%s\" does not exist" % name )
+					return 1
+			requested = set( args["workloads"] )
+			workloads = [ w for w in _workloads if w.name in requested ]
+
+		results = collections.OrderedDict()
+		results["version"] = Gaffer.About.versionString()
+		results["system"] = collections.OrderedDict( [
+			( "platform", sys.platform ),
+			( "cpus", multiprocessing.cpu_count() ),
+		] )
+		results["args"] = collections.OrderedDict( [
+			( "scale", args["scale"].value ),
+			( "repeat", args["repeat"].value ),
+			( "clearCache", args["clearCache"].value ),
+		] )
+		results["workloads"] = collections.OrderedDict()
+
+		for workload in workloads :
+			IECore.msg( IECore.Msg.Level.Info, "benchmark", "Running \"%s\"" % workload.name )
+			results["workloads"][workload.name] = self.__runWorkload( workload, args )
+
+		output = file( args["outputFile"].value, "w" ) if args["outputFile"].value else sys.stdout
+		json.dump( results, output, indent = 4 )
+		output.write( "\n" )
+		if output is not sys.stdout :
+			output.close()
+
+		return 0
+
+	def __runWorkload( self, workload, args ) :
+
+		script = Gaffer.ScriptNode()
+
+		buildTimer = Gaffer._Timing.Timer()
+		with buildTimer :
+			output = workload.build( script, args["scale"].value )
+
+		if args["scriptDirectory"].value :
+			if not os.path.isdir( args["scriptDirectory"].value ) :
+				os.makedirs( args["scriptDirectory"].value )
+			script["fileName"].setValue( os.path.join( args["scriptDirectory"].value, workload.name + ".gfr" ) )
+			script.save()
+
+		memory = _maxRSS()
+		runTimer = Gaffer._Timing.Timer()
+		monitor = Gaffer.PerformanceMonitor()
+		for i in range( 0, args["repeat"].value ) :
+			if args["clearCache"].value :
+				Gaffer.ValuePlug.clearCache()
+				Gaffer.ValuePlug.clearHashCache()
+				IECore.ObjectPool.defaultObjectPool().clear()
+			with runTimer :
+				with monitor :
+					workload.run( script, output )
+
+		statistics = monitor.combinedStatistics()
+
+		result = collections.OrderedDict()
+		result["build"] = buildTimer.statistics()
+		result["run"] = runTimer.statistics()
+		result["performanceMonitor"] = collections.OrderedDict( [
+			( "hashCount", statistics.hashCount ),
+			( "computeCount", statistics.computeCount ),
+			( "deduplicatedComputeCount", statistics.deduplicatedComputeCount ),
+			# Durations are converted from nanoseconds to seconds
+			( "hashDuration", statistics.hashDuration / 1e9 ),
+			( "computeDuration", statistics.computeDuration / 1e9 ),
+		] )
+		result["memory"] = collections.OrderedDict( [
+			( "run", _maxRSS() - memory ),
+			( "cacheUsage", Gaffer.ValuePlug.cacheMemoryUsage() ),
+		] )
+
+		return result
+
+def _maxRSS() :
+
+	if sys.platform == "darwin" :
+		return resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+	else :
+		return resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss * 1024
+
+##########################################################################
+# Workloads. Each consists of a `build( script, scale )` function which
+# populates a ScriptNode and returns the output to be computed, and a
+# `run( script, output )` function which performs the computation to be
+# timed. Building is timed separately from running.
+##########################################################################
+
+_Workload = collections.namedtuple( "_Workload", [ "name", "description", "build", "run" ] )
+_workloads = []
+
+def _registerWorkload( name, description, build, run ) :
+
+	_workloads.append( _Workload( name, description, build, run ) )
+
+def _scaled( value, scale ) :
+
+	return max( 1, int( round( value * scale ) ) )
+
+# Scenes
+# ======
+
+def __traverseScene( script, scene ) :
+
+	import GafferSceneTest
+	GafferSceneTest.traverseScene( scene )
+
+def __buildSceneDeep( script, scale ) :
+
+	import GafferScene
+
+	script["sphere"] = GafferScene.Sphere()
+
+	# The scale determines the number of spheres at the
+	# bottom of the hierarchy, so that the size of the
+	# scene is proportional to it.
+	script["group0"] = GafferScene.Group()
+	for i in range( 0, _scaled( 4, scale ) ) :
+		script["group0"]["in"][i].setInput( script["sphere"]["out"] )
+
+	# Each level duplicates the entire hierarchy below it,
+	# multiplying the number of spheres by 4 each time.
+	out = script["group0"]["out"]
+	for i in range( 0, 5 ) :
+
+		duplicate = GafferScene.Duplicate( "duplicate%d" % i )
+		script.addChild( duplicate )
+		duplicate["in"].setInput( out )
+		duplicate["target"].setValue( "/group" )
+		duplicate["copies"].setValue( 3 )
+		duplicate["transform"]["translate"]["x"].setValue( 2 ** i )
+
+		group = GafferScene.Group( "group%d" % ( i + 1 ) )
+		script.addChild( group )
+		group["in"][0].setInput( duplicate["out"] )
+
+		out = group["out"]
+
+	return out
+
+_registerWorkload(
+	"sceneDeep",
+	"Traverses a deep hierarchy generated by nested Duplicate and Group nodes.",
+	__buildSceneDeep, __traverseScene
+)
+
+def __buildInstances( script, scale ) :
+
+	import GafferScene
+
+	script["plane"] = GafferScene.Plane()
+	script["plane"]["divisions"].setValue( imath.V2i( _scaled( 200, math.sqrt( scale ) ) ) )
+
+	script["sphere"] = GafferScene.Sphere()
+
+	script["instancer"] = GafferScene.Instancer()
+	script["instancer"]["in"].setInput( script["plane"]["out"] )
+	script["instancer"]["instances"].setInput( script["sphere"]["out"] )
+	script["instancer"]["parent"].setValue( "/plane" )
+
+	return script["instancer"]["out"]
+
+_registerWorkload(
+	"sceneWide",
+	"Traverses a wide hierarchy generated by instancing onto the vertices of a plane.",
+	__buildInstances, __traverseScene
+)
+
+def __buildSets( script, scale ) :
+
+	import GafferScene
+
+	out = __buildInstances( script, scale )
+
+	# Make sets containing overlapping subsets of the instances,
+	# and use a set expression to combine them into a filter.
+	for i in range( 0, 10 ) :
+
+		pathFilter = GafferScene.PathFilter( "pathFilter%d" % i )
+		script.addChild( pathFilter )
+		pathFilter["paths"].setValue( IECore.StringVectorData( [ "/plane/instances/*/*%d" % i, "/plane/instances/*/*%d?" % ( 9 - i ) ] ) )
+
+		setNode = GafferScene.Set( "set%d" % i )
+		script.addChild( setNode )
+		setNode["in"].setInput( out )
+		setNode["name"].setValue( "set%d" % i )
+		setNode["filter"].setInput( pathFilter["out"] )
+
+		out = setNode["out"]
+
+	script["setFilter"] = GafferScene.SetFilter()
+	script["setFilter"]["setExpression"].setValue( "( set0 | set1 | set2 ) - set3 | ( set4 & set5 ) | ( set6 & set7 ) | set8 - set9" )
+
+	script["customAttributes"] = GafferScene.CustomAttributes()
+	script["customAttributes"]["in"].setInput( out )
+	script["customAttributes"]["filter"].setInput( script["setFilter"]["out"] )
+	script["customAttributes"]["attributes"].addMember( "user:benchmark", IECore.IntData( 1 ) )
+
+	return script["customAttributes"]["out"]
+
+def __computeSets( script, scene ) :
+
+	import GafferScene
+
+	GafferScene.SceneAlgo.sets( scene )
+	__traverseScene( script, scene )
+
+_registerWorkload(
+	"sceneSets",
+	"Computes many sets, and traverses a scene filtered using a set expression.",
+	__buildSets, __computeSets
+)
+
+# Images
+# ======
+
+def __buildImageChain( script, scale ) :
+
+	import GafferImage
+
+	script["checkerboard"] = GafferImage.Checkerboard()
+	script["checkerboard"]["format"].setValue( GafferImage.Format( 1920, 1080, 1.0 ) )
+
+	# Repeatedly blur, downsample, upsample and merge the
+	# result back over the original.
+	out = script["checkerboard"]["out"]
+	for i in range( 0, _scaled( 8, scale ) ) :
+
+		blur = GafferImage.Blur( "blur%d" % i )
+		script.addChild( blur )
+		blur["in"].setInput( out )
+		blur["radius"].setValue( imath.V2f( 2 + i ) )
+
+		downsample = GafferImage.Resample( "downsample%d" % i )
+		script.addChild( downsample )
+		downsample["in"].setInput( blur["out"] )
+		downsample["matrix"].setValue( imath.M33f().scale( imath.V2f( 0.5 ) ) )
+
+		upsample = GafferImage.Resample( "upsample%d" % i )
+		script.addChild( upsample )
+		upsample["in"].setInput( downsample["out"] )
+		upsample["matrix"].setValue( imath.M33f().scale( imath.V2f( 2 ) ) )
+		upsample["filter"].setValue( "cubic" )
+
+		merge = GafferImage.Merge( "merge%d" % i )
+		script.addChild( merge )
+		merge["in"][0].setInput( script["checkerboard"]["out"] )
+		merge["in"][1].setInput( upsample["out"] )
+		merge["operation"].setValue( GafferImage.Merge.Operation.Over )
+
+		out = merge["out"]
+
+	return out
+
+def __processTiles( script, image ) :
+
+	import GafferImageTest
+	GafferImageTest.processTiles( image )
+
+_registerWorkload(
+	"imageChain",
+	"Processes all tiles of a long chain of Blur, Resample and Merge nodes.",
+	__buildImageChain, __processTiles
+)
+
+# Expressions
+# ===========
+
+def __buildExpressions( script, scale, language ) :
+
+	# Make independent chains of nodes, where each node
+	# is driven by an expression reading from the previous
+	# node and the current frame.
+	outputs = []
+	for c in range( 0, _scaled( 20, scale ) ) :
+
+		previous = None
+		for i in range( 0, 50 ) :
+
+			node = Gaffer.Node( "node%d_%d" % ( c, i ) )
+			script.addChild( node )
+			node["user"]["f"] = Gaffer.FloatPlug( flags = Gaffer.Plug.Flags.Default | Gaffer.Plug.Flags.Dynamic )
+
+			expression = Gaffer.Expression( "expression%d_%d" % ( c, i ) )
+			script.addChild( expression )
+			if previous is None :
+				code = 'parent["%s"]["user"]["f"] = context.getFrame() * 0.5' % node.getName()
+			else :
+				code = 'parent["%s"]["user"]["f"] = parent["%s"]["user"]["f"] * 0.5 + max( context.getFrame(), %d )' % ( node.getName(), previous.getName(), i )
+			expression.setExpression( code, language )
+
+			previous = node
+
+		outputs.append( previous["user"]["f"] )
+
+	return outputs
+
+def __evaluateExpressions( script, outputs ) :
+
+	with Gaffer.Context( script.context() ) as context :
+		for frame in range( 1, 51 ) :
+			context.setFrame( frame )
+			for output in outputs :
+				output.getValue()
+
+_registerWorkload(
+	"pythonExpressions",
+	"Evaluates long chains of nodes driven by python expressions over many frames.",
+	lambda script, scale : __buildExpressions( script, scale, "python" ), __evaluateExpressions
+)
+
+_registerWorkload(
+	"nativeExpressions",
+	"As for pythonExpressions, but using the native expression engine.",
+	lambda script, scale : __buildExpressions( script, scale, "native" ), __evaluateExpressions
+)
+
+# Dispatch
+# ========
+
+def __buildDispatch( script, scale ) :
+
+	import GafferDispatch
+
+	# Make a layered DAG where each task depends on two
+	# tasks from the layer above.
+	width = 20
+	previousLayer = []
+	for layer in range( 0, _scaled( 20, scale ) ) :
+
+		currentLayer = []
+		for i in range( 0, width ) :
+
+			task = GafferDispatch.TaskList( "task%d_%d" % ( layer, i ) )
+			script.addChild( task )
+			if previousLayer :
+				task["preTasks"][0].setInput( previousLayer[i]["task"] )
+				task["preTasks"][1].setInput( previousLayer[(i+1)%width]["task"] )
+
+			currentLayer.append( task )
+
+		previousLayer = currentLayer
+
+	script["final"] = GafferDispatch.TaskList()
+	for i, task in enumerate( previousLayer ) :
+		script["final"]["preTasks"][i].setInput( task["task"] )
+
+	script["dispatcher"] = GafferDispatch.LocalDispatcher()
+	script["dispatcher"]["framesMode"].setValue( GafferDispatch.Dispatcher.FramesMode.CustomRange )
+	script["dispatcher"]["frameRange"].setValue( "1-10" )
+
+	return script["final"]
+
+def __dispatch( script, task ) :
+
+	jobsDirectory = tempfile.mkdtemp( prefix = "gafferBenchmark" )
+	try :
+		script["dispatcher"]["jobsDirectory"].setValue( jobsDirectory )
+		script["dispatcher"].dispatch( [ task ] )
+	finally :
+		shutil.rmtree( jobsDirectory )
+
+_registerWorkload(
+	"dispatch",
+	"Dispatches a large DAG of tasks over a range of frames, using the LocalDispatcher.",
+	__buildDispatch, __dispatch
+)
+
+# Serialisation
+# =============
+
+def __buildSerialisation( script, scale ) :
+
+	# Make Boxes containing connected nodes with expressions,
+	# metadata and dynamic plugs, to exercise the full range
+	# of serialisation features.
+	for b in range( 0, _scaled( 50, scale ) ) :
+
+		box = Gaffer.Box( "box%d" % b )
+		script.addChild( box )
+		box["user"]["in"] = Gaffer.FloatPlug( flags = Gaffer.Plug.Flags.Default | Gaffer.Plug.Flags.Dynamic )
+		Gaffer.Metadata.registerValue( box["user"]["in"], "description", "Benchmark input" )
+
+		previous = box["user"]["in"]
+		for i in range( 0, 20 ) :
+
+			node = Gaffer.Node( "node%d" % i )
+			box.addChild( node )
+			node["user"]["a"] = Gaffer.FloatPlug( flags = Gaffer.Plug.Flags.Default | Gaffer.Plug.Flags.Dynamic )
+			node["user"]["b"] = Gaffer.StringPlug( defaultValue = "b", flags = Gaffer.Plug.Flags.Default | Gaffer.Plug.Flags.Dynamic )
+			node["user"]["a"].setInput( previous )
+			node["user"]["b"].setValue( "value%d" % i )
+			Gaffer.Metadata.registerValue( node, "nodeGadget:color", imath.Color3f( i / 20.0 ) )
+
+			previous = node["user"]["a"]
+
+		box["expression"] = Gaffer.Expression()
+		box["expression"].setExpression( 'parent["user"]["in"] = context.getFrame()' )
+
+	return script.serialise()
+
+def __serialiseAndLoad( script, serialisation ) :
+
+	script.serialise()
+
+	loaded = Gaffer.ScriptNode()
+	loaded.execute( serialisation )
+
+_registerWorkload(
+	"serialisation",
+	"Serialises a large script, and loads the result into a new script.",
+	__buildSerialisation, __serialiseAndLoad
+)
+
+def __buildScriptLoad( script, scale ) :
+
+	serialisation = __buildSerialisation( script, scale )
+
+	# Load once so that the compiled form of the script
+	# is cached, as it would be after the first load of
+	# a file in a session.
+	Gaffer.ScriptNode().execute( serialisation )
+
+	return serialisation
+
+def __load( script, serialisation ) :
+
+	loaded = Gaffer.ScriptNode()
+	loaded.execute( serialisation )
+
+__uncachedLoadCount = [ 0 ]
+def __uncachedLoad( script, serialisation ) :
+
+	# Append a unique comment so that the script must
+	# be compiled from scratch.
+	__uncachedLoadCount[0] += 1
+	__load( script, serialisation + "\n# %d\n" % __uncachedLoadCount[0] )
+
+_registerWorkload(
+	"scriptLoad",
+	"Loads a large script which has not been loaded before.",
+	__buildSerialisation, __uncachedLoad
+)
+
+_registerWorkload(
+	"scriptLoadCached",
+	"As for scriptLoad, but loading a script which has been loaded before, so that its compiled form is cached.",
+	__buildScriptLoad, __load
+)
+
+IECore.registerRunTimeTyped( benchmark )
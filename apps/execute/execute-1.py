@@ -35,7 +35,7 @@
 #
 ##########################################################################
 
-import os, sys, traceback
+import os, sys, ast, traceback, threading, multiprocessing, Queue
 
 import imath
 
@@ -97,6 +97,29 @@ class execute( Gaffer.Application ) :
 					allowEmptyList = True,
 				),
 
+				IECore.IntParameter(
+					name = "parallelFrames",
+					description = "The number of frames to execute concurrently, each "
+						"in its own thread. This can speed up the execution of lightweight "
+						"tasks such as writing files for many frames. A value of zero "
+						"executes as many frames as there are processor cores. Nodes which "
+						"require sequence execution are always executed serially.",
+					defaultValue = 1,
+					minValue = 0,
+				),
+
+				IECore.BoolParameter(
+					name = "worker",
+					description = "Runs as a persistent worker for a dispatcher. Rather "
+						"than executing the nodes and frames specified on the command line, "
+						"the script is loaded once and requests are then read from stdin, "
+						"one per line, each specifying the nodes, frames and context to "
+						"execute. The result of each request is written to stdout as a "
+						"single line containing the return status, and the worker exits "
+						"when stdin is closed.",
+					defaultValue = False,
+				),
+
 				IECore.StringVectorParameter(
 					name = "context",
 					description = "The context used during execution. Note that the frames "
@@ -131,9 +154,23 @@ class execute( Gaffer.Application ) :
 
 		self.root()["scripts"].addChild( scriptNode )
 
+		self.__parallelFrames = args["parallelFrames"].value or multiprocessing.cpu_count()
+
+		if args["worker"].value :
+			return self.__runWorker( scriptNode )
+
+		return self.__execute(
+			scriptNode,
+			args["nodes"],
+			self.parameters()["frames"].getFrameListValue().asList(),
+			args["context"]
+		)
+
+	def __execute( self, scriptNode, nodeNames, frames, contextArgs ) :
+
 		nodes = []
-		if len( args["nodes"] ) :
-			for nodeName in args["nodes"] :
+		if len( nodeNames ) :
+			for nodeName in nodeNames :
 				node = scriptNode.descendant( nodeName )
 				if node is None :
 					IECore.msg( IECore.Msg.Level.Error, "gaffer execute", "Node \"%s\" does not exist" % nodeName )
@@ -150,16 +187,15 @@ class execute( Gaffer.Application ) :
 				IECore.msg( IECore.Msg.Level.Error, "gaffer execute", "Script has no executable nodes" )
 				return 1
 
-		if len(args["context"]) % 2 :
+		if len(contextArgs) % 2 :
 			IECore.msg( IECore.Msg.Level.Error, "gaffer execute", "Context parameter must have matching entry/value pairs" )
 			return 1
 
 		context = Gaffer.Context( scriptNode.context() )
-		for i in range( 0, len(args["context"]), 2 ) :
-			entry = args["context"][i].lstrip( "-" )
-			context[entry] = eval( args["context"][i+1] )
+		for i in range( 0, len(contextArgs), 2 ) :
+			entry = contextArgs[i].lstrip( "-" )
+			context[entry] = eval( contextArgs[i+1] )
 
-		frames = self.parameters()["frames"].getFrameListValue().asList()
 		if not frames :
 			frames = [ scriptNode.context().getFrame() ]
 
@@ -167,12 +203,18 @@ class execute( Gaffer.Application ) :
 			for node in nodes :
 				errorConnection = node.errorSignal().connect( Gaffer.WeakMethod( self.__error ) )
 				try :
-					node["task"].executeSequence( frames )
+					if self.__parallelFrames > 1 and len( frames ) > 1 and not node["task"].requiresSequenceExecution() :
+						error = self.__executeParallel( node["task"], frames )
+					else :
+						node["task"].executeSequence( frames )
+						error = None
 				except Exception as exception :
+					error = "".join( traceback.format_exception( *sys.exc_info() ) )
+				if error is not None :
 					IECore.msg(
 						IECore.Msg.Level.Debug,
 						"gaffer execute : executing %s" % node.relativeName( scriptNode ),
-						"".join( traceback.format_exception( *sys.exc_info() ) ),
+						error,
 					)
 					IECore.msg(
 						IECore.Msg.Level.Error,
@@ -183,6 +225,73 @@ class execute( Gaffer.Application ) :
 
 		return 0
 
+	## Executes the frames using up to `self.__parallelFrames` threads, each
+	# with its own copy of the current context. Returns the formatted traceback
+	# for the first frame to fail, or None if all frames succeeded.
+	def __executeParallel( self, taskPlug, frames ) :
+
+		context = Gaffer.Context.current()
+
+		frameQueue = Queue.Queue()
+		for frame in frames :
+			frameQueue.put( frame )
+
+		errors = []
+		def executeFrames() :
+
+			with Gaffer.Context( context ) as frameContext :
+				# Stop taking new frames as soon as any frame
+				# has failed, as serial execution would.
+				while not errors :
+					try :
+						frame = frameQueue.get_nowait()
+					except Queue.Empty :
+						return
+					frameContext.setFrame( frame )
+					try :
+						taskPlug.execute()
+					except Exception as exception :
+						errors.append( "".join( traceback.format_exception( *sys.exc_info() ) ) )
+
+		threads = [
+			threading.Thread( target = executeFrames )
+			for i in range( 0, min( self.__parallelFrames, len( frames ) ) )
+		]
+		for thread in threads :
+			thread.start()
+		for thread in threads :
+			thread.join()
+
+		return errors[0] if errors else None
+
+	def __runWorker( self, scriptNode ) :
+
+		# We reserve the original stdout for reporting results, and redirect
+		# everything else to stderr so that output from the tasks themselves
+		# can't be mistaken for a result.
+		results = os.fdopen( os.dup( sys.stdout.fileno() ), "w" )
+		sys.stdout.flush()
+		os.dup2( sys.stderr.fileno(), sys.stdout.fileno() )
+
+		while True :
+
+			line = sys.stdin.readline()
+			if not line :
+				break
+
+			try :
+				request = ast.literal_eval( line )
+				frames = IECore.FrameList.parse( request["frames"] ).asList()
+				result = self.__execute( scriptNode, request["nodes"], frames, request["context"] )
+			except Exception as exception :
+				IECore.msg( IECore.Msg.Level.Error, "gaffer execute : reading request", str( exception ) )
+				result = 1
+
+			results.write( "%d\n" % result )
+			results.flush()
+
+		return 0
+
 	def __error( self, plug, source, message ) :
 
 		IECore.msg(
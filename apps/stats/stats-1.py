@@ -37,7 +37,7 @@
 import os
 import gc
 import sys
-import time
+import json
 import tempfile
 import resource
 import collections
@@ -45,6 +45,7 @@ import collections
 import IECore
 
 import Gaffer
+import Gaffer._Timing
 
 class stats( Gaffer.Application ) :
 
@@ -76,6 +77,19 @@ class stats( Gaffer.Application ) :
 			```
 			gaffer stats fileName.gfr -image NameOfNode -performanceMonitor
 			```
+
+			To record a timeline of the processes used to generate a scene :
+
+			```
+			gaffer stats fileName.gfr -scene NameOfNode -trace trace.json
+			```
+
+			To benchmark a scene over several runs, writing the results as
+			JSON and flagging any regressions relative to a previous run :
+
+			```
+			gaffer stats fileName.gfr -scene NameOfNode -repeat 5 -clearCache -format json -outputFile today.json -compare yesterday.json
+			```
 			"""
 		)
 
@@ -99,6 +113,19 @@ class stats( Gaffer.Application ) :
 					extensions = "",
 				),
 
+				IECore.StringParameter(
+					name = "format",
+					description = "The format used to output the results. The \"json\" "
+						"format is intended for consumption by other tools, and may be "
+						"passed to the compare parameter of a subsequent run.",
+					defaultValue = "text",
+					presets = (
+						( "text", "text" ),
+						( "json", "json" ),
+					),
+					presetsOnly = True,
+				),
+
 				IECore.FrameListParameter(
 					name = "frames",
 					description = "The frames to evaluate statistics for. The default value "
@@ -138,6 +165,42 @@ class stats( Gaffer.Application ) :
 					defaultValue = False,
 				),
 
+				IECore.IntParameter(
+					name = "repeat",
+					description = "The number of times to evaluate the scene, image or "
+						"task. When greater than 1, the minimum, median and standard "
+						"deviation of the timings are reported.",
+					defaultValue = 1,
+					minValue = 1,
+				),
+
+				IECore.BoolParameter(
+					name = "clearCache",
+					description = "Clears the caches between each repeated evaluation, "
+						"so that every run measures the full cost of computation.",
+					defaultValue = False,
+				),
+
+				IECore.FileNameParameter(
+					name = "compare",
+					description = "A file containing the JSON output from a previous run. "
+						"Timings are compared against it and any which have increased "
+						"by more than the regression threshold are flagged, in which "
+						"case the application returns a non-zero exit status.",
+					defaultValue = "",
+					allowEmptyString = True,
+					extensions = "json",
+					check = IECore.FileNameParameter.CheckType.MustExist,
+				),
+
+				IECore.FloatParameter(
+					name = "regressionThreshold",
+					description = "The percentage increase in median time which is "
+						"considered to be a regression when using the compare parameter.",
+					defaultValue = 10.0,
+					minValue = 0.0,
+				),
+
 				IECore.StringParameter(
 					name = "task",
 					description = "The name of a TaskNode or TaskPlug to dispatch.",
@@ -173,6 +236,26 @@ class stats( Gaffer.Application ) :
 					defaultValue = "",
 				),
 
+				IECore.BoolParameter(
+					name = "cacheStatistics",
+					description = "Records which nodes are responsible for the contents "
+						"of the cache, and lists the largest consumers of cache memory.",
+					defaultValue = False,
+				),
+
+				IECore.FileNameParameter(
+					name = "trace",
+					description = "Turns on a trace monitor, and writes the timeline of "
+						"all hash and compute processes to the specified file in Chrome "
+						"Trace Event format. The trace can be viewed in chrome://tracing "
+						"or Perfetto. If the file has a \".txt\" extension, the trace is "
+						"instead written as collapsed stacks suitable for flamegraph tools.",
+					defaultValue = "",
+					allowEmptyString = True,
+					extensions = "json txt",
+					check = IECore.FileNameParameter.CheckType.DontCare,
+				),
+
 				IECore.BoolParameter(
 					name = "vtune",
 					description = "Enables VTune instrumentation. When enabled, the VTune "
@@ -204,13 +287,15 @@ class stats( Gaffer.Application ) :
 
 		self.__timers = collections.OrderedDict()
 		self.__memory = collections.OrderedDict()
+		self.__results = collections.OrderedDict()
+		self.__format = args["format"].value
 
 		self.__memory["Application"] = _Memory.maxRSS()
 
 		script = Gaffer.ScriptNode()
 		script["fileName"].setValue( os.path.abspath( args["script"].value ) )
 
-		with _Timer() as loadingTimer :
+		with Gaffer._Timing.Timer() as loadingTimer :
 			script.load( continueOnError = True )
 		self.__timers["Loading"] = loadingTimer
 
@@ -232,6 +317,14 @@ class stats( Gaffer.Application ) :
 		else :
 			self.__contextMonitor = None
 
+		if args["cacheStatistics"].value :
+			Gaffer.ValuePlug.setCacheStatisticsEnabled( True )
+
+		if args["trace"].value :
+			self.__traceMonitor = Gaffer.TraceMonitor()
+		else :
+			self.__traceMonitor = None
+
 		if args["vtune"].value :
 			try:
 				self.__vtuneMonitor = Gaffer.VTuneMonitor()
@@ -243,20 +336,12 @@ class stats( Gaffer.Application ) :
 
 		self.__writeVersion( script )
 
-		self.__output.write( "\n" )
-
 		self.__writeArgs( args )
 
-		self.__output.write( "\n" )
-
 		self.__writeSettings( script )
 
-		self.__output.write( "\n" )
-
 		self.__writeVariables( script )
 
-		self.__output.write( "\n" )
-
 		if args["nodeSummary"].value :
 
 			self.__writeNodes( script )
@@ -273,23 +358,25 @@ class stats( Gaffer.Application ) :
 
 			self.__writeTask( script, args )
 
-		self.__output.write( "\n" )
-
 		self.__writeMemory()
 
-		self.__output.write( "\n" )
+		self.__writeCacheStatistics( args )
 
 		self.__writePerformance( script, args )
 
-		self.__output.write( "\n" )
-
 		self.__writeContext( script, args )
 
-		self.__output.write( "\n" )
+		regressions = self.__writeComparison( args )
+
+		self.__writeTrace( args )
+
+		if self.__format == "json" :
+			json.dump( self.__results, self.__output, indent = 4, default = _jsonValue )
+			self.__output.write( "\n" )
 
 		self.__output.close()
 
-		return 0
+		return 1 if regressions else 0
 
 	def __writeVersion( self, script ) :
 
@@ -304,8 +391,19 @@ class stats( Gaffer.Application ) :
 			( "Current", Gaffer.About.versionString() ),
 		)
 
-		self.__output.write( "Gaffer Version :\n\n" )
-		self.__writeItems( versions )
+		self.__writeSection( "Gaffer Version", "version", versions )
+
+	## Records a section of results for JSON output, or writes it
+	# immediately when outputting text. Items with an empty name are
+	# used as spacers in the text output, and are omitted from JSON.
+	def __writeSection( self, title, key, items ) :
+
+		self.__results[key] = collections.OrderedDict( [ x for x in items if x[0] ] )
+
+		if self.__format == "text" :
+			self.__output.write( "%s :\n\n" % title )
+			self.__writeItems( items )
+			self.__output.write( "\n" )
 
 	def __writeItems( self, items ) :
 
@@ -318,8 +416,7 @@ class stats( Gaffer.Application ) :
 
 	def __writeArgs( self, args ) :
 
-		self.__output.write( "Args :\n\n" )
-		self.__writeItems( sorted( args.items() ) )
+		self.__writeSection( "Args", "args", sorted( args.items() ) )
 
 	def __writeSettings( self, script ) :
 
@@ -343,8 +440,7 @@ class stats( Gaffer.Application ) :
 
 		itemsWalk( script )
 
-		self.__output.write( "Settings :\n\n" )
-		self.__writeItems( items )
+		self.__writeSection( "Settings", "settings", items )
 
 	def __writeVariables( self, script ) :
 
@@ -354,8 +450,7 @@ class stats( Gaffer.Application ) :
 			if data is not None :
 				items.append( ( name, data ) )
 
-		self.__output.write( "Variables :\n\n" )
-		self.__writeItems( items )
+		self.__writeSection( "Variables", "variables", items )
 
 	def __writeNodes( self, script ) :
 
@@ -376,8 +471,7 @@ class stats( Gaffer.Application ) :
 			( "Total", sum( counter.values() ) ),
 		] )
 
-		self.__output.write( "Nodes :\n\n" )
-		self.__writeItems( items )
+		self.__writeSection( "Nodes", "nodes", items )
 
 	def __context( self, script, args ) :
 
@@ -395,6 +489,27 @@ class stats( Gaffer.Application ) :
 
 		return frames
 
+	## Times `f()` for the requested number of repeats, with all
+	# the monitors active, recording the results under `name`.
+	def __measure( self, name, args, f ) :
+
+		if args["preCache"].value :
+			f()
+
+		memory = _Memory.maxRSS()
+		timer = Gaffer._Timing.Timer()
+		for i in range( 0, args["repeat"].value ) :
+			if i > 0 and args["clearCache"].value :
+				Gaffer.ValuePlug.clearCache()
+				Gaffer.ValuePlug.clearHashCache()
+				IECore.ObjectPool.defaultObjectPool().clear()
+			with timer :
+				with self.__performanceMonitor or _NullContextManager(), self.__contextMonitor or _NullContextManager(), self.__traceMonitor or _NullContextManager() :
+					f()
+
+		self.__timers[name] = timer
+		self.__memory[name] = _Memory.maxRSS() - memory
+
 	def __writeScene( self, script, args ) :
 
 		import GafferScene
@@ -418,20 +533,83 @@ class stats( Gaffer.Application ) :
 					else :
 						GafferSceneTest.traverseScene( scene )
 
-		if args["preCache"].value :
-			computeScene()
+		self.__measure( "Scene generation", args, computeScene )
 
-		memory = _Memory.maxRSS()
-		with _Timer() as sceneTimer :
-			with self.__performanceMonitor or _NullContextManager(), self.__contextMonitor or _NullContextManager() :
-				computeScene()
+		# Gather statistics outside of the measurements above, so
+		# they don't affect the timings. The scene will generally be
+		# in the cache already, so this is relatively cheap.
+
+		locations = 0
+		objects = {}
+		attributes = {}
+		transforms = {}
+		sets = collections.OrderedDict()
+		setMemory = {}
+		setSizes = {}
+
+		with self.__context( script, args ) as context :
+
+			for frame in self.__frames( script, args ) :
+
+				context.setFrame( frame )
+
+				if not args["sets"] :
+
+					paths = [ "/" ]
+					while paths :
+
+						path = paths.pop()
+						locations += 1
+
+						h = scene.objectHash( path ).toString()
+						if h not in objects :
+							objects[h] = scene.object( path, _copy = False ).memoryUsage()
+
+						h = scene.attributesHash( path ).toString()
+						if h not in attributes :
+							attributes[h] = scene.attributes( path, _copy = False ).memoryUsage()
+
+						h = scene.transformHash( path ).toString()
+						if h not in transforms :
+							transforms[h] = IECore.M44fData( scene.transform( path ) ).memoryUsage()
+
+						prefix = path.rstrip( "/" ) + "/"
+						paths.extend( [ prefix + str( n ) for n in scene.childNames( path, _copy = False ) ] )
+
+				for setName in args["sets"] or scene["setNames"].getValue() :
+
+					setName = str( setName )
+					h = scene.setHash( setName ).toString()
+					if h not in setMemory :
+						setData = scene.set( setName, _copy = False )
+						setMemory[h] = setData.memoryUsage()
+						setSizes[h] = setData.value.size()
+					# Record sizes per name, since distinct sets
+					# may share a hash, for instance if they are
+					# all empty.
+					sets[setName] = max( sets.get( setName, 0 ), setSizes[h] )
 
-		self.__timers["Scene generation"] = sceneTimer
-		self.__memory["Scene generation"] = _Memory.maxRSS() - memory
+		if not args["sets"] :
+			items = [
+				( "Locations", locations ),
+				( "Unique objects", len( objects ) ),
+				( "Unique attributes", len( attributes ) ),
+				( "Unique transforms", len( transforms ) ),
+				( "Sets", len( sets ) ),
+				( "", "" ),
+				( "Object memory", _Memory( sum( objects.values() ) ) ),
+				( "Attribute memory", _Memory( sum( attributes.values() ) ) ),
+				( "Transform memory", _Memory( sum( transforms.values() ) ) ),
+				( "Set memory", _Memory( sum( setMemory.values() ) ) ),
+			]
+		else :
+			items = [
+				( "Sets", len( sets ) ),
+				( "Set memory", _Memory( sum( setMemory.values() ) ) ),
+			]
 
-		## \todo Calculate and write scene stats
-		#  - Locations
-		#  - Unique objects, attributes etc
+		self.__writeSection( "Scene", "scene", items )
+		self.__writeSection( "Set sizes", "sets", sets.items() )
 
 	def __writeImage( self, script, args ) :
 
@@ -453,16 +631,7 @@ class stats( Gaffer.Application ) :
 					context.setFrame( frame )
 					GafferImageTest.processTiles( image )
 
-		if args["preCache"].value :
-			computeImage()
-
-		memory = _Memory.maxRSS()
-		with _Timer() as imageTimer :
-			with self.__performanceMonitor or _NullContextManager(), self.__contextMonitor or _NullContextManager() :
-				computeImage()
-
-		self.__timers["Image generation"] = imageTimer
-		self.__memory["Image generation"] = _Memory.maxRSS() - memory
+		self.__measure( "Image generation", args, computeImage )
 
 		items = [
 			( "Format", image["format"].getValue() ),
@@ -470,8 +639,7 @@ class stats( Gaffer.Application ) :
 			( "Channel names", image["channelNames"].getValue() ),
 		]
 
-		self.__output.write( "\nImage :\n\n" )
-		self.__writeItems( items )
+		self.__writeSection( "Image", "image", items )
 
 	def __writeTask( self, script, args ) :
 
@@ -488,16 +656,14 @@ class stats( Gaffer.Application ) :
 		dispatcher = GafferDispatch.LocalDispatcher()
 		dispatcher["jobsDirectory"].setValue( tempfile.mkdtemp( prefix = "gafferStats" ) )
 
-		memory = _Memory.maxRSS()
-		with _Timer() as taskTimer :
-			with self.__performanceMonitor or _NullContextManager(), self.__contextMonitor or _NullContextManager() :
-				with Gaffer.Context( script.context() ) as context :
-					for frame in self.__frames( script, args ) :
-						context.setFrame( frame )
-						dispatcher.dispatch( [ task ] )
+		def executeTask() :
 
-		self.__timers["Task execution"] = taskTimer
-		self.__memory["Task execution"] = _Memory.maxRSS() - memory
+			with Gaffer.Context( script.context() ) as context :
+				for frame in self.__frames( script, args ) :
+					context.setFrame( frame )
+					dispatcher.dispatch( [ task ] )
+
+		self.__measure( "Task execution", args, executeTask )
 
 	def __writeMemory( self ) :
 
@@ -516,35 +682,74 @@ class stats( Gaffer.Application ) :
 			( "Max resident size", _Memory.maxRSS() ),
 		] )
 
-		self.__output.write( "Memory :\n\n" )
-		self.__writeItems( items )
+		self.__writeSection( "Memory", "memory", items )
+
+	def __writeCacheStatistics( self, args ) :
 
-	def __writeStatisticsItems( self, script, stats, key, n ) :
+		if not Gaffer.ValuePlug.getCacheStatisticsEnabled() :
+			return
 
-		stats.sort( key = key, reverse = True )
-		items = [ ( x[0].relativeName( script ), key( x ) ) for x in stats[:n] ]
-		self.__writeItems( items )
+		statistics = Gaffer.ValuePlug.cacheStatistics()
+		n = args["maxLinesPerMetric"].value
+
+		results = collections.OrderedDict()
+		for key, title in ( ( "nodes", "node" ), ( "plugTypes", "plug type" ) ) :
+
+			items = [ x for x in statistics[key].items() if x[1]["bytes"] ]
+			items.sort( key = lambda x : x[1]["bytes"], reverse = True )
+			results[key] = collections.OrderedDict( items[:n] )
+
+			if self.__format != "text" :
+				continue
+
+			self.__output.write( "Top %d cache consumers by %s :\n\n" % ( min( n, len( items ) ), title ) )
+			self.__writeItems( [
+				(
+					name,
+					"%s (%d entries, %.1f%% hits, %d evictions)" % (
+						_Memory( s["bytes"] ), s["entries"],
+						100.0 * s["hits"] / max( s["hits"] + s["misses"], 1 ),
+						s["evictions"]
+					)
+				)
+				for name, s in items[:n]
+			] )
+			self.__output.write( "\n" )
+
+		self.__results["cacheStatistics"] = results
 
 	def __writePerformance( self, script, args ) :
 
-			self.__output.write( "Performance :\n\n" )
-			self.__writeItems( self.__timers.items() )
+			self.__writeSection( "Performance", "performance", self.__timers.items() )
 
-			if self.__performanceMonitor is not None :
+			if self.__performanceMonitor is None :
+				return
+
+			if self.__format == "text" :
 				self.__output.write(
-					"\n" + Gaffer.MonitorAlgo.formatStatistics(
+					Gaffer.MonitorAlgo.formatStatistics(
 						self.__performanceMonitor,
 						maxLinesPerMetric = args["maxLinesPerMetric"].value
-					)
+					) + "\n"
 				)
 
+			plugStatistics = self.__performanceMonitor.allStatistics().items()
+			plugStatistics.sort( key = lambda x : x[1].hashDuration + x[1].computeDuration, reverse = True )
+
+			results = collections.OrderedDict()
+			results["combined"] = _performanceStatistics( self.__performanceMonitor.combinedStatistics() )
+			results["plugs"] = collections.OrderedDict( [
+				( plug.relativeName( script ), _performanceStatistics( s ) )
+				for plug, s in plugStatistics[:args["maxLinesPerMetric"].value]
+			] )
+
+			self.__results["performanceMonitor"] = results
+
 	def __writeContext( self, script, args ) :
 
 			if self.__contextMonitor is None :
 				return
 
-			self.__output.write( "Contexts :\n\n" )
-
 			stats = self.__contextMonitor.combinedStatistics()
 
 			items = [ ( n, stats.numUniqueValues( n ) ) for n in stats.variableNames() ]
@@ -553,25 +758,75 @@ class stats( Gaffer.Application ) :
 				( "Unique contexts", stats.numUniqueContexts() ),
 			]
 
-			self.__writeItems( items )
+			self.__writeSection( "Contexts", "contexts", items )
 
-class _Timer( object ) :
+	## Compares our timings against the JSON output from a previous
+	# run, returning the names of any timings which have regressed.
+	def __writeComparison( self, args ) :
 
-	def __enter__( self ) :
+		if not args["compare"].value :
+			return []
 
-		self.__time = time.time()
-		self.__clock = time.clock()
+		try :
+			with open( args["compare"].value ) as f :
+				previous = json.load( f ).get( "performance", {} )
+		except ValueError :
+			IECore.msg( IECore.Msg.Level.Error, "stats", "Unable to read previous results from \"%s\"" % args["compare"].value )
+			return []
 
-		return self
+		threshold = args["regressionThreshold"].value / 100.0
 
-	def __exit__( self, type, value, traceBack ) :
+		items = []
+		results = collections.OrderedDict()
+		regressions = []
+		for name, timer in self.__timers.items() :
+
+			if name not in previous :
+				continue
+
+			current = timer.statistics()
+			results[name] = collections.OrderedDict()
+			for clock, label in ( ( "wall", "wall" ), ( "cpu", "CPU" ) ) :
+
+				previousMedian = previous[name][clock]["median"]
+				currentMedian = current[clock]["median"]
+				change = ( currentMedian - previousMedian ) / previousMedian if previousMedian > 0 else 0.0
+				regression = change > threshold
+
+				results[name][clock] = collections.OrderedDict( [
+					( "previous", previousMedian ),
+					( "current", currentMedian ),
+					( "change", change ),
+					( "regression", regression ),
+				] )
+
+				items.append( (
+					"%s (%s)" % ( name, label ),
+					"%.3fs -> %.3fs (%+.1f%%)%s" % ( previousMedian, currentMedian, change * 100, " REGRESSION" if regression else "" )
+				) )
+
+				if regression and name not in regressions :
+					regressions.append( name )
+
+		if self.__format == "text" :
+			self.__output.write( "Comparison :\n\n" )
+			self.__writeItems( items )
+			self.__output.write( "\n" )
 
-		self.__time = time.time() - self.__time
-		self.__clock = time.clock() - self.__clock
+		self.__results["comparison"] = results
 
-	def __str__( self ) :
+		return regressions
 
-		return "%.3fs (wall), %.3fs (CPU)" % ( self.__time, self.__clock )
+	def __writeTrace( self, args ) :
+
+		if self.__traceMonitor is None :
+			return
+
+		fileName = args["trace"].value
+		if os.path.splitext( fileName )[1] == ".txt" :
+			self.__traceMonitor.writeFlameGraph( fileName )
+		else :
+			self.__traceMonitor.writeChromeTrace( fileName )
 
 class _Memory( object ) :
 
@@ -587,6 +842,10 @@ class _Memory( object ) :
 		else :
 			return cls( resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss * 1024 )
 
+	def bytes( self ) :
+
+		return self.__bytes
+
 	def __str__( self ) :
 
 		return "%.3fM" % ( self.__bytes / ( 1024 * 1024. ) )
@@ -605,4 +864,28 @@ class _NullContextManager( object ) :
 
 		pass
 
+def _performanceStatistics( statistics ) :
+
+	return collections.OrderedDict( [
+		( "hashCount", statistics.hashCount ),
+		( "computeCount", statistics.computeCount ),
+		( "deduplicatedComputeCount", statistics.deduplicatedComputeCount ),
+		# Durations are converted from nanoseconds to seconds
+		( "hashDuration", statistics.hashDuration / 1e9 ),
+		( "computeDuration", statistics.computeDuration / 1e9 ),
+	] )
+
+## Used as the `default` argument to `json.dump()`, converting
+# the values we record into types which json can serialise.
+def _jsonValue( value ) :
+
+	if isinstance( value, Gaffer._Timing.Timer ) :
+		return value.statistics()
+	elif isinstance( value, _Memory ) :
+		return value.bytes()
+	elif isinstance( value, IECore.Data ) and hasattr( value, "value" ) :
+		return value.value
+
+	return str( value )
+
 IECore.registerRunTimeTyped( stats )
@@ -42,6 +42,7 @@
 #include "Gaffer/TypedObjectPlug.h"
 
 #include <functional>
+#include <memory>
 
 namespace Gaffer
 {
@@ -120,6 +121,19 @@ class GAFFER_API Expression : public ComputeNode
 				/// to apply them to each of the individual output plugs.
 				/// \threading This function may be called concurrently.
 				virtual IECore::ConstObjectVectorPtr execute( const Context *context, const std::vector<const ValuePlug *> &proxyInputs ) const = 0;
+				/// Executes the last parsed expression once for each of the specified
+				/// contexts, appending the results to `results`. The default implementation
+				/// simply calls execute() with each context made current in turn, but
+				/// engines may override it to amortise per-execution overheads such as
+				/// acquiring the Python GIL.
+				/// \threading This function may be called concurrently.
+				virtual void executeBatch( const std::vector<const Context *> &contexts, const std::vector<const ValuePlug *> &proxyInputs, std::vector<IECore::ConstObjectVectorPtr> &results ) const;
+				/// Should return true if concurrent calls to execute() are serialised
+				/// internally, for instance by the Python GIL. In this case the Expression
+				/// node combines executions requested concurrently by different threads
+				/// into a single call to executeBatch(). The default implementation
+				/// returns false.
+				virtual bool executesSerially() const;
 				//@}
 
 				/// @name Language utilities
@@ -218,9 +232,16 @@ class GAFFER_API Expression : public ComputeNode
 
 		void plugSet( const Plug *plug );
 
+		// Executes the expression via Engine::executeBatch(), combining
+		// our execution with any requested concurrently by other threads.
+		IECore::ConstObjectVectorPtr executeBatched( const Context *context, const std::vector<const ValuePlug *> &inputs ) const;
+
 		EnginePtr m_engine;
 		std::vector<IECore::InternedString> m_contextNames;
 
+		struct Batcher;
+		std::unique_ptr<Batcher> m_batcher;
+
 		ExpressionChangedSignal m_expressionChangedSignal;
 
 };
@@ -46,6 +46,8 @@
 
 #include "boost/signals.hpp"
 
+#include <memory>
+
 namespace Gaffer
 {
 
@@ -247,6 +249,7 @@ class GAFFER_API GraphComponent : public IECore::RunTimeTyped, public boost::sig
 		void setNameInternal( const IECore::InternedString &name );
 		void addChildInternal( GraphComponentPtr child );
 		void removeChildInternal( GraphComponentPtr child, bool emitParentChanged );
+		GraphComponent *childInternal( const IECore::InternedString &name ) const;
 
 		/// \todo The memory overhead of all these signals may become too great.
 		/// At this point we need to reimplement the signal returning functions to
@@ -263,6 +266,13 @@ class GAFFER_API GraphComponent : public IECore::RunTimeTyped, public boost::sig
 		GraphComponent *m_parent;
 		ChildContainer m_children;
 
+		// Index from name to child, used to accelerate `getChild()`
+		// and the maintenance of unique names for parents with many
+		// children. Only built when the number of children exceeds
+		// a threshold.
+		struct NameIndex;
+		std::unique_ptr<NameIndex> m_nameIndex;
+
 };
 
 } // namespace Gaffer
@@ -39,6 +39,8 @@
 
 #include "Gaffer/Export.h"
 
+#include "IECore/InternedString.h"
+
 #include "boost/noncopyable.hpp"
 
 namespace Gaffer
@@ -58,6 +60,11 @@ class GAFFER_API Monitor : boost::noncopyable
 		void setActive( bool active );
 		bool getActive() const;
 
+		/// Increments a named counter on all active monitors. This allows
+		/// statistics which aren't associated with a node graph process,
+		/// such as the hit rates of caches, to be reported to monitors.
+		static void incrementCounter( const IECore::InternedString &name, size_t amount = 1 );
+
 		class Scope : boost::noncopyable
 		{
 
@@ -83,6 +90,9 @@ class GAFFER_API Monitor : boost::noncopyable
 		virtual void processStarted( const Process *process ) = 0;
 		/// Implementations must be safe to call concurrently.
 		virtual void processFinished( const Process *process ) = 0;
+		/// Called by `incrementCounter()`. Implementations must be safe
+		/// to call concurrently. The default implementation does nothing.
+		virtual void counterIncremented( const IECore::InternedString &name, size_t amount );
 
 };
 
@@ -46,6 +46,7 @@
 
 #include "tbb/enumerable_thread_specific.h"
 
+#include <map>
 #include <stack>
 
 namespace Gaffer
@@ -54,7 +55,8 @@ namespace Gaffer
 IE_CORE_FORWARDDECLARE( Plug )
 
 /// A monitor which collects statistics about the frequency
-/// and duration of hash and compute processes per plug.
+/// and duration of hash and compute processes per plug. It also
+/// accumulates any counters reported via `Monitor::incrementCounter()`.
 class GAFFER_API PerformanceMonitor : public Monitor
 {
 
@@ -70,13 +72,18 @@ class GAFFER_API PerformanceMonitor : public Monitor
 				size_t hashCount = 0,
 				size_t computeCount = 0,
 				boost::chrono::nanoseconds hashDuration = boost::chrono::nanoseconds( 0 ),
-				boost::chrono::nanoseconds computeDuration = boost::chrono::nanoseconds( 0 )
+				boost::chrono::nanoseconds computeDuration = boost::chrono::nanoseconds( 0 ),
+				size_t deduplicatedComputeCount = 0
 			);
 
 			size_t hashCount;
 			size_t computeCount;
 			boost::chrono::nanoseconds hashDuration;
 			boost::chrono::nanoseconds computeDuration;
+			/// The number of times a compute was avoided by waiting
+			/// for another thread to compute the same value. Time
+			/// spent waiting is billed to the waiting process.
+			size_t deduplicatedComputeCount;
 
 			Statistics & operator += ( const Statistics &rhs );
 
@@ -91,11 +98,17 @@ class GAFFER_API PerformanceMonitor : public Monitor
 		const Statistics &plugStatistics( const Plug *plug ) const;
 		const Statistics &combinedStatistics() const;
 
+		typedef std::map<IECore::InternedString, size_t> CountersMap;
+
+		const CountersMap &allCounters() const;
+		/// Returns 0 for counters which have not been incremented.
+		size_t counter( const IECore::InternedString &name ) const;
 
 	protected :
 
 		void processStarted( const Process *process ) override;
 		void processFinished( const Process *process ) override;
+		void counterIncremented( const IECore::InternedString &name, size_t amount ) override;
 
 	private :
 
@@ -112,6 +125,8 @@ class GAFFER_API PerformanceMonitor : public Monitor
 			DurationStack durationStack;
 			// The last time measurement we made.
 			boost::chrono::high_resolution_clock::time_point then;
+			// Counters incremented on this thread.
+			CountersMap counters;
 		};
 
 		tbb::enumerable_thread_specific<ThreadData, tbb::cache_aligned_allocator<ThreadData>, tbb::ets_key_per_instance> m_threadData;
@@ -120,6 +135,7 @@ class GAFFER_API PerformanceMonitor : public Monitor
 		void collate() const;
 		mutable StatisticsMap m_statistics;
 		mutable Statistics m_combinedStatistics;
+		mutable CountersMap m_counters;
 
 };
 
@@ -110,6 +110,7 @@ class GAFFER_API Process : public boost::noncopyable
 		static void registerMonitor( Monitor *monitor );
 		static void deregisterMonitor( Monitor *monitor );
 		static bool monitorRegistered( const Monitor *monitor );
+		static void incrementMonitorCounters( const IECore::InternedString &name, size_t amount );
 
 		void emitError( const std::string &error ) const;
 
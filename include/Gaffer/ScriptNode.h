@@ -204,7 +204,13 @@ class GAFFER_API ScriptNode : public Node
 		const BoolPlug *unsavedChangesPlug() const;
 		/// Loads the script specified in the filename plug.
 		/// See execute() for a description of the continueOnError argument
-		/// and the return value.
+		/// and the return value. If the `GAFFER_SCRIPT_CACHE_PATH` environment
+		/// variable is set, compiled scripts are cached in that directory,
+		/// allowing subsequent loads of the same file to skip compilation.
+		/// \todo Compilation is only a small part of the cost of loading a
+		/// large script, with execution of the serialisation dominating. Add
+		/// a binary format which can construct nodes, set plug values, make
+		/// connections and register metadata without using the interpreter.
 		bool load( bool continueOnError = false );
 		/// Saves the script to the file specified by the filename plug.
 		void save() const;
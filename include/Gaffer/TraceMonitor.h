@@ -0,0 +1,141 @@
+//////////////////////////////////////////////////////////////////////////
+//
+//  Copyright (c) 2018, Image Engine Design Inc. All rights reserved.
+//
+//  Redistribution and use in source and binary forms, with or without
+//  modification, are permitted provided that the following conditions are
+//  met:
+//
+//      * Redistributions of source code must retain the above
+//        copyright notice, this list of conditions and the following
+//        disclaimer.
+//
+//      * Redistributions in binary form must reproduce the above
+//        copyright notice, this list of conditions and the following
+//        disclaimer in the documentation and/or other materials provided with
+//        the distribution.
+//
+//      * Neither the name of John Haddon nor the names of
+//        any other contributors to this software may be used to endorse or
+//        promote products derived from this software without specific prior
+//        written permission.
+//
+//  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+//  IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+//  THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+//  PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+//  CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+//  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+//  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+//  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+//  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+//  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+//  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+//////////////////////////////////////////////////////////////////////////
+
+#ifndef GAFFER_TRACEMONITOR_H
+#define GAFFER_TRACEMONITOR_H
+
+#include "Gaffer/Monitor.h"
+
+#include "IECore/InternedString.h"
+#include "IECore/MurmurHash.h"
+#include "IECore/RefCounted.h"
+
+#include "boost/chrono.hpp"
+
+#include "tbb/atomic.h"
+#include "tbb/enumerable_thread_specific.h"
+
+#include <iosfwd>
+#include <vector>
+
+namespace Gaffer
+{
+
+IE_CORE_FORWARDDECLARE( Plug )
+
+/// A monitor which records the start and end of every process,
+/// so that the timeline of a computation can be inspected. Events
+/// are accumulated into per-thread buffers while the monitor is
+/// active, and can be exported in formats suitable for use with
+/// external tools.
+class GAFFER_API TraceMonitor : public Monitor
+{
+
+	public :
+
+		TraceMonitor();
+		~TraceMonitor() override;
+
+		struct Event
+		{
+
+			ConstPlugPtr plug;
+			IECore::InternedString type;
+			IECore::MurmurHash contextHash;
+			/// A small integer identifying the thread the
+			/// process ran on, numbered in order of first use.
+			size_t thread;
+			/// Times are measured relative to the construction
+			/// of the monitor.
+			boost::chrono::nanoseconds begin;
+			boost::chrono::nanoseconds end;
+			/// Index of the enclosing event in `events()`,
+			/// or -1 for a top-level process.
+			int parent;
+
+		};
+
+		typedef std::vector<Event> Events;
+
+		/// Returns all events recorded so far, grouped by thread
+		/// and ordered by start time within each thread. Must not
+		/// be called while processes are running.
+		const Events &events() const;
+		/// Discards all recorded events.
+		void clear();
+
+		/// Writes the events in the Chrome Trace Event format,
+		/// suitable for viewing in `chrome://tracing` or Perfetto.
+		void writeChromeTrace( std::ostream &stream ) const;
+		/// Writes the events in the "collapsed stack" format used
+		/// by `flamegraph.pl` and speedscope. Each line contains
+		/// a call stack and the total time spent in the innermost
+		/// process of that stack, in microseconds.
+		void writeFlameGraph( std::ostream &stream ) const;
+
+	protected :
+
+		void processStarted( const Process *process ) override;
+		void processFinished( const Process *process ) override;
+
+	private :
+
+		// For performance reasons we accumulate events into
+		// thread local storage while computations are running.
+		struct ThreadData
+		{
+			ThreadData();
+			// Identifier for the thread, initialised on first use.
+			size_t thread;
+			Events events;
+			// Indices into `events` for the processes currently
+			// running on this thread.
+			std::vector<int> stack;
+		};
+
+		tbb::enumerable_thread_specific<ThreadData, tbb::cache_aligned_allocator<ThreadData>, tbb::ets_key_per_instance> m_threadData;
+		tbb::atomic<size_t> m_numThreads;
+		const boost::chrono::high_resolution_clock::time_point m_startTime;
+
+		// Then when we want to query it, we collate it into m_events.
+		void collate() const;
+		mutable Events m_events;
+
+};
+
+} // namespace Gaffer
+
+#endif // GAFFER_TRACEMONITOR_H
@@ -42,6 +42,8 @@
 
 #include "IECore/Object.h"
 
+#include <map>
+
 namespace Gaffer
 {
 
@@ -114,6 +116,78 @@ class GAFFER_API ValuePlug : public Plug
 		static size_t cacheMemoryUsage();
 		/// Clears the cache.
 		static void clearCache();
+		/// Statistics describing the usage of the cache. The entries
+		/// and bytes describe the values currently held in the cache,
+		/// and are attributed to the plug that computed them.
+		struct CacheStatistics
+		{
+			CacheStatistics() : entries( 0 ), bytes( 0 ), hits( 0 ), misses( 0 ), evictions( 0 ) {}
+			size_t entries;
+			size_t bytes;
+			size_t hits;
+			size_t misses;
+			/// Entries removed by `clearCache()` are not counted as
+			/// evictions. Neither are any evicted by other threads
+			/// while `clearCache()` is running.
+			size_t evictions;
+		};
+		typedef std::map<std::string, CacheStatistics> CacheStatisticsMap;
+		/// Enables the recording of statistics for each node and
+		/// plug type using the cache. This adds overhead to every
+		/// cache access, so is disabled by default. Values computed
+		/// while disabled are not accounted for, and enabling resets
+		/// the hit, miss and eviction counts.
+		static void setCacheStatisticsEnabled( bool enabled );
+		static bool getCacheStatisticsEnabled();
+		/// Fills the maps with the statistics recorded so far, keyed
+		/// by node name (relative to the ScriptNode) and plug type name
+		/// respectively.
+		static void cacheStatistics( CacheStatisticsMap &nodeStatistics, CacheStatisticsMap &plugTypeStatistics );
+		/// ValuePlug also caches hashes, to avoid repeatedly hashing the
+		/// same plugs during a computation. Each thread has its own hash
+		/// cache, limited to a maximum number of entries, with the least
+		/// recently used entries being evicted first.
+		static size_t getHashCacheSizeLimit();
+		static void setHashCacheSizeLimit( size_t entries );
+		/// Clears the hash caches of all threads. This is done automatically
+		/// whenever a plug is dirtied, so is only needed when measuring
+		/// the full cost of hashing.
+		static void clearHashCache();
+		struct HashCacheStatistics
+		{
+			HashCacheStatistics() : entries( 0 ), hits( 0 ), misses( 0 ), evictions( 0 ) {}
+			/// The total number of entries in all threads.
+			size_t entries;
+			size_t hits;
+			size_t misses;
+			size_t evictions;
+		};
+		/// Returns statistics accumulated over the lifetime of the process.
+		static HashCacheStatistics hashCacheStatistics();
+		/// Specifies a directory in which computed values may also be stored,
+		/// providing a second tier of cache which persists beyond the lifetime
+		/// of the process, and may be shared by several processes. An empty
+		/// directory (the default) disables the disk cache. Note that `clearCache()`
+		/// does not affect the disk cache.
+		static void setDiskCacheDirectory( const std::string &directory );
+		static std::string getDiskCacheDirectory();
+		/// Sets the maximum size of the disk cache in bytes. When it is exceeded,
+		/// the least recently used values are removed.
+		static void setDiskCacheSizeLimit( size_t bytes );
+		static size_t getDiskCacheSizeLimit();
+		/// The disk cache is only used for values of the plug types it
+		/// is enabled for. It is intended for expensive values which are
+		/// cheap to load relative to their compute time. Plugs without the
+		/// Cacheable flag are never stored.
+		///
+		/// > Caution : Hashes are only valid within a single process unless
+		/// > they fully describe the value being computed. In particular,
+		/// > nodes which read files typically hash only the file name and a
+		/// > refresh count, so a value cached on disk would not be updated
+		/// > when the file changes. The disk cache must not be enabled for
+		/// > the output types of such nodes.
+		static void setDiskCacheEnabled( IECore::TypeId plugType, bool enabled );
+		static bool getDiskCacheEnabled( IECore::TypeId plugType );
 		//@}
 
 	protected :
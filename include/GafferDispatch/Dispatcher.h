@@ -42,6 +42,7 @@
 
 #include "Gaffer/CatchingSignalCombiner.h"
 #include "Gaffer/NumericPlug.h"
+#include "Gaffer/TypedPlug.h"
 
 #include "IECore/CompoundData.h"
 #include "IECore/FrameList.h"
@@ -175,6 +176,57 @@ class GAFFERDISPATCH_API Dispatcher : public Gaffer::Node
 		/// At the start of dispatch(), a directory is created under jobsDirectoryPlug + jobNamePlug
 		/// which the dispatcher writes temporary files to. This method returns the most recent created directory.
 		const std::string jobDirectory() const;
+		/// Returns statistics describing the most recent dispatch, or null if
+		/// the dispatch failed before any tasks were evaluated. These are
+		/// intended to be queried by slots connected to postDispatchSignal(),
+		/// and contain the number of unique tasks and batches, along with the
+		/// time in seconds spent in each phase of the dispatch :
+		///
+		/// - "taskEvaluationTime" : Computing task hashes and dependencies.
+		/// - "batchingTime" : Grouping tasks into batches.
+		/// - "immediateExecutionTime" : Executing batches marked as immediate.
+		/// - "doDispatchTime" : The call to `doDispatch()`.
+		const IECore::CompoundData *dispatchStatistics() const;
+		//@}
+
+		//! @name Task skipping
+		/// Dispatchers may skip tasks which are known to be up to date. When
+		/// skipUpToDateTasksPlug() is on, every task executed successfully is
+		/// recorded in a manifest, along with the files it produced. Subsequent
+		/// dispatches then omit tasks whose hash has been recorded previously,
+		/// provided that their outputs are unchanged on disk and none of their
+		/// preTasks are being executed.
+		///////////////////////////////////////////////////////////////////////
+		//@{
+		Gaffer::BoolPlug *skipUpToDateTasksPlug();
+		const Gaffer::BoolPlug *skipUpToDateTasksPlug() const;
+		/// The directory in which the manifest is stored. If this is empty,
+		/// a "taskManifest" directory inside the jobsDirectoryPlug() is used.
+		Gaffer::StringPlug *taskManifestDirectoryPlug();
+		const Gaffer::StringPlug *taskManifestDirectoryPlug() const;
+		//@}
+
+		//! @name Task timings
+		/// When useTaskTimingsPlug() is on, the time taken to execute each
+		/// task is recorded, keyed by node and task hash. Subsequent dispatches
+		/// use these timings to estimate the duration of each batch. Nodes with a
+		/// batch size of 0 are then batched automatically, so that each batch
+		/// takes roughly targetBatchDurationPlug() seconds, and independent
+		/// batches are ordered so that those on the longest critical path come
+		/// first. The estimates are also stored in the "dispatcher:estimatedDuration"
+		/// and "dispatcher:criticalPath" blind data of each TaskBatch, for use
+		/// by derived classes.
+		////////////////////////////////////////////////////////////////////////
+		//@{
+		Gaffer::BoolPlug *useTaskTimingsPlug();
+		const Gaffer::BoolPlug *useTaskTimingsPlug() const;
+		/// The directory in which the timings are stored. If this is empty,
+		/// a "taskTimings" directory inside the jobsDirectoryPlug() is used.
+		Gaffer::StringPlug *taskTimingsDirectoryPlug();
+		const Gaffer::StringPlug *taskTimingsDirectoryPlug() const;
+		/// The target duration in seconds for automatically sized batches.
+		Gaffer::FloatPlug *targetBatchDurationPlug();
+		const Gaffer::FloatPlug *targetBatchDurationPlug() const;
 		//@}
 
 		/// A function which creates a Dispatcher.
@@ -280,6 +332,10 @@ class GAFFERDISPATCH_API Dispatcher : public Gaffer::Node
 
 		std::string createJobDirectory( const Gaffer::Context *context ) const;
 		mutable std::string m_jobDirectory;
+		mutable IECore::CompoundDataPtr m_dispatchStatistics;
+
+		std::string createTaskManifestDirectory( const Gaffer::Context *context ) const;
+		std::string createTaskTimingsDirectory( const Gaffer::Context *context ) const;
 
 		void executeAndPruneImmediateBatches( TaskBatch *batch, bool immediate = false ) const;
 
@@ -296,6 +352,29 @@ class GAFFERDISPATCH_API Dispatcher : public Gaffer::Node
 
 };
 
+namespace Detail
+{
+
+/// Functions for maintaining the manifest used to skip up to date tasks.
+/// The manifest is a directory containing a file for each task executed,
+/// listing the modification times of the files the task wrote via its
+/// "fileName" plug, if it has one. These are used by `Dispatcher::dispatch()`
+/// and `TaskNode::TaskPlug`, and are not intended for use elsewhere.
+GAFFERDISPATCH_API bool taskIsUpToDate( const std::string &manifestDirectory, const TaskNode *node, const IECore::MurmurHash &taskHash );
+/// Must be called with the task's context current.
+GAFFERDISPATCH_API void recordTaskExecuted( const std::string &manifestDirectory, const TaskNode *node, const IECore::MurmurHash &taskHash );
+
+/// Functions for maintaining the timings used to estimate batch durations.
+/// The timings directory contains a file for each node, with a line per
+/// execution containing the task hash and the time taken in seconds. Files
+/// are compacted to the latest entry per hash once they exceed a size limit.
+GAFFERDISPATCH_API void recordTaskDuration( const std::string &timingsDirectory, const TaskNode *node, const IECore::MurmurHash &taskHash, double seconds );
+/// Fills `durations` with the most recent duration recorded for each task hash
+/// of `node`, keyed by `MurmurHash::toString()`.
+GAFFERDISPATCH_API void taskDurations( const std::string &timingsDirectory, const TaskNode *node, std::map<std::string, double> &durations );
+
+} // namespace Detail
+
 } // namespace GafferDispatch
 
 #endif // GAFFERDISPATCH_DISPATCHER_H
@@ -116,6 +116,7 @@ class GAFFERSCENE_API InteractiveRender : public Gaffer::Node
 
 		std::vector<std::unique_ptr<SceneGraph> > m_sceneGraphs;
 		IECoreScenePreview::RendererPtr m_renderer;
+		std::unique_ptr<RendererAlgo::AttributesCache> m_attributesCache;
 		State m_state;
 		unsigned m_dirtyComponents;
 		IECore::ConstCompoundObjectPtr m_globals;
@@ -37,6 +37,7 @@
 #ifndef GAFFERSCENE_RENDERERALGO_H
 #define GAFFERSCENE_RENDERERALGO_H
 
+#include "GafferScene/Private/IECoreScenePreview/Renderer.h"
 #include "GafferScene/ScenePlug.h"
 
 #include "IECoreScene/Camera.h"
@@ -47,14 +48,10 @@
 
 #include "boost/container/flat_map.hpp"
 
-#include <functional>
-
-namespace IECoreScenePreview
-{
+#include "tbb/concurrent_hash_map.h"
 
-class Renderer;
-
-} // namespace IECoreScenePreview
+#include <atomic>
+#include <functional>
 
 namespace GafferScene
 {
@@ -143,9 +140,55 @@ class GAFFERSCENE_API RenderSets : boost::noncopyable
 
 };
 
-GAFFERSCENE_API void outputCameras( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer );
-GAFFERSCENE_API void outputLights( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer );
-GAFFERSCENE_API void outputObjects( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer, const ScenePlug::ScenePath &root = ScenePlug::ScenePath() );
+/// Utility class to share AttributesInterfaces between all locations
+/// with identical attributes, so that the renderer only has to convert
+/// each unique set of attributes once.
+class GAFFERSCENE_API AttributesCache : boost::noncopyable
+{
+
+	public :
+
+		/// The cache holds references to AttributesInterfaces, so
+		/// must be destroyed before the renderer itself.
+		AttributesCache( IECoreScenePreview::Renderer *renderer );
+		~AttributesCache();
+
+		/// Returns an AttributesInterface for the attributes, reusing
+		/// a previous one if the attributes have been seen before.
+		/// May be called concurrently with other calls to `get()`.
+		IECoreScenePreview::Renderer::AttributesInterfacePtr get( const IECore::CompoundObject *attributes );
+
+		/// Removes any AttributesInterfaces which are not referenced
+		/// by anything other than the cache. Intended to be called after
+		/// each update of an interactive render. Must not be called
+		/// concurrently with anything else.
+		void clearUnused();
+
+		/// Reports the hits and misses since the last call to any
+		/// active monitors, as the "RendererAlgo:attributesCacheHits" and
+		/// "RendererAlgo:attributesCacheMisses" counters.
+		/// \see Gaffer::Monitor::incrementCounter()
+		void reportStatistics();
+
+	private :
+
+		IECoreScenePreview::Renderer *m_renderer;
+
+		typedef tbb::concurrent_hash_map<IECore::MurmurHash, IECoreScenePreview::Renderer::AttributesInterfacePtr> Cache;
+		Cache m_cache;
+
+		std::atomic<size_t> m_hits;
+		std::atomic<size_t> m_misses;
+
+};
+
+/// The output functions share AttributesInterfaces between locations via
+/// `attributesCache`. If it is null, a temporary cache is used for the
+/// duration of the call. Pass the same cache to each call to share between
+/// them too.
+GAFFERSCENE_API void outputCameras( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer, AttributesCache *attributesCache = nullptr );
+GAFFERSCENE_API void outputLights( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer, AttributesCache *attributesCache = nullptr );
+GAFFERSCENE_API void outputObjects( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer, const ScenePlug::ScenePath &root = ScenePlug::ScenePath(), AttributesCache *attributesCache = nullptr );
 
 /// Applies the resolution, aspect ratio etc from the globals to the camera.
 GAFFERSCENE_API void applyCameraGlobals( IECoreScene::Camera *camera, const IECore::CompoundObject *globals );
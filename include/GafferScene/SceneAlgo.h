@@ -86,6 +86,10 @@ GAFFERSCENE_API void matchingPaths( const Filter *filter, const ScenePlug *scene
 GAFFERSCENE_API void matchingPaths( const Gaffer::IntPlug *filterPlug, const ScenePlug *scene, IECore::PathMatcher &paths );
 /// As above, but specifying the filter as a PathMatcher.
 GAFFERSCENE_API void matchingPaths( const IECore::PathMatcher &filter, const ScenePlug *scene, IECore::PathMatcher &paths );
+/// Returns a hash uniquely identifying the paths that would be returned by
+/// `matchingPaths( filterPlug, scene, paths )`. This visits the same locations,
+/// but is cheaper as it avoids the construction of a PathMatcher.
+GAFFERSCENE_API IECore::MurmurHash matchingPathsHash( const Gaffer::IntPlug *filterPlug, const ScenePlug *scene );
 
 /// Invokes the ThreadableFunctor at every location in the scene,
 /// visiting parent locations before their children, but
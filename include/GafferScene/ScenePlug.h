@@ -200,6 +200,15 @@ class GAFFERSCENE_API ScenePlug : public Gaffer::ValuePlug
 		IECore::MurmurHash fullAttributesHash( const ScenePath &scenePath ) const;
 		IECore::MurmurHash objectHash( const ScenePath &scenePath ) const;
 		IECore::MurmurHash childNamesHash( const ScenePath &scenePath ) const;
+		/// Returns a hash of the entire hierarchy below and including
+		/// `scenePath`, accounting for the bounds, transforms, attributes,
+		/// objects and child names of every location. Children are hashed
+		/// in parallel, and the individual hashes benefit from the hash cache
+		/// as usual, but the result itself is not cached, so the cost is
+		/// always proportional to the size of the hierarchy. It is therefore
+		/// not suitable for use in `hash()` implementations, which may be
+		/// called frequently.
+		IECore::MurmurHash hierarchyHash( const ScenePath &scenePath ) const;
 		/// See comments for `globals()` method.
 		IECore::MurmurHash globalsHash() const;
 		/// See comments for `setNames()` method.
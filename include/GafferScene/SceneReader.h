@@ -42,6 +42,9 @@
 #include "IECoreScene/SceneInterface.h"
 
 #include "tbb/enumerable_thread_specific.h"
+#include "tbb/spin_mutex.h"
+
+#include <set>
 
 namespace Gaffer
 {
@@ -74,6 +77,12 @@ class GAFFERSCENE_API SceneReader : public SceneNode
 		Gaffer::StringPlug *tagsPlug();
 		const Gaffer::StringPlug *tagsPlug() const;
 
+		/// When on, reading a location also triggers background
+		/// reads of its children and of the next frame, so that
+		/// they are ready by the time the traversal reaches them.
+		Gaffer::BoolPlug *prefetchPlug();
+		const Gaffer::BoolPlug *prefetchPlug() const;
+
 		void affects( const Gaffer::Plug *input, AffectedPlugsContainer &outputs ) const override;
 
 		static size_t supportedExtensions( std::vector<std::string> &extensions );
@@ -111,21 +120,37 @@ class GAFFERSCENE_API SceneReader : public SceneNode
 		// the same file repeatedly, and also the same path within the file
 		// repeatedly (to hash a value then compute it for instance, or to get
 		// the bound and then the object). We take advantage of that by storing
-		// the last accessed scene in thread local storage - we can then avoid
+		// the recently accessed scenes in thread local storage - we can then avoid
 		// the relatively expensive lookups necessary to find the appropriate
-		// SceneInterfacePtr for a query.
-		struct LastScene
+		// SceneInterfacePtr for a query. We keep several entries rather than
+		// just the last one, because traversals interleave queries for a
+		// location with queries for its parent and siblings, and because
+		// a single thread may be working with several files at once.
+		struct ThreadCache
 		{
-			std::string fileName;
-			IECoreScene::ConstSceneInterfacePtr fileNameScene;
-			ScenePlug::ScenePath path;
-			IECoreScene::ConstSceneInterfacePtr pathScene;
+			struct Entry
+			{
+				std::string fileName;
+				ScenePlug::ScenePath path;
+				IECoreScene::ConstSceneInterfacePtr scene;
+			};
+			// Most recently used first.
+			std::vector<Entry> entries;
 		};
-		mutable tbb::enumerable_thread_specific<LastScene> m_lastScene;
+		mutable tbb::enumerable_thread_specific<ThreadCache> m_threadCache;
 		// Returns the SceneInterface for the current filename (in the current Context)
-		// and specified path, using m_lastScene to accelerate the lookups.
+		// and specified path, using m_threadCache to accelerate the lookups.
 		IECoreScene::ConstSceneInterfacePtr scene( const ScenePath &path ) const;
 
+		// The files we have read, so that we can invalidate just those
+		// when the refresh count changes. If we read more files than
+		// the file cache can hold, we stop tracking them and set
+		// `m_fileNamesOverflowed` instead, so that all files are
+		// invalidated.
+		mutable std::set<std::string> m_fileNames;
+		mutable bool m_fileNamesOverflowed;
+		mutable tbb::spin_mutex m_fileNamesMutex;
+
 		static const double g_frameRate;
 		static size_t g_firstPlugIndex;
 
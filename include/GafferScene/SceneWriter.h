@@ -83,6 +83,9 @@ class GAFFERSCENE_API SceneWriter : public GafferDispatch::TaskNode
 	private :
 
 		void createDirectories( const std::string &fileName ) const;
+		void plugDirtied( const Gaffer::Plug *plug );
+
+		uint64_t m_dirtyCount;
 
 		static size_t g_firstPlugIndex;
 
@@ -0,0 +1,116 @@
+##########################################################################
+#
+#  Copyright (c) 2018, Image Engine Design Inc. All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are
+#  met:
+#
+#      * Redistributions of source code must retain the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer.
+#
+#      * Redistributions in binary form must reproduce the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer in the documentation and/or other materials provided with
+#        the distribution.
+#
+#      * Neither the name of John Haddon nor the names of
+#        any other contributors to this software may be used to endorse or
+#        promote products derived from this software without specific prior
+#        written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+#  IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+#  THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+#  PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+#  CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+##########################################################################
+
+import Gaffer
+
+import collections
+import threading
+
+## A process-wide cache of the results of parsing Python source code,
+# shared by the PythonExpressionEngine and GafferDispatch.PythonCommand.
+# These must analyse their source to determine dependencies every time
+# they are parsed or hashed, and when the same source is hashed for
+# many frames the `ast` traversal would otherwise dominate.
+#
+# Entries are keyed on the source and the type of the parser, which is
+# constructed with the source as its sole argument. Parsers are shared
+# between clients, so must be treated as read-only once constructed.
+
+__lock = threading.Lock()
+__cache = collections.OrderedDict()
+__sizeLimit = 1000
+__statistics = { "hits" : 0, "misses" : 0, "evictions" : 0 }
+
+## Returns a `( parser, code )` tuple for the specified source, where
+# `parser` is `parserType( source )` and `code` is the result of compiling
+# the source for use with `exec`. Exceptions from parsing and compilation
+# are propagated to the caller and the failure is not cached.
+def get( source, parserType ) :
+
+	key = ( parserType, source )
+	with __lock :
+		result = __cache.pop( key, None )
+		if result is not None :
+			__cache[key] = result
+			__statistics["hits"] += 1
+			return result
+		__statistics["misses"] += 1
+
+	# Parse outside the lock, so that concurrent misses for
+	# different sources do not serialise. At worst two threads
+	# do the same work and the second result wins.
+	result = ( parserType( source ), compile( source, "<string>", "exec" ) )
+
+	with __lock :
+		__cache[key] = result
+		__limit()
+
+	return result
+
+def setSizeLimit( entries ) :
+
+	global __sizeLimit
+	with __lock :
+		__sizeLimit = entries
+		__limit()
+
+def getSizeLimit() :
+
+	return __sizeLimit
+
+## Removes all entries from the cache, and resets the statistics.
+def clear() :
+
+	with __lock :
+		__cache.clear()
+		for k in __statistics.keys() :
+			__statistics[k] = 0
+
+## Returns a dictionary containing the number of entries, hits, misses
+# and evictions.
+def statistics() :
+
+	with __lock :
+		result = dict( __statistics )
+		result["entries"] = len( __cache )
+
+	return result
+
+def __limit() :
+
+	while len( __cache ) > __sizeLimit :
+		__cache.popitem( last = False )
+		__statistics["evictions"] += 1
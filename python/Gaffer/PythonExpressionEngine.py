@@ -53,12 +53,17 @@ class PythonExpressionEngine( Gaffer.Expression.Engine ) :
 
 	def parse( self, node, expression, inPlugs, outPlugs, contextNames ) :
 
-		parser = _Parser( expression )
+		parser, self.__code = Gaffer.ParseCache.get( expression, _Parser )
 
 		self.__expression = expression
 		self.__inPlugPaths = list( parser.plugReads )
 		self.__outPlugPaths = list( parser.plugWrites )
 
+		# Split the plug paths once up front, so that `execute()`
+		# can navigate `plugDict` without further string processing.
+		self.__inPlugKeys = [ self.__plugKey( p ) for p in self.__inPlugPaths ]
+		self.__outPlugKeys = [ self.__plugKey( p ) for p in self.__outPlugPaths ]
+
 		inPlugs.extend( [ self.__plug( node, p ) for p in self.__inPlugPaths ] )
 		outPlugs.extend( [ self.__plug( node, p ) for p in self.__outPlugPaths ] )
 		contextNames.extend( parser.contextReads )
@@ -66,34 +71,32 @@ class PythonExpressionEngine( Gaffer.Expression.Engine ) :
 	def execute( self, context, inputs ) :
 
 		plugDict = {}
-		for plugPath, plug in zip( self.__inPlugPaths, inputs ) :
+		for ( parentKeys, key ), plug in zip( self.__inPlugKeys, inputs ) :
 			parentDict = plugDict
-			plugPathSplit = plugPath.split( "." )
-			for p in plugPathSplit[:-1] :
+			for p in parentKeys :
 				parentDict = parentDict.setdefault( p, {} )
 			if isinstance( plug, Gaffer.CompoundDataPlug ) :
 				value = IECore.CompoundData()
 				plug.fillCompoundData( value )
 			else :
 				value = plug.getValue()
-			parentDict[plugPathSplit[-1]] = value
+			parentDict[key] = value
 
-		for plugPath in self.__outPlugPaths :
+		for parentKeys, key in self.__outPlugKeys :
 			parentDict = plugDict
-			for p in plugPath.split( "." )[:-1] :
+			for p in parentKeys :
 				parentDict = parentDict.setdefault( p, {} )
 
 		executionDict = { "imath" : imath, "IECore" : IECore, "parent" : plugDict, "context" : _ContextProxy( context ) }
 
-		exec( self.__expression, executionDict, executionDict )
+		exec( self.__code, executionDict, executionDict )
 
 		result = IECore.ObjectVector()
-		for plugPath in self.__outPlugPaths :
+		for parentKeys, key in self.__outPlugKeys :
 			parentDict = plugDict
-			plugPathSplit = plugPath.split( "." )
-			for p in plugPathSplit[:-1] :
+			for p in parentKeys :
 				parentDict = parentDict[p]
-			result.append( parentDict.get( plugPathSplit[-1], IECore.NullObject.defaultNullObject() ) )
+			result.append( parentDict.get( key, IECore.NullObject.defaultNullObject() ) )
 
 		return result
 
@@ -194,6 +197,12 @@ class PythonExpressionEngine( Gaffer.Expression.Engine ) :
 
 		return result
 
+	@staticmethod
+	def __plugKey( plugPath ) :
+
+		plugPathSplit = plugPath.split( "." )
+		return tuple( plugPathSplit[:-1] ), plugPathSplit[-1]
+
 	def __plug( self, node, plugPath ) :
 
 		plug = node.parent().descendant( plugPath )
@@ -0,0 +1,103 @@
+##########################################################################
+#
+#  Copyright (c) 2018, Image Engine Design Inc. All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are
+#  met:
+#
+#      * Redistributions of source code must retain the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer.
+#
+#      * Redistributions in binary form must reproduce the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer in the documentation and/or other materials provided with
+#        the distribution.
+#
+#      * Neither the name of John Haddon nor the names of
+#        any other contributors to this software may be used to endorse or
+#        promote products derived from this software without specific prior
+#        written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+#  IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+#  THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+#  PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+#  CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+##########################################################################
+
+import math
+import time
+import collections
+
+## Private utilities shared by the `stats` and `benchmark` apps.
+# Not part of the public API.
+
+## Accumulates wall and CPU time across one or more runs, each
+# timed using the Timer as a context manager.
+class Timer( object ) :
+
+	def __init__( self ) :
+
+		self.__samples = []
+
+	def __enter__( self ) :
+
+		self.__time = time.time()
+		self.__clock = time.clock()
+
+		return self
+
+	def __exit__( self, type, value, traceBack ) :
+
+		self.__samples.append( ( time.time() - self.__time, time.clock() - self.__clock ) )
+
+	## Returns a dictionary containing the minimum, median and
+	# standard deviation of the "wall" and "cpu" times, along
+	# with the individual samples.
+	def statistics( self ) :
+
+		result = collections.OrderedDict()
+		for index, clock in enumerate( ( "wall", "cpu" ) ) :
+
+			samples = [ s[index] for s in self.__samples ]
+			if not samples :
+				continue
+
+			mean = sum( samples ) / len( samples )
+			sortedSamples = sorted( samples )
+			middle = len( samples ) // 2
+			if len( samples ) % 2 :
+				median = sortedSamples[middle]
+			else :
+				median = ( sortedSamples[middle-1] + sortedSamples[middle] ) / 2.0
+
+			result[clock] = collections.OrderedDict( [
+				( "min", sortedSamples[0] ),
+				( "median", median ),
+				( "stddev", math.sqrt( sum( ( s - mean ) ** 2 for s in samples ) / len( samples ) ) ),
+				( "samples", samples ),
+			] )
+
+		return result
+
+	def __str__( self ) :
+
+		if len( self.__samples ) == 1 :
+			return "%.3fs (wall), %.3fs (CPU)" % self.__samples[0]
+
+		s = self.statistics()
+		return "%.3fs (wall), %.3fs (CPU) median, %.3fs (wall), %.3fs (CPU) min, %.3fs (wall), %.3fs (CPU) stddev, %d runs" % (
+			s["wall"]["median"], s["cpu"]["median"],
+			s["wall"]["min"], s["cpu"]["min"],
+			s["wall"]["stddev"], s["cpu"]["stddev"],
+			len( self.__samples )
+		)
@@ -54,5 +54,7 @@ from GraphComponentPath import GraphComponentPath
 from OutputRedirection import OutputRedirection
 
 import NodeAlgo
+import ExpressionAlgo
+import ParseCache
 
 __import__( "IECore" ).loadConfig( "GAFFER_STARTUP_PATHS", subdirectory = "Gaffer" )
@@ -36,6 +36,8 @@
 
 import os
 import errno
+import multiprocessing
+import Queue
 import signal
 import shlex
 import subprocess32 as subprocess
@@ -57,6 +59,8 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 		self["executeInBackground"] = Gaffer.BoolPlug( defaultValue = False )
 		self["ignoreScriptLoadErrors"] = Gaffer.BoolPlug( defaultValue = False )
 		self["environmentCommand"] = Gaffer.StringPlug()
+		self["maxConcurrentBatches"] = Gaffer.IntPlug( defaultValue = 0, minValue = 0 )
+		self["persistentWorkers"] = Gaffer.BoolPlug( defaultValue = False )
 
 		self.__jobPool = jobPool if jobPool else LocalDispatcher.defaultJobPool()
 
@@ -91,6 +95,17 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 			self.__environmentCommand = Gaffer.Context.current().substitute(
 				dispatcher["environmentCommand"].getValue()
 			)
+			self.__maxConcurrentBatches = dispatcher["maxConcurrentBatches"].getValue()
+			if self.__maxConcurrentBatches == 0 :
+				self.__maxConcurrentBatches = multiprocessing.cpu_count()
+			self.__persistentWorkers = dispatcher["persistentWorkers"].getValue()
+			self.__workers = []
+			self.__idleWorkers = []
+			self.__events = Queue.Queue()
+			# Written by the scheduling thread and read from
+			# others, so protected by a lock.
+			self.__timelines = {}
+			self.__timelinesLock = threading.Lock()
 
 			self.__messageHandler = IECore.CapturingMessageHandler()
 			self.__messageTitle = "%s : Job %s %s" % ( self.__dispatcher.getName(), self.__name, self.__id )
@@ -125,28 +140,59 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 
 		def statistics( self ) :
 
-			batch = self.__currentBatch()
-			if batch is None or "pid" not in batch.blindData().keys() :
+			pids = self._pids()
+			if not pids :
 				return {}
 
-			rss = 0
-			pcpu = 0.0
-			pid = batch.blindData().get( "pid" )
-
 			try :
-				stats = subprocess.Popen( ( "ps -Ao pid,ppid,pgid,sess,pcpu,rss" ).split( " " ), stdout=subprocess.PIPE, stderr=subprocess.PIPE ).communicate()[0].split()
-				for i in range( 0, len(stats), 6 ) :
-					if str(pid) in stats[i:i+4] :
-						pcpu += float(stats[i+4])
-						rss += float(stats[i+5])
+				stats = _processGroupStatistics( pids )
 			except :
 				return {}
 
-			return {
-				"pid" : pid,
-				"pcpu" : pcpu,
-				"rss" : rss,
-			}
+			result = { "pid" : pids[0] }
+			for groupStats in stats.values() :
+				for key, value in groupStats.items() :
+					result[key] = result.get( key, 0 ) + value
+
+			return result
+
+		## Returns a list of dictionaries, one per batch which has been
+		# launched, each containing the "nodeName", "frames", "startTime"
+		# and "endTime" of the batch, along with "samples" of its resource
+		# usage taken periodically while it ran. Each sample is a dictionary
+		# containing the "time" at which it was taken, along with the same
+		# "pcpu", "rss", "readBytes" and "writeBytes" entries provided by
+		# `statistics()`.
+		def resourceTimeline( self ) :
+
+			with self.__timelinesLock :
+				timelines = [ dict( t, samples = list( t["samples"] ) ) for t in self.__timelines.values() ]
+
+			return sorted( timelines, key = lambda t : t["startTime"] )
+
+		## Used by the JobPool to find the process groups
+		# for which statistics should be gathered.
+		def _pids( self ) :
+
+			return [
+				batch.blindData()["pid"].value
+				for batch in self.__runningBatches()
+				if "pid" in batch.blindData().keys()
+			]
+
+		## Called periodically by the JobPool, with statistics
+		# gathered for all the process groups returned by `_pids()`.
+		def _recordStatistics( self, time, statistics ) :
+
+			for batch in self.__runningBatches() :
+				pid = batch.blindData().get( "pid" )
+				if pid is None or pid.value not in statistics :
+					continue
+				sample = dict( statistics[pid.value] )
+				sample["time"] = time
+				with self.__timelinesLock :
+					if batch in self.__timelines :
+						self.__timelines[batch]["samples"].append( sample )
 
 		def messageHandler( self ) :
 
@@ -169,6 +215,8 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 
 			if not self.failed() :
 				self.__killBatchWalk( self.__batch )
+				# Wake the background dispatch so it can respond.
+				self.__events.put( None )
 
 		def killed( self ) :
 
@@ -234,17 +282,120 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 			if self.__getStatus( batch ) == LocalDispatcher.Job.Status.Complete :
 				return True
 
-			for upstreamBatch in batch.preTasks() :
-				if not self.__doBackgroundDispatch( upstreamBatch ) :
+			# Batches are launched in the same order as a depth-first
+			# serial execution would use, but any batch whose preTasks
+			# have all completed may run alongside the others, up to
+			# the `maxConcurrentBatches` limit.
+			pending = self.__scheduleWalk( batch, [], set() )
+			running = {}
+
+			# When the dispatcher is using task timings, we favour
+			# the batches with the longest critical path whenever
+			# several are ready to run. The sort is stable, so the
+			# depth-first order is preserved otherwise.
+			pending.sort(
+				key = lambda b : -b.blindData().get( "dispatcher:criticalPath", IECore.FloatData( 0 ) ).value
+			)
+
+			try :
+				return self.__scheduleBatches( batch, pending, running )
+			finally :
+				for worker in self.__workers :
+					worker.stop()
+				del self.__workers[:]
+				del self.__idleWorkers[:]
+
+		def __scheduleBatches( self, batch, pending, running ) :
+
+			while True :
+
+				if batch.blindData().get( "killed" ) :
+					self.__killRunning( running )
+					self.__reportKilled( batch )
 					return False
 
-			if batch.blindData().get( "killed" ) :
-				self.__reportKilled( batch )
-				return False
+				for pendingBatch in list( pending ) :
+					if len( running ) >= self.__maxConcurrentBatches :
+						break
+					if any(
+						self.__getStatus( b ) != LocalDispatcher.Job.Status.Complete
+						for b in pendingBatch.preTasks()
+					) :
+						continue
+					pending.remove( pendingBatch )
+					process = self.__launchBatch( pendingBatch )
+					if process is not None :
+						running[pendingBatch] = process
+						thread = threading.Thread( target = self.__waitForBatch, args = ( pendingBatch, process ) )
+						thread.daemon = True
+						thread.start()
+
+				if not running :
+					break
+
+				# Block until a batch finishes or we are killed.
+				finishedBatch = self.__events.get()
+				if finishedBatch is None :
+					continue
+
+				process = running.pop( finishedBatch )
+				self.__setEndTime( finishedBatch )
+
+				if process.returncode :
+					# Serial execution would have stopped at the first
+					# failure, so we stop everything else too.
+					self.__killRunning( running )
+					self.__reportFailed( finishedBatch )
+					return False
 
-			if not batch.plug() :
-				self.__reportCompleted( batch )
-				return True
+				self.__setStatus( finishedBatch, LocalDispatcher.Job.Status.Complete )
+				if isinstance( process, _Worker ) :
+					self.__idleWorkers.append( process )
+
+			self.__reportCompleted( batch )
+			return True
+
+		def __killRunning( self, running ) :
+
+			for runningBatch, process in running.items() :
+				os.killpg( process.pid, signal.SIGTERM )
+				self.__setStatus( runningBatch, LocalDispatcher.Job.Status.Killed )
+				self.__setEndTime( runningBatch )
+
+		def __setEndTime( self, batch ) :
+
+			with self.__timelinesLock :
+				if batch in self.__timelines :
+					self.__timelines[batch]["endTime"] = time.time()
+
+		def __waitForBatch( self, batch, process ) :
+
+			process.wait()
+			self.__events.put( batch )
+
+		def __scheduleWalk( self, batch, schedule, visited ) :
+
+			if batch in visited :
+				return schedule
+
+			visited.add( batch )
+
+			if self.__getStatus( batch ) == LocalDispatcher.Job.Status.Complete :
+				return schedule
+
+			for upstreamBatch in batch.preTasks() :
+				self.__scheduleWalk( upstreamBatch, schedule, visited )
+
+			if batch.plug() is not None :
+				schedule.append( batch )
+
+			return schedule
+
+		## Launches a `gaffer execute` process for the batch, or submits the
+		# batch to a persistent worker, returning the process or worker.
+		# Returns None for batches which have no work to do, in which case
+		# they are marked as complete immediately.
+		def __launchBatch( self, batch ) :
 
 			if len( batch.frames() ) == 0 :
 				# This case occurs for nodes like TaskList and TaskContextProcessors,
@@ -254,20 +405,16 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 				# provide progress feedback to the user.
 				self.__setStatus( batch, LocalDispatcher.Job.Status.Complete )
 				IECore.msg( IECore.MessageHandler.Level.Info, self.__messageTitle, "Finished " + batch.blindData()["nodeName"].value )
-				return True
+				return None
 
 			taskContext = batch.context()
 			frames = str( IECore.frameListFromList( [ int(x) for x in batch.frames() ] ) )
 
-			args = [
+			args = shlex.split( self.__environmentCommand ) + [
 				"gaffer", "execute",
 				"-script", self.__scriptFile,
-				"-nodes", batch.blindData()["nodeName"].value,
-				"-frames", frames,
 			]
 
-			args = shlex.split( self.__environmentCommand ) + args
-
 			if self.__ignoreScriptLoadErrors :
 				args.append( "-ignoreScriptLoadErrors" )
 
@@ -276,30 +423,48 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 				if entry not in self.__context.keys() or taskContext[entry] != self.__context[entry] :
 					contextArgs.extend( [ "-" + entry, IECore.repr( taskContext[entry] ) ] )
 
-			if contextArgs :
-				args.extend( [ "-context" ] + contextArgs )
-
 			self.__setStatus( batch, LocalDispatcher.Job.Status.Running )
-			IECore.msg( IECore.MessageHandler.Level.Info, self.__messageTitle, " ".join( args ) )
-			process = subprocess.Popen( args, start_new_session=True )
-			batch.blindData()["pid"] = IECore.IntData( process.pid )
 
-			while process.poll() is None :
+			if self.__persistentWorkers :
 
-				if batch.blindData().get( "killed" ) :
-					os.killpg( process.pid, signal.SIGTERM )
-					self.__reportKilled( batch )
-					return False
+				if self.__idleWorkers :
+					process = self.__idleWorkers.pop()
+				else :
+					args.append( "-worker" )
+					IECore.msg( IECore.MessageHandler.Level.Info, self.__messageTitle, " ".join( args ) )
+					process = _Worker( args )
+					self.__workers.append( process )
 
-				time.sleep( 0.01 )
+				IECore.msg(
+					IECore.MessageHandler.Level.Info, self.__messageTitle,
+					"Worker %d : executing %s on frames %s" % ( process.pid, batch.blindData()["nodeName"].value, frames )
+				)
+				process.submit( batch.blindData()["nodeName"].value, frames, contextArgs )
 
-			if process.returncode :
-				self.__reportFailed( batch )
-				return False
+			else :
 
-			self.__setStatus( batch, LocalDispatcher.Job.Status.Complete )
+				args.extend( [
+					"-nodes", batch.blindData()["nodeName"].value,
+					"-frames", frames,
+				] )
 
-			return True
+				if contextArgs :
+					args.extend( [ "-context" ] + contextArgs )
+
+				IECore.msg( IECore.MessageHandler.Level.Info, self.__messageTitle, " ".join( args ) )
+				process = subprocess.Popen( args, start_new_session=True )
+
+			batch.blindData()["pid"] = IECore.IntData( process.pid )
+			with self.__timelinesLock :
+				self.__timelines[batch] = {
+					"nodeName" : batch.blindData()["nodeName"].value,
+					"frames" : frames,
+					"startTime" : time.time(),
+					"endTime" : None,
+					"samples" : [],
+				}
+
+			return process
 
 		def __getStatus( self, batch ) :
 
@@ -330,26 +495,29 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 
 		def __currentBatch( self ) :
 
-			## \todo Consider just storing the current batch, rather
-			# than searching each time it is requested.
-			return self.__currentBatchWalk( self.__batch, set() )
+			runningBatches = self.__runningBatches()
+			return runningBatches[0] if runningBatches else None
 
-		def __currentBatchWalk( self, batch, visited ) :
+		def __runningBatches( self ) :
+
+			## \todo Consider just storing the running batches, rather
+			# than searching each time they are requested.
+			return self.__runningBatchesWalk( self.__batch, [], set() )
+
+		def __runningBatchesWalk( self, batch, result, visited ) :
 
 			if batch in visited :
-				return None
+				return result
 
 			visited.add( batch )
 
 			if self.__getStatus( batch ) == LocalDispatcher.Job.Status.Running :
-				return batch
+				result.append( batch )
 
 			for upstreamBatch in batch.preTasks() :
-				currentBatch = self.__currentBatchWalk( upstreamBatch, visited )
-				if currentBatch is not None :
-					return currentBatch
+				self.__runningBatchesWalk( upstreamBatch, result, visited )
 
-			return None
+			return result
 
 		def __initBatchWalk( self, batch ) :
 
@@ -373,6 +541,8 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 
 			self.__jobs = []
 			self.__failedJobs = []
+			self.__jobsChanged = threading.Condition()
+			self.__monitorThread = None
 			self.__jobAddedSignal = Gaffer.Signal1()
 			self.__jobRemovedSignal = Gaffer.Signal1()
 			self.__jobFailedSignal = Gaffer.Signal1()
@@ -387,8 +557,9 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 
 		def waitForAll( self ) :
 
-			while len(self.__jobs) :
-				time.sleep( 0.2 )
+			with self.__jobsChanged :
+				while len(self.__jobs) :
+					self.__jobsChanged.wait()
 
 		def jobAddedSignal( self ) :
 
@@ -406,13 +577,25 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 
 			assert( isinstance( job, LocalDispatcher.Job ) )
 
-			self.__jobs.append( job )
+			with self.__jobsChanged :
+				self.__jobs.append( job )
+				if self.__monitorThread is None :
+					self.__monitorThread = threading.Thread( target = self.__monitor )
+					self.__monitorThread.daemon = True
+					self.__monitorThread.start()
+
 			self.jobAddedSignal()( job )
 
 		def _remove( self, job, force = False ) :
 
-			if job in self.__jobs :
-				self.__jobs.remove( job )
+			removed = False
+			with self.__jobsChanged :
+				if job in self.__jobs :
+					self.__jobs.remove( job )
+					self.__jobsChanged.notify_all()
+					removed = True
+
+			if removed :
 				self.jobRemovedSignal()( job )
 
 			if force and job in self.__failedJobs :
@@ -426,6 +609,38 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 				self.jobFailedSignal()( job )
 				self._remove( job )
 
+		## Samples the resource usage of all running jobs periodically,
+		# gathering statistics for all of them with a single pass over
+		# the process table. Exits when there are no more jobs, and is
+		# restarted by `_append()` as necessary.
+		def __monitor( self ) :
+
+			while True :
+
+				with self.__jobsChanged :
+					jobs = list( self.__jobs )
+					if not jobs :
+						self.__monitorThread = None
+						return
+
+				pids = []
+				for job in jobs :
+					pids.extend( job._pids() )
+
+				try :
+					statistics = _processGroupStatistics( pids ) if pids else {}
+				except :
+					statistics = {}
+
+				sampleTime = time.time()
+				for job in jobs :
+					job._recordStatistics( sampleTime, statistics )
+
+				time.sleep( LocalDispatcher.JobPool._monitorInterval )
+
+		## Interval in seconds between samples of job statistics.
+		_monitorInterval = 1.0
+
 	__jobPool = JobPool()
 
 	@staticmethod
@@ -451,6 +666,130 @@ class LocalDispatcher( GafferDispatch.Dispatcher ) :
 
 		job.execute( background = self["executeInBackground"].getValue() )
 
+## A long-lived `gaffer execute -worker` process, which loads the
+# job's script once and then executes batches submitted to it via
+# stdin. Provides the same `pid`, `wait()` and `returncode` interface
+# as the Popen objects used to execute individual batches, so the two
+# can be scheduled interchangeably.
+class _Worker( object ) :
+
+	def __init__( self, args ) :
+
+		self.__process = subprocess.Popen(
+			args,
+			stdin = subprocess.PIPE, stdout = subprocess.PIPE,
+			start_new_session = True
+		)
+
+		self.pid = self.__process.pid
+		self.returncode = None
+
+	def submit( self, nodeName, frames, contextArgs ) :
+
+		self.returncode = None
+		self.__process.stdin.write(
+			repr( { "nodes" : [ nodeName ], "frames" : frames, "context" : contextArgs } ) + "\n"
+		)
+		self.__process.stdin.flush()
+
+	## Blocks until the current request has completed,
+	# returning its status.
+	def wait( self ) :
+
+		line = self.__process.stdout.readline()
+		if line.strip() :
+			self.returncode = int( line )
+		else :
+			# The worker died rather than reporting a result.
+			self.__process.wait()
+			self.returncode = self.__process.returncode or 1
+
+		return self.returncode
+
+	## Closes the worker's input, causing it to exit once any
+	# current request has completed.
+	def stop( self ) :
+
+		try :
+			self.__process.stdin.close()
+		except IOError :
+			pass
+
+		self.__process.wait()
+
+## Returns a dictionary mapping from process group id to the summed
+# "pcpu", "rss" (in KB), "readBytes" and "writeBytes" statistics of all
+# the processes in the group or session. On Linux these are gathered in
+# bulk from `/proc`, and elsewhere we fall back to calling `ps`, which
+# doesn't provide IO statistics.
+def _processGroupStatistics( pgids ) :
+
+	pgids = set( pgids )
+	if os.path.isdir( "/proc" ) :
+		return _procStatistics( pgids )
+
+	result = {}
+	stats = subprocess.Popen( ( "ps -Ao pid,ppid,pgid,sess,pcpu,rss" ).split( " " ), stdout=subprocess.PIPE, stderr=subprocess.PIPE ).communicate()[0].split()
+	for i in range( 0, len(stats), 6 ) :
+		for pgid in [ int( x ) for x in stats[i:i+4] if x.isdigit() and int( x ) in pgids ][:1] :
+			groupStats = result.setdefault( pgid, { "pcpu" : 0.0, "rss" : 0, "readBytes" : 0, "writeBytes" : 0 } )
+			groupStats["pcpu"] += float( stats[i+4] )
+			groupStats["rss"] += int( stats[i+5] )
+
+	return result
+
+def _procStatistics( pgids ) :
+
+	result = {}
+
+	clockTicks = float( os.sysconf( "SC_CLK_TCK" ) )
+	pageSize = os.sysconf( "SC_PAGE_SIZE" ) // 1024
+	with open( "/proc/uptime" ) as f :
+		uptime = float( f.read().split()[0] )
+
+	for pid in os.listdir( "/proc" ) :
+
+		if not pid.isdigit() :
+			continue
+
+		try :
+			with open( "/proc/%s/stat" % pid ) as f :
+				stat = f.read()
+		except IOError :
+			# Process has exited since we listed it.
+			continue
+
+		# The command name is in parentheses and may contain spaces,
+		# so we split only the fields after it. This makes `fields[0]`
+		# the third field documented in `man proc`.
+		fields = stat[stat.rfind( ")" ) + 2:].split()
+		pgid, session = int( fields[2] ), int( fields[3] )
+		pgid = pgid if pgid in pgids else session
+		if pgid not in pgids :
+			continue
+
+		groupStats = result.setdefault( pgid, { "pcpu" : 0.0, "rss" : 0, "readBytes" : 0, "writeBytes" : 0 } )
+
+		# Like `ps`, we report CPU usage averaged over the lifetime of the process.
+		cpuTime = ( int( fields[11] ) + int( fields[12] ) ) / clockTicks
+		elapsedTime = uptime - int( fields[19] ) / clockTicks
+		if elapsedTime > 0 :
+			groupStats["pcpu"] += 100.0 * cpuTime / elapsedTime
+		groupStats["rss"] += int( fields[21] ) * pageSize
+
+		try :
+			with open( "/proc/%s/io" % pid ) as f :
+				for line in f :
+					name, value = line.split( ":" )
+					if name == "read_bytes" :
+						groupStats["readBytes"] += int( value )
+					elif name == "write_bytes" :
+						groupStats["writeBytes"] += int( value )
+		except IOError :
+			pass
+
+	return result
+
 IECore.registerRunTimeTyped( LocalDispatcher, typeName = "GafferDispatch::LocalDispatcher" )
 IECore.registerRunTimeTyped( LocalDispatcher.JobPool, typeName = "GafferDispatch::LocalDispatcher::JobPool" )
 
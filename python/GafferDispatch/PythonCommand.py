@@ -62,7 +62,7 @@ class PythonCommand( GafferDispatch.TaskNode ) :
 		command = self["command"].getValue()
 		h.append( command )
 
-		parser = _Parser( command )
+		parser, code = Gaffer.ParseCache.get( command, _Parser )
 		for name in parser.contextReads :
 			value = context.get( name )
 			if isinstance( value, IECore.Object ) :
@@ -80,7 +80,7 @@ class PythonCommand( GafferDispatch.TaskNode ) :
 	def execute( self ) :
 
 		executionDict = self.__executionDict()
-		exec( self["command"].getValue(), executionDict, executionDict )
+		exec( self.__code(), executionDict, executionDict )
 
 	def executeSequence( self, frames ) :
 
@@ -94,12 +94,16 @@ class PythonCommand( GafferDispatch.TaskNode ) :
 			return
 
 		executionDict = self.__executionDict( frames )
-		exec( self["command"].getValue(), executionDict, executionDict )
+		exec( self.__code(), executionDict, executionDict )
 
 	def requiresSequenceExecution( self ) :
 
 		return self["sequence"].getValue()
 
+	def __code( self ) :
+
+		return Gaffer.ParseCache.get( self["command"].getValue(), _Parser )[1]
+
 	def __executionDict( self, frames = None ) :
 
 		result = {
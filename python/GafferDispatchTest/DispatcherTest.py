@@ -1609,5 +1609,320 @@ class DispatcherTest( GafferTest.TestCase ) :
 			self.assertNotIn( "frame", batch.context() )
 			self.assertEqual( batch.context(), batches[0].context() )
 
+	def testSkipUpToDateTasks( self ) :
+
+		log = []
+		s = Gaffer.ScriptNode()
+		s["n1"] = GafferDispatchTest.LoggingTaskNode( log = log )
+		s["n1"]["value"] = Gaffer.IntPlug()
+		s["n2"] = GafferDispatchTest.LoggingTaskNode( log = log )
+		s["n2"]["value"] = Gaffer.IntPlug()
+		s["n2"]["preTasks"][0].setInput( s["n1"]["task"] )
+
+		# Only tasks with known outputs can be skipped, so we give
+		# the nodes output files. LoggingTaskNode doesn't actually
+		# write to them, which is fine since they don't change.
+		for n in ( "n1", "n2" ) :
+			fileName = os.path.join( self.temporaryDirectory(), n + ".txt" )
+			open( fileName, "w" ).close()
+			s[n]["fileName"] = Gaffer.StringPlug( defaultValue = fileName )
+
+		dispatcher = GafferDispatch.Dispatcher.create( "testDispatcher" )
+		dispatcher["framesMode"].setValue( dispatcher.FramesMode.CustomRange )
+		dispatcher["frameRange"].setValue( "1-3" )
+		dispatcher["skipUpToDateTasks"].setValue( True )
+
+		dispatcher.dispatch( [ s["n2"] ] )
+		self.assertEqual( sorted( l.node.getName() for l in log ), [ "n1" ] * 3 + [ "n2" ] * 3 )
+		self.assertTrue( os.path.isdir( self.temporaryDirectory() + "/taskManifest" ) )
+
+		# Nothing has changed, so nothing should be executed.
+
+		del log[:]
+		dispatcher.dispatch( [ s["n2"] ] )
+		self.assertEqual( log, [] )
+
+		# Changing the downstream node should only execute it.
+
+		s["n2"]["value"].setValue( 1 )
+		dispatcher.dispatch( [ s["n2"] ] )
+		self.assertEqual( [ l.node.getName() for l in log ], [ "n2" ] * 3 )
+
+		# Changing the upstream node must execute both.
+
+		del log[:]
+		s["n1"]["value"].setValue( 1 )
+		dispatcher.dispatch( [ s["n2"] ] )
+		self.assertEqual( sorted( l.node.getName() for l in log ), [ "n1" ] * 3 + [ "n2" ] * 3 )
+
+		# But nothing is skipped if we turn skipping off.
+
+		del log[:]
+		dispatcher["skipUpToDateTasks"].setValue( False )
+		dispatcher.dispatch( [ s["n2"] ] )
+		self.assertEqual( len( log ), 6 )
+
+	def testSkipUpToDateTasksNeverSkipsTasksWithoutOutputs( self ) :
+
+		log = []
+		s = Gaffer.ScriptNode()
+		s["n"] = GafferDispatchTest.LoggingTaskNode( log = log )
+
+		dispatcher = GafferDispatch.Dispatcher.create( "testDispatcher" )
+		dispatcher["skipUpToDateTasks"].setValue( True )
+		dispatcher["taskManifestDirectory"].setValue( self.temporaryDirectory() + "/manifest" )
+
+		for i in range( 0, 3 ) :
+			del log[:]
+			dispatcher.dispatch( [ s["n"] ] )
+			self.assertEqual( len( log ), 1 )
+
+		self.assertEqual( os.listdir( self.temporaryDirectory() + "/manifest" ), [] )
+
+	def testRecordingFailuresDontFailTasks( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["w"] = GafferDispatchTest.TextWriter()
+		s["w"]["fileName"].setValue( self.temporaryDirectory() + "/test.txt" )
+		s["w"]["text"].setValue( "test" )
+
+		# The manifest can't be written into a directory
+		# which doesn't exist, but that mustn't fail a task
+		# which has otherwise executed successfully.
+
+		c = Gaffer.Context( s.context() )
+		c["dispatcher:taskManifestDirectory"] = self.temporaryDirectory() + "/doesNotExist"
+		c["dispatcher:taskTimingsDirectory"] = self.temporaryDirectory() + "/doesNotExist"
+
+		with c, IECore.CapturingMessageHandler() as mh :
+			s["w"]["task"].execute()
+			s["w"]["task"].executeSequence( [ 1, 2 ] )
+
+		self.assertEqual( open( self.temporaryDirectory() + "/test.txt" ).read(), "test" )
+		self.assertTrue( len( mh.messages ) )
+		for m in mh.messages :
+			self.assertEqual( m.level, IECore.Msg.Level.Warning )
+			self.assertTrue( "Failed to record execution" in m.message )
+
+	def testSkipUpToDateTasksChecksOutputs( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["w"] = GafferDispatchTest.TextWriter()
+		s["w"]["fileName"].setValue( self.temporaryDirectory() + "/test.####.txt" )
+		s["w"]["text"].setValue( "test" )
+
+		dispatcher = GafferDispatch.Dispatcher.create( "testDispatcher" )
+		dispatcher["framesMode"].setValue( dispatcher.FramesMode.CustomRange )
+		dispatcher["frameRange"].setValue( "1-2" )
+		dispatcher["skipUpToDateTasks"].setValue( True )
+		dispatcher["taskManifestDirectory"].setValue( self.temporaryDirectory() + "/manifest" )
+
+		dispatcher.dispatch( [ s["w"] ] )
+
+		fileNames = [ self.temporaryDirectory() + "/test.%04d.txt" % f for f in ( 1, 2 ) ]
+		for fileName in fileNames :
+			self.assertEqual( open( fileName ).read(), "test" )
+		self.assertEqual( len( os.listdir( self.temporaryDirectory() + "/manifest" ) ), 2 )
+
+		# Removing an output must cause that frame to be
+		# executed again, but not the other.
+
+		os.remove( fileNames[0] )
+		mTime = os.stat( fileNames[1] ).st_mtime
+		time.sleep( 1 )
+
+		dispatcher.dispatch( [ s["w"] ] )
+		self.assertEqual( open( fileNames[0] ).read(), "test" )
+		self.assertEqual( os.stat( fileNames[1] ).st_mtime, mTime )
+
+	def testDispatchStatistics( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["n1"] = GafferDispatchTest.LoggingTaskNode()
+		s["n1"]["frame"] = Gaffer.StringPlug( defaultValue = "${frame}" )
+		s["n2"] = GafferDispatchTest.LoggingTaskNode()
+		s["n2"]["frame"] = Gaffer.StringPlug( defaultValue = "${frame}" )
+		s["n2"]["preTasks"][0].setInput( s["n1"]["task"] )
+
+		dispatcher = GafferDispatch.Dispatcher.create( "testDispatcher" )
+		dispatcher["framesMode"].setValue( dispatcher.FramesMode.CustomRange )
+		dispatcher["frameRange"].setValue( "1-10" )
+
+		statistics = []
+		def postDispatch( dispatcher, nodes, success ) :
+			statistics.append( dispatcher.dispatchStatistics() )
+
+		c = GafferDispatch.Dispatcher.postDispatchSignal().connect( postDispatch )
+
+		dispatcher.dispatch( [ s["n2"] ] )
+		self.assertEqual( len( statistics ), 1 )
+		self.assertEqual( statistics[0]["numTasks"].value, 20 )
+		self.assertEqual( statistics[0]["numBatches"].value, 20 )
+		for name in ( "taskEvaluationTime", "batchingTime", "immediateExecutionTime", "doDispatchTime" ) :
+			self.assertGreaterEqual( statistics[0][name].value, 0 )
+
+		s["n1"]["dispatcher"]["batchSize"].setValue( 5 )
+		dispatcher.dispatch( [ s["n2"] ] )
+		self.assertEqual( statistics[1]["numTasks"].value, 20 )
+		self.assertEqual( statistics[1]["numBatches"].value, 12 )
+
+	def __writeTaskTimings( self, directory, node, durations ) :
+
+		if not os.path.exists( directory ) :
+			os.makedirs( directory )
+
+		fileName = os.path.join( directory, IECore.MurmurHash().append( node.relativeName( node.scriptNode() ) ).toString() )
+		with open( fileName, "w" ) as f :
+			for frame, seconds in durations.items() :
+				with Gaffer.Context( node.scriptNode().context() ) as c :
+					c.setFrame( frame )
+					f.write( "%s %f\n" % ( node["task"].hash().toString(), seconds ) )
+
+	def testTaskTimingsAreRecorded( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["n"] = GafferDispatchTest.LoggingTaskNode()
+		s["n"]["frame"] = Gaffer.StringPlug( defaultValue = "${frame}" )
+
+		dispatcher = GafferDispatch.Dispatcher.create( "testDispatcher" )
+		dispatcher["framesMode"].setValue( dispatcher.FramesMode.CustomRange )
+		dispatcher["frameRange"].setValue( "1-4" )
+		dispatcher["useTaskTimings"].setValue( True )
+		dispatcher["taskTimingsDirectory"].setValue( self.temporaryDirectory() + "/timings" )
+
+		dispatcher.dispatch( [ s["n"] ] )
+
+		fileNames = os.listdir( self.temporaryDirectory() + "/timings" )
+		self.assertEqual( len( fileNames ), 1 )
+
+		lines = open( os.path.join( self.temporaryDirectory(), "timings", fileNames[0] ) ).readlines()
+		self.assertEqual( len( lines ), 4 )
+		hashes = set()
+		for line in lines :
+			h, seconds = line.split()
+			hashes.add( h )
+			self.assertGreaterEqual( float( seconds ), 0 )
+		self.assertEqual( len( hashes ), 4 )
+
+	def testTaskTimingsAreCompacted( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["n"] = GafferDispatchTest.LoggingTaskNode()
+		s["n"]["frame"] = Gaffer.StringPlug( defaultValue = "${frame}" )
+
+		# Simulate a long history of executions of the same task.
+
+		timingsDirectory = self.temporaryDirectory() + "/timings"
+		self.__writeTaskTimings( timingsDirectory, s["n"], { 1 : 10 } )
+		fileName = os.path.join( timingsDirectory, os.listdir( timingsDirectory )[0] )
+		line = open( fileName ).read()
+		with open( fileName, "w" ) as f :
+			f.write( line * 10000 )
+
+		dispatcher = GafferDispatch.Dispatcher.create( "testDispatcher" )
+		dispatcher["framesMode"].setValue( dispatcher.FramesMode.CustomRange )
+		dispatcher["frameRange"].setValue( "1" )
+		dispatcher["useTaskTimings"].setValue( True )
+		dispatcher["taskTimingsDirectory"].setValue( timingsDirectory )
+		dispatcher.dispatch( [ s["n"] ] )
+
+		# Only the latest entry should remain.
+
+		lines = open( fileName ).readlines()
+		self.assertEqual( len( lines ), 1 )
+		self.assertEqual( lines[0].split()[0], line.split()[0] )
+		self.assertNotEqual( lines[0], line )
+
+	def testAutomaticBatchSize( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["n"] = GafferDispatchTest.LoggingTaskNode()
+		s["n"]["frame"] = Gaffer.StringPlug( defaultValue = "${frame}" )
+		s["n"]["dispatcher"]["batchSize"].setValue( 0 )
+
+		dispatcher = self.NullDispatcher()
+		dispatcher["framesMode"].setValue( dispatcher.FramesMode.CustomRange )
+		dispatcher["frameRange"].setValue( "1-10" )
+		dispatcher["jobsDirectory"].setValue( self.temporaryDirectory() + "/jobs" )
+		dispatcher["useTaskTimings"].setValue( True )
+		dispatcher["taskTimingsDirectory"].setValue( self.temporaryDirectory() + "/timings" )
+		dispatcher["targetBatchDuration"].setValue( 30 )
+
+		# Without any timings, every task gets its own batch.
+
+		dispatcher.dispatch( [ s["n"] ] )
+		self.assertEqual( [ len( b.frames() ) for b in dispatcher.lastDispatch.preTasks() ], [ 1 ] * 10 )
+
+		# With timings, tasks are batched until they reach the
+		# target duration.
+
+		self.__writeTaskTimings(
+			self.temporaryDirectory() + "/timings", s["n"],
+			{ f : 10 for f in range( 1, 11 ) }
+		)
+
+		dispatcher.dispatch( [ s["n"] ] )
+		batches = dispatcher.lastDispatch.preTasks()
+		self.assertEqual( [ len( b.frames() ) for b in batches ], [ 3, 3, 3, 1 ] )
+		self.assertEqual( [ b.blindData()["dispatcher:estimatedDuration"].value for b in batches ], [ 30, 30, 30, 10 ] )
+
+	def testCriticalPathOrdering( self ) :
+
+		log = []
+		s = Gaffer.ScriptNode()
+		s["short"] = GafferDispatchTest.LoggingTaskNode( log = log )
+		s["long1"] = GafferDispatchTest.LoggingTaskNode( log = log )
+		s["long2"] = GafferDispatchTest.LoggingTaskNode( log = log )
+		s["long2"]["preTasks"][0].setInput( s["long1"]["task"] )
+
+		dispatcher = GafferDispatch.Dispatcher.create( "testDispatcher" )
+		dispatcher["useTaskTimings"].setValue( True )
+		dispatcher["taskTimingsDirectory"].setValue( self.temporaryDirectory() + "/timings" )
+
+		# Without timings, tasks are dispatched in the order given.
+
+		dispatcher.dispatch( [ s["short"], s["long2"] ] )
+		self.assertEqual( [ l.node for l in log ], [ s["short"], s["long1"], s["long2"] ] )
+
+		# With timings, the longest chain of tasks is dispatched first,
+		# even though neither of its tasks is the most expensive.
+
+		frame = s.context().getFrame()
+		self.__writeTaskTimings( self.temporaryDirectory() + "/timings", s["short"], { frame : 15 } )
+		self.__writeTaskTimings( self.temporaryDirectory() + "/timings", s["long1"], { frame : 10 } )
+		self.__writeTaskTimings( self.temporaryDirectory() + "/timings", s["long2"], { frame : 10 } )
+
+		del log[:]
+		dispatcher.dispatch( [ s["short"], s["long2"] ] )
+		self.assertEqual( [ l.node for l in log ], [ s["long1"], s["long2"], s["short"] ] )
+
+	def testSharedPreTasksAreBatchedOnce( self ) :
+
+		# Many tasks sharing the same preTask must all be connected
+		# to a single batch for it, even though the preTask graph is
+		# now evaluated in parallel.
+
+		log = []
+		s = Gaffer.ScriptNode()
+		s["shared"] = GafferDispatchTest.LoggingTaskNode( log = log )
+
+		s["taskList"] = GafferDispatch.TaskList()
+		for i in range( 0, 50 ) :
+			s["n%d" % i] = GafferDispatchTest.LoggingTaskNode( log = log )
+			s["n%d" % i]["index"] = Gaffer.IntPlug( defaultValue = i )
+			s["n%d" % i]["preTasks"][0].setInput( s["shared"]["task"] )
+			s["taskList"]["preTasks"][i].setInput( s["n%d" % i]["task"] )
+
+		dispatcher = self.NullDispatcher()
+		dispatcher.dispatch( [ s["taskList"] ] )
+
+		taskListBatch = dispatcher.lastDispatch.preTasks()[0]
+		self.assertEqual( len( taskListBatch.preTasks() ), 50 )
+		sharedBatches = [ b.preTasks()[0] for b in taskListBatch.preTasks() ]
+		sharedBatches[0].blindData()["testTag"] = IECore.BoolData( True )
+		for batch in sharedBatches :
+			self.assertEqual( batch.plug(), s["shared"]["task"] )
+			self.assertTrue( batch.blindData()["testTag"].value )
+
 if __name__ == "__main__":
 	unittest.main()
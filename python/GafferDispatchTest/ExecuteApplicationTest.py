@@ -46,6 +46,7 @@ import IECore
 
 import Gaffer
 import GafferTest
+import GafferDispatch
 import GafferDispatchTest
 
 class ExecuteApplicationTest( GafferTest.TestCase ) :
@@ -154,6 +155,90 @@ class ExecuteApplicationTest( GafferTest.TestCase ) :
 		self.failUnless( string.isInstanceOf( IECore.StringData ) )
 		self.assertEqual( string.value, "1 2" )
 
+	def testWorker( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["string"] = GafferTest.CachingTestNode()
+		s["e"] = Gaffer.Expression()
+		s["e"].setExpression( "parent['string']['in'] = '{} {}'.format( context.getFrame(), context.get( 'value', 0 ) )" )
+		s["write"] = Gaffer.ObjectWriter()
+		s["write"]["in"].setInput( s["string"]["out"] )
+		s["write"]["fileName"].setValue( self.__outputFileSeq.fileName )
+
+		s["fileName"].setValue( self.__scriptFileName )
+		s.save()
+
+		p = subprocess.Popen(
+			"gaffer execute " + self.__scriptFileName + " -worker",
+			shell=True,
+			stdin = subprocess.PIPE,
+			stdout = subprocess.PIPE,
+			stderr = subprocess.PIPE,
+		)
+
+		def request( nodes, frames, context ) :
+			p.stdin.write( repr( { "nodes" : nodes, "frames" : frames, "context" : context } ) + "\n" )
+			p.stdin.flush()
+			return int( p.stdout.readline() )
+
+		self.assertEqual( request( [ "write" ], "1-2", [ "-value", "1" ] ), 0 )
+		self.assertEqual( request( [ "write" ], "3", [] ), 0 )
+		self.assertEqual( request( [ "doesNotExist" ], "1", [] ), 1 )
+
+		p.stdin.close()
+		p.wait()
+		self.failIf( p.returncode )
+
+		for frame, value in [ ( 1, 1 ), ( 2, 1 ), ( 3, 0 ) ] :
+			string = IECore.ObjectReader( self.__outputFileSeq.fileNameForFrame( frame ) ).read()
+			self.assertEqual( string.value, "%d %d" % ( frame, value ) )
+
+	def testParallelFrames( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["string"] = GafferTest.CachingTestNode()
+		s["e"] = Gaffer.Expression()
+		s["e"].setExpression( "parent['string']['in'] = '{} {}'.format( context.getFrame(), context.get( 'value', 0 ) )" )
+		s["write"] = Gaffer.ObjectWriter()
+		s["write"]["in"].setInput( s["string"]["out"] )
+		s["write"]["fileName"].setValue( self.__outputFileSeq.fileName )
+
+		s["fileName"].setValue( self.__scriptFileName )
+		s.save()
+
+		p = subprocess.Popen(
+			"gaffer execute " + self.__scriptFileName + " -frames 1-20 -parallelFrames 4 -context -value 2",
+			shell=True,
+			stderr = subprocess.PIPE,
+		)
+		p.wait()
+
+		error = "".join( p.stderr.readlines() )
+		self.assertEqual( error, "" )
+		self.failIf( p.returncode )
+		for frame in range( 1, 21 ) :
+			string = IECore.ObjectReader( self.__outputFileSeq.fileNameForFrame( frame ) ).read()
+			self.assertEqual( string.value, "%d 2" % frame )
+
+	def testParallelFramesErrorReturnStatus( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["command"] = GafferDispatch.PythonCommand()
+		s["command"]["command"].setValue( "if context.getFrame() == 5 : raise RuntimeError( 'Frame 5 failed' )" )
+
+		s["fileName"].setValue( self.__scriptFileName )
+		s.save()
+
+		p = subprocess.Popen(
+			"gaffer execute " + self.__scriptFileName + " -frames 1-10 -parallelFrames 4",
+			shell=True,
+			stderr = subprocess.PIPE,
+		)
+		p.wait()
+
+		self.assertIn( "Frame 5 failed", "".join( p.stderr.readlines() ) )
+		self.failUnless( p.returncode )
+
 	def testErrorReturnStatusForBadContext( self ) :
 
 		s = Gaffer.ScriptNode()
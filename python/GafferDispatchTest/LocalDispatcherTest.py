@@ -419,6 +419,9 @@ class LocalDispatcherTest( GafferTest.TestCase ) :
 
 		dispatcher = GafferDispatch.Dispatcher.create( "LocalTest" )
 		dispatcher["executeInBackground"].setValue( True )
+		# we're checking the order in which the batches append to
+		# the file, so we mustn't run independent batches concurrently.
+		dispatcher["maxConcurrentBatches"].setValue( 1 )
 		dispatcher["framesMode"].setValue( GafferDispatch.Dispatcher.FramesMode.CustomRange )
 		frameList = IECore.FrameList.parse( "2-6x2" )
 		dispatcher["frameRange"].setValue( str(frameList) )
@@ -690,6 +693,9 @@ class LocalDispatcherTest( GafferTest.TestCase ) :
 
 		dispatcher = GafferDispatch.Dispatcher.create( "LocalTest" )
 		dispatcher["executeInBackground"].setValue( True )
+		# we're checking the order in which the batches append to
+		# the file, so we mustn't run independent batches concurrently.
+		dispatcher["maxConcurrentBatches"].setValue( 1 )
 		dispatcher["framesMode"].setValue( GafferDispatch.Dispatcher.FramesMode.CustomRange )
 		frameList = IECore.FrameList.parse( "2-6x2" )
 		dispatcher["frameRange"].setValue( str(frameList) )
@@ -825,6 +831,235 @@ class LocalDispatcherTest( GafferTest.TestCase ) :
 			"0.0 1.0 2.0"
 		)
 
+	def testMaxConcurrentBatches( self ) :
+
+		s = Gaffer.ScriptNode()
+
+		s["taskList"] = GafferDispatch.TaskList()
+		for i in range( 0, 4 ) :
+			s["sleep%d" % i] = GafferDispatch.SystemCommand()
+			s["sleep%d" % i]["command"].setValue( "sleep 1" )
+			s["taskList"]["preTasks"][i].setInput( s["sleep%d" % i]["task"] )
+
+		s["t"] = GafferDispatchTest.TextWriter()
+		s["t"]["fileName"].setValue( self.temporaryDirectory() + "/test.txt" )
+		s["t"]["text"].setValue( "done" )
+		s["t"]["preTasks"][0].setInput( s["taskList"]["task"] )
+
+		d = GafferDispatch.Dispatcher.create( "LocalTest" )
+		d["executeInBackground"].setValue( True )
+		d["maxConcurrentBatches"].setValue( 4 )
+
+		def sleepIntervals( job ) :
+
+			return [
+				( t["startTime"], t["endTime"] )
+				for t in job.resourceTimeline()
+				if t["nodeName"].startswith( "sleep" )
+			]
+
+		def overlapping( intervals ) :
+
+			intervals = sorted( intervals )
+			return any( i[0] < p[1] for p, i in zip( intervals, intervals[1:] ) )
+
+		d.dispatch( [ s["t"] ] )
+		job = d.jobPool().jobs()[-1]
+		d.jobPool().waitForAll()
+
+		self.assertEqual( open( s["t"]["fileName"].getValue() ).read(), "done" )
+		os.remove( s["t"]["fileName"].getValue() )
+
+		intervals = sleepIntervals( job )
+		self.assertEqual( len( intervals ), 4 )
+		self.assertTrue( overlapping( intervals ) )
+
+		d["maxConcurrentBatches"].setValue( 1 )
+
+		d.dispatch( [ s["t"] ] )
+		job = d.jobPool().jobs()[-1]
+		d.jobPool().waitForAll()
+
+		self.assertEqual( open( s["t"]["fileName"].getValue() ).read(), "done" )
+
+		intervals = sleepIntervals( job )
+		self.assertEqual( len( intervals ), 4 )
+		self.assertFalse( overlapping( intervals ) )
+
+	def testFailureMarksKilledSiblingBatches( self ) :
+
+		s = Gaffer.ScriptNode()
+
+		s["taskList"] = GafferDispatch.TaskList()
+		s["fail"] = GafferDispatch.SystemCommand()
+		s["fail"]["command"].setValue( "sleep 1; exit 1" )
+		s["sleep"] = GafferDispatch.SystemCommand()
+		s["sleep"]["command"].setValue( "sleep 30" )
+		s["taskList"]["preTasks"][0].setInput( s["fail"]["task"] )
+		s["taskList"]["preTasks"][1].setInput( s["sleep"]["task"] )
+
+		d = GafferDispatch.Dispatcher.create( "LocalTest" )
+		d["executeInBackground"].setValue( True )
+		d["maxConcurrentBatches"].setValue( 2 )
+
+		with IECore.CapturingMessageHandler() :
+			d.dispatch( [ s["taskList"] ] )
+			job = d.jobPool().jobs()[-1]
+			d.jobPool().waitForAll()
+
+		self.assertTrue( job.failed() )
+
+		# The sibling was killed, rather than being
+		# left to run to completion.
+		timeline = { t["nodeName"] : t for t in job.resourceTimeline() }
+		self.assertEqual( set( timeline.keys() ), { "fail", "sleep" } )
+		for t in timeline.values() :
+			self.assertIsNotNone( t["endTime"] )
+		self.assertLess( timeline["sleep"]["endTime"], timeline["sleep"]["startTime"] + 30 )
+
+	def testFailureKillsConcurrentBatches( self ) :
+
+		s = Gaffer.ScriptNode()
+
+		s["sleep"] = GafferDispatch.SystemCommand()
+		s["sleep"]["command"].setValue( "sleep 5 && touch " + self.temporaryDirectory() + "/slept" )
+
+		s["fail"] = GafferDispatchTest.TextWriter()
+		s["fail"]["fileName"].setValue( "" )
+
+		s["taskList"] = GafferDispatch.TaskList()
+		s["taskList"]["preTasks"][0].setInput( s["sleep"]["task"] )
+		s["taskList"]["preTasks"][1].setInput( s["fail"]["task"] )
+
+		d = GafferDispatch.Dispatcher.create( "LocalTest" )
+		d["executeInBackground"].setValue( True )
+		d["maxConcurrentBatches"].setValue( 2 )
+
+		numFailedJobs = len( d.jobPool().failedJobs() )
+
+		t = time.time()
+		d.dispatch( [ s["taskList"] ] )
+		d.jobPool().waitForAll()
+
+		self.assertLess( time.time() - t, 5 )
+		self.assertEqual( len( d.jobPool().failedJobs() ), numFailedJobs + 1 )
+		self.assertFalse( os.path.exists( self.temporaryDirectory() + "/slept" ) )
+
+	def testPersistentWorkers( self ) :
+
+		s = Gaffer.ScriptNode()
+
+		s["n1"] = GafferDispatchTest.TextWriter()
+		s["n1"]["fileName"].setValue( self.temporaryDirectory() + "/n1_####.txt" )
+		s["n1"]["text"].setValue( "n1 on ${frame} with ${foo}" )
+
+		s["n2"] = GafferDispatchTest.TextWriter()
+		s["n2"]["fileName"].setValue( self.temporaryDirectory() + "/n2_####.txt" )
+		s["n2"]["text"].setValue( "n2 on ${frame}" )
+		s["n2"]["preTasks"][0].setInput( s["n1"]["task"] )
+
+		d = GafferDispatch.Dispatcher.create( "LocalTest" )
+		d["executeInBackground"].setValue( True )
+		d["persistentWorkers"].setValue( True )
+		d["maxConcurrentBatches"].setValue( 2 )
+		d["framesMode"].setValue( d.FramesMode.CustomRange )
+		d["frameRange"].setValue( "1-4" )
+
+		c = Gaffer.Context( s.context() )
+		c["foo"] = "bar"
+		with c :
+			d.dispatch( [ s["n2"] ] )
+
+		d.jobPool().waitForAll()
+		self.assertEqual( len( d.jobPool().jobs() ), 0 )
+
+		for frame in range( 1, 5 ) :
+			self.assertEqual(
+				open( self.temporaryDirectory() + "/n1_%04d.txt" % frame ).read(),
+				"n1 on %d with bar" % frame
+			)
+			self.assertEqual(
+				open( self.temporaryDirectory() + "/n2_%04d.txt" % frame ).read(),
+				"n2 on %d" % frame
+			)
+
+	def testPersistentWorkerFailure( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["n1"] = GafferDispatchTest.TextWriter()
+		s["n1"]["fileName"].setValue( self.temporaryDirectory() + "/n1_####.txt" )
+		s["n1"]["text"].setValue( "n1 on ${frame}" )
+		s["n2"] = GafferDispatchTest.TextWriter()
+		s["n2"]["fileName"].setValue( "" )
+		s["n2"]["preTasks"][0].setInput( s["n1"]["task"] )
+		s["n3"] = GafferDispatchTest.TextWriter()
+		s["n3"]["fileName"].setValue( self.temporaryDirectory() + "/n3_####.txt" )
+		s["n3"]["preTasks"][0].setInput( s["n2"]["task"] )
+
+		d = GafferDispatch.Dispatcher.create( "LocalTest" )
+		d["executeInBackground"].setValue( True )
+		d["persistentWorkers"].setValue( True )
+
+		numFailedJobs = len( d.jobPool().failedJobs() )
+
+		d.dispatch( [ s["n3"] ] )
+		d.jobPool().waitForAll()
+
+		self.assertEqual( len( d.jobPool().failedJobs() ), numFailedJobs + 1 )
+		self.assertTrue( os.path.isfile( s.context().substitute( s["n1"]["fileName"].getValue() ) ) )
+		self.assertFalse( os.path.isfile( s.context().substitute( s["n3"]["fileName"].getValue() ) ) )
+
+	def testResourceTimeline( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["sleep"] = GafferDispatch.SystemCommand()
+		s["sleep"]["command"].setValue( "sleep 1" )
+
+		d = GafferDispatch.Dispatcher.create( "LocalTest" )
+		d["executeInBackground"].setValue( True )
+
+		monitorInterval = GafferDispatch.LocalDispatcher.JobPool._monitorInterval
+		GafferDispatch.LocalDispatcher.JobPool._monitorInterval = 0.1
+		try :
+			d.dispatch( [ s["sleep"] ] )
+			job = d.jobPool().jobs()[0]
+			d.jobPool().waitForAll()
+		finally :
+			GafferDispatch.LocalDispatcher.JobPool._monitorInterval = monitorInterval
+
+		timeline = job.resourceTimeline()
+		self.assertEqual( len( timeline ), 1 )
+		self.assertEqual( timeline[0]["nodeName"], "sleep" )
+		self.assertEqual( timeline[0]["frames"], "1" )
+		self.assertGreaterEqual( timeline[0]["endTime"] - timeline[0]["startTime"], 1 )
+
+		samples = timeline[0]["samples"]
+		self.assertGreater( len( samples ), 1 )
+		for sample in samples :
+			self.assertGreaterEqual( sample["time"], timeline[0]["startTime"] )
+			self.assertGreater( sample["rss"], 0 )
+			for key in ( "pcpu", "readBytes", "writeBytes" ) :
+				self.assertIn( key, sample )
+
+	def testStatistics( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["sleep"] = GafferDispatch.SystemCommand()
+		s["sleep"]["command"].setValue( "sleep 2" )
+
+		d = GafferDispatch.Dispatcher.create( "LocalTest" )
+		d["executeInBackground"].setValue( True )
+		d.dispatch( [ s["sleep"] ] )
+
+		job = d.jobPool().jobs()[0]
+		time.sleep( 1 )
+		stats = job.statistics()
+		self.assertGreater( stats["rss"], 0 )
+		self.assertIn( "pcpu", stats )
+
+		d.jobPool().waitForAll()
+		self.assertEqual( job.statistics(), {} )
+
 	def tearDown( self ) :
 
 		GafferTest.TestCase.tearDown( self )
@@ -316,5 +316,23 @@ class PythonCommandTest( GafferTest.TestCase ) :
 		c["task"].execute()
 		self.assertEqual( c.test, imath.V2i( 1, 2 ) )
 
+	def testHashUsesParseCache( self ) :
+
+		c = GafferDispatch.PythonCommand()
+		c["command"].setValue( "self.test = context.getFrame()" )
+
+		c["task"].hash()
+		misses = Gaffer.ParseCache.statistics()["misses"]
+
+		with Gaffer.Context() as context :
+			for i in range( 0, 100 ) :
+				context.setFrame( i )
+				c["task"].hash()
+
+		self.assertEqual( Gaffer.ParseCache.statistics()["misses"], misses )
+
+		c["task"].execute()
+		self.assertEqual( c.test, 1 )
+
 if __name__ == "__main__":
 	unittest.main()
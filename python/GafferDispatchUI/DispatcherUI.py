@@ -118,6 +118,74 @@ Gaffer.Metadata.registerNode(
 
 		),
 
+		"skipUpToDateTasks" : (
+
+			"description",
+			"""
+			Skips tasks which have been executed by a previous dispatch,
+			provided that nothing affecting them has changed since.
+			Executed tasks are recorded in a manifest along with the
+			files they wrote, and a task is only skipped if its hash
+			matches the one recorded, its output files are unmodified
+			and none of its preTasks need to be executed.
+			""",
+
+		),
+
+		"taskManifestDirectory" : (
+
+			"description",
+			"""
+			The directory used to store the manifest of executed tasks
+			when skipUpToDateTasks is on. If this is left empty, a
+			"taskManifest" directory within the jobsDirectory is used.
+			""",
+
+			"plugValueWidget:type", "GafferUI.FileSystemPathPlugValueWidget",
+			"path:leaf", False,
+
+		),
+
+		"useTaskTimings" : (
+
+			"description",
+			"""
+			Records the time taken to execute each task, and uses the
+			timings from previous dispatches to estimate how long each
+			batch will take. Nodes with a batchSize of 0 are then batched
+			automatically to match the targetBatchDuration, and independent
+			batches are ordered so that the longest chains of work are
+			started first.
+			""",
+
+		),
+
+		"taskTimingsDirectory" : (
+
+			"description",
+			"""
+			The directory used to store task timings when useTaskTimings
+			is on. If this is left empty, a "taskTimings" directory within
+			the jobsDirectory is used.
+			""",
+
+			"plugValueWidget:type", "GafferUI.FileSystemPathPlugValueWidget",
+			"path:leaf", False,
+
+		),
+
+		"targetBatchDuration" : (
+
+			"description",
+			"""
+			The duration in seconds to aim for when automatically
+			sizing batches for nodes with a batchSize of 0. Tasks
+			which have never been timed are always given a batch
+			of their own.
+			""",
+
+		),
+
 	}
 
 )
@@ -139,6 +207,8 @@ Gaffer.Metadata.registerNode(
 			"description",
 			"""
 			Maximum number of frames to batch together when dispatching tasks.
+			A value of 0 sizes batches automatically, using the timings recorded
+			when the dispatcher's useTaskTimings plug is on.
 			""",
 
 		),
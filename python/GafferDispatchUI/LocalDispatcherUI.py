@@ -97,6 +97,32 @@ Gaffer.Metadata.registerNode(
 
 		),
 
+		"maxConcurrentBatches" : (
+
+			"description",
+			"""
+			The maximum number of batches which may be executed
+			simultaneously when executing in the background. Batches
+			are only run concurrently when they don't depend on one
+			another. A value of 0 uses one batch per hardware thread.
+			""",
+
+		),
+
+		"persistentWorkers" : (
+
+			"description",
+			"""
+			Executes background batches using long-lived `gaffer execute`
+			worker processes, rather than launching a new process for each
+			batch. Each worker loads the script only once and then executes
+			many batches, avoiding repeated startup and script loading costs,
+			and reusing cached results between batches. This is particularly
+			beneficial for large scripts with many short tasks.
+			""",
+
+		),
+
 	}
 
 )
@@ -177,6 +177,40 @@ class EncapsulateTest( GafferSceneTest.SceneTestCase ) :
 		encapsulate["in"].setInput( group1["out"] )
 		assertHashesUnique( "/group" )
 
+	def testCapsuleHashIncludesSetsAndGlobals( self ) :
+
+		sphere = GafferScene.Sphere()
+		group = GafferScene.Group()
+		group["in"][0].setInput( sphere["out"] )
+
+		options = GafferScene.CustomOptions()
+		options["in"].setInput( group["out"] )
+
+		pathFilter = GafferScene.PathFilter()
+		pathFilter["paths"].setValue( IECore.StringVectorData( [ "/group" ] ) )
+
+		encapsulate = GafferScene.Encapsulate()
+		encapsulate["in"].setInput( options["out"] )
+		encapsulate["filter"].setInput( pathFilter["out"] )
+
+		hashes = set()
+		def assertHashUnique() :
+
+			h = encapsulate["out"].objectHash( "/group" )
+			self.assertNotIn( h, hashes )
+			hashes.add( h )
+
+		assertHashUnique()
+
+		sphere["sets"].setValue( "A" )
+		assertHashUnique()
+
+		sphere["sets"].setValue( "A B" )
+		assertHashUnique()
+
+		options["options"].addMember( "test", IECore.IntData( 10 ) )
+		assertHashUnique()
+
 	def testSetMemberAtRoot( self ) :
 
 		sphere = GafferScene.Sphere()
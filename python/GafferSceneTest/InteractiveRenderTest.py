@@ -1589,6 +1589,97 @@ class InteractiveRenderTest( GafferSceneTest.SceneTestCase ) :
 		image = IECoreImage.ImageDisplayDriver.storedImage( "myLovelySphere" )
 		self.__assertColorsAlmostEqual( self.__color4fAtUV( image, imath.V2f( 0.5 ) ), imath.Color4f( 1, 0, 0, 1 ), delta = 0.01 )
 
+	def testSharedAttributes( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["s"] = GafferScene.Sphere()
+
+		# Copies of the sphere, all out of view of the camera,
+		# sharing identical attributes with the original.
+
+		s["d"] = GafferScene.Duplicate()
+		s["d"]["in"].setInput( s["s"]["out"] )
+		s["d"]["target"].setValue( "/sphere" )
+		s["d"]["transform"]["translate"].setValue( imath.V3f( 10, 0, 0 ) )
+		s["d"]["copies"].setValue( 9 )
+
+		s["f"] = GafferScene.PathFilter()
+		s["f"]["paths"].setValue( IECore.StringVectorData( [ "/sphere" ] ) )
+
+		s["a"] = GafferScene.StandardAttributes()
+		s["a"]["in"].setInput( s["d"]["out"] )
+		s["a"]["filter"].setInput( s["f"]["out"] )
+		s["a"]["attributes"]["visibility"]["value"].setValue( False )
+
+		s["o"] = GafferScene.Outputs()
+		s["o"].addOutput(
+			"beauty",
+			IECoreScene.Output(
+				"test",
+				"ieDisplay",
+				"rgba",
+				{
+					"driverType" : "ImageDisplayDriver",
+					"handle" : "myLovelySpheres",
+				}
+			)
+		)
+		s["o"]["in"].setInput( s["a"]["out"] )
+
+		s["r"] = self._createInteractiveRender()
+		s["r"]["in"].setInput( s["o"]["out"] )
+
+		# All ten spheres should share a single AttributesInterface.
+
+		with Gaffer.PerformanceMonitor() as m :
+			s["r"]["state"].setValue( s["r"].State.Running )
+
+		time.sleep( 0.5 )
+
+		self.assertEqual( m.counter( "RendererAlgo:attributesCacheMisses" ), 1 )
+		self.assertEqual( m.counter( "RendererAlgo:attributesCacheHits" ), 9 )
+
+		image = IECoreImage.ImageDisplayDriver.storedImage( "myLovelySpheres" )
+		self.assertAlmostEqual( self.__color4fAtUV( image, imath.V2f( 0.5 ) ).r, 1, delta = 0.01 )
+
+		# Giving the original sphere unique attributes should
+		# require a new AttributesInterface for it alone.
+
+		with Gaffer.PerformanceMonitor() as m :
+			s["a"]["attributes"]["doubleSided"]["enabled"].setValue( True )
+
+		time.sleep( 0.5 )
+
+		self.assertEqual( m.counter( "RendererAlgo:attributesCacheMisses" ), 1 )
+		self.assertEqual( m.counter( "RendererAlgo:attributesCacheHits" ), 0 )
+
+		image = IECoreImage.ImageDisplayDriver.storedImage( "myLovelySpheres" )
+		self.assertAlmostEqual( self.__color4fAtUV( image, imath.V2f( 0.5 ) ).r, 1, delta = 0.01 )
+
+		# Hiding it removes it from the render without affecting
+		# the copies.
+
+		s["a"]["attributes"]["visibility"]["enabled"].setValue( True )
+		time.sleep( 0.5 )
+
+		image = IECoreImage.ImageDisplayDriver.storedImage( "myLovelySpheres" )
+		self.assertAlmostEqual( self.__color4fAtUV( image, imath.V2f( 0.5 ) ).r, 0, delta = 0.01 )
+
+		# Reverting both edits should reuse the AttributesInterface
+		# still held by the copies.
+
+		with Gaffer.PerformanceMonitor() as m :
+			s["a"]["attributes"]["doubleSided"]["enabled"].setValue( False )
+			s["a"]["attributes"]["visibility"]["enabled"].setValue( False )
+
+		time.sleep( 0.5 )
+
+		self.assertEqual( m.counter( "RendererAlgo:attributesCacheMisses" ), 0 )
+		self.assertEqual( m.counter( "RendererAlgo:attributesCacheHits" ), 1 )
+
+		image = IECoreImage.ImageDisplayDriver.storedImage( "myLovelySpheres" )
+		self.assertAlmostEqual( self.__color4fAtUV( image, imath.V2f( 0.5 ) ).r, 1, delta = 0.01 )
+
 	def tearDown( self ) :
 
 		GafferSceneTest.SceneTestCase.tearDown( self )
@@ -38,6 +38,7 @@ import unittest
 
 import IECore
 
+import Gaffer
 import GafferScene
 import GafferSceneTest
 
@@ -78,6 +79,59 @@ class RendererAlgoTest( GafferSceneTest.SceneTestCase ) :
 		self.assertScenesEqual( sphere["out"], adaptors["out"] )
 		self.assertSceneHashesEqual( sphere["out"], adaptors["out"] )
 
+	def testAttributesCache( self ) :
+
+		renderer = GafferScene.Private.IECoreScenePreview.Renderer.create(
+			"OpenGL",
+			GafferScene.Private.IECoreScenePreview.Renderer.RenderType.Interactive
+		)
+
+		cache = GafferScene.AttributesCache( renderer )
+
+		attributes1 = IECore.CompoundObject( { "user:a" : IECore.IntData( 1 ) } )
+		attributes2 = IECore.CompoundObject( { "user:a" : IECore.IntData( 2 ) } )
+
+		# Identical attributes should share a single AttributesInterface.
+
+		with Gaffer.PerformanceMonitor() as m :
+
+			a1 = cache.get( attributes1 )
+			self.assertTrue( a1.isSame( cache.get( attributes1 ) ) )
+			self.assertTrue( a1.isSame( cache.get( attributes1.copy() ) ) )
+
+			a2 = cache.get( attributes2 )
+			self.assertFalse( a2.isSame( a1 ) )
+
+			cache.reportStatistics()
+
+		self.assertEqual( m.counter( "RendererAlgo:attributesCacheHits" ), 2 )
+		self.assertEqual( m.counter( "RendererAlgo:attributesCacheMisses" ), 2 )
+
+		# Statistics are reset after being reported.
+
+		with Gaffer.PerformanceMonitor() as m :
+			cache.reportStatistics()
+
+		self.assertEqual( m.allCounters(), {} )
+
+		# Entries which are still referenced outside the
+		# cache should survive `clearUnused()`, and the
+		# rest should be released.
+
+		del a2
+		cache.clearUnused()
+
+		with Gaffer.PerformanceMonitor() as m :
+
+			self.assertTrue( a1.isSame( cache.get( attributes1 ) ) )
+			a2 = cache.get( attributes2 )
+			self.assertEqual( a2.refCount(), 2 )
+
+			cache.reportStatistics()
+
+		self.assertEqual( m.counter( "RendererAlgo:attributesCacheHits" ), 1 )
+		self.assertEqual( m.counter( "RendererAlgo:attributesCacheMisses" ), 1 )
+
 	def tearDown( self ) :
 
 		GafferSceneTest.SceneTestCase.tearDown( self )
@@ -186,6 +186,39 @@ class SceneAlgoTest( GafferSceneTest.SceneTestCase ) :
 
 		self.assertEqual( set( m.paths() ), { "/group/sphere", "/group/sphere1", "/group/sphere2" } )
 
+	def testMatchingPathsHash( self ) :
+
+		s = GafferScene.Sphere()
+		g = GafferScene.Group()
+		g["in"][0].setInput( s["out"] )
+		g["in"][1].setInput( s["out"] )
+		g["in"][2].setInput( s["out"] )
+
+		f = GafferScene.PathFilter()
+		f["paths"].setValue( IECore.StringVectorData( [ "/group/sphere1" ] ) )
+
+		h = GafferScene.SceneAlgo.matchingPathsHash( f["out"], g["out"] )
+		self.assertEqual( GafferScene.SceneAlgo.matchingPathsHash( f["out"], g["out"] ), h )
+
+		# Changes to the scene which don't affect the matching
+		# paths don't affect the hash.
+
+		s["radius"].setValue( 2 )
+		self.assertEqual( GafferScene.SceneAlgo.matchingPathsHash( f["out"], g["out"] ), h )
+
+		# But changes to the filter do.
+
+		f["paths"].setValue( IECore.StringVectorData( [ "/group/sphere2" ] ) )
+		self.assertNotEqual( GafferScene.SceneAlgo.matchingPathsHash( f["out"], g["out"] ), h )
+
+		f["paths"].setValue( IECore.StringVectorData( [ "/group/sphere*" ] ) )
+		h = GafferScene.SceneAlgo.matchingPathsHash( f["out"], g["out"] )
+
+		# As do changes to the scene which affect the matches.
+
+		g["in"][3].setInput( s["out"] )
+		self.assertNotEqual( GafferScene.SceneAlgo.matchingPathsHash( f["out"], g["out"] ), h )
+
 	def testSetsNeedContextEntry( self ) :
 
 		script = Gaffer.ScriptNode()
@@ -237,5 +237,51 @@ class ScenePlugTest( GafferSceneTest.SceneTestCase ) :
 		self.assertEqual( p.globalsHash(), p["globals"].hash() )
 		self.assertEqual( p.setNamesHash(), p["setNames"].hash() )
 
+	def testHierarchyHash( self ) :
+
+		sphere = GafferScene.Sphere()
+		plane = GafferScene.Plane()
+
+		group = GafferScene.Group()
+		group["in"][0].setInput( sphere["out"] )
+		group["in"][1].setInput( plane["out"] )
+
+		hashes = set()
+		def assertHashUnique( path = "/" ) :
+
+			h = group["out"].hierarchyHash( path )
+			self.assertNotIn( h, hashes )
+			hashes.add( h )
+
+			# Must be deterministic, despite being computed
+			# in parallel.
+			Gaffer.ValuePlug.clearCache()
+			self.assertEqual( group["out"].hierarchyHash( path ), h )
+
+		assertHashUnique()
+
+		sphere["radius"].setValue( 2 )
+		assertHashUnique()
+
+		plane["transform"]["translate"]["x"].setValue( 1 )
+		assertHashUnique()
+
+		plane["name"].setValue( "ground" )
+		assertHashUnique()
+
+		group["transform"]["translate"]["y"].setValue( 1 )
+		assertHashUnique()
+
+		# Changes outside the hierarchy have no effect.
+
+		h = group["out"].hierarchyHash( "/group/sphere" )
+		plane["dimensions"]["x"].setValue( 10 )
+		self.assertEqual( group["out"].hierarchyHash( "/group/sphere" ), h )
+
+		# But those inside do.
+
+		sphere["radius"].setValue( 3 )
+		self.assertNotEqual( group["out"].hierarchyHash( "/group/sphere" ), h )
+
 if __name__ == "__main__":
 	unittest.main()
@@ -500,5 +500,99 @@ class SceneReaderTest( GafferSceneTest.SceneTestCase ) :
 		r["fileName"].setValue( os.path.dirname( __file__ ) + "/alembicFiles/cube.abc" )
 		self.assertSceneValid( r["out"] )
 
+	def testPrefetch( self ) :
+
+		self.writeAnimatedSCC()
+
+		reader = GafferScene.SceneReader()
+		reader["fileName"].setValue( self.__testFile )
+		reader["refreshCount"].setValue( self.uniqueInt( self.__testFile ) )
+
+		prefetchingReader = GafferScene.SceneReader()
+		prefetchingReader["fileName"].setValue( self.__testFile )
+		prefetchingReader["refreshCount"].setValue( reader["refreshCount"].getValue() )
+		prefetchingReader["prefetch"].setValue( True )
+
+		# Prefetching is purely an optimisation, and mustn't
+		# affect the output in any way.
+		self.assertFalse( prefetchingReader["out"]["childNames"] in prefetchingReader.affects( prefetchingReader["prefetch"] ) )
+
+		with Gaffer.Context() as c :
+			for frame in [ 0.5, 1, 1.5, 2, 5, 10 ] :
+				c.setFrame( frame )
+				self.assertScenesEqual( prefetchingReader["out"], reader["out"] )
+
+	def testFileNameFromContext( self ) :
+
+		for i in range( 0, 2 ) :
+			sc = IECoreScene.SceneCache( self.temporaryDirectory() + "/test%d.scc" % i, IECore.IndexedIO.OpenMode.Write )
+			c = sc.createChild( "child%d" % i )
+			c.writeObject( IECoreScene.SpherePrimitive( i + 1 ), 0.0 )
+			del sc, c
+
+		reader = GafferScene.SceneReader()
+		reader["fileName"].setValue( self.temporaryDirectory() + "/test${i}.scc" )
+		reader["refreshCount"].setValue( self.uniqueInt( self.__testFile ) )
+
+		# Interleave access to the two files, so that
+		# the per-thread caches must hold both at once.
+		for n in range( 0, 4 ) :
+			for i in range( 0, 2 ) :
+				with Gaffer.Context() as c :
+					c["i"] = i
+					self.assertEqual( reader["out"].childNames( "/" ), IECore.InternedStringVectorData( [ "child%d" % i ] ) )
+					self.assertEqual( reader["out"].object( "/child%d" % i ), IECoreScene.SpherePrimitive( i + 1 ) )
+
+	def testRefreshOnlyAffectsOwnFiles( self ) :
+
+		fileNames = [ self.temporaryDirectory() + "/test%d.scc" % i for i in range( 0, 2 ) ]
+		readers = []
+		for i, fileName in enumerate( fileNames ) :
+
+			sc = IECoreScene.SceneCache( fileName, IECore.IndexedIO.OpenMode.Write )
+			sc.createChild( "child%d" % i )
+			del sc
+
+			reader = GafferScene.SceneReader()
+			reader["fileName"].setValue( fileName )
+			reader["refreshCount"].setValue( self.uniqueInt( fileName ) )
+			self.assertEqual( reader["out"].childNames( "/" ), IECore.InternedStringVectorData( [ "child%d" % i ] ) )
+			readers.append( reader )
+
+		# Remove the second file, so that we'll get an error
+		# if it is reopened, and then refresh the first reader.
+
+		os.remove( fileNames[1] )
+		readers[0]["refreshCount"].setValue( readers[0]["refreshCount"].getValue() + 1 )
+		Gaffer.ValuePlug.clearCache()
+
+		# The first reader should still work.
+
+		self.assertEqual( readers[0]["out"].childNames( "/" ), IECore.InternedStringVectorData( [ "child0" ] ) )
+
+		# And a new reader for the second file should be
+		# able to use the file that is still open.
+
+		reader = GafferScene.SceneReader()
+		reader["fileName"].setValue( fileNames[1] )
+		reader["refreshCount"].setValue( readers[1]["refreshCount"].getValue() )
+		self.assertEqual( reader["out"].childNames( "/" ), IECore.InternedStringVectorData( [ "child1" ] ) )
+
+	def testRefreshPicksUpNewContents( self ) :
+
+		reader = GafferScene.SceneReader()
+		reader["fileName"].setValue( self.__testFile )
+
+		for i in range( 0, 3 ) :
+
+			sc = IECoreScene.SceneCache( self.__testFile, IECore.IndexedIO.OpenMode.Write )
+			sc.createChild( "child%d" % i ).writeObject( IECoreScene.SpherePrimitive( i + 1 ), 0.0 )
+			del sc
+
+			reader["refreshCount"].setValue( self.uniqueInt( self.__testFile ) )
+
+			self.assertEqual( reader["out"].childNames( "/" ), IECore.InternedStringVectorData( [ "child%d" % i ] ) )
+			self.assertEqual( reader["out"].object( "/child%d" % i ), IECoreScene.SpherePrimitive( i + 1 ) )
+
 if __name__ == "__main__":
 	unittest.main()
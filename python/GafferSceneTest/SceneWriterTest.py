@@ -35,6 +35,7 @@
 ##########################################################################
 
 import os
+import inspect
 import unittest
 import threading
 import imath
@@ -99,6 +100,84 @@ class SceneWriterTest( GafferSceneTest.SceneTestCase ) :
 		self.assertEqual( t.readTransformAsMatrix( 1.5 / 24.0 ), imath.M44d().translate( imath.V3d( 1.5, 0, 3 ) ) )
 		self.assertEqual( t.readTransformAsMatrix( 2 / 24.0 ), imath.M44d().translate( imath.V3d( 2, 0, 4 ) ) )
 
+	def testWriteFilePerFrame( self ) :
+
+		script = Gaffer.ScriptNode()
+		script["sphere"] = GafferScene.Sphere()
+		script["group"] = GafferScene.Group()
+		script["group"]["in"][0].setInput( script["sphere"]["out"] )
+		script["set"] = GafferScene.Set()
+		script["set"]["in"].setInput( script["group"]["out"] )
+		script["set"]["name"].setValue( "A" )
+		script["expression"] = Gaffer.Expression()
+		script["expression"].setExpression( inspect.cleandoc(
+			"""
+			parent["group"]["transform"]["translate"]["x"] = context.getFrame()
+			parent["set"]["paths"] = IECore.StringVectorData( [ "/group" if context.getFrame() < 3 else "/group/sphere" ] )
+			"""
+		) )
+		script["writer"] = GafferScene.SceneWriter()
+		script["writer"]["in"].setInput( script["set"]["out"] )
+		script["writer"]["fileName"].setValue( self.temporaryDirectory() + "/test.####.scc" )
+
+		with Gaffer.Context() :
+			script["writer"].executeSequence( [ 1, 2, 3, 4 ] )
+
+		self.assertFalse( os.path.exists( self.temporaryDirectory() + "/test.####.scc" ) )
+
+		for frame in ( 1, 2, 3, 4 ) :
+
+			sc = IECoreScene.SceneCache( self.temporaryDirectory() + "/test.%04d.scc" % frame, IECore.IndexedIO.OpenMode.Read )
+			group = sc.child( "group" )
+			sphere = group.child( "sphere" )
+
+			self.assertEqual( group.readTransformAsMatrix( frame / 24.0 ), imath.M44d().translate( imath.V3d( frame, 0, 0 ) ) )
+
+			self.assertEqual( IECore.InternedString( "A" ) in group.readTags(), frame < 3 )
+			self.assertEqual( IECore.InternedString( "A" ) in sphere.readTags(), frame >= 3 )
+
+	def testErrorsInSequence( self ) :
+
+		script = Gaffer.ScriptNode()
+		script["sphere"] = GafferScene.Sphere()
+		script["set"] = GafferScene.Set()
+		script["set"]["in"].setInput( script["sphere"]["out"] )
+		script["set"]["name"].setValue( "A" )
+		script["set"]["paths"].setValue( IECore.StringVectorData( [ "/sphere" ] ) )
+		script["writer"] = GafferScene.SceneWriter()
+		script["writer"]["in"].setInput( script["set"]["out"] )
+		script["writer"]["fileName"].setValue( self.temporaryDirectory() + "/test.scc" )
+
+		script["expression"] = Gaffer.Expression()
+
+		# Errors in computing locations are encountered on worker threads,
+		# and errors in computing sets on the main thread. Both must be
+		# reported, however far into the sequence they occur, without
+		# hanging either the writer or the computation.
+
+		for plug in ( "sphere.radius", "set.name" ) :
+
+			for errorFrame in ( 1, 3, 6 ) :
+
+				script["expression"].setExpression( inspect.cleandoc(
+					"""
+					if context.getFrame() == {errorFrame} :
+						raise Exception( "Frame {errorFrame} failed" )
+					parent["{node}"]["{plug}"] = {value}
+					""".format(
+						errorFrame = errorFrame,
+						node = plug.split( "." )[0],
+						plug = plug.split( "." )[1],
+						value = "1" if plug == "sphere.radius" else "\"A\""
+					)
+				) )
+
+				with Gaffer.Context() :
+					self.assertRaisesRegexp(
+						RuntimeError, "Frame %d failed" % errorFrame,
+						script["writer"].executeSequence, [ 1, 2, 3, 4, 5, 6 ]
+					)
+
 	def testSceneCacheRoundtrip( self ) :
 
 		scene = IECoreScene.SceneCache( self.temporaryDirectory() + "/fromPython.scc", IECore.IndexedIO.OpenMode.Write )
@@ -248,6 +327,16 @@ class SceneWriterTest( GafferSceneTest.SceneTestCase ) :
 		c["renderDirectory"] = self.temporaryDirectory() + "/sceneWriterTest2"
 		self.assertNotEqual( writer.hash( c ), current )
 
+		# output varies by the content of the scene
+		current = writer.hash( c )
+		plane["dimensions"]["x"].setValue( 2 )
+		self.assertNotEqual( writer.hash( c ), current )
+
+		# and by sets within the scene
+		current = writer.hash( c )
+		plane["sets"].setValue( "A" )
+		self.assertNotEqual( writer.hash( c ), current )
+
 		# output doesn't vary by ui Context entries
 		current = writer.hash( c )
 		c["ui:something"] = "alterTheUI"
@@ -38,6 +38,7 @@ import functools
 
 import IECore
 
+import Gaffer
 import GafferScene
 import GafferSceneTest
 
@@ -132,12 +133,16 @@ class SetAlgoTest( GafferSceneTest.SceneTestCase ) :
 		expressionCheck( '(setA - ((setC /group/group/sphere2) & setB))', [ '/group/group/sphere1' ] )
 		expressionCheck( 'setA - (/group/group/sphere1 /group/group/sphere2) | (setA setB setC) & setC', [ '/group/sphere3' ] )
 
-		# Test if proper exception is thrown for invalid expression
-		with self.assertRaises( RuntimeError ) as e :
-			# note the missing )
-			GafferScene.SetAlgo.evaluateSetExpression( 'setA - (/group/group/sphere2', group2["out"] )
+		# Test if proper exception is thrown for invalid expression. We
+		# do this repeatedly to check that the error is reported in full
+		# even when the parsed expression is cached.
+		for f in ( GafferScene.SetAlgo.evaluateSetExpression, GafferScene.SetAlgo.evaluateSetExpression, GafferScene.SetAlgo.setExpressionHash ) :
 
-		self.assertEqual( str( e.exception ), 'Exception : Syntax error in indicated part of SetExpression.\nsetA - (/group/group/sphere2\n     |---------------------|\n.' )
+			with self.assertRaises( RuntimeError ) as e :
+				# note the missing )
+				f( 'setA - (/group/group/sphere2', group2["out"] )
+
+			self.assertEqual( str( e.exception ), 'Exception : Syntax error in indicated part of SetExpression.\nsetA - (/group/group/sphere2\n     |---------------------|\n.' )
 
 		# Sets that don't exist should be replaced with an empty PathMatcher
 		expressionCheck( 'A', [] )
@@ -159,6 +164,56 @@ class SetAlgoTest( GafferSceneTest.SceneTestCase ) :
 		self.assertCorrectEvaluation( setA["out"], "MySets:setA", [ "/MyObject:sphere1" ] )
 		self.assertCorrectEvaluation( setA["out"], "/MyObject:sphere1", [ "/MyObject:sphere1" ] )
 
+	def testManyOperands( self ) :
+
+		script = Gaffer.ScriptNode()
+		script["plane"] = GafferScene.Plane()
+
+		out = script["plane"]["out"]
+		for i in range( 0, 20 ) :
+			setNode = GafferScene.Set( "set%d" % i )
+			setNode["in"].setInput( out )
+			setNode["name"].setValue( "set%d" % i )
+			setNode["paths"].setValue( IECore.StringVectorData( [ "/object%d" % j for j in range( i, 20 ) ] ) )
+			script.addChild( setNode )
+			out = setNode["out"]
+
+		union = " | ".join( "set%d" % i for i in range( 0, 20 ) )
+		self.assertCorrectEvaluation( out, union, [ "/object%d" % i for i in range( 0, 20 ) ] )
+
+		intersection = " & ".join( "set%d" % i for i in range( 0, 20 ) )
+		self.assertCorrectEvaluation( out, intersection, [ "/object19" ] )
+
+		difference = "set0 - " + " - ".join( "/object%d" % i for i in range( 0, 19 ) )
+		self.assertCorrectEvaluation( out, difference, [ "/object19" ] )
+
+		self.assertCorrectEvaluation( out, "set0 - set10 - set5 | set18 & set19 - /object19", [ "/object%d" % i for i in range( 0, 5 ) ] )
+
+	def testEvaluationUsesCurrentContext( self ) :
+
+		# Operands are evaluated concurrently, so this checks
+		# that the context is transferred to the worker threads.
+
+		script = Gaffer.ScriptNode()
+		script["plane"] = GafferScene.Plane()
+
+		script["setA"] = GafferScene.Set()
+		script["setA"]["in"].setInput( script["plane"]["out"] )
+		script["setA"]["name"].setValue( "A" )
+
+		script["setB"] = GafferScene.Set()
+		script["setB"]["in"].setInput( script["setA"]["out"] )
+		script["setB"]["name"].setValue( "B" )
+
+		script["expression"] = Gaffer.Expression()
+		script["expression"].setExpression( 'parent["setA"]["paths"] = IECore.StringVectorData( [ context["pathA"] ] ); parent["setB"]["paths"] = IECore.StringVectorData( [ context["pathB"] ] )' )
+
+		for i in range( 0, 10 ) :
+			with Gaffer.Context() as context :
+				context["pathA"] = "/a%d" % i
+				context["pathB"] = "/b%d" % i
+				self.assertCorrectEvaluation( script["setB"]["out"], "A | B", [ "/a%d" % i, "/b%d" % i ] )
+
 	def assertCorrectEvaluation( self, scenePlug, expression, expectedContents ) :
 
 		result = set( GafferScene.SetAlgo.evaluateSetExpression( expression, scenePlug ).paths() )
@@ -36,6 +36,7 @@
 
 import functools
 
+import IECore
 import IECoreScene
 
 import Gaffer
@@ -102,6 +103,19 @@ Gaffer.Metadata.registerNode(
 
 		],
 
+		"prefetch" : [
+
+			"description",
+			"""
+			Reads the children of each location, and the next
+			frame of each object, in background tasks while the
+			scene is being traversed. This can speed up loading
+			of large scenes from slow file systems, at the expense
+			of some extra reading.
+			""",
+
+		],
+
 	}
 
 )
@@ -133,7 +147,9 @@ def __tagsPopupMenu( menuDefinition, plugValueWidget ) :
 
 	fileName = plugValueWidget.getContext().substitute( node["fileName"].getValue() )
 	try :
-		scene = IECoreScene.SharedSceneInterfaces.get( fileName )
+		# We don't use SharedSceneInterfaces, because the SceneReader
+		# doesn't invalidate it when it is refreshed.
+		scene = IECoreScene.SceneInterface.create( fileName, IECore.IndexedIO.OpenMode.Read )
 	except :
 		return
 
@@ -0,0 +1,88 @@
+##########################################################################
+#
+#  Copyright (c) 2018, Image Engine Design Inc. All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are
+#  met:
+#
+#      * Redistributions of source code must retain the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer.
+#
+#      * Redistributions in binary form must reproduce the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer in the documentation and/or other materials provided with
+#        the distribution.
+#
+#      * Neither the name of John Haddon nor the names of
+#        any other contributors to this software may be used to endorse or
+#        promote products derived from this software without specific prior
+#        written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+#  IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+#  THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+#  PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+#  CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+##########################################################################
+
+import os
+import json
+import unittest
+import subprocess32 as subprocess
+
+import Gaffer
+import GafferTest
+
+class BenchmarkApplicationTest( GafferTest.TestCase ) :
+
+	def testList( self ) :
+
+		o = subprocess.check_output( [ "gaffer", "benchmark", "-list" ] )
+		for name in ( "sceneDeep", "sceneWide", "sceneSets", "imageChain", "pythonExpressions", "nativeExpressions", "dispatch", "serialisation" ) :
+			self.assertIn( name, o )
+
+	def testRun( self ) :
+
+		outputFile = self.temporaryDirectory() + "/results.json"
+		subprocess.check_call( [
+			"gaffer", "benchmark", "-scale", "0.05", "-repeat", "2",
+			"-outputFile", outputFile, "-scriptDirectory", self.temporaryDirectory()
+		] )
+
+		with open( outputFile ) as f :
+			results = json.load( f )
+
+		self.assertEqual( results["version"], Gaffer.About.versionString() )
+		self.assertEqual( len( results["workloads"] ), 8 )
+		for name, workload in results["workloads"].items() :
+			self.assertEqual( len( workload["run"]["wall"]["samples"] ), 2 )
+			self.assertIn( "median", workload["run"]["cpu"] )
+			self.assertIn( "computeCount", workload["performanceMonitor"] )
+			self.assertTrue( os.path.exists( self.temporaryDirectory() + "/" + name + ".gfr" ) )
+
+		self.assertGreater( results["workloads"]["sceneDeep"]["performanceMonitor"]["computeCount"], 0 )
+
+	def testWorkloads( self ) :
+
+		o = subprocess.check_output( [ "gaffer", "benchmark", "sceneDeep", "serialisation", "-scale", "0.05" ] )
+		results = json.loads( o )
+
+		self.assertEqual( sorted( results["workloads"].keys() ), [ "sceneDeep", "serialisation" ] )
+
+	def testInvalidWorkload( self ) :
+
+		p = subprocess.Popen( [ "gaffer", "benchmark", "iDontExist" ], stderr = subprocess.PIPE )
+		p.communicate()
+		self.assertEqual( p.returncode, 1 )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -560,5 +560,51 @@ class ComputeNodeTest( GafferTest.TestCase ) :
 		# is not an error.
 		self.assertEqual( len( cs ), 0 )
 
+	def testConcurrentComputesAreDeduplicated( self ) :
+
+		class SlowNode( Gaffer.ComputeNode ) :
+
+			def __init__( self, name="SlowNode" ) :
+
+				Gaffer.ComputeNode.__init__( self, name )
+
+				self["out"] = Gaffer.IntPlug( direction = Gaffer.Plug.Direction.Out )
+				self.numComputes = 0
+
+			def affects( self, input ) :
+
+				return []
+
+			def hash( self, output, context, h ) :
+
+				Gaffer.ComputeNode.hash( self, output, context, h )
+
+			def compute( self, plug, context ) :
+
+				self.numComputes += 1
+				time.sleep( 0.5 )
+				plug.setValue( 10 )
+
+		IECore.registerRunTimeTyped( SlowNode )
+
+		n = SlowNode()
+		Gaffer.ValuePlug.clearCache()
+
+		def f() :
+			self.assertEqual( n["out"].getValue(), 10 )
+
+		with Gaffer.PerformanceMonitor() as m :
+			threads = [ threading.Thread( target = f ) for i in range( 0, 4 ) ]
+			for t in threads :
+				t.start()
+			for t in threads :
+				t.join()
+
+		# Only the first thread should have done the compute,
+		# with the others waiting for its result.
+		self.assertEqual( n.numComputes, 1 )
+		self.assertEqual( m.plugStatistics( n["out"] ).computeCount, 1 )
+		self.assertEqual( m.plugStatistics( n["out"] ).deduplicatedComputeCount, 3 )
+
 if __name__ == "__main__":
 	unittest.main()
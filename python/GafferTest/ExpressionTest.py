@@ -38,6 +38,7 @@
 import os
 import inspect
 import unittest
+import threading
 import imath
 
 import IECore
@@ -1413,5 +1414,91 @@ class ExpressionTest( GafferTest.TestCase ) :
 			self.assertEqual( s["n"]["op1"].getValue(), 0 )
 			self.assertEqual( s["n"]["op2"].getValue(), 1 )
 
+	def testPythonEngineExecuteBatch( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["n"] = GafferTest.AddNode()
+		s["n"]["op2"].setValue( 10 )
+		s["e"] = Gaffer.Expression()
+
+		engine = Gaffer.PythonExpressionEngine()
+		inPlugs, outPlugs, contextNames = [], [], []
+		engine.parse(
+			s["e"], 'parent["n"]["op1"] = parent["n"]["op2"] + int( context.getFrame() )',
+			inPlugs, outPlugs, contextNames
+		)
+
+		self.assertEqual( inPlugs, [ s["n"]["op2"] ] )
+		self.assertEqual( outPlugs, [ s["n"]["op1"] ] )
+
+		contexts = []
+		for frame in range( 1, 4 ) :
+			c = Gaffer.Context()
+			c.setFrame( frame )
+			contexts.append( c )
+
+		results = engine.executeBatch( contexts, inPlugs )
+		self.assertEqual( [ r[0].value for r in results ], [ 11, 12, 13 ] )
+
+		# Batched results should match those from individual executions.
+		for c, r in zip( contexts, results ) :
+			with c :
+				self.assertEqual( engine.execute( c, inPlugs ), r )
+
+	def testConcurrentComputes( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["n"] = GafferTest.AddNode()
+		s["n"]["op2"].setValue( 10 )
+		s["e"] = Gaffer.Expression()
+		# The sleep releases the GIL, giving other threads the
+		# chance to request executions which will then be batched.
+		s["e"].setExpression( inspect.cleandoc(
+			"""
+			import time
+			time.sleep( 0.01 )
+			frame = int( context.getFrame() )
+			if frame == 13 :
+				raise ValueError( "Bad frame" )
+			parent["n"]["op1"] = parent["n"]["op2"] + frame
+			"""
+		) )
+
+		results = {}
+		errors = {}
+		def f( frame ) :
+
+			c = Gaffer.Context()
+			c.setFrame( frame )
+			with c :
+				try :
+					results[frame] = s["n"]["sum"].getValue()
+				except Exception as e :
+					errors[frame] = str( e )
+
+		threads = []
+		for frame in range( 0, 50 ) :
+			t = threading.Thread( target = f, args = ( frame, ) )
+			t.start()
+			threads.append( t )
+
+		for t in threads :
+			t.join()
+
+		# An error in one execution must not affect the others.
+		self.assertEqual( errors.keys(), [ 13 ] )
+		self.assertIn( "Bad frame", errors[13] )
+
+		# Results must match those computed serially.
+		Gaffer.ValuePlug.clearCache()
+		for frame in range( 0, 50 ) :
+			if frame == 13 :
+				continue
+			c = Gaffer.Context()
+			c.setFrame( frame )
+			with c :
+				self.assertEqual( s["n"]["sum"].getValue(), results[frame] )
+				self.assertEqual( results[frame], frame + 20 )
+
 if __name__ == "__main__":
 	unittest.main()
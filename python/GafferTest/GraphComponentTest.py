@@ -624,6 +624,54 @@ class GraphComponentTest( GafferTest.TestCase ) :
 			else :
 				self.assertEqual( child.getName(), "GraphComponent%d" % index )
 
+	def testNamingWithManyChildren( self ) :
+
+		# Parents with many children use an index to accelerate
+		# name lookups and uniquification. Check that it behaves
+		# exactly the same as the linear search used for parents
+		# with fewer children.
+
+		def names( numFillers ) :
+
+			g = Gaffer.GraphComponent()
+			for i in range( 0, numFillers ) :
+				g.addChild( Gaffer.GraphComponent( "filler%d" % i ) )
+
+			result = []
+			children = []
+			for name in [ "a", "a", "a1", "a", "a10", "a", "b2", "b", "b2" ] :
+				c = Gaffer.GraphComponent( name )
+				g.addChild( c )
+				children.append( c )
+				result.append( c.getName() )
+				self.assertTrue( g[c.getName()].isSame( c ) )
+
+			# Remove the highest suffix, and check it is reused.
+			g.removeChild( g["a11"] )
+			self.assertNotIn( "a11", g )
+			c = Gaffer.GraphComponent( "a" )
+			g.addChild( c )
+			result.append( c.getName() )
+
+			# Rename, and check that lookups follow.
+			g["b"].setName( "c" )
+			self.assertNotIn( "b", g )
+			self.assertEqual( g["c"].getName(), "c" )
+			g["a1"].setName( "a" )
+			result.append( [ x.getName() for x in g.children() if x.getName().startswith( "a" ) ] )
+
+			c = Gaffer.GraphComponent( "b" )
+			g.addChild( c )
+			result.append( c.getName() )
+
+			return result
+
+		self.assertEqual( names( 0 ), names( 1000 ) )
+		self.assertEqual(
+			names( 1000 )[:9],
+			[ "a", "a1", "a2", "a3", "a10", "a11", "b2", "b", "b3" ]
+		)
+
 	def testNamesWithStrangeSuffixes( self ) :
 
 		g = Gaffer.GraphComponent()
@@ -0,0 +1,284 @@
+##########################################################################
+#
+#  Copyright (c) 2018, Image Engine Design Inc. All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are
+#  met:
+#
+#      * Redistributions of source code must retain the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer.
+#
+#      * Redistributions in binary form must reproduce the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer in the documentation and/or other materials provided with
+#        the distribution.
+#
+#      * Neither the name of John Haddon nor the names of
+#        any other contributors to this software may be used to endorse or
+#        promote products derived from this software without specific prior
+#        written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+#  IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+#  THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+#  PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+#  CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+##########################################################################
+
+import unittest
+import imath
+
+import IECore
+
+import Gaffer
+import GafferTest
+
+class NativeExpressionEngineTest( GafferTest.TestCase ) :
+
+	def __scriptWithPlugs( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["n"] = Gaffer.Node()
+
+		for name, plugType in [
+			( "b", Gaffer.BoolPlug ),
+			( "i", Gaffer.IntPlug ),
+			( "f", Gaffer.FloatPlug ),
+			( "s", Gaffer.StringPlug ),
+			( "v2", Gaffer.V2fPlug ),
+			( "v3", Gaffer.V3fPlug ),
+			( "c", Gaffer.Color3fPlug ),
+		] :
+			s["n"]["user"]["in" + name.upper()] = plugType( flags = Gaffer.Plug.Flags.Default | Gaffer.Plug.Flags.Dynamic )
+			s["n"]["user"][name] = plugType( flags = Gaffer.Plug.Flags.Default | Gaffer.Plug.Flags.Dynamic )
+
+		s["n"]["user"]["inI"].setValue( 7 )
+		s["n"]["user"]["inF"].setValue( 2.5 )
+		s["n"]["user"]["inS"].setValue( "abc" )
+		s["n"]["user"]["inV2"].setValue( imath.V2f( 1, 2 ) )
+		s["n"]["user"]["inV3"].setValue( imath.V3f( 1, 2, 3 ) )
+		s["n"]["user"]["inC"].setValue( imath.Color3f( 0.25, 0.5, 0.75 ) )
+
+		s["e"] = Gaffer.Expression()
+
+		return s
+
+	def __assertMatchesPython( self, expression, plugName, context = None ) :
+
+		s = self.__scriptWithPlugs()
+		plug = s["n"]["user"][plugName]
+		context = context or Gaffer.Context()
+
+		s["e"].setExpression( expression, "python" )
+		with context :
+			pythonValue = plug.getValue()
+
+		s["e"].setExpression( expression, "native" )
+		with context :
+			nativeValue = plug.getValue()
+
+		self.assertEqual( nativeValue, pythonValue, expression )
+
+	def testMatchesPython( self ) :
+
+		for expression, plugName in [
+			( 'parent["n"]["user"]["i"] = parent["n"]["user"]["inI"] * 2 + 1', "i" ),
+			( 'parent["n"]["user"]["i"] = parent["n"]["user"]["inI"] / 2', "i" ),
+			( 'parent["n"]["user"]["i"] = -parent["n"]["user"]["inI"] / 2', "i" ),
+			( 'parent["n"]["user"]["i"] = -parent["n"]["user"]["inI"] % 3', "i" ),
+			( 'parent["n"]["user"]["i"] = 2 ** 10', "i" ),
+			( 'parent["n"]["user"]["i"] = 2 ** 30', "i" ),
+			( 'parent["n"]["user"]["i"] = ( -3 ) ** 19', "i" ),
+			( 'parent["n"]["user"]["i"] = 1 ** 1000000000000', "i" ),
+			( 'parent["n"]["user"]["i"] = ( -1 ) ** 1000000000001', "i" ),
+			( 'parent["n"]["user"]["i"] = 0 ** 1000000000000', "i" ),
+			( 'parent["n"]["user"]["i"] = 2 ** 62 / 2 ** 40', "i" ),
+			( 'parent["n"]["user"]["i"] = int( parent["n"]["user"]["inF"] * 3 )', "i" ),
+			( 'parent["n"]["user"]["i"] = max( 1, parent["n"]["user"]["inI"], 3 )', "i" ),
+			( 'parent["n"]["user"]["f"] = parent["n"]["user"]["inF"] / 2', "f" ),
+			( 'parent["n"]["user"]["f"] = parent["n"]["user"]["inF"] // 2', "f" ),
+			( 'parent["n"]["user"]["f"] = -parent["n"]["user"]["inF"] % 2', "f" ),
+			( 'parent["n"]["user"]["f"] = round( parent["n"]["user"]["inF"] )', "f" ),
+			( 'import math\nparent["n"]["user"]["f"] = math.sin( parent["n"]["user"]["inF"] ) * math.pi', "f" ),
+			( 'parent["n"]["user"]["f"] = parent["n"]["user"]["inV3"].y + parent["n"]["user"]["inC"][2]', "f" ),
+			( 'x = parent["n"]["user"]["inF"]\ny = x * x\nparent["n"]["user"]["f"] = y - x', "f" ),
+			( 'parent["n"]["user"]["b"] = parent["n"]["user"]["inI"] > 5 and parent["n"]["user"]["inF"] < 3', "b" ),
+			( 'parent["n"]["user"]["b"] = not parent["n"]["user"]["inB"]', "b" ),
+			( 'parent["n"]["user"]["s"] = parent["n"]["user"]["inS"] + "def"', "s" ),
+			( 'parent["n"]["user"]["s"] = "yes" if parent["n"]["user"]["inS"] == "abc" else "no"', "s" ),
+			( 'parent["n"]["user"]["v2"] = parent["n"]["user"]["inV2"] * 2', "v2" ),
+			( 'parent["n"]["user"]["v3"] = parent["n"]["user"]["inV3"] + imath.V3f( 1 )', "v3" ),
+			( 'parent["n"]["user"]["c"] = parent["n"]["user"]["inC"] * imath.Color3f( 2, 1, 0.5 )', "c" ),
+		] :
+			self.__assertMatchesPython( expression, plugName )
+
+	def testContext( self ) :
+
+		c = Gaffer.Context()
+		c.setFrame( 10 )
+		c["a"] = 2
+		c["b"] = "x"
+
+		for expression, plugName in [
+			( 'parent["n"]["user"]["f"] = context.getFrame() * 2', "f" ),
+			( 'parent["n"]["user"]["f"] = context.getTime()', "f" ),
+			( 'parent["n"]["user"]["i"] = context["a"] + context.get( "c", 10 )', "i" ),
+			( 'parent["n"]["user"]["s"] = context["b"] if "b" in context else "none"', "s" ),
+			( 'parent["n"]["user"]["b"] = "c" not in context', "b" ),
+		] :
+			self.__assertMatchesPython( expression, plugName, c )
+
+	def testContextDependencies( self ) :
+
+		s = self.__scriptWithPlugs()
+		s["e"].setExpression( 'parent["n"]["user"]["i"] = context.get( "a", 1 )', "native" )
+
+		with Gaffer.Context() as c :
+			self.assertEqual( s["n"]["user"]["i"].getValue(), 1 )
+			c["a"] = 2
+			self.assertEqual( s["n"]["user"]["i"].getValue(), 2 )
+			c["b"] = 3
+			h = s["n"]["user"]["i"].hash()
+			c["b"] = 4
+			self.assertEqual( s["n"]["user"]["i"].hash(), h )
+
+	def testUnsupportedSyntax( self ) :
+
+		s = self.__scriptWithPlugs()
+		for expression in [
+			'if True :\n\tparent["n"]["user"]["i"] = 1',
+			'parent["n"]["user"]["s"] = "%d" % 10',
+			'parent["n"]["user"]["i"] = len( "abc" )',
+			'parent["n"]["user"]["i"] = undefinedName',
+			'parent["n"]["user"]["i"] = 1 < 2 < 3',
+			'import os\nparent["n"]["user"]["i"] = 1',
+			'parent["n"]["user"]["i"] = parent["n"]["user"]["i"] + 1',
+			'parent["n"]["user"]["doesNotExist"] = 1',
+			'parent["n"]["user"]["i"] = 010',
+			'parent["n"]["user"]["i"] = 100000000000000000000',
+		] :
+			self.assertRaises( RuntimeError, s["e"].setExpression, expression, "native" )
+
+	def testUnsupportedPlugType( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["n"] = Gaffer.Node()
+		s["n"]["user"]["m"] = Gaffer.M44fPlug( flags = Gaffer.Plug.Flags.Default | Gaffer.Plug.Flags.Dynamic )
+		s["e"] = Gaffer.Expression()
+
+		self.assertEqual( s["e"].identifier( s["n"]["user"]["m"] ), "" )
+		self.assertRaisesRegexp( RuntimeError, "unsupported type", s["e"].setExpression, 'parent["n"]["user"]["m"] = 1', "native" )
+
+	def testRuntimeErrors( self ) :
+
+		s = self.__scriptWithPlugs()
+
+		s["e"].setExpression( 'parent["n"]["user"]["i"] = parent["n"]["user"]["inI"] / parent["n"]["user"]["inB"]', "native" )
+		self.assertRaisesRegexp( RuntimeError, "division or modulo by zero", s["n"]["user"]["i"].getValue )
+
+		s["e"].setExpression( 'import math\nparent["n"]["user"]["f"] = math.sqrt( -parent["n"]["user"]["inF"] )', "native" )
+		self.assertRaisesRegexp( RuntimeError, "math domain error", s["n"]["user"]["f"].getValue )
+
+		s["e"].setExpression( 'parent["n"]["user"]["f"] = context["notThere"]', "native" )
+		self.assertRaisesRegexp( RuntimeError, "notThere", s["n"]["user"]["f"].getValue )
+
+		s["e"].setExpression( 'parent["n"]["user"]["s"] = parent["n"]["user"]["inS"] + 1', "native" )
+		self.assertRaisesRegexp( RuntimeError, "unsupported operand", s["n"]["user"]["s"].getValue )
+
+		# Python integers have unlimited precision, but ours
+		# don't, so we report overflow rather than giving the
+		# wrong result.
+
+		for expression in [
+			'parent["n"]["user"]["i"] = 2 ** 100 / 2 ** 90',
+			'parent["n"]["user"]["i"] = parent["n"]["user"]["inI"] ** 1000000000000',
+			'parent["n"]["user"]["i"] = parent["n"]["user"]["inI"] * 4000000000 * 4000000000 / 4000000000',
+			'parent["n"]["user"]["i"] = 9223372036854775807 + parent["n"]["user"]["inI"]',
+			'parent["n"]["user"]["i"] = -9223372036854775807 - parent["n"]["user"]["inI"] - 2',
+			'parent["n"]["user"]["i"] = -( -9223372036854775801 - parent["n"]["user"]["inI"] )',
+			'parent["n"]["user"]["i"] = abs( -9223372036854775801 - parent["n"]["user"]["inI"] )',
+			'parent["n"]["user"]["i"] = int( parent["n"]["user"]["inF"] * 1e30 ) / 1000000',
+			'parent["n"]["user"]["i"] = int( "100000000000000000000" ) / 1000000',
+			# Plugs are only 32 bit, so results are range
+			# checked on the way out too.
+			'parent["n"]["user"]["i"] = 2147483647 + parent["n"]["user"]["inI"]',
+			'parent["n"]["user"]["i"] = -2147483648 - parent["n"]["user"]["inI"]',
+			'parent["n"]["user"]["i"] = parent["n"]["user"]["inF"] * 1e10',
+		] :
+			s["e"].setExpression( expression, "native" )
+			self.assertRaisesRegexp( RuntimeError, "integer overflow", s["n"]["user"]["i"].getValue )
+
+	def testSerialisation( self ) :
+
+		s = self.__scriptWithPlugs()
+		s["e"].setExpression( 'parent["n"]["user"]["f"] = parent["n"]["user"]["inF"] * context.getFrame()', "native" )
+
+		ss = s.serialise()
+		self.assertFalse( "Gaffernative" in ss )
+
+		s2 = Gaffer.ScriptNode()
+		s2.execute( ss )
+
+		self.assertEqual( s2["e"].getExpression(), s["e"].getExpression() )
+		with Gaffer.Context() as c :
+			c.setFrame( 3 )
+			self.assertEqual( s2["n"]["user"]["f"].getValue(), 7.5 )
+
+	def testDefaultExpression( self ) :
+
+		s = self.__scriptWithPlugs()
+		s["n"]["user"]["v3"].setValue( imath.V3f( 1, 2.5, 3 ) )
+		s["n"]["user"]["s"].setValue( "a\"b" )
+
+		for plugName in [ "b", "i", "f", "s", "v3" ] :
+			plug = s["n"]["user"][plugName]
+			value = plug.getValue()
+			s["e"] = Gaffer.Expression()
+			s["e"].setExpression( s["e"].defaultExpression( plug, "native" ), "native" )
+			self.assertTrue( plug.getInput() is not None )
+			self.assertEqual( plug.getValue(), value )
+
+	def testDisconnection( self ) :
+
+		s = self.__scriptWithPlugs()
+		s["e"].setExpression( "parent['n']['user']['i'] = parent['n']['user']['inI'] + 1", "native" )
+		self.assertEqual( s["n"]["user"]["i"].getValue(), 8 )
+
+		s["n"]["user"]["inI"].setValue( 1 )
+		del s["n"]["user"]["inI"]
+		self.assertEqual( s["e"].getExpression(), ( 'parent["n"]["user"]["i"] = 0 + 1', "native" ) )
+		self.assertEqual( s["n"]["user"]["i"].getValue(), 1 )
+
+	def testConvertToNative( self ) :
+
+		s = self.__scriptWithPlugs()
+		s["e"].setExpression( 'parent["n"]["user"]["i"] = parent["n"]["user"]["inI"] * 2', "python" )
+
+		s["b"] = Gaffer.Box()
+		s["b"]["n"] = GafferTest.AddNode()
+		s["b"]["e"] = Gaffer.Expression()
+		s["b"]["e"].setExpression( 'parent["n"]["op1"] = len( "abc" )', "python" )
+		s["b"]["e2"] = Gaffer.Expression()
+		s["b"]["e2"].setExpression( 'parent["n"]["op2"] = int( context.getFrame() )', "python" )
+
+		converted = Gaffer.ExpressionAlgo.convertToNative( s )
+		self.assertEqual( set( converted ), { s["e"], s["b"]["e2"] } )
+
+		self.assertEqual( s["e"].getExpression()[1], "native" )
+		self.assertEqual( s["b"]["e"].getExpression()[1], "python" )
+		self.assertEqual( s["b"]["e2"].getExpression()[1], "native" )
+
+		self.assertEqual( s["n"]["user"]["i"].getValue(), 14 )
+		self.assertEqual( s["b"]["n"]["sum"].getValue(), 4 )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,118 @@
+##########################################################################
+#
+#  Copyright (c) 2018, Image Engine Design Inc. All rights reserved.
+#  Copyright (c) 2012-2013, Image Engine Design Inc. All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are
+#  met:
+#
+#      * Redistributions of source code must retain the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer.
+#
+#      * Redistributions in binary form must reproduce the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer in the documentation and/or other materials provided with
+#        the distribution.
+#
+#      * Neither the name of John Haddon nor the names of
+#        any other contributors to this software may be used to endorse or
+#        promote products derived from this software without specific prior
+#        written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+#  IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+#  THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+#  PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+#  CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+##########################################################################
+
+import unittest
+
+import Gaffer
+import GafferTest
+
+class ParseCacheTest( GafferTest.TestCase ) :
+
+	class Parser( object ) :
+
+		constructions = 0
+
+		def __init__( self, source ) :
+
+			ParseCacheTest.Parser.constructions += 1
+			self.source = source
+
+	def setUp( self ) :
+
+		GafferTest.TestCase.setUp( self )
+
+		self.__sizeLimit = Gaffer.ParseCache.getSizeLimit()
+		Gaffer.ParseCache.clear()
+		ParseCacheTest.Parser.constructions = 0
+
+	def tearDown( self ) :
+
+		GafferTest.TestCase.tearDown( self )
+
+		Gaffer.ParseCache.setSizeLimit( self.__sizeLimit )
+
+	def test( self ) :
+
+		parser, code = Gaffer.ParseCache.get( "a = 1", self.Parser )
+		self.assertEqual( parser.source, "a = 1" )
+		d = {}
+		exec( code, d, d )
+		self.assertEqual( d["a"], 1 )
+
+		self.assertEqual( Gaffer.ParseCache.get( "a = 1", self.Parser ), ( parser, code ) )
+		self.assertEqual( self.Parser.constructions, 1 )
+		self.assertEqual(
+			Gaffer.ParseCache.statistics(),
+			{ "entries" : 1, "hits" : 1, "misses" : 1, "evictions" : 0 }
+		)
+
+	def testSizeLimit( self ) :
+
+		Gaffer.ParseCache.setSizeLimit( 2 )
+
+		for i in range( 0, 3 ) :
+			Gaffer.ParseCache.get( "a = %d" % i, self.Parser )
+
+		s = Gaffer.ParseCache.statistics()
+		self.assertEqual( s["entries"], 2 )
+		self.assertEqual( s["evictions"], 1 )
+
+		# Least recently used entry should have been evicted.
+		Gaffer.ParseCache.get( "a = 0", self.Parser )
+		self.assertEqual( self.Parser.constructions, 4 )
+
+	def testErrorsNotCached( self ) :
+
+		self.assertRaises( SyntaxError, Gaffer.ParseCache.get, "a = ", self.Parser )
+		self.assertEqual( Gaffer.ParseCache.statistics()["entries"], 0 )
+
+	def testExpressionsShareCache( self ) :
+
+		s = Gaffer.ScriptNode()
+		for i in range( 0, 10 ) :
+			s["b%d" % i] = Gaffer.Box()
+			s["b%d" % i]["n"] = GafferTest.AddNode()
+			s["b%d" % i]["e"] = Gaffer.Expression()
+			s["b%d" % i]["e"].setExpression( 'parent["n"]["op1"] = int( context.getFrame() )' )
+			if i == 0 :
+				misses = Gaffer.ParseCache.statistics()["misses"]
+
+		# Identical expressions are only parsed once.
+		self.assertEqual( Gaffer.ParseCache.statistics()["misses"], misses )
+
+if __name__ == "__main__":
+	unittest.main()
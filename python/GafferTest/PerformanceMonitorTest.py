@@ -132,23 +132,27 @@ class PerformanceMonitorTest( GafferTest.TestCase ) :
 			hashCount = 10,
 			computeCount = 20,
 			hashDuration = 100,
-			computeDuration = 200
+			computeDuration = 200,
+			deduplicatedComputeCount = 5,
 		)
 
 		self.assertEqual( s.hashCount, 10 )
 		self.assertEqual( s.computeCount, 20 )
 		self.assertEqual( s.hashDuration, 100 )
 		self.assertEqual( s.computeDuration, 200 )
+		self.assertEqual( s.deduplicatedComputeCount, 5 )
 
 		s.hashCount = 20
 		s.computeCount = 30
 		s.hashDuration = 200
 		s.computeDuration = 300
+		s.deduplicatedComputeCount = 6
 
 		self.assertEqual( s.hashCount, 20 )
 		self.assertEqual( s.computeCount, 30 )
 		self.assertEqual( s.hashDuration, 200 )
 		self.assertEqual( s.computeDuration, 300 )
+		self.assertEqual( s.deduplicatedComputeCount, 6 )
 
 	def testEnterReturnValue( self ) :
 
@@ -158,6 +162,27 @@ class PerformanceMonitorTest( GafferTest.TestCase ) :
 
 		self.assertTrue( m is n )
 
+	def testCounters( self ) :
+
+		m = Gaffer.PerformanceMonitor()
+		self.assertEqual( m.allCounters(), {} )
+		self.assertEqual( m.counter( "test:a" ), 0 )
+
+		# Counters are only recorded while the monitor is active.
+		Gaffer.Monitor.incrementCounter( "test:a" )
+		self.assertEqual( m.counter( "test:a" ), 0 )
+
+		with m :
+			Gaffer.Monitor.incrementCounter( "test:a" )
+			Gaffer.Monitor.incrementCounter( "test:a", 2 )
+			Gaffer.Monitor.incrementCounter( "test:b", 10 )
+
+		self.assertEqual( m.counter( "test:a" ), 3 )
+		self.assertEqual( m.counter( "test:b" ), 10 )
+		self.assertEqual( m.allCounters(), { "test:a" : 3, "test:b" : 10 } )
+
+		self.assertTrue( "test:b" in Gaffer.MonitorAlgo.formatStatistics( m ) )
+
 	def testDurations( self ) :
 
 		class DurationNode( Gaffer.ComputeNode ) :
@@ -1444,5 +1444,45 @@ class ScriptNodeTest( GafferTest.TestCase ) :
 		s["fileName"].setValue( self.temporaryDirectory() + "/test2.gfr" )
 		self.assertFalse( Gaffer.MetadataAlgo.getReadOnly( s ) )
 
+	def testCompiledScriptCache( self ) :
+
+		cachePath = self.temporaryDirectory() + "/scriptCache"
+		originalCachePath = os.environ.get( "GAFFER_SCRIPT_CACHE_PATH" )
+		os.environ["GAFFER_SCRIPT_CACHE_PATH"] = cachePath
+
+		try :
+
+			s = Gaffer.ScriptNode()
+			s["n1"] = GafferTest.AddNode()
+			s["n2"] = GafferTest.AddNode()
+			s["n2"]["op1"].setInput( s["n1"]["sum"] )
+			s["n1"]["op2"].setValue( 10 )
+			s["fileName"].setValue( self.temporaryDirectory() + "/test.gfr" )
+			s.save()
+
+			for continueOnError in ( False, True, False, True ) :
+
+				s2 = Gaffer.ScriptNode()
+				s2["fileName"].setValue( s["fileName"].getValue() )
+				s2.load( continueOnError = continueOnError )
+
+				self.assertTrue( s2["n2"]["op1"].getInput().isSame( s2["n1"]["sum"] ) )
+				self.assertEqual( s2["n1"]["op2"].getValue(), 10 )
+
+			# One entry for normal execution, and one for
+			# the statement-by-statement execution used by
+			# `continueOnError`.
+			self.assertEqual(
+				len( [ f for f in os.listdir( cachePath ) if f.endswith( ".gfrc" ) ] ),
+				2
+			)
+
+		finally :
+
+			if originalCachePath is None :
+				del os.environ["GAFFER_SCRIPT_CACHE_PATH"]
+			else :
+				os.environ["GAFFER_SCRIPT_CACHE_PATH"] = originalCachePath
+
 if __name__ == "__main__":
 	unittest.main()
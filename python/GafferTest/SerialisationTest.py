@@ -34,6 +34,7 @@
 #
 ##########################################################################
 
+import sys
 import imath
 
 import IECore
@@ -147,6 +148,41 @@ class SerialisationTest( GafferTest.TestCase ) :
 		self.assertEqual( Gaffer.Serialisation.modulePath( GafferTest.AddNode() ), "GafferTest" )
 		self.assertEqual( Gaffer.Serialisation.modulePath( GafferTest.AddNode ), "GafferTest" )
 
+	def testPathsForObjectsSharingAType( self ) :
+
+		# In Python 2, old-style classes and their instances all
+		# share a type, as do all functions. Make sure we don't
+		# return the path for one object for another.
+
+		class OldStyleA :
+			pass
+		OldStyleA.__module__ = "ModuleA"
+
+		class OldStyleB :
+			pass
+		OldStyleB.__module__ = "ModuleB"
+
+		def functionA() :
+			pass
+		functionA.__module__ = "ModuleA"
+
+		def functionB() :
+			pass
+		functionB.__module__ = "ModuleB"
+
+		for i in range( 0, 2 ) :
+
+			self.assertEqual( Gaffer.Serialisation.modulePath( OldStyleA ), "ModuleA" )
+			self.assertEqual( Gaffer.Serialisation.modulePath( OldStyleB ), "ModuleB" )
+			self.assertEqual( Gaffer.Serialisation.modulePath( OldStyleA() ), "ModuleA" )
+			self.assertEqual( Gaffer.Serialisation.modulePath( OldStyleB() ), "ModuleB" )
+
+			self.assertEqual( Gaffer.Serialisation.classPath( OldStyleA ), "ModuleA.OldStyleA" )
+			self.assertEqual( Gaffer.Serialisation.classPath( OldStyleB ), "ModuleB.OldStyleB" )
+
+			self.assertEqual( Gaffer.Serialisation.modulePath( functionA ), "ModuleA" )
+			self.assertEqual( Gaffer.Serialisation.modulePath( functionB ), "ModuleB" )
+
 	def testIncludeParentMetadataWhenExcludingChildren( self ) :
 
 		n1 = Gaffer.Node()
@@ -173,5 +209,43 @@ class SerialisationTest( GafferTest.TestCase ) :
 
 		self.assertEqual( Gaffer.Serialisation.classPath( self.Outer.Inner ), "GafferTest.SerialisationTest.Outer.Inner" )
 
+	def __testLargeScript( self, numNodes ) :
+
+		s = Gaffer.ScriptNode()
+		for i in range( 0, numNodes ) :
+			n = GafferTest.AddNode()
+			if i % 2 :
+				n["op1"].setInput( s.children( Gaffer.Node )[-1]["sum"] )
+			else :
+				n["op2"].setValue( i )
+			s.addChild( n )
+
+		t = IECore.Timer()
+		serialisation = s.serialise()
+		serialiseTime = t.stop()
+
+		s2 = Gaffer.ScriptNode()
+		t = IECore.Timer()
+		s2.execute( serialisation )
+		loadTime = t.stop()
+
+		self.assertEqual( len( s2.children( Gaffer.Node ) ), numNodes )
+		self.assertEqual( s2.serialise(), serialisation )
+
+		return serialiseTime, loadTime
+
+	def testLargeScript( self ) :
+
+		self.__testLargeScript( 1000 )
+
+	@GafferTest.performanceTest
+	def testLargeScriptPerformance( self ) :
+
+		for numNodes in ( 1000, 10000, 50000 ) :
+			serialiseTime, loadTime = self.__testLargeScript( numNodes )
+			sys.stderr.write(
+				"\n%d nodes : %.3fs (serialise), %.3fs (load)" % ( numNodes, serialiseTime, loadTime )
+			)
+
 if __name__ == "__main__":
 	unittest.main()
@@ -83,12 +83,10 @@ class SpeedTest( GafferTest.TestCase ) :
 
 	#
 	# this test checks it doesn't take a ludicrous amount of time
-	# to retrieve children from their parents by name. even though
-	# we're currently doing a linear search to achieve this it doesn't
-	# seem to be a particularly pressing issue, perhaps because comparison
-	# against many InternedStrings is much cheaper than comparison
-	# against many std::strings. if necessary we can improve things by
-	# storing a map from name to children in GraphComponent.
+	# to retrieve children from their parents by name. parents with
+	# many children now store an index from name to child, so the
+	# timings below (for linear searches) are only of historical
+	# interest.
 	#
 	# r338 (linear search with string comparisons)
 	#
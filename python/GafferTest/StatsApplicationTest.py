@@ -35,6 +35,7 @@
 ##########################################################################
 
 import re
+import json
 import unittest
 import subprocess32 as subprocess
 
@@ -69,5 +70,94 @@ class StatsApplicationTest( GafferTest.TestCase ) :
 		self.assertTrue( re.search( r"Box\s*1", o ) )
 		self.assertTrue( re.search( r"Total\s*3", o ) )
 
+	def testTrace( self ) :
+
+		import GafferDispatch
+
+		script = Gaffer.ScriptNode()
+		script["n"] = GafferDispatch.PythonCommand()
+		script["n"]["command"].setValue( "pass" )
+
+		script["fileName"].setValue( self.temporaryDirectory() + "/script.gfr" )
+		script.save()
+
+		traceFileName = self.temporaryDirectory() + "/trace.json"
+		subprocess.check_output( [ "gaffer", "stats", script["fileName"].getValue(), "-task", "n", "-trace", traceFileName ] )
+
+		with open( traceFileName ) as f :
+			trace = json.load( f )
+
+		self.assertTrue( len( trace["traceEvents"] ) )
+
+	def testJSON( self ) :
+
+		script = Gaffer.ScriptNode()
+		script["n"] = GafferTest.AddNode()
+		script["b"] = Gaffer.Box()
+		script["b"]["n"] = GafferTest.AddNode()
+
+		script["fileName"].setValue( self.temporaryDirectory() + "/script.gfr" )
+		script.save()
+
+		o = subprocess.check_output( [ "gaffer", "stats", script["fileName"].getValue(), "-format", "json" ] )
+		results = json.loads( o )
+
+		self.assertEqual( results["version"]["Current"], Gaffer.About.versionString() )
+		self.assertEqual( results["nodes"]["AddNode"], 2 )
+		self.assertEqual( results["nodes"]["Total"], 3 )
+		self.assertIn( "Loading", results["performance"] )
+		self.assertIn( "median", results["performance"]["Loading"]["wall"] )
+		self.assertGreater( results["memory"]["Max resident size"], 0 )
+
+	def testRepeatAndCompare( self ) :
+
+		import GafferScene
+
+		script = Gaffer.ScriptNode()
+		script["sphere"] = GafferScene.Sphere()
+		script["sphere"]["sets"].setValue( "A" )
+		script["duplicate"] = GafferScene.Duplicate()
+		script["duplicate"]["in"].setInput( script["sphere"]["out"] )
+		script["duplicate"]["target"].setValue( "/sphere" )
+		script["duplicate"]["copies"].setValue( 9 )
+
+		script["fileName"].setValue( self.temporaryDirectory() + "/script.gfr" )
+		script.save()
+
+		resultsFileName = self.temporaryDirectory() + "/results.json"
+		subprocess.check_output( [
+			"gaffer", "stats", script["fileName"].getValue(),
+			"-scene", "duplicate", "-repeat", "3", "-clearCache",
+			"-format", "json", "-outputFile", resultsFileName
+		] )
+
+		with open( resultsFileName ) as f :
+			results = json.load( f )
+
+		self.assertEqual( len( results["performance"]["Scene generation"]["wall"]["samples"] ), 3 )
+		self.assertEqual( results["scene"]["Locations"], 11 )
+		self.assertEqual( results["scene"]["Unique objects"], 2 )
+		self.assertEqual( results["sets"]["A"], 10 )
+
+		# Fake a previous run which was much faster, so
+		# that we are guaranteed to see a regression.
+
+		for timer in results["performance"].values() :
+			for clock in timer.values() :
+				clock["median"] /= 1000.0
+
+		previousFileName = self.temporaryDirectory() + "/previous.json"
+		with open( previousFileName, "w" ) as f :
+			json.dump( results, f )
+
+		p = subprocess.Popen(
+			[ "gaffer", "stats", script["fileName"].getValue(), "-scene", "duplicate", "-compare", previousFileName ],
+			stdout = subprocess.PIPE
+		)
+		o = p.communicate()[0]
+
+		self.assertEqual( p.returncode, 1 )
+		self.assertTrue( re.search( r"Scene generation \(wall\).*REGRESSION", o ) )
+
 if __name__ == "__main__":
 	unittest.main()
@@ -0,0 +1,174 @@
+##########################################################################
+#
+#  Copyright (c) 2018, Image Engine Design Inc. All rights reserved.
+#  Copyright (c) 2012-2013, Image Engine Design Inc. All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are
+#  met:
+#
+#      * Redistributions of source code must retain the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer.
+#
+#      * Redistributions in binary form must reproduce the above
+#        copyright notice, this list of conditions and the following
+#        disclaimer in the documentation and/or other materials provided with
+#        the distribution.
+#
+#      * Neither the name of John Haddon nor the names of
+#        any other contributors to this software may be used to endorse or
+#        promote products derived from this software without specific prior
+#        written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+#  IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+#  THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+#  PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+#  CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import os
+import json
+import threading
+import unittest
+
+import IECore
+
+import Gaffer
+import GafferTest
+
+class TraceMonitorTest( GafferTest.TestCase ) :
+
+	def __graph( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["a1"] = GafferTest.AddNode()
+		s["a1"]["op1"].setValue( 1 )
+		s["a2"] = GafferTest.AddNode()
+		s["a2"]["op1"].setInput( s["a1"]["sum"] )
+		s["a2"]["op2"].setValue( 2 )
+
+		return s
+
+	def testEvents( self ) :
+
+		s = self.__graph()
+
+		m = Gaffer.TraceMonitor()
+		with m :
+			self.assertEqual( s["a2"]["sum"].getValue(), 3 )
+
+		events = m.events()
+		self.assertEqual(
+			set( ( e.plug, e.type ) for e in events ),
+			{
+				( s["a1"]["sum"], "computeNode:hash" ),
+				( s["a1"]["sum"], "computeNode:compute" ),
+				( s["a2"]["sum"], "computeNode:hash" ),
+				( s["a2"]["sum"], "computeNode:compute" ),
+			}
+		)
+
+		for e in events :
+			self.assertGreaterEqual( e.end, e.begin )
+			self.assertEqual( e.contextHash, Gaffer.Context().hash() )
+			self.assertEqual( e.thread, 0 )
+			if e.parent >= 0 :
+				# Children are contained entirely within their parent.
+				parent = events[e.parent]
+				self.assertGreaterEqual( e.begin, parent.begin )
+				self.assertLessEqual( e.end, parent.end )
+				self.assertEqual( parent.plug, s["a2"]["sum"] )
+				self.assertEqual( e.plug, s["a1"]["sum"] )
+			else :
+				self.assertEqual( e.plug, s["a2"]["sum"] )
+
+		m.clear()
+		self.assertEqual( m.events(), [] )
+
+	def testChromeTrace( self ) :
+
+		s = self.__graph()
+
+		m = Gaffer.TraceMonitor()
+		with m :
+			s["a2"]["sum"].getValue()
+
+		fileName = os.path.join( self.temporaryDirectory(), "trace.json" )
+		m.writeChromeTrace( fileName )
+
+		with open( fileName ) as f :
+			trace = json.load( f )
+
+		events = trace["traceEvents"]
+		self.assertEqual( len( events ), len( m.events() ) )
+		self.assertEqual( set( e["name"] for e in events ), { "a1.sum", "a2.sum" } )
+		self.assertEqual( set( e["cat"] for e in events ), { "computeNode:hash", "computeNode:compute" } )
+		for e in events :
+			self.assertEqual( e["ph"], "X" )
+			self.assertEqual( e["args"]["nodeType"], "GafferTest::AddNode" )
+
+	def testFlameGraph( self ) :
+
+		s = self.__graph()
+
+		class SlowNode( GafferTest.AddNode ) :
+
+			def compute( self, plug, context ) :
+
+				import time
+				time.sleep( 0.01 )
+				GafferTest.AddNode.compute( self, plug, context )
+
+		s["a1"] = SlowNode()
+		s["a1"]["op1"].setValue( 1 )
+		s["a2"]["op1"].setInput( s["a1"]["sum"] )
+
+		m = Gaffer.TraceMonitor()
+		with m :
+			s["a2"]["sum"].getValue()
+
+		fileName = os.path.join( self.temporaryDirectory(), "trace.txt" )
+		m.writeFlameGraph( fileName )
+
+		with open( fileName ) as f :
+			lines = f.readlines()
+
+		stacks = dict( l.rsplit( " ", 1 ) for l in lines )
+		stack = "a2.sum (computeNode:compute);a1.sum (computeNode:compute)"
+		self.assertIn( stack, stacks )
+		self.assertGreaterEqual( int( stacks[stack] ), 10000 )
+
+	def testThreads( self ) :
+
+		s = Gaffer.ScriptNode()
+		s["n"] = GafferTest.AddNode()
+		s["e"] = Gaffer.Expression()
+		s["e"].setExpression( 'parent["n"]["op1"] = int( context["i"] )' )
+
+		def f( i ) :
+
+			with Gaffer.Context() as c :
+				c["i"] = i
+				s["n"]["sum"].getValue()
+
+		m = Gaffer.TraceMonitor()
+		with m :
+			threads = [ threading.Thread( target = f, args = ( i, ) ) for i in range( 0, 4 ) ]
+			for t in threads :
+				t.start()
+			for t in threads :
+				t.join()
+
+		# Threads are numbered sequentially in order of first use.
+		self.assertEqual( set( e.thread for e in m.events() ), { 0, 1, 2, 3 } )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -35,6 +35,7 @@
 #
 ##########################################################################
 
+import os
 import gc
 
 import IECore
@@ -616,17 +617,196 @@ class ValuePlugTest( GafferTest.TestCase ) :
 		n["user"]["c"].setInput( None )
 		self.assertTrue( n["user"]["c"]["i"].getInput() is None )
 
+	def testHashCacheSizeLimit( self ) :
+
+		Gaffer.ValuePlug.setHashCacheSizeLimit( 10 )
+		self.assertEqual( Gaffer.ValuePlug.getHashCacheSizeLimit(), 10 )
+
+		nodes = [ GafferTest.AddNode() ]
+		for i in range( 0, 19 ) :
+			nodes.append( GafferTest.AddNode() )
+			nodes[-1]["op1"].setInput( nodes[-2]["sum"] )
+
+		s1 = Gaffer.ValuePlug.hashCacheStatistics()
+		nodes[-1]["sum"].hash()
+		s2 = Gaffer.ValuePlug.hashCacheStatistics()
+
+		self.assertEqual( s2["misses"] - s1["misses"], 20 )
+		self.assertEqual( s2["evictions"] - s1["evictions"], 10 )
+
+		# The most recently used entries should
+		# have survived.
+
+		nodes[-1]["sum"].hash()
+		nodes[-5]["sum"].hash()
+		s3 = Gaffer.ValuePlug.hashCacheStatistics()
+
+		self.assertEqual( s3["misses"], s2["misses"] )
+		self.assertEqual( s3["hits"] - s2["hits"], 2 )
+
+		# But the least recently used ones will
+		# need to be hashed again.
+
+		nodes[0]["sum"].hash()
+		s4 = Gaffer.ValuePlug.hashCacheStatistics()
+		self.assertEqual( s4["misses"] - s3["misses"], 1 )
+
+	def testClearHashCache( self ) :
+
+		n1 = GafferTest.AddNode()
+		n2 = GafferTest.AddNode()
+		n2["op1"].setInput( n1["sum"] )
+
+		h = n2["sum"].hash()
+		s1 = Gaffer.ValuePlug.hashCacheStatistics()
+		self.assertEqual( n2["sum"].hash(), h )
+		s2 = Gaffer.ValuePlug.hashCacheStatistics()
+		self.assertEqual( s2["misses"], s1["misses"] )
+
+		Gaffer.ValuePlug.clearHashCache()
+
+		self.assertEqual( n2["sum"].hash(), h )
+		s3 = Gaffer.ValuePlug.hashCacheStatistics()
+		self.assertEqual( s3["misses"] - s2["misses"], 2 )
+
+	def testCacheStatistics( self ) :
+
+		Gaffer.ValuePlug.clearCache()
+		Gaffer.ValuePlug.setCacheStatisticsEnabled( True )
+		self.assertTrue( Gaffer.ValuePlug.getCacheStatisticsEnabled() )
+
+		s = Gaffer.ScriptNode()
+		s["a1"] = GafferTest.AddNode()
+		s["a1"]["op1"].setValue( 1 )
+		s["a2"] = GafferTest.AddNode()
+		s["a2"]["op1"].setInput( s["a1"]["sum"] )
+
+		self.assertEqual( s["a2"]["sum"].getValue(), 1 )
+
+		statistics = Gaffer.ValuePlug.cacheStatistics()
+		for name in ( "a1", "a2" ) :
+			nodeStatistics = statistics["nodes"][name]
+			self.assertEqual( nodeStatistics["entries"], 1 )
+			self.assertGreater( nodeStatistics["bytes"], 0 )
+			self.assertEqual( nodeStatistics["misses"], 1 )
+			self.assertEqual( nodeStatistics["hits"], 0 )
+			self.assertEqual( nodeStatistics["evictions"], 0 )
+
+		plugTypeStatistics = statistics["plugTypes"]["Gaffer::IntPlug"]
+		self.assertEqual( plugTypeStatistics["entries"], 2 )
+		self.assertEqual(
+			plugTypeStatistics["bytes"],
+			statistics["nodes"]["a1"]["bytes"] + statistics["nodes"]["a2"]["bytes"]
+		)
+
+		# Repeated computes should be recorded as hits.
+
+		s["a2"]["sum"].getValue()
+		self.assertEqual( Gaffer.ValuePlug.cacheStatistics()["nodes"]["a2"]["hits"], 1 )
+
+		# Reducing the cache size should be recorded as evictions.
+
+		Gaffer.ValuePlug.setCacheMemoryLimit( 0 )
+		statistics = Gaffer.ValuePlug.cacheStatistics()
+		for name in ( "a1", "a2" ) :
+			nodeStatistics = statistics["nodes"][name]
+			self.assertEqual( nodeStatistics["entries"], 0 )
+			self.assertEqual( nodeStatistics["bytes"], 0 )
+			self.assertEqual( nodeStatistics["evictions"], 1 )
+
+		# But clearing the cache is not an eviction.
+
+		Gaffer.ValuePlug.setCacheMemoryLimit( self.__originalCacheMemoryLimit )
+		s["a1"]["op2"].setValue( 1 )
+		s["a2"]["sum"].getValue()
+		self.assertEqual( Gaffer.ValuePlug.cacheStatistics()["nodes"]["a2"]["entries"], 1 )
+
+		Gaffer.ValuePlug.clearCache()
+		statistics = Gaffer.ValuePlug.cacheStatistics()
+		self.assertEqual( statistics["nodes"]["a2"]["entries"], 0 )
+		self.assertEqual( statistics["nodes"]["a2"]["evictions"], 1 )
+
+	def __diskCacheFiles( self, directory ) :
+
+		result = []
+		for root, dirs, files in os.walk( directory ) :
+			result.extend( files )
+
+		return result
+
+	def testDiskCache( self ) :
+
+		n = GafferTest.AddNode()
+		n["op1"].setValue( 10 )
+		n["op2"].setValue( 20 )
+
+		Gaffer.ValuePlug.setDiskCacheDirectory( self.temporaryDirectory() + "/diskCache" )
+		self.assertEqual( Gaffer.ValuePlug.getDiskCacheDirectory(), self.temporaryDirectory() + "/diskCache" )
+
+		# Disk cache is opt-in by plug type.
+
+		self.assertFalse( Gaffer.ValuePlug.getDiskCacheEnabled( Gaffer.IntPlug.staticTypeId() ) )
+		self.assertEqual( n["sum"].getValue(), 30 )
+		self.assertEqual( self.__diskCacheFiles( self.temporaryDirectory() + "/diskCache" ), [] )
+
+		Gaffer.ValuePlug.setDiskCacheEnabled( Gaffer.IntPlug.staticTypeId(), True )
+		self.assertTrue( Gaffer.ValuePlug.getDiskCacheEnabled( Gaffer.IntPlug.staticTypeId() ) )
+
+		n["op2"].setValue( 21 )
+		with Gaffer.PerformanceMonitor() as m :
+			self.assertEqual( n["sum"].getValue(), 31 )
+		self.assertEqual( m.plugStatistics( n["sum"] ).computeCount, 1 )
+		self.assertEqual( len( self.__diskCacheFiles( self.temporaryDirectory() + "/diskCache" ) ), 1 )
+
+		# Clearing the memory cache should leave the value
+		# available from disk.
+
+		Gaffer.ValuePlug.clearCache()
+		with Gaffer.PerformanceMonitor() as m :
+			self.assertEqual( n["sum"].getValue(), 31 )
+		self.assertEqual( m.plugStatistics( n["sum"] ).computeCount, 0 )
+
+		# Plugs which aren't cacheable must never be stored.
+
+		n["sum"].setFlags( Gaffer.Plug.Flags.Cacheable, False )
+		n["op2"].setValue( 22 )
+		self.assertEqual( n["sum"].getValue(), 32 )
+		self.assertEqual( len( self.__diskCacheFiles( self.temporaryDirectory() + "/diskCache" ) ), 1 )
+
+	def testDiskCacheSizeLimit( self ) :
+
+		n = GafferTest.AddNode()
+
+		Gaffer.ValuePlug.setDiskCacheDirectory( self.temporaryDirectory() + "/diskCache" )
+		Gaffer.ValuePlug.setDiskCacheEnabled( Gaffer.IntPlug.staticTypeId(), True )
+
+		for i in range( 0, 10 ) :
+			n["op1"].setValue( i )
+			n["sum"].getValue()
+		self.assertEqual( len( self.__diskCacheFiles( self.temporaryDirectory() + "/diskCache" ) ), 10 )
+
+		Gaffer.ValuePlug.setDiskCacheSizeLimit( 0 )
+		self.assertEqual( Gaffer.ValuePlug.getDiskCacheSizeLimit(), 0 )
+		self.assertEqual( self.__diskCacheFiles( self.temporaryDirectory() + "/diskCache" ), [] )
+
 	def setUp( self ) :
 
 		GafferTest.TestCase.setUp( self )
 
 		self.__originalCacheMemoryLimit = Gaffer.ValuePlug.getCacheMemoryLimit()
+		self.__originalDiskCacheSizeLimit = Gaffer.ValuePlug.getDiskCacheSizeLimit()
+		self.__originalHashCacheSizeLimit = Gaffer.ValuePlug.getHashCacheSizeLimit()
 
 	def tearDown( self ) :
 
 		GafferTest.TestCase.tearDown( self )
 
 		Gaffer.ValuePlug.setCacheMemoryLimit( self.__originalCacheMemoryLimit )
+		Gaffer.ValuePlug.setDiskCacheDirectory( "" )
+		Gaffer.ValuePlug.setDiskCacheSizeLimit( self.__originalDiskCacheSizeLimit )
+		Gaffer.ValuePlug.setDiskCacheEnabled( Gaffer.IntPlug.staticTypeId(), False )
+		Gaffer.ValuePlug.setHashCacheSizeLimit( self.__originalHashCacheSizeLimit )
+		Gaffer.ValuePlug.setCacheStatisticsEnabled( False )
 
 if __name__ == "__main__":
 	unittest.main()
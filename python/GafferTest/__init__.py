@@ -37,6 +37,7 @@
 
 from _GafferTest import *
 
+import os
 import unittest
 
 # workaround lack of expectedFailure decorator for
@@ -52,6 +53,13 @@ except AttributeError :
 				print "Expected failure"
 		return wrapper
 
+## Decorator for tests which exist primarily for benchmarking.
+# These are too slow to run routinely, so are skipped unless the
+# GAFFERTEST_PERFORMANCE environment variable is set.
+def performanceTest( f ) :
+
+	return unittest.skipUnless( "GAFFERTEST_PERFORMANCE" in os.environ, "Performance tests not enabled" )( f )
+
 from TestCase import TestCase
 from AddNode import AddNode
 from SignalsTest import SignalsTest
@@ -87,6 +95,8 @@ from LazyModuleTest import LazyModuleTest
 from NodeBindingTest import NodeBindingTest
 from DictPathTest import DictPathTest
 from ExpressionTest import ExpressionTest
+from NativeExpressionEngineTest import NativeExpressionEngineTest
+from ParseCacheTest import ParseCacheTest
 from BlockedConnectionTest import BlockedConnectionTest
 from TimeWarpComputeNodeTest import TimeWarpComputeNodeTest
 from TransformPlugTest import TransformPlugTest
@@ -124,8 +134,10 @@ from SubGraphTest import SubGraphTest
 from FileSequencePathFilterTest import FileSequencePathFilterTest
 from AnimationTest import AnimationTest
 from StatsApplicationTest import StatsApplicationTest
+from BenchmarkApplicationTest import BenchmarkApplicationTest
 from DownstreamIteratorTest import DownstreamIteratorTest
 from PerformanceMonitorTest import PerformanceMonitorTest
+from TraceMonitorTest import TraceMonitorTest
 from MetadataAlgoTest import MetadataAlgoTest
 from ContextMonitorTest import ContextMonitorTest
 from PlugAlgoTest import PlugAlgoTest
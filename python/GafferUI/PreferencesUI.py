@@ -34,6 +34,8 @@
 #
 ##########################################################################
 
+import imath
+
 import Gaffer
 import GafferUI
 
@@ -63,3 +65,56 @@ Gaffer.Metadata.registerNode(
 	}
 
 )
+
+## Displays the nodes using the most memory in the ValuePlug cache.
+# Intended for use as a custom widget in the Cache section of the
+# preferences. Statistics are only available while
+# `Gaffer.ValuePlug.getCacheStatisticsEnabled()` is True.
+class CacheStatisticsWidget( GafferUI.Widget ) :
+
+	def __init__( self, plugParent, maxLines = 10, **kw ) :
+
+		column = GafferUI.ListContainer( GafferUI.ListContainer.Orientation.Vertical, spacing = 4 )
+		GafferUI.Widget.__init__( self, column, **kw )
+
+		self.__maxLines = maxLines
+
+		with column :
+
+			with GafferUI.ListContainer( GafferUI.ListContainer.Orientation.Horizontal ) :
+				GafferUI.Spacer( imath.V2i( GafferUI.PlugWidget.labelWidth(), 1 ) )
+				button = GafferUI.Button( "Show Top Consumers" )
+				self.__buttonClickedConnection = button.clickedSignal().connect( Gaffer.WeakMethod( self.__buttonClicked ) )
+				GafferUI.Spacer( imath.V2i( 1 ), imath.V2i( 999999, 1 ), parenting = { "expand" : True } )
+
+			self.__text = GafferUI.MultiLineTextWidget( editable = False, role = GafferUI.MultiLineTextWidget.Role.Code )
+			self.__text.setVisible( False )
+
+	def __buttonClicked( self, button ) :
+
+		self.__text.setText( self.__format() )
+		self.__text.setVisible( True )
+
+	def __format( self ) :
+
+		if not Gaffer.ValuePlug.getCacheStatisticsEnabled() :
+			return "Turn on Record Statistics to see cache usage by node."
+
+		statistics = Gaffer.ValuePlug.cacheStatistics()["nodes"]
+		items = sorted( statistics.items(), key = lambda x : x[1]["bytes"], reverse = True )
+		items = [ x for x in items[:self.__maxLines] if x[1]["bytes"] ]
+		if not items :
+			return "No cache entries recorded."
+
+		width = max( len( x[0] ) for x in items ) + 4
+		lines = [
+			"{name:<{width}}{mb:.1f}M ({entries} entries, {hitRate:.0f}% hits)".format(
+				name = name, width = width,
+				mb = s["bytes"] / ( 1024.0 * 1024.0 ),
+				entries = s["entries"],
+				hitRate = 100.0 * s["hits"] / max( s["hits"] + s["misses"], 1 ),
+			)
+			for name, s in items
+		]
+
+		return "\n".join( lines )
@@ -49,9 +49,70 @@
 #include "boost/bind.hpp"
 #include "boost/bind/placeholders.hpp"
 
+#include "tbb/task_arena.h"
+
+#include <algorithm>
+#include <chrono>
+#include <condition_variable>
+#include <mutex>
+#include <thread>
+
+// Waiting for a batch being executed by another thread is only
+// safe if the executing thread can't steal unrelated work while it
+// executes, since that work might itself be waiting for the batch.
+// We prevent that using TBB's task isolation, and must fall back to
+// executing individually if it is not available.
+#if TBB_INTERFACE_VERSION >= 10000
+#define GAFFER_BATCH_EXECUTIONS
+#endif
+
 using namespace IECore;
 using namespace Gaffer;
 
+//////////////////////////////////////////////////////////////////////////
+// Batcher implementation
+//////////////////////////////////////////////////////////////////////////
+
+// Collects the executions requested by threads which arrive while
+// another thread is executing a batch, so that they can be performed
+// together in the next batch.
+struct Expression::Batcher
+{
+
+	Batcher()
+		:	executing( false )
+	{
+	}
+
+	// An execution requested by a single thread. Requests live
+	// on the stack of the requesting thread, which waits until
+	// the request is finished.
+	struct Request
+	{
+
+		Request( const Context *context )
+			:	context( context ), batched( false ), finished( false )
+		{
+		}
+
+		const Context *context;
+		// Null if the batch failed.
+		ConstObjectVectorPtr result;
+		// True once a thread has taken the request
+		// into a batch it is executing.
+		bool batched;
+		bool finished;
+
+	};
+
+	std::mutex mutex;
+	std::condition_variable condition;
+	std::vector<Request *> pending;
+	bool executing;
+	std::thread::id executingThread;
+
+};
+
 //////////////////////////////////////////////////////////////////////////
 // Expression implementation
 //////////////////////////////////////////////////////////////////////////
@@ -61,7 +122,7 @@ size_t Expression::g_firstPlugIndex;
 IE_CORE_DEFINERUNTIMETYPED( Expression );
 
 Expression::Expression( const std::string &name )
-	:	ComputeNode( name ), m_engine( nullptr )
+	:	ComputeNode( name ), m_engine( nullptr ), m_batcher( new Batcher )
 {
 	storeIndexOfNextChild( g_firstPlugIndex );
 
@@ -338,7 +399,9 @@ void Expression::compute( ValuePlug *output, const Context *context ) const
 			{
 				inputs.push_back( it->get() );
 			}
-			static_cast<ObjectVectorPlug *>( output )->setValue( m_engine->execute( context, inputs ) );
+			static_cast<ObjectVectorPlug *>( output )->setValue(
+				m_engine->executesSerially() ? executeBatched( context, inputs ) : m_engine->execute( context, inputs )
+			);
 		}
 		else
 		{
@@ -386,6 +449,103 @@ void Expression::compute( ValuePlug *output, const Context *context ) const
 	ComputeNode::compute( output, context );
 }
 
+IECore::ConstObjectVectorPtr Expression::executeBatched( const Context *context, const std::vector<const ValuePlug *> &inputs ) const
+{
+#ifdef GAFFER_BATCH_EXECUTIONS
+	Batcher::Request request( context );
+
+	std::unique_lock<std::mutex> lock( m_batcher->mutex );
+	if( m_batcher->executing && m_batcher->executingThread == std::this_thread::get_id() )
+	{
+		// We're already executing a batch further up the stack,
+		// so can't wait for it.
+		lock.unlock();
+		return m_engine->execute( context, inputs );
+	}
+
+	m_batcher->pending.push_back( &request );
+	while( !request.finished )
+	{
+		if( m_batcher->executing )
+		{
+			// Another thread is executing a batch, so wait for it to finish
+			// and then either collect our result or execute the next batch
+			// ourselves. We wake periodically so that we don't delay
+			// cancellation while our request is still pending.
+			m_batcher->condition.wait_for( lock, std::chrono::milliseconds( 100 ) );
+			if( !request.batched )
+			{
+				try
+				{
+					IECore::Canceller::check( context->canceller() );
+				}
+				catch( ... )
+				{
+					m_batcher->pending.erase( std::find( m_batcher->pending.begin(), m_batcher->pending.end(), &request ) );
+					throw;
+				}
+			}
+			continue;
+		}
+
+		// Execute all pending requests, including our own, in a single batch.
+		std::vector<Batcher::Request *> batch;
+		batch.swap( m_batcher->pending );
+		m_batcher->executing = true;
+		m_batcher->executingThread = std::this_thread::get_id();
+
+		std::vector<const Context *> contexts;
+		contexts.reserve( batch.size() );
+		for( std::vector<Batcher::Request *>::const_iterator it = batch.begin(), eIt = batch.end(); it != eIt; ++it )
+		{
+			(*it)->batched = true;
+			contexts.push_back( (*it)->context );
+		}
+
+		lock.unlock();
+
+		std::vector<ConstObjectVectorPtr> results;
+		try
+		{
+			// Isolate the execution so that while waiting on its own
+			// internal tasks, this thread can't pick up unrelated tasks
+			// which themselves wait on the batch we're executing.
+			tbb::this_task_arena::isolate(
+				[this, &contexts, &inputs, &results] {
+					m_engine->executeBatch( contexts, inputs, results );
+				}
+			);
+		}
+		catch( ... )
+		{
+			// Leave the results empty, so that each request is
+			// executed again individually below.
+			results.clear();
+		}
+
+		lock.lock();
+		for( size_t i = 0, e = batch.size(); i < e; ++i )
+		{
+			batch[i]->result = results.size() == e ? results[i] : nullptr;
+			batch[i]->finished = true;
+		}
+		m_batcher->executing = false;
+		m_batcher->condition.notify_all();
+	}
+
+	lock.unlock();
+	if( request.result )
+	{
+		return request.result;
+	}
+
+	// The batch failed, perhaps because of an error in the execution
+	// for some other context. Execute individually so that we only
+	// report our own errors.
+#endif
+	return m_engine->execute( context, inputs );
+}
+
 void Expression::updatePlugs( const std::vector<ValuePlug *> &inPlugs, const std::vector<ValuePlug *> &outPlugs )
 {
 	for( size_t i = 0, e = inPlugs.size(); i < e; ++i )
@@ -532,6 +692,21 @@ Expression::EnginePtr Expression::Engine::create( const std::string engineType )
 	return it->second();
 }
 
+void Expression::Engine::executeBatch( const std::vector<const Context *> &contexts, const std::vector<const ValuePlug *> &proxyInputs, std::vector<IECore::ConstObjectVectorPtr> &results ) const
+{
+	results.reserve( results.size() + contexts.size() );
+	for( std::vector<const Context *>::const_iterator it = contexts.begin(), eIt = contexts.end(); it != eIt; ++it )
+	{
+		Context::Scope scope( *it );
+		results.push_back( execute( *it, proxyInputs ) );
+	}
+}
+
+bool Expression::Engine::executesSerially() const
+{
+	return false;
+}
+
 void Expression::Engine::registerEngine( const std::string engineType, Creator creator )
 {
 	creators()[engineType] = creator;
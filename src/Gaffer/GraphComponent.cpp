@@ -48,12 +48,124 @@
 #include "boost/lexical_cast.hpp"
 #include "boost/regex.hpp"
 
+#include <cctype>
 #include <set>
+#include <unordered_map>
 
 using namespace Gaffer;
 using namespace IECore;
 using namespace std;
 
+//////////////////////////////////////////////////////////////////////////
+// NameIndex
+//////////////////////////////////////////////////////////////////////////
+
+namespace
+{
+
+// Parents with more children than this maintain a NameIndex.
+const size_t g_nameIndexThreshold = 64;
+
+// Calls `f( prefix, suffix )` for every way in which `name` can be split
+// into a prefix and a numeric suffix, treating an empty suffix as 0. These
+// are exactly the splits that `setName()` considers when making names unique.
+template<typename F>
+void visitNumericSuffixes( const std::string &name, F &&f )
+{
+	size_t digitsBegin = name.size();
+	while( digitsBegin > 0 && isdigit( name[digitsBegin-1] ) )
+	{
+		--digitsBegin;
+	}
+
+	for( size_t i = digitsBegin; i <= name.size(); ++i )
+	{
+		f( name.substr( 0, i ), i < name.size() ? strtol( name.c_str() + i, nullptr, 10 ) : 0 );
+	}
+}
+
+} // namespace
+
+struct GraphComponent::NameIndex
+{
+
+	// Keyed by the address of the interned name, which
+	// is unique to each name.
+	typedef std::unordered_map<const char *, GraphComponent *> Children;
+	Children children;
+
+	// For each prefix, the minimum numeric suffix that would make a name
+	// unique. Computed lazily, kept up to date as children are added, and
+	// discarded whenever the removal of a child might invalidate it.
+	typedef std::unordered_map<std::string, int> Suffixes;
+	Suffixes suffixes;
+
+	void add( GraphComponent *child )
+	{
+		children[child->m_name.c_str()] = child;
+		visitNumericSuffixes(
+			child->m_name.string(),
+			[this]( const std::string &prefix, long suffix ) {
+				Suffixes::iterator it = suffixes.find( prefix );
+				if( it != suffixes.end() )
+				{
+					it->second = max( it->second, (int)suffix + 1 );
+				}
+			}
+		);
+	}
+
+	void remove( GraphComponent *child )
+	{
+		Children::iterator it = children.find( child->m_name.c_str() );
+		if( it == children.end() || it->second != child )
+		{
+			return;
+		}
+
+		children.erase( it );
+		visitNumericSuffixes(
+			child->m_name.string(),
+			[this]( const std::string &prefix, long suffix ) {
+				Suffixes::iterator it = suffixes.find( prefix );
+				if( it != suffixes.end() && it->second <= (int)suffix + 1 )
+				{
+					suffixes.erase( it );
+				}
+			}
+		);
+	}
+
+	int uniqueSuffix( const std::string &prefix, int suffix )
+	{
+		Suffixes::iterator it = suffixes.find( prefix );
+		if( it == suffixes.end() )
+		{
+			int minSuffix = 0;
+			for( Children::const_iterator cIt = children.begin(), eIt = children.end(); cIt != eIt; ++cIt )
+			{
+				const std::string &name = cIt->second->m_name.string();
+				if( name.compare( 0, prefix.size(), prefix ) == 0 )
+				{
+					char *endPtr = nullptr;
+					long childSuffix = strtol( name.c_str() + prefix.size(), &endPtr, 10 );
+					if( *endPtr == '\0' )
+					{
+						minSuffix = max( minSuffix, (int)childSuffix + 1 );
+					}
+				}
+			}
+			it = suffixes.insert( Suffixes::value_type( prefix, minSuffix ) ).first;
+		}
+		return max( suffix, it->second );
+	}
+
+};
+
+//////////////////////////////////////////////////////////////////////////
+// GraphComponent
+//////////////////////////////////////////////////////////////////////////
+
 IE_CORE_DEFINERUNTIMETYPED( GraphComponent );
 
 GraphComponent::GraphComponent( const std::string &name )
@@ -91,12 +203,20 @@ const IECore::InternedString &GraphComponent::setName( const IECore::InternedStr
 	if( m_parent )
 	{
 		bool uniqueAlready = true;
-		for( ChildContainer::const_iterator it=m_parent->m_children.begin(), eIt=m_parent->m_children.end(); it != eIt; it++ )
+		if( m_parent->m_nameIndex )
 		{
-			if( *it != this && (*it)->m_name == newName )
+			const GraphComponent *existingChild = m_parent->childInternal( newName );
+			uniqueAlready = !existingChild || existingChild == this;
+		}
+		else
+		{
+			for( ChildContainer::const_iterator it=m_parent->m_children.begin(), eIt=m_parent->m_children.end(); it != eIt; it++ )
 			{
-				uniqueAlready = false;
-				break;
+				if( *it != this && (*it)->m_name == newName )
+				{
+					uniqueAlready = false;
+					break;
+				}
 			}
 		}
 
@@ -107,21 +227,31 @@ const IECore::InternedString &GraphComponent::setName( const IECore::InternedStr
 			std::string prefix;
 			int suffix = StringAlgo::numericSuffix( newName.value(), 1, &prefix );
 
-			// iterate over all the siblings to find the minimum value for the suffix which
-			// will be greater than any existing suffix.
-			for( ChildContainer::const_iterator it=m_parent->m_children.begin(), eIt=m_parent->m_children.end(); it != eIt; it++ )
+			if( m_parent->m_nameIndex && m_parent->childInternal( m_name ) != this )
 			{
-				if( *it == this )
-				{
-					continue;
-				}
-				if( (*it)->m_name.value().compare( 0, prefix.size(), prefix ) == 0 )
+				// we're not in the index yet (we're in the process of being
+				// added to the parent), so the index can find the minimum
+				// suffix without having to exclude our own name.
+				suffix = m_parent->m_nameIndex->uniqueSuffix( prefix, suffix );
+			}
+			else
+			{
+				// iterate over all the siblings to find the minimum value for the suffix which
+				// will be greater than any existing suffix.
+				for( ChildContainer::const_iterator it=m_parent->m_children.begin(), eIt=m_parent->m_children.end(); it != eIt; it++ )
 				{
-					char *endPtr = nullptr;
-					long siblingSuffix = strtol( (*it)->m_name.value().c_str() + prefix.size(), &endPtr, 10 );
-					if( *endPtr == '\0' )
+					if( *it == this )
+					{
+						continue;
+					}
+					if( (*it)->m_name.value().compare( 0, prefix.size(), prefix ) == 0 )
 					{
-						suffix = max( suffix, (int)siblingSuffix + 1 );
+						char *endPtr = nullptr;
+						long siblingSuffix = strtol( (*it)->m_name.value().c_str() + prefix.size(), &endPtr, 10 );
+						if( *endPtr == '\0' )
+						{
+							suffix = max( suffix, (int)siblingSuffix + 1 );
+						}
 					}
 				}
 			}
@@ -148,7 +278,16 @@ const IECore::InternedString &GraphComponent::setName( const IECore::InternedStr
 
 void GraphComponent::setNameInternal( const IECore::InternedString &name )
 {
+	NameIndex *parentIndex = m_parent ? m_parent->m_nameIndex.get() : nullptr;
+	if( parentIndex )
+	{
+		parentIndex->remove( this );
+	}
 	m_name = name;
+	if( parentIndex )
+	{
+		parentIndex->add( this );
+	}
 	nameChangedSignal()( this );
 }
 
@@ -305,6 +444,18 @@ void GraphComponent::addChildInternal( GraphComponentPtr child )
 	m_children.push_back( child );
 	child->m_parent = this;
 	child->setName( child->m_name.value() ); // to force uniqueness
+	if( m_nameIndex )
+	{
+		m_nameIndex->add( child.get() );
+	}
+	else if( m_children.size() > g_nameIndexThreshold )
+	{
+		m_nameIndex.reset( new NameIndex );
+		for( ChildContainer::const_iterator it = m_children.begin(), eIt = m_children.end(); it != eIt; ++it )
+		{
+			m_nameIndex->add( it->get() );
+		}
+	}
 	childAddedSignal()( this, child.get() );
 	child->parentChangedSignal()( child.get(), previousParent );
 }
@@ -366,6 +517,14 @@ void GraphComponent::removeChildInternal( GraphComponentPtr child, bool emitPare
 		throw Exception( boost::str( boost::format( "GraphComponent::removeChildInternal : \"%s\" is not a child of \"%s\"." ) % child->fullName() % fullName() ) );
 	}
 	m_children.erase( it );
+	if( m_nameIndex )
+	{
+		m_nameIndex->remove( child.get() );
+		if( m_children.size() < g_nameIndexThreshold / 2 )
+		{
+			m_nameIndex.reset();
+		}
+	}
 	child->m_parent = nullptr;
 	childRemovedSignal()( this, child.get() );
 	if( emitParentChanged )
@@ -379,6 +538,24 @@ const GraphComponent::ChildContainer &GraphComponent::children() const
 	return m_children;
 }
 
+GraphComponent *GraphComponent::childInternal( const IECore::InternedString &name ) const
+{
+	if( m_nameIndex )
+	{
+		NameIndex::Children::const_iterator it = m_nameIndex->children.find( name.c_str() );
+		return it != m_nameIndex->children.end() ? it->second : nullptr;
+	}
+
+	for( ChildContainer::const_iterator it=m_children.begin(), eIt=m_children.end(); it!=eIt; it++ )
+	{
+		if( (*it)->m_name==name )
+		{
+			return it->get();
+		}
+	}
+	return nullptr;
+}
+
 GraphComponent *GraphComponent::ancestor( IECore::TypeId type )
 {
 	GraphComponent *a = m_parent;
@@ -49,6 +49,15 @@ Monitor::~Monitor()
 	Process::deregisterMonitor( this );
 }
 
+void Monitor::incrementCounter( const IECore::InternedString &name, size_t amount )
+{
+	Process::incrementMonitorCounters( name, amount );
+}
+
+void Monitor::counterIncremented( const IECore::InternedString &name, size_t amount )
+{
+}
+
 void Monitor::setActive( bool active )
 {
 	if( active )
@@ -40,6 +40,7 @@
 #include "Gaffer/Plug.h"
 
 #include <iomanip>
+#include <map>
 
 using namespace Gaffer;
 
@@ -386,6 +387,30 @@ std::string formatStatistics( const PerformanceMonitor &monitor, size_t maxLines
 	outputItems( names, values, ss );
 	ss << "\n";
 
+	// Then any counters, sorted by name
+
+	const PerformanceMonitor::CountersMap &counters = monitor.allCounters();
+	if( counters.size() )
+	{
+		std::map<std::string, size_t> sortedCounters;
+		for( const auto &counter : counters )
+		{
+			sortedCounters[counter.first.string()] = counter.second;
+		}
+
+		std::vector<std::string> counterNames;
+		std::vector<size_t> counterValues;
+		for( const auto &counter : sortedCounters )
+		{
+			counterNames.push_back( counter.first );
+			counterValues.push_back( counter.second );
+		}
+
+		ss << "Counters :\n\n";
+		outputItems( counterNames, counterValues, ss );
+		ss << "\n";
+	}
+
 	// Now show breakdowns by plugs in each category
 	std::string s = ss.str();
 	for( int m = First; m <= Last; ++m )
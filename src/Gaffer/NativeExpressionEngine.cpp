@@ -0,0 +1,2368 @@
+//////////////////////////////////////////////////////////////////////////
+//
+//  Copyright (c) 2018, Image Engine Design Inc. All rights reserved.
+//
+//  Redistribution and use in source and binary forms, with or without
+//  modification, are permitted provided that the following conditions are
+//  met:
+//
+//      * Redistributions of source code must retain the above
+//        copyright notice, this list of conditions and the following
+//        disclaimer.
+//
+//      * Redistributions in binary form must reproduce the above
+//        copyright notice, this list of conditions and the following
+//        disclaimer in the documentation and/or other materials provided with
+//        the distribution.
+//
+//      * Neither the name of John Haddon nor the names of
+//        any other contributors to this software may be used to endorse or
+//        promote products derived from this software without specific prior
+//        written permission.
+//
+//  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+//  IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+//  THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+//  PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+//  CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+//  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+//  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+//  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+//  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+//  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+//  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+//////////////////////////////////////////////////////////////////////////
+
+#include "Gaffer/Expression.h"
+
+#include "Gaffer/CompoundNumericPlug.h"
+#include "Gaffer/Context.h"
+#include "Gaffer/NumericPlug.h"
+#include "Gaffer/StringPlug.h"
+
+#include "IECore/NullObject.h"
+#include "IECore/SimpleTypedData.h"
+#include "IECore/VectorTypedData.h"
+
+#include "boost/algorithm/string/classification.hpp"
+#include "boost/algorithm/string/join.hpp"
+#include "boost/algorithm/string/replace.hpp"
+#include "boost/algorithm/string/split.hpp"
+#include "boost/algorithm/string/trim.hpp"
+#include "boost/format.hpp"
+#include "boost/optional.hpp"
+#include "boost/regex.hpp"
+#include "boost/variant.hpp"
+
+#include <cerrno>
+#include <cmath>
+#include <cstdlib>
+#include <cstring>
+#include <limits>
+#include <memory>
+#include <unordered_map>
+
+using namespace std;
+using namespace Imath;
+using namespace IECore;
+using namespace Gaffer;
+
+//////////////////////////////////////////////////////////////////////////
+// The NativeExpressionEngine implements a subset of the Python expression
+// language entirely in C++, so that simple expressions can be evaluated
+// without acquiring the GIL. The subset is chosen such that any expression
+// it accepts gives the same result as when evaluated by the Python engine
+// (with Python 2 semantics for division). Supported features are :
+//
+// - Plug reads and writes using the `parent["node"]["plug"]` syntax, for
+//   Bool, Int, Float, String, V2f, V3f and Color3f plugs.
+// - Local variables.
+// - Int, float, bool and string literals.
+// - Arithmetic (`+ - * / // % **`), comparison (`< <= > >= == !=`) and
+//   boolean (`and or not`) operators, and conditional expressions.
+// - Context reads via `context["name"]`, `context.get()`, `context.getFrame()`,
+//   `context.getTime()`, `context.getFramesPerSecond()` and `"name" in context`.
+// - The `abs()`, `min()`, `max()`, `round()`, `int()` and `float()` builtins,
+//   common functions from the `math` module, and the `imath.V2f`, `imath.V3f`
+//   and `imath.Color3f` constructors.
+//////////////////////////////////////////////////////////////////////////
+
+namespace
+{
+
+//////////////////////////////////////////////////////////////////////////
+// Values
+//////////////////////////////////////////////////////////////////////////
+
+typedef boost::variant<bool, int64_t, double, std::string, V2f, V3f, Color3f> Value;
+
+enum ValueType
+{
+	BoolType,
+	IntType,
+	FloatType,
+	StringType,
+	V2fType,
+	V3fType,
+	Color3fType
+};
+
+ValueType valueType( const Value &v )
+{
+	return (ValueType)v.which();
+}
+
+const char *typeName( const Value &v )
+{
+	static const char *names[] = { "bool", "int", "float", "str", "V2f", "V3f", "Color3f" };
+	return names[v.which()];
+}
+
+bool isNumeric( const Value &v )
+{
+	return valueType( v ) <= FloatType;
+}
+
+// Bools behave as integers for the purposes of arithmetic,
+// as they do in Python.
+bool isInteger( const Value &v )
+{
+	return valueType( v ) <= IntType;
+}
+
+bool isVector( const Value &v )
+{
+	return valueType( v ) >= V2fType;
+}
+
+// Python integers have unlimited precision, but ours are 64 bit,
+// so we must throw rather than silently overflow.
+[[noreturn]] void throwIntegerOverflow()
+{
+	throw IECore::Exception( "integer overflow" );
+}
+
+int64_t toInteger( const Value &v )
+{
+	if( valueType( v ) == BoolType )
+	{
+		return boost::get<bool>( v ) ? 1 : 0;
+	}
+	return boost::get<int64_t>( v );
+}
+
+double toDouble( const Value &v )
+{
+	switch( valueType( v ) )
+	{
+		case BoolType :
+			return boost::get<bool>( v ) ? 1.0 : 0.0;
+		case IntType :
+			return boost::get<int64_t>( v );
+		case FloatType :
+			return boost::get<double>( v );
+		default :
+			throw IECore::Exception( boost::str( boost::format( "a float is required, not '%s'" ) % typeName( v ) ) );
+	}
+}
+
+// IntData and IntPlugs are only 32 bit, so results must be
+// range checked on their way out of the expression.
+int narrowInteger( int64_t i )
+{
+	if( i < std::numeric_limits<int>::min() || i > std::numeric_limits<int>::max() )
+	{
+		throwIntegerOverflow();
+	}
+	return static_cast<int>( i );
+}
+
+int truncateToInteger( double d )
+{
+	d = trunc( d );
+	// Written so that NaN fails the check too.
+	if( !( d >= std::numeric_limits<int>::min() && d <= std::numeric_limits<int>::max() ) )
+	{
+		throwIntegerOverflow();
+	}
+	return static_cast<int>( d );
+}
+
+bool truth( const Value &v )
+{
+	switch( valueType( v ) )
+	{
+		case BoolType :
+			return boost::get<bool>( v );
+		case IntType :
+			return boost::get<int64_t>( v ) != 0;
+		case FloatType :
+			return boost::get<double>( v ) != 0.0;
+		case StringType :
+			return !boost::get<std::string>( v ).empty();
+		default :
+			return true;
+	}
+}
+
+size_t vectorSize( const Value &v )
+{
+	return valueType( v ) == V2fType ? 2 : 3;
+}
+
+float vectorComponent( const Value &v, size_t index )
+{
+	switch( valueType( v ) )
+	{
+		case V2fType :
+			return boost::get<V2f>( v )[index];
+		case V3fType :
+			return boost::get<V3f>( v )[index];
+		case Color3fType :
+			return boost::get<Color3f>( v )[index];
+		default :
+			throw IECore::Exception( boost::str( boost::format( "'%s' object has no components" ) % typeName( v ) ) );
+	}
+}
+
+// Applies `f` to each component of the vectors `a` and `b`,
+// which must have the same type.
+template<typename F>
+Value vectorOp( const Value &a, const Value &b, F &&f )
+{
+	switch( valueType( a ) )
+	{
+		case V2fType :
+		{
+			const V2f &va = boost::get<V2f>( a ); const V2f &vb = boost::get<V2f>( b );
+			return V2f( f( va[0], vb[0] ), f( va[1], vb[1] ) );
+		}
+		case V3fType :
+		{
+			const V3f &va = boost::get<V3f>( a ); const V3f &vb = boost::get<V3f>( b );
+			return V3f( f( va[0], vb[0] ), f( va[1], vb[1] ), f( va[2], vb[2] ) );
+		}
+		default :
+		{
+			const Color3f &va = boost::get<Color3f>( a ); const Color3f &vb = boost::get<Color3f>( b );
+			return Color3f( f( va[0], vb[0] ), f( va[1], vb[1] ), f( va[2], vb[2] ) );
+		}
+	}
+}
+
+// Applies `f( component, s )` to each component of the vector `v`.
+template<typename F>
+Value vectorScalarOp( const Value &v, float s, F &&f )
+{
+	switch( valueType( v ) )
+	{
+		case V2fType :
+		{
+			const V2f &vv = boost::get<V2f>( v );
+			return V2f( f( vv[0], s ), f( vv[1], s ) );
+		}
+		case V3fType :
+		{
+			const V3f &vv = boost::get<V3f>( v );
+			return V3f( f( vv[0], s ), f( vv[1], s ), f( vv[2], s ) );
+		}
+		default :
+		{
+			const Color3f &vv = boost::get<Color3f>( v );
+			return Color3f( f( vv[0], s ), f( vv[1], s ), f( vv[2], s ) );
+		}
+	}
+}
+
+Value dataToValue( const Data *data, const std::string &name )
+{
+	switch( data->typeId() )
+	{
+		case BoolDataTypeId :
+			return static_cast<const BoolData *>( data )->readable();
+		case IntDataTypeId :
+			return (int64_t)static_cast<const IntData *>( data )->readable();
+		case FloatDataTypeId :
+			return (double)static_cast<const FloatData *>( data )->readable();
+		case DoubleDataTypeId :
+			return static_cast<const DoubleData *>( data )->readable();
+		case StringDataTypeId :
+			return static_cast<const StringData *>( data )->readable();
+		case InternedStringDataTypeId :
+			return static_cast<const InternedStringData *>( data )->readable().string();
+		case V2fDataTypeId :
+			return static_cast<const V2fData *>( data )->readable();
+		case V3fDataTypeId :
+			return static_cast<const V3fData *>( data )->readable();
+		case Color3fDataTypeId :
+			return static_cast<const Color3fData *>( data )->readable();
+		default :
+			throw IECore::Exception( boost::str(
+				boost::format( "Context variable \"%s\" has unsupported type \"%s\"" ) % name % data->typeName()
+			) );
+	}
+}
+
+ObjectPtr valueToObject( const Value &v )
+{
+	switch( valueType( v ) )
+	{
+		case BoolType :
+			return new BoolData( boost::get<bool>( v ) );
+		case IntType :
+			return new IntData( narrowInteger( boost::get<int64_t>( v ) ) );
+		case FloatType :
+			return new DoubleData( boost::get<double>( v ) );
+		case StringType :
+			return new StringData( boost::get<std::string>( v ) );
+		case V2fType :
+			return new V2fData( boost::get<V2f>( v ) );
+		case V3fType :
+			return new V3fData( boost::get<V3f>( v ) );
+		default :
+			return new Color3fData( boost::get<Color3f>( v ) );
+	}
+}
+
+bool plugTypeSupported( const ValuePlug *plug )
+{
+	switch( (Gaffer::TypeId)plug->typeId() )
+	{
+		case BoolPlugTypeId :
+		case IntPlugTypeId :
+		case FloatPlugTypeId :
+		case StringPlugTypeId :
+		case V2fPlugTypeId :
+		case V3fPlugTypeId :
+		case Color3fPlugTypeId :
+			return true;
+		default :
+			return false;
+	}
+}
+
+Value plugValue( const ValuePlug *plug )
+{
+	switch( (Gaffer::TypeId)plug->typeId() )
+	{
+		case BoolPlugTypeId :
+			return static_cast<const BoolPlug *>( plug )->getValue();
+		case IntPlugTypeId :
+			return (int64_t)static_cast<const IntPlug *>( plug )->getValue();
+		case FloatPlugTypeId :
+			return (double)static_cast<const FloatPlug *>( plug )->getValue();
+		case StringPlugTypeId :
+			return static_cast<const StringPlug *>( plug )->getValue();
+		case V2fPlugTypeId :
+			return static_cast<const V2fPlug *>( plug )->getValue();
+		case V3fPlugTypeId :
+			return static_cast<const V3fPlug *>( plug )->getValue();
+		case Color3fPlugTypeId :
+			return static_cast<const Color3fPlug *>( plug )->getValue();
+		default :
+			// Shouldn't get here, as parse() rejects unsupported plugs.
+			throw IECore::Exception( boost::str( boost::format( "Unsupported plug type \"%s\"" ) % plug->typeName() ) );
+	}
+}
+
+std::string floatLiteral( double f )
+{
+	std::string result = boost::str( boost::format( "%.9g" ) % f );
+	if( result.find_first_of( ".e" ) == std::string::npos )
+	{
+		result += ".0";
+	}
+	return result;
+}
+
+std::string stringLiteral( const std::string &s )
+{
+	std::string result = "\"";
+	for( const char c : s )
+	{
+		switch( c )
+		{
+			case '\\' : result += "\\\\"; break;
+			case '"' : result += "\\\""; break;
+			case '\n' : result += "\\n"; break;
+			case '\t' : result += "\\t"; break;
+			default : result += c;
+		}
+	}
+	return result + "\"";
+}
+
+// Returns a literal for the specified value, in a form that can
+// be parsed by both this engine and the Python engine. Returns an
+// empty string if this is not possible.
+std::string literal( const ValuePlug *plug, bool defaultValue )
+{
+	switch( (Gaffer::TypeId)plug->typeId() )
+	{
+		case BoolPlugTypeId :
+		{
+			const BoolPlug *p = static_cast<const BoolPlug *>( plug );
+			return ( defaultValue ? p->defaultValue() : p->getValue() ) ? "True" : "False";
+		}
+		case IntPlugTypeId :
+		{
+			const IntPlug *p = static_cast<const IntPlug *>( plug );
+			return std::to_string( defaultValue ? p->defaultValue() : p->getValue() );
+		}
+		case FloatPlugTypeId :
+		{
+			const FloatPlug *p = static_cast<const FloatPlug *>( plug );
+			const float f = defaultValue ? p->defaultValue() : p->getValue();
+			return std::isfinite( f ) ? floatLiteral( f ) : "";
+		}
+		case StringPlugTypeId :
+		{
+			const StringPlug *p = static_cast<const StringPlug *>( plug );
+			return stringLiteral( defaultValue ? p->defaultValue() : p->getValue() );
+		}
+		case V2fPlugTypeId :
+		{
+			const V2fPlug *p = static_cast<const V2fPlug *>( plug );
+			const V2f v = defaultValue ? p->defaultValue() : p->getValue();
+			return "imath.V2f( " + floatLiteral( v[0] ) + ", " + floatLiteral( v[1] ) + " )";
+		}
+		case V3fPlugTypeId :
+		{
+			const V3fPlug *p = static_cast<const V3fPlug *>( plug );
+			const V3f v = defaultValue ? p->defaultValue() : p->getValue();
+			return "imath.V3f( " + floatLiteral( v[0] ) + ", " + floatLiteral( v[1] ) + ", " + floatLiteral( v[2] ) + " )";
+		}
+		case Color3fPlugTypeId :
+		{
+			const Color3fPlug *p = static_cast<const Color3fPlug *>( plug );
+			const Color3f c = defaultValue ? p->defaultValue() : p->getValue();
+			return "imath.Color3f( " + floatLiteral( c[0] ) + ", " + floatLiteral( c[1] ) + ", " + floatLiteral( c[2] ) + " )";
+		}
+		default :
+			return "";
+	}
+}
+
+//////////////////////////////////////////////////////////////////////////
+// Operators
+//////////////////////////////////////////////////////////////////////////
+
+enum BinaryOp
+{
+	Add,
+	Subtract,
+	Multiply,
+	Divide,
+	FloorDivide,
+	Modulo,
+	Power,
+	Less,
+	LessEqual,
+	Greater,
+	GreaterEqual,
+	Equal,
+	NotEqual
+};
+
+const char *opName( BinaryOp op )
+{
+	static const char *names[] = { "+", "-", "*", "/", "//", "%", "**", "<", "<=", ">", ">=", "==", "!=" };
+	return names[op];
+}
+
+[[noreturn]] void throwUnsupportedOperands( BinaryOp op, const Value &a, const Value &b )
+{
+	throw IECore::Exception( boost::str(
+		boost::format( "unsupported operand type(s) for %s: '%s' and '%s'" ) % opName( op ) % typeName( a ) % typeName( b )
+	) );
+}
+
+int64_t floorDivide( int64_t a, int64_t b )
+{
+	int64_t q = a / b;
+	if( ( a % b != 0 ) && ( ( a < 0 ) != ( b < 0 ) ) )
+	{
+		--q;
+	}
+	return q;
+}
+
+int64_t integerModulo( int64_t a, int64_t b )
+{
+	int64_t r = a % b;
+	if( r != 0 && ( ( r < 0 ) != ( b < 0 ) ) )
+	{
+		r += b;
+	}
+	return r;
+}
+
+int64_t checkedAdd( int64_t a, int64_t b )
+{
+	if( ( b > 0 && a > std::numeric_limits<int64_t>::max() - b ) || ( b < 0 && a < std::numeric_limits<int64_t>::min() - b ) )
+	{
+		throwIntegerOverflow();
+	}
+	return a + b;
+}
+
+int64_t checkedSubtract( int64_t a, int64_t b )
+{
+	if( ( b < 0 && a > std::numeric_limits<int64_t>::max() + b ) || ( b > 0 && a < std::numeric_limits<int64_t>::min() + b ) )
+	{
+		throwIntegerOverflow();
+	}
+	return a - b;
+}
+
+int64_t checkedMultiply( int64_t a, int64_t b )
+{
+	const int64_t max = std::numeric_limits<int64_t>::max();
+	const int64_t min = std::numeric_limits<int64_t>::min();
+	if( a > 0 )
+	{
+		if( ( b > 0 && a > max / b ) || ( b < 0 && b < min / a ) )
+		{
+			throwIntegerOverflow();
+		}
+	}
+	else if( a < 0 )
+	{
+		if( ( b > 0 && a < min / b ) || ( b < 0 && b < max / a ) )
+		{
+			throwIntegerOverflow();
+		}
+	}
+	return a * b;
+}
+
+// Exponentiation by squaring, so that the cost is logarithmic
+// in the exponent. Requires `e >= 0`.
+int64_t checkedPower( int64_t b, int64_t e )
+{
+	int64_t result = 1;
+	while( e )
+	{
+		if( e & 1 )
+		{
+			result = checkedMultiply( result, b );
+		}
+		e >>= 1;
+		if( e )
+		{
+			b = checkedMultiply( b, b );
+		}
+	}
+	return result;
+}
+
+double floatModulo( double a, double b )
+{
+	double r = fmod( a, b );
+	if( r != 0 && ( ( r < 0 ) != ( b < 0 ) ) )
+	{
+		r += b;
+	}
+	return r;
+}
+
+Value arithmetic( BinaryOp op, const Value &a, const Value &b )
+{
+	if( isNumeric( a ) && isNumeric( b ) )
+	{
+		if( isInteger( a ) && isInteger( b ) )
+		{
+			const int64_t ia = toInteger( a );
+			const int64_t ib = toInteger( b );
+			switch( op )
+			{
+				case Add :
+					return checkedAdd( ia, ib );
+				case Subtract :
+					return checkedSubtract( ia, ib );
+				case Multiply :
+					return checkedMultiply( ia, ib );
+				case Divide :
+				case FloorDivide :
+					// Python 2 semantics - integer division floors.
+					if( ib == 0 )
+					{
+						throw IECore::Exception( "integer division or modulo by zero" );
+					}
+					return floorDivide( ia, ib );
+				case Modulo :
+					if( ib == 0 )
+					{
+						throw IECore::Exception( "integer division or modulo by zero" );
+					}
+					return integerModulo( ia, ib );
+				case Power :
+				{
+					if( ib < 0 )
+					{
+						if( ia == 0 )
+						{
+							throw IECore::Exception( "0.0 cannot be raised to a negative power" );
+						}
+						return pow( (double)ia, (double)ib );
+					}
+					return checkedPower( ia, ib );
+				}
+				default :
+					break;
+			}
+		}
+		else
+		{
+			const double da = toDouble( a );
+			const double db = toDouble( b );
+			switch( op )
+			{
+				case Add :
+					return da + db;
+				case Subtract :
+					return da - db;
+				case Multiply :
+					return da * db;
+				case Divide :
+					if( db == 0 )
+					{
+						throw IECore::Exception( "float division by zero" );
+					}
+					return da / db;
+				case FloorDivide :
+					if( db == 0 )
+					{
+						throw IECore::Exception( "float divmod()" );
+					}
+					return floor( da / db );
+				case Modulo :
+					if( db == 0 )
+					{
+						throw IECore::Exception( "float modulo" );
+					}
+					return floatModulo( da, db );
+				case Power :
+					if( da == 0 && db < 0 )
+					{
+						throw IECore::Exception( "0.0 cannot be raised to a negative power" );
+					}
+					if( da < 0 && db != floor( db ) )
+					{
+						throw IECore::Exception( "negative number cannot be raised to a fractional power" );
+					}
+					return pow( da, db );
+				default :
+					break;
+			}
+		}
+	}
+	else if( op == Add && valueType( a ) == StringType && valueType( b ) == StringType )
+	{
+		return boost::get<std::string>( a ) + boost::get<std::string>( b );
+	}
+	else if( isVector( a ) && valueType( a ) == valueType( b ) )
+	{
+		switch( op )
+		{
+			case Add :
+				return vectorOp( a, b, [] ( float x, float y ) { return x + y; } );
+			case Subtract :
+				return vectorOp( a, b, [] ( float x, float y ) { return x - y; } );
+			case Multiply :
+				return vectorOp( a, b, [] ( float x, float y ) { return x * y; } );
+			case Divide :
+				return vectorOp( a, b, [] ( float x, float y ) { return x / y; } );
+			default :
+				break;
+		}
+	}
+	else if( isVector( a ) && isNumeric( b ) )
+	{
+		const float s = toDouble( b );
+		switch( op )
+		{
+			case Multiply :
+				return vectorScalarOp( a, s, [] ( float x, float y ) { return x * y; } );
+			case Divide :
+				return vectorScalarOp( a, s, [] ( float x, float y ) { return x / y; } );
+			default :
+				break;
+		}
+	}
+	else if( isNumeric( a ) && isVector( b ) && op == Multiply )
+	{
+		return vectorScalarOp( b, toDouble( a ), [] ( float x, float y ) { return x * y; } );
+	}
+
+	throwUnsupportedOperands( op, a, b );
+}
+
+bool equal( const Value &a, const Value &b )
+{
+	if( isNumeric( a ) && isNumeric( b ) )
+	{
+		if( isInteger( a ) && isInteger( b ) )
+		{
+			return toInteger( a ) == toInteger( b );
+		}
+		return toDouble( a ) == toDouble( b );
+	}
+	return a == b;
+}
+
+Value comparison( BinaryOp op, const Value &a, const Value &b )
+{
+	if( op == Equal )
+	{
+		return equal( a, b );
+	}
+	else if( op == NotEqual )
+	{
+		return !equal( a, b );
+	}
+
+	int c = 0;
+	if( isNumeric( a ) && isNumeric( b ) )
+	{
+		if( isInteger( a ) && isInteger( b ) )
+		{
+			const int64_t ia = toInteger( a ), ib = toInteger( b );
+			c = ia < ib ? -1 : ( ia > ib ? 1 : 0 );
+		}
+		else
+		{
+			const double da = toDouble( a ), db = toDouble( b );
+			c = da < db ? -1 : ( da > db ? 1 : 0 );
+		}
+	}
+	else if( valueType( a ) == StringType && valueType( b ) == StringType )
+	{
+		c = boost::get<std::string>( a ).compare( boost::get<std::string>( b ) );
+	}
+	else
+	{
+		throwUnsupportedOperands( op, a, b );
+	}
+
+	switch( op )
+	{
+		case Less :
+			return c < 0;
+		case LessEqual :
+			return c <= 0;
+		case Greater :
+			return c > 0;
+		default :
+			return c >= 0;
+	}
+}
+
+//////////////////////////////////////////////////////////////////////////
+// Functions
+//////////////////////////////////////////////////////////////////////////
+
+enum Function
+{
+	Abs,
+	Min,
+	Max,
+	Round,
+	Int,
+	Float,
+	Sin,
+	Cos,
+	Tan,
+	ASin,
+	ACos,
+	ATan,
+	ATan2,
+	Sqrt,
+	Exp,
+	Log,
+	Log10,
+	Floor,
+	Ceil,
+	FAbs,
+	Pow,
+	FMod,
+	MakeV2f,
+	MakeV3f,
+	MakeColor3f
+};
+
+struct FunctionDescription
+{
+	const char *name;
+	Function function;
+	size_t minArguments;
+	size_t maxArguments;
+};
+
+const FunctionDescription g_builtins[] = {
+	{ "abs", Abs, 1, 1 },
+	{ "min", Min, 2, 1000 },
+	{ "max", Max, 2, 1000 },
+	{ "round", Round, 1, 1 },
+	{ "int", Int, 1, 1 },
+	{ "float", Float, 1, 1 },
+};
+
+const FunctionDescription g_mathFunctions[] = {
+	{ "sin", Sin, 1, 1 },
+	{ "cos", Cos, 1, 1 },
+	{ "tan", Tan, 1, 1 },
+	{ "asin", ASin, 1, 1 },
+	{ "acos", ACos, 1, 1 },
+	{ "atan", ATan, 1, 1 },
+	{ "atan2", ATan2, 2, 2 },
+	{ "sqrt", Sqrt, 1, 1 },
+	{ "exp", Exp, 1, 1 },
+	{ "log", Log, 1, 1 },
+	{ "log10", Log10, 1, 1 },
+	{ "floor", Floor, 1, 1 },
+	{ "ceil", Ceil, 1, 1 },
+	{ "fabs", FAbs, 1, 1 },
+	{ "pow", Pow, 2, 2 },
+	{ "fmod", FMod, 2, 2 },
+};
+
+const FunctionDescription g_imathFunctions[] = {
+	{ "V2f", MakeV2f, 1, 2 },
+	{ "V3f", MakeV3f, 1, 3 },
+	{ "Color3f", MakeColor3f, 1, 3 },
+};
+
+template<size_t N>
+const FunctionDescription *findFunction( const FunctionDescription (&functions)[N], const std::string &name )
+{
+	for( size_t i = 0; i < N; ++i )
+	{
+		if( name == functions[i].name )
+		{
+			return &functions[i];
+		}
+	}
+	return nullptr;
+}
+
+double mathArgument( const Value &v, bool domainOK )
+{
+	if( !domainOK )
+	{
+		throw IECore::Exception( "math domain error" );
+	}
+	return toDouble( v );
+}
+
+Value integerFromString( const std::string &s )
+{
+	const std::string t = boost::trim_copy( s );
+	char *end = nullptr;
+	errno = 0;
+	const long long result = strtoll( t.c_str(), &end, 10 );
+	if( t.empty() || *end != '\0' )
+	{
+		throw IECore::Exception( boost::str( boost::format( "invalid literal for int() with base 10: '%s'" ) % s ) );
+	}
+	if( errno == ERANGE )
+	{
+		throwIntegerOverflow();
+	}
+	return (int64_t)result;
+}
+
+Value floatFromString( const std::string &s )
+{
+	const std::string t = boost::trim_copy( s );
+	char *end = nullptr;
+	const double result = strtod( t.c_str(), &end );
+	if( t.empty() || *end != '\0' )
+	{
+		throw IECore::Exception( boost::str( boost::format( "could not convert string to float: %s" ) % s ) );
+	}
+	return result;
+}
+
+Value call( Function function, const std::vector<Value> &args )
+{
+	switch( function )
+	{
+		case Abs :
+			if( isInteger( args[0] ) )
+			{
+				const int64_t i = toInteger( args[0] );
+				return i < 0 ? checkedSubtract( 0, i ) : i;
+			}
+			return fabs( toDouble( args[0] ) );
+		case Min :
+		case Max :
+		{
+			size_t result = 0;
+			for( size_t i = 1; i < args.size(); ++i )
+			{
+				const bool less = boost::get<bool>( comparison( Less, args[i], args[result] ) );
+				const bool greater = boost::get<bool>( comparison( Greater, args[i], args[result] ) );
+				if( ( function == Min && less ) || ( function == Max && greater ) )
+				{
+					result = i;
+				}
+			}
+			return args[result];
+		}
+		case Round :
+			// Python 2 semantics - rounds half away from
+			// zero, and returns a float.
+			return round( toDouble( args[0] ) );
+		case Int :
+			if( valueType( args[0] ) == StringType )
+			{
+				return integerFromString( boost::get<std::string>( args[0] ) );
+			}
+			else if( isInteger( args[0] ) )
+			{
+				return toInteger( args[0] );
+			}
+			else
+			{
+				const double d = trunc( toDouble( args[0] ) );
+				// Written so that NaN fails the check too.
+				if( !( d >= (double)std::numeric_limits<int64_t>::min() && d < -(double)std::numeric_limits<int64_t>::min() ) )
+				{
+					throwIntegerOverflow();
+				}
+				return (int64_t)d;
+			}
+		case Float :
+			if( valueType( args[0] ) == StringType )
+			{
+				return floatFromString( boost::get<std::string>( args[0] ) );
+			}
+			return toDouble( args[0] );
+		case Sin :
+			return sin( toDouble( args[0] ) );
+		case Cos :
+			return cos( toDouble( args[0] ) );
+		case Tan :
+			return tan( toDouble( args[0] ) );
+		case ASin :
+			return asin( mathArgument( args[0], fabs( toDouble( args[0] ) ) <= 1 ) );
+		case ACos :
+			return acos( mathArgument( args[0], fabs( toDouble( args[0] ) ) <= 1 ) );
+		case ATan :
+			return atan( toDouble( args[0] ) );
+		case ATan2 :
+			return atan2( toDouble( args[0] ), toDouble( args[1] ) );
+		case Sqrt :
+			return sqrt( mathArgument( args[0], toDouble( args[0] ) >= 0 ) );
+		case Exp :
+			return exp( toDouble( args[0] ) );
+		case Log :
+			return log( mathArgument( args[0], toDouble( args[0] ) > 0 ) );
+		case Log10 :
+			return log10( mathArgument( args[0], toDouble( args[0] ) > 0 ) );
+		case Floor :
+			return floor( toDouble( args[0] ) );
+		case Ceil :
+			return ceil( toDouble( args[0] ) );
+		case FAbs :
+			return fabs( toDouble( args[0] ) );
+		case Pow :
+			return pow( toDouble( args[0] ), toDouble( args[1] ) );
+		case FMod :
+			if( toDouble( args[1] ) == 0 )
+			{
+				throw IECore::Exception( "math domain error" );
+			}
+			return fmod( toDouble( args[0] ), toDouble( args[1] ) );
+		case MakeV2f :
+		{
+			const float x = toDouble( args[0] );
+			return args.size() == 1 ? V2f( x ) : V2f( x, toDouble( args[1] ) );
+		}
+		case MakeV3f :
+		case MakeColor3f :
+		{
+			if( args.size() == 2 )
+			{
+				throw IECore::Exception( "Expected 1 or 3 arguments" );
+			}
+			const float x = toDouble( args[0] );
+			const V3f v = args.size() == 1 ? V3f( x ) : V3f( x, toDouble( args[1] ), toDouble( args[2] ) );
+			if( function == MakeV3f )
+			{
+				return v;
+			}
+			return Color3f( v[0], v[1], v[2] );
+		}
+	}
+
+	throw IECore::Exception( "Unknown function" );
+}
+
+//////////////////////////////////////////////////////////////////////////
+// Abstract syntax tree
+//////////////////////////////////////////////////////////////////////////
+
+struct Evaluation
+{
+
+	Evaluation( const Context *context, size_t numLocals )
+		:	context( context ), locals( numLocals )
+	{
+	}
+
+	const Context *context;
+	std::vector<Value> inputs;
+	std::vector<Value> locals;
+
+};
+
+namespace AST
+{
+
+struct Node
+{
+	virtual ~Node() {}
+	virtual Value evaluate( const Evaluation &evaluation ) const = 0;
+};
+
+typedef std::unique_ptr<Node> NodePtr;
+
+struct Literal : public Node
+{
+	Literal( const Value &value ) : value( value ) {}
+	Value evaluate( const Evaluation &evaluation ) const override { return value; }
+	const Value value;
+};
+
+struct PlugRead : public Node
+{
+	PlugRead( size_t index ) : index( index ) {}
+	Value evaluate( const Evaluation &evaluation ) const override { return evaluation.inputs[index]; }
+	const size_t index;
+};
+
+struct LocalRead : public Node
+{
+	LocalRead( size_t index ) : index( index ) {}
+	Value evaluate( const Evaluation &evaluation ) const override { return evaluation.locals[index]; }
+	const size_t index;
+};
+
+struct ContextRead : public Node
+{
+
+	ContextRead( const std::string &name, NodePtr defaultValue, bool hasDefault )
+		:	name( name ), defaultValue( std::move( defaultValue ) ), hasDefault( hasDefault )
+	{
+	}
+
+	Value evaluate( const Evaluation &evaluation ) const override
+	{
+		const Data *data = evaluation.context->get<Data>( name, nullptr );
+		if( data )
+		{
+			return dataToValue( data, name.string() );
+		}
+		else if( !hasDefault )
+		{
+			throw IECore::Exception( boost::str( boost::format( "Context has no entry named \"%s\"" ) % name.string() ) );
+		}
+		else if( defaultValue )
+		{
+			return defaultValue->evaluate( evaluation );
+		}
+		// `context.get( "name" )` returns None in Python,
+		// which we don't support.
+		throw IECore::Exception( boost::str( boost::format( "Context has no entry named \"%s\"" ) % name.string() ) );
+	}
+
+	const InternedString name;
+	const NodePtr defaultValue;
+	const bool hasDefault;
+
+};
+
+struct ContextContains : public Node
+{
+	ContextContains( const std::string &name, bool negate ) : name( name ), negate( negate ) {}
+	Value evaluate( const Evaluation &evaluation ) const override
+	{
+		const bool contains = evaluation.context->get<Data>( name, nullptr );
+		return contains != negate;
+	}
+	const InternedString name;
+	const bool negate;
+};
+
+struct ContextFrame : public Node
+{
+	enum Method { Frame, Time, FramesPerSecond };
+	ContextFrame( Method method ) : method( method ) {}
+	Value evaluate( const Evaluation &evaluation ) const override
+	{
+		switch( method )
+		{
+			case Frame :
+				return (double)evaluation.context->getFrame();
+			case Time :
+				return (double)evaluation.context->getTime();
+			default :
+				return (double)evaluation.context->getFramesPerSecond();
+		}
+	}
+	const Method method;
+};
+
+struct Negate : public Node
+{
+	Negate( NodePtr operand ) : operand( std::move( operand ) ) {}
+	Value evaluate( const Evaluation &evaluation ) const override
+	{
+		const Value v = operand->evaluate( evaluation );
+		if( isInteger( v ) )
+		{
+			return checkedSubtract( 0, toInteger( v ) );
+		}
+		else if( valueType( v ) == FloatType )
+		{
+			return -boost::get<double>( v );
+		}
+		else if( isVector( v ) )
+		{
+			return vectorScalarOp( v, -1.0f, [] ( float x, float y ) { return x * y; } );
+		}
+		throw IECore::Exception( boost::str( boost::format( "bad operand type for unary -: '%s'" ) % typeName( v ) ) );
+	}
+	const NodePtr operand;
+};
+
+struct UnaryPlus : public Node
+{
+	UnaryPlus( NodePtr operand ) : operand( std::move( operand ) ) {}
+	Value evaluate( const Evaluation &evaluation ) const override
+	{
+		const Value v = operand->evaluate( evaluation );
+		if( isInteger( v ) )
+		{
+			return toInteger( v );
+		}
+		else if( valueType( v ) == FloatType )
+		{
+			return v;
+		}
+		throw IECore::Exception( boost::str( boost::format( "bad operand type for unary +: '%s'" ) % typeName( v ) ) );
+	}
+	const NodePtr operand;
+};
+
+struct Not : public Node
+{
+	Not( NodePtr operand ) : operand( std::move( operand ) ) {}
+	Value evaluate( const Evaluation &evaluation ) const override { return !truth( operand->evaluate( evaluation ) ); }
+	const NodePtr operand;
+};
+
+struct Binary : public Node
+{
+	Binary( BinaryOp op, NodePtr a, NodePtr b ) : op( op ), a( std::move( a ) ), b( std::move( b ) ) {}
+	Value evaluate( const Evaluation &evaluation ) const override
+	{
+		const Value va = a->evaluate( evaluation );
+		const Value vb = b->evaluate( evaluation );
+		return op >= Less ? comparison( op, va, vb ) : arithmetic( op, va, vb );
+	}
+	const BinaryOp op;
+	const NodePtr a;
+	const NodePtr b;
+};
+
+// `and` and `or`, which short circuit and return
+// one of their operands, as in Python.
+struct BooleanOp : public Node
+{
+	BooleanOp( bool isAnd, NodePtr a, NodePtr b ) : isAnd( isAnd ), a( std::move( a ) ), b( std::move( b ) ) {}
+	Value evaluate( const Evaluation &evaluation ) const override
+	{
+		Value va = a->evaluate( evaluation );
+		if( truth( va ) != isAnd )
+		{
+			return va;
+		}
+		return b->evaluate( evaluation );
+	}
+	const bool isAnd;
+	const NodePtr a;
+	const NodePtr b;
+};
+
+struct Conditional : public Node
+{
+	Conditional( NodePtr condition, NodePtr a, NodePtr b ) : condition( std::move( condition ) ), a( std::move( a ) ), b( std::move( b ) ) {}
+	Value evaluate( const Evaluation &evaluation ) const override
+	{
+		return truth( condition->evaluate( evaluation ) ) ? a->evaluate( evaluation ) : b->evaluate( evaluation );
+	}
+	const NodePtr condition;
+	const NodePtr a;
+	const NodePtr b;
+};
+
+struct Component : public Node
+{
+	Component( NodePtr operand, int index ) : operand( std::move( operand ) ), index( index ) {}
+	Value evaluate( const Evaluation &evaluation ) const override
+	{
+		const Value v = operand->evaluate( evaluation );
+		if( !isVector( v ) )
+		{
+			throw IECore::Exception( boost::str( boost::format( "'%s' object has no components" ) % typeName( v ) ) );
+		}
+		const int size = vectorSize( v );
+		const int i = index < 0 ? index + size : index;
+		if( i < 0 || i >= size )
+		{
+			throw IECore::Exception( "Index out of range" );
+		}
+		return (double)vectorComponent( v, i );
+	}
+	const NodePtr operand;
+	const int index;
+};
+
+struct Call : public Node
+{
+	Call( Function function, std::vector<NodePtr> &&arguments ) : function( function ), arguments( std::move( arguments ) ) {}
+	Value evaluate( const Evaluation &evaluation ) const override
+	{
+		std::vector<Value> values;
+		values.reserve( arguments.size() );
+		for( const auto &a : arguments )
+		{
+			values.push_back( a->evaluate( evaluation ) );
+		}
+		return call( function, values );
+	}
+	const Function function;
+	const std::vector<NodePtr> arguments;
+};
+
+} // namespace AST
+
+struct Statement
+{
+	bool isOutput;
+	size_t index;
+	AST::NodePtr value;
+};
+
+struct Program
+{
+	std::vector<std::string> inPlugPaths;
+	std::vector<std::string> outPlugPaths;
+	std::vector<InternedString> contextNames;
+	std::vector<Statement> statements;
+	size_t numLocals = 0;
+};
+
+//////////////////////////////////////////////////////////////////////////
+// Tokeniser
+//////////////////////////////////////////////////////////////////////////
+
+struct Token
+{
+
+	enum Type
+	{
+		Name,
+		Number,
+		String,
+		Operator,
+		Newline,
+		End
+	};
+
+	Type type;
+	std::string text;
+	Value value;
+	int line;
+
+};
+
+[[noreturn]] void throwSyntaxError( int line, const std::string &message )
+{
+	throw IECore::Exception( boost::str( boost::format( "Line %d : %s" ) % line % message ) );
+}
+
+std::vector<Token> tokenise( const std::string &expression )
+{
+	std::vector<Token> result;
+
+	int line = 1;
+	int depth = 0;
+	const char *c = expression.c_str();
+	while( *c )
+	{
+		Token token;
+		token.line = line;
+
+		if( *c == ' ' || *c == '\t' || *c == '\r' )
+		{
+			c++;
+			continue;
+		}
+		else if( *c == '\\' && c[1] == '\n' )
+		{
+			c += 2;
+			line++;
+			continue;
+		}
+		else if( *c == '#' )
+		{
+			while( *c && *c != '\n' )
+			{
+				c++;
+			}
+			continue;
+		}
+		else if( *c == '\n' || *c == ';' )
+		{
+			if( *c == '\n' )
+			{
+				line++;
+			}
+			c++;
+			if( depth == 0 )
+			{
+				token.type = Token::Newline;
+				result.push_back( token );
+			}
+			continue;
+		}
+		else if( isdigit( *c ) || ( *c == '.' && isdigit( c[1] ) ) )
+		{
+			const char *begin = c;
+			bool isFloat = false;
+			while( isdigit( *c ) )
+			{
+				c++;
+			}
+			if( *c == '.' )
+			{
+				isFloat = true;
+				c++;
+				while( isdigit( *c ) )
+				{
+					c++;
+				}
+			}
+			if( *c == 'e' || *c == 'E' )
+			{
+				isFloat = true;
+				c++;
+				if( *c == '+' || *c == '-' )
+				{
+					c++;
+				}
+				if( !isdigit( *c ) )
+				{
+					throwSyntaxError( line, "Invalid number" );
+				}
+				while( isdigit( *c ) )
+				{
+					c++;
+				}
+			}
+			token.type = Token::Number;
+			token.text = std::string( begin, c );
+			if( isFloat )
+			{
+				token.value = strtod( token.text.c_str(), nullptr );
+			}
+			else
+			{
+				if( token.text.size() > 1 && token.text[0] == '0' )
+				{
+					// Python 2 would interpret this as octal.
+					throwSyntaxError( line, "Octal literals are not supported" );
+				}
+				errno = 0;
+				token.value = (int64_t)strtoll( token.text.c_str(), nullptr, 10 );
+				if( errno == ERANGE )
+				{
+					throwSyntaxError( line, "Integer literal is too large" );
+				}
+			}
+			if( isalpha( *c ) || *c == '_' )
+			{
+				throwSyntaxError( line, "Invalid number" );
+			}
+		}
+		else if( *c == '"' || *c == '\'' )
+		{
+			const char quote = *c++;
+			if( c[0] == quote && c[1] == quote )
+			{
+				throwSyntaxError( line, "Triple quoted strings are not supported" );
+			}
+			std::string s;
+			while( *c != quote )
+			{
+				if( !*c || *c == '\n' )
+				{
+					throwSyntaxError( line, "Unterminated string" );
+				}
+				if( *c == '\\' )
+				{
+					c++;
+					switch( *c )
+					{
+						case '\\' : s += '\\'; break;
+						case '\'' : s += '\''; break;
+						case '"' : s += '"'; break;
+						case 'n' : s += '\n'; break;
+						case 't' : s += '\t'; break;
+						default :
+							throwSyntaxError( line, "Unsupported escape sequence" );
+					}
+					c++;
+				}
+				else
+				{
+					s += *c++;
+				}
+			}
+			c++;
+			token.type = Token::String;
+			token.value = s;
+		}
+		else if( isalpha( *c ) || *c == '_' )
+		{
+			const char *begin = c;
+			while( isalnum( *c ) || *c == '_' )
+			{
+				c++;
+			}
+			token.type = Token::Name;
+			token.text = std::string( begin, c );
+			if( *c == '"' || *c == '\'' )
+			{
+				// String prefixes such as `r` and `u`.
+				throwSyntaxError( line, "Unsupported string prefix" );
+			}
+		}
+		else
+		{
+			static const char *operators[] = {
+				"**", "//", "==", "!=", "<=", ">=",
+				"+", "-", "*", "/", "%", "<", ">", "(", ")", "[", "]", ",", ".", "=",
+				nullptr
+			};
+
+			token.type = Token::Operator;
+			for( const char **o = operators; *o; ++o )
+			{
+				const size_t length = strlen( *o );
+				if( strncmp( c, *o, length ) == 0 )
+				{
+					token.text = *o;
+					break;
+				}
+			}
+
+			if( token.text.empty() )
+			{
+				throwSyntaxError( line, boost::str( boost::format( "Unexpected character '%c'" ) % *c ) );
+			}
+
+			c += token.text.size();
+			if( token.text == "(" || token.text == "[" )
+			{
+				depth++;
+			}
+			else if( token.text == ")" || token.text == "]" )
+			{
+				depth--;
+			}
+		}
+
+		result.push_back( token );
+	}
+
+	Token end;
+	end.type = Token::Newline;
+	end.line = line;
+	result.push_back( end );
+	end.type = Token::End;
+	result.push_back( end );
+
+	return result;
+}
+
+//////////////////////////////////////////////////////////////////////////
+// Parser
+//////////////////////////////////////////////////////////////////////////
+
+class Parser
+{
+
+	public :
+
+		Parser( const std::string &expression, Program &program )
+			:	m_tokens( tokenise( expression ) ), m_position( 0 ), m_program( program )
+		{
+			while( peek().type != Token::End )
+			{
+				if( peek().type == Token::Newline )
+				{
+					next();
+					continue;
+				}
+				parseStatement();
+				if( next().type != Token::Newline )
+				{
+					throwSyntaxError( m_tokens[m_position-1].line, "Expected end of statement" );
+				}
+			}
+		}
+
+	private :
+
+		const Token &peek( size_t offset = 0 ) const
+		{
+			return m_tokens[std::min( m_position + offset, m_tokens.size() - 1 )];
+		}
+
+		const Token &next()
+		{
+			const Token &result = peek();
+			if( m_position < m_tokens.size() - 1 )
+			{
+				m_position++;
+			}
+			return result;
+		}
+
+		bool isOperator( const char *op, size_t offset = 0 ) const
+		{
+			const Token &t = peek( offset );
+			return t.type == Token::Operator && t.text == op;
+		}
+
+		bool isName( const char *name, size_t offset = 0 ) const
+		{
+			const Token &t = peek( offset );
+			return t.type == Token::Name && t.text == name;
+		}
+
+		void expectOperator( const char *op )
+		{
+			if( !isOperator( op ) )
+			{
+				throwSyntaxError( peek().line, boost::str( boost::format( "Expected '%s'" ) % op ) );
+			}
+			next();
+		}
+
+		const std::string &expectName()
+		{
+			if( peek().type != Token::Name )
+			{
+				throwSyntaxError( peek().line, "Expected name" );
+			}
+			return next().text;
+		}
+
+		const std::string &expectString()
+		{
+			if( peek().type != Token::String )
+			{
+				throwSyntaxError( peek().line, "Expected string" );
+			}
+			return boost::get<std::string>( next().value );
+		}
+
+		static bool isReserved( const std::string &name )
+		{
+			static const char *reserved[] = {
+				"parent", "context", "math", "imath", "IECore", "True", "False", "None",
+				"and", "or", "not", "if", "else", "in", "is", "import", "lambda", nullptr
+			};
+			for( const char **r = reserved; *r; ++r )
+			{
+				if( name == *r )
+				{
+					return true;
+				}
+			}
+			return findFunction( g_builtins, name );
+		}
+
+		// Parses the `["a"]["b"]` following `parent`, returning
+		// "a.b".
+		std::string parsePlugPath()
+		{
+			std::vector<std::string> path;
+			while( isOperator( "[" ) && peek( 1 ).type == Token::String && peek( 2 ).type == Token::Operator && peek( 2 ).text == "]" )
+			{
+				next();
+				path.push_back( boost::get<std::string>( next().value ) );
+				next();
+			}
+			if( path.empty() )
+			{
+				throwSyntaxError( peek().line, "Expected plug path" );
+			}
+			return boost::algorithm::join( path, "." );
+		}
+
+		static size_t index( std::vector<std::string> &container, const std::string &s )
+		{
+			auto it = std::find( container.begin(), container.end(), s );
+			if( it == container.end() )
+			{
+				container.push_back( s );
+				return container.size() - 1;
+			}
+			return it - container.begin();
+		}
+
+		void addContextName( const std::string &name )
+		{
+			const InternedString n( name );
+			if( std::find( m_program.contextNames.begin(), m_program.contextNames.end(), n ) == m_program.contextNames.end() )
+			{
+				m_program.contextNames.push_back( n );
+			}
+		}
+
+		void parseStatement()
+		{
+			if( isName( "import" ) )
+			{
+				next();
+				const std::string &module = expectName();
+				if( module != "math" && module != "imath" && module != "IECore" )
+				{
+					throwSyntaxError( peek().line, boost::str( boost::format( "Unsupported module \"%s\"" ) % module ) );
+				}
+				return;
+			}
+
+			Statement statement;
+			if( isName( "parent" ) && isOperator( "[", 1 ) )
+			{
+				next();
+				statement.isOutput = true;
+				const std::string path = parsePlugPath();
+				if( std::find( m_program.inPlugPaths.begin(), m_program.inPlugPaths.end(), path ) != m_program.inPlugPaths.end() )
+				{
+					throwSyntaxError( peek().line, "Cannot both read from and write to plug \"" + path + "\"" );
+				}
+				statement.index = index( m_program.outPlugPaths, path );
+			}
+			else if( peek().type == Token::Name && isOperator( "=", 1 ) )
+			{
+				const std::string &name = next().text;
+				if( isReserved( name ) )
+				{
+					throwSyntaxError( peek().line, boost::str( boost::format( "Cannot assign to \"%s\"" ) % name ) );
+				}
+				statement.isOutput = false;
+				auto it = m_locals.find( name );
+				if( it == m_locals.end() )
+				{
+					it = m_locals.insert( make_pair( name, m_program.numLocals++ ) ).first;
+				}
+				statement.index = it->second;
+			}
+			else
+			{
+				throwSyntaxError( peek().line, "Unsupported statement" );
+			}
+
+			expectOperator( "=" );
+			statement.value = parseExpression();
+			m_program.statements.push_back( std::move( statement ) );
+		}
+
+		AST::NodePtr parseExpression()
+		{
+			AST::NodePtr result = parseOr();
+			if( isName( "if" ) )
+			{
+				next();
+				AST::NodePtr condition = parseOr();
+				if( !isName( "else" ) )
+				{
+					throwSyntaxError( peek().line, "Expected 'else'" );
+				}
+				next();
+				AST::NodePtr other = parseExpression();
+				return AST::NodePtr( new AST::Conditional( std::move( condition ), std::move( result ), std::move( other ) ) );
+			}
+			return result;
+		}
+
+		AST::NodePtr parseOr()
+		{
+			AST::NodePtr result = parseAnd();
+			while( isName( "or" ) )
+			{
+				next();
+				result.reset( new AST::BooleanOp( false, std::move( result ), parseAnd() ) );
+			}
+			return result;
+		}
+
+		AST::NodePtr parseAnd()
+		{
+			AST::NodePtr result = parseNot();
+			while( isName( "and" ) )
+			{
+				next();
+				result.reset( new AST::BooleanOp( true, std::move( result ), parseNot() ) );
+			}
+			return result;
+		}
+
+		AST::NodePtr parseNot()
+		{
+			if( isName( "not" ) )
+			{
+				next();
+				return AST::NodePtr( new AST::Not( parseNot() ) );
+			}
+			return parseComparison();
+		}
+
+		bool comparisonOperator( BinaryOp &op ) const
+		{
+			static const std::pair<const char *, BinaryOp> operators[] = {
+				{ "<", Less }, { "<=", LessEqual }, { ">", Greater }, { ">=", GreaterEqual }, { "==", Equal }, { "!=", NotEqual }
+			};
+			for( const auto &o : operators )
+			{
+				if( isOperator( o.first ) )
+				{
+					op = o.second;
+					return true;
+				}
+			}
+			return false;
+		}
+
+		AST::NodePtr parseComparison()
+		{
+			if( peek().type == Token::String && ( isName( "in", 1 ) || ( isName( "not", 1 ) && isName( "in", 2 ) ) ) )
+			{
+				const std::string name = boost::get<std::string>( next().value );
+				const bool negate = isName( "not" );
+				next();
+				if( negate )
+				{
+					next();
+				}
+				if( !isName( "context" ) )
+				{
+					throwSyntaxError( peek().line, "Unsupported use of 'in'" );
+				}
+				next();
+				addContextName( name );
+				return AST::NodePtr( new AST::ContextContains( name, negate ) );
+			}
+
+			AST::NodePtr result = parseArithmetic();
+			BinaryOp op;
+			if( comparisonOperator( op ) )
+			{
+				next();
+				result.reset( new AST::Binary( op, std::move( result ), parseArithmetic() ) );
+				if( comparisonOperator( op ) )
+				{
+					throwSyntaxError( peek().line, "Chained comparisons are not supported" );
+				}
+			}
+
+			if( isName( "in" ) || isName( "not" ) || isName( "is" ) )
+			{
+				throwSyntaxError( peek().line, "Unsupported operator \"" + peek().text + "\"" );
+			}
+
+			return result;
+		}
+
+		AST::NodePtr parseArithmetic()
+		{
+			AST::NodePtr result = parseTerm();
+			while( isOperator( "+" ) || isOperator( "-" ) )
+			{
+				const BinaryOp op = next().text == "+" ? Add : Subtract;
+				result.reset( new AST::Binary( op, std::move( result ), parseTerm() ) );
+			}
+			return result;
+		}
+
+		AST::NodePtr parseTerm()
+		{
+			const bool stringLiteral = peek().type == Token::String;
+			AST::NodePtr result = parseFactor();
+			while( isOperator( "*" ) || isOperator( "/" ) || isOperator( "//" ) || isOperator( "%" ) )
+			{
+				const std::string &o = next().text;
+				BinaryOp op = Multiply;
+				if( o == "/" )
+				{
+					op = Divide;
+				}
+				else if( o == "//" )
+				{
+					op = FloorDivide;
+				}
+				else if( o == "%" )
+				{
+					if( stringLiteral )
+					{
+						throwSyntaxError( peek().line, "String formatting is not supported" );
+					}
+					op = Modulo;
+				}
+				result.reset( new AST::Binary( op, std::move( result ), parseFactor() ) );
+			}
+			return result;
+		}
+
+		AST::NodePtr parseFactor()
+		{
+			if( isOperator( "-" ) )
+			{
+				next();
+				return AST::NodePtr( new AST::Negate( parseFactor() ) );
+			}
+			else if( isOperator( "+" ) )
+			{
+				next();
+				return AST::NodePtr( new AST::UnaryPlus( parseFactor() ) );
+			}
+			return parsePower();
+		}
+
+		AST::NodePtr parsePower()
+		{
+			AST::NodePtr result = parsePostfix();
+			if( isOperator( "**" ) )
+			{
+				next();
+				result.reset( new AST::Binary( Power, std::move( result ), parseFactor() ) );
+			}
+			return result;
+		}
+
+		AST::NodePtr parsePostfix()
+		{
+			AST::NodePtr result = parseAtom();
+			while( true )
+			{
+				if( isOperator( "." ) )
+				{
+					next();
+					const std::string &attribute = expectName();
+					static const char *attributes[] = { "x", "y", "z", "r", "g", "b" };
+					int index = -1;
+					for( int i = 0; i < 6; ++i )
+					{
+						if( attribute == attributes[i] )
+						{
+							index = i % 3;
+						}
+					}
+					if( index == -1 )
+					{
+						throwSyntaxError( peek().line, "Unsupported attribute \"" + attribute + "\"" );
+					}
+					result.reset( new AST::Component( std::move( result ), index ) );
+				}
+				else if( isOperator( "[" ) )
+				{
+					next();
+					int sign = 1;
+					if( isOperator( "-" ) )
+					{
+						next();
+						sign = -1;
+					}
+					if( peek().type != Token::Number || peek().value.which() != IntType )
+					{
+						throwSyntaxError( peek().line, "Expected integer index" );
+					}
+					const int index = sign * boost::get<int64_t>( next().value );
+					expectOperator( "]" );
+					result.reset( new AST::Component( std::move( result ), index ) );
+				}
+				else
+				{
+					break;
+				}
+			}
+			return result;
+		}
+
+		std::vector<AST::NodePtr> parseArguments( const FunctionDescription *function )
+		{
+			std::vector<AST::NodePtr> result;
+			expectOperator( "(" );
+			while( !isOperator( ")" ) )
+			{
+				result.push_back( parseExpression() );
+				if( !isOperator( "," ) )
+				{
+					break;
+				}
+				next();
+			}
+			expectOperator( ")" );
+
+			if( function && ( result.size() < function->minArguments || result.size() > function->maxArguments ) )
+			{
+				throwSyntaxError( peek().line, boost::str( boost::format( "Wrong number of arguments for \"%s\"" ) % function->name ) );
+			}
+
+			return result;
+		}
+
+		AST::NodePtr parseCall( const FunctionDescription *function )
+		{
+			std::vector<AST::NodePtr> arguments = parseArguments( function );
+			return AST::NodePtr( new AST::Call( function->function, std::move( arguments ) ) );
+		}
+
+		AST::NodePtr parseAtom()
+		{
+			const Token &token = peek();
+			if( token.type == Token::Number || token.type == Token::String )
+			{
+				next();
+				return AST::NodePtr( new AST::Literal( token.value ) );
+			}
+			else if( isOperator( "(" ) )
+			{
+				next();
+				AST::NodePtr result = parseExpression();
+				expectOperator( ")" );
+				return result;
+			}
+			else if( token.type != Token::Name )
+			{
+				throwSyntaxError( token.line, "Unexpected \"" + token.text + "\"" );
+			}
+
+			const std::string name = next().text;
+			if( name == "True" || name == "False" )
+			{
+				return AST::NodePtr( new AST::Literal( name == "True" ) );
+			}
+			else if( name == "parent" )
+			{
+				const std::string path = parsePlugPath();
+				if( std::find( m_program.outPlugPaths.begin(), m_program.outPlugPaths.end(), path ) != m_program.outPlugPaths.end() )
+				{
+					throwSyntaxError( token.line, "Cannot both read from and write to plug \"" + path + "\"" );
+				}
+				return AST::NodePtr( new AST::PlugRead( index( m_program.inPlugPaths, path ) ) );
+			}
+			else if( name == "context" )
+			{
+				return parseContext();
+			}
+			else if( name == "math" )
+			{
+				expectOperator( "." );
+				const std::string &functionName = expectName();
+				if( functionName == "pi" )
+				{
+					return AST::NodePtr( new AST::Literal( M_PI ) );
+				}
+				else if( functionName == "e" )
+				{
+					return AST::NodePtr( new AST::Literal( M_E ) );
+				}
+				const FunctionDescription *function = findFunction( g_mathFunctions, functionName );
+				if( !function )
+				{
+					throwSyntaxError( token.line, "Unsupported function \"math." + functionName + "\"" );
+				}
+				return parseCall( function );
+			}
+			else if( name == "imath" )
+			{
+				expectOperator( "." );
+				const std::string &typeName = expectName();
+				const FunctionDescription *function = findFunction( g_imathFunctions, typeName );
+				if( !function )
+				{
+					throwSyntaxError( token.line, "Unsupported type \"imath." + typeName + "\"" );
+				}
+				return parseCall( function );
+			}
+			else if( const FunctionDescription *function = findFunction( g_builtins, name ) )
+			{
+				return parseCall( function );
+			}
+
+			auto it = m_locals.find( name );
+			if( it == m_locals.end() )
+			{
+				throwSyntaxError( token.line, "Unsupported name \"" + name + "\"" );
+			}
+			return AST::NodePtr( new AST::LocalRead( it->second ) );
+		}
+
+		AST::NodePtr parseContext()
+		{
+			const int line = peek().line;
+			if( isOperator( "[" ) )
+			{
+				next();
+				const std::string name = expectString();
+				expectOperator( "]" );
+				addContextName( name );
+				return AST::NodePtr( new AST::ContextRead( name, nullptr, false ) );
+			}
+
+			expectOperator( "." );
+			const std::string method = expectName();
+			if( method == "get" )
+			{
+				expectOperator( "(" );
+				const std::string name = expectString();
+				AST::NodePtr defaultValue;
+				if( isOperator( "," ) )
+				{
+					next();
+					defaultValue = parseExpression();
+				}
+				expectOperator( ")" );
+				addContextName( name );
+				return AST::NodePtr( new AST::ContextRead( name, std::move( defaultValue ), true ) );
+			}
+
+			AST::ContextFrame::Method m;
+			if( method == "getFrame" )
+			{
+				m = AST::ContextFrame::Frame;
+				addContextName( "frame" );
+			}
+			else if( method == "getTime" )
+			{
+				m = AST::ContextFrame::Time;
+				addContextName( "frame" );
+				addContextName( "framesPerSecond" );
+			}
+			else if( method == "getFramesPerSecond" )
+			{
+				m = AST::ContextFrame::FramesPerSecond;
+				addContextName( "framesPerSecond" );
+			}
+			else
+			{
+				throwSyntaxError( line, "Unsupported method \"context." + method + "\"" );
+			}
+
+			expectOperator( "(" );
+			expectOperator( ")" );
+			return AST::NodePtr( new AST::ContextFrame( m ) );
+		}
+
+		std::vector<Token> m_tokens;
+		size_t m_position;
+		Program &m_program;
+		std::unordered_map<std::string, size_t> m_locals;
+
+};
+
+//////////////////////////////////////////////////////////////////////////
+// NativeExpressionEngine
+//////////////////////////////////////////////////////////////////////////
+
+class NativeExpressionEngine : public Gaffer::Expression::Engine
+{
+
+	public :
+
+		IE_CORE_DECLAREMEMBERPTR( NativeExpressionEngine );
+
+		NativeExpressionEngine()
+		{
+		}
+
+		void parse( Expression *node, const std::string &expression, std::vector<ValuePlug *> &inputs, std::vector<ValuePlug *> &outputs, std::vector<IECore::InternedString> &contextVariables ) override
+		{
+			std::unique_ptr<Program> program( new Program );
+			Parser parser( expression, *program );
+
+			for( const auto &path : program->inPlugPaths )
+			{
+				inputs.push_back( plug( node, path ) );
+			}
+			for( const auto &path : program->outPlugPaths )
+			{
+				outputs.push_back( plug( node, path ) );
+			}
+			contextVariables.insert( contextVariables.end(), program->contextNames.begin(), program->contextNames.end() );
+
+			m_program = std::move( program );
+		}
+
+		IECore::ConstObjectVectorPtr execute( const Gaffer::Context *context, const std::vector<const Gaffer::ValuePlug *> &proxyInputs ) const override
+		{
+			Evaluation evaluation( context, m_program->numLocals );
+			evaluation.inputs.reserve( proxyInputs.size() );
+			for( const auto &p : proxyInputs )
+			{
+				evaluation.inputs.push_back( plugValue( p ) );
+			}
+
+			std::vector<boost::optional<Value>> outputs( m_program->outPlugPaths.size() );
+			for( const auto &statement : m_program->statements )
+			{
+				Value value = statement.value->evaluate( evaluation );
+				if( statement.isOutput )
+				{
+					outputs[statement.index] = value;
+				}
+				else
+				{
+					evaluation.locals[statement.index] = value;
+				}
+			}
+
+			ObjectVectorPtr result = new ObjectVector;
+			result->members().reserve( outputs.size() );
+			for( const auto &output : outputs )
+			{
+				if( output )
+				{
+					result->members().push_back( valueToObject( *output ) );
+				}
+				else
+				{
+					// The expression didn't provide a value - the
+					// plug will be set to its default.
+					result->members().push_back( NullObject::defaultNullObject() );
+				}
+			}
+
+			return result;
+		}
+
+		void apply( Gaffer::ValuePlug *proxyOutput, const Gaffer::ValuePlug *topLevelProxyOutput, const IECore::Object *value ) const override
+		{
+			if( runTimeCast<const NullObject>( value ) )
+			{
+				proxyOutput->setToDefault();
+				return;
+			}
+
+			if( proxyOutput != topLevelProxyOutput )
+			{
+				// Child of a compound plug - extract
+				// the appropriate component.
+				size_t index = 0;
+				for( ; index < topLevelProxyOutput->children().size(); ++index )
+				{
+					if( topLevelProxyOutput->getChild( index ) == proxyOutput )
+					{
+						break;
+					}
+				}
+				float component;
+				switch( value->typeId() )
+				{
+					case V2fDataTypeId :
+						component = static_cast<const V2fData *>( value )->readable()[index];
+						break;
+					case V3fDataTypeId :
+						component = static_cast<const V3fData *>( value )->readable()[index];
+						break;
+					case Color3fDataTypeId :
+						component = static_cast<const Color3fData *>( value )->readable()[index];
+						break;
+					default :
+						throw IECore::Exception( boost::str(
+							boost::format( "Cannot set \"%s\" from value of type \"%s\"" ) % topLevelProxyOutput->typeName() % value->typeName()
+						) );
+				}
+				static_cast<FloatPlug *>( proxyOutput )->setValue( component );
+				return;
+			}
+
+			switch( (Gaffer::TypeId)proxyOutput->typeId() )
+			{
+				case BoolPlugTypeId :
+					static_cast<BoolPlug *>( proxyOutput )->setValue( truth( numericValue( proxyOutput, value ) ) );
+					break;
+				case IntPlugTypeId :
+				{
+					const Value v = numericValue( proxyOutput, value );
+					static_cast<IntPlug *>( proxyOutput )->setValue(
+						isInteger( v ) ? narrowInteger( toInteger( v ) ) : truncateToInteger( toDouble( v ) )
+					);
+					break;
+				}
+				case FloatPlugTypeId :
+					static_cast<FloatPlug *>( proxyOutput )->setValue( toDouble( numericValue( proxyOutput, value ) ) );
+					break;
+				case StringPlugTypeId :
+					if( const StringData *d = runTimeCast<const StringData>( value ) )
+					{
+						static_cast<StringPlug *>( proxyOutput )->setValue( d->readable() );
+						break;
+					}
+					throw IECore::Exception( boost::str(
+						boost::format( "Cannot set \"%s\" from value of type \"%s\"" ) % proxyOutput->typeName() % value->typeName()
+					) );
+				default :
+					// Shouldn't get here, as parse() rejects other
+					// plug types.
+					assert( false );
+			}
+		}
+
+		std::string identifier( const Expression *node, const ValuePlug *plug ) const override
+		{
+			if( !plugTypeSupported( plug ) )
+			{
+				return "";
+			}
+
+			std::string relativeName;
+			if( node->isAncestorOf( plug ) )
+			{
+				relativeName = plug->relativeName( node );
+			}
+			else
+			{
+				relativeName = plug->relativeName( node->parent<Node>() );
+			}
+
+			return identifier( relativeName );
+		}
+
+		std::string replace( const Expression *node, const std::string &expression, const std::vector<const ValuePlug *> &oldPlugs, const std::vector<const ValuePlug *> &newPlugs ) const override
+		{
+			std::string result = expression;
+			for( size_t i = 0; i < oldPlugs.size(); ++i )
+			{
+				std::string replacement;
+				if( newPlugs[i] )
+				{
+					replacement = identifier( node, newPlugs[i] );
+				}
+				else if( oldPlugs[i]->direction() == Plug::In )
+				{
+					replacement = literal( oldPlugs[i], /* defaultValue = */ true );
+				}
+				else
+				{
+					replacement = "__disconnected";
+				}
+
+				// Match either style of quotes.
+				std::string regex = identifier( node, oldPlugs[i] );
+				boost::replace_all( regex, "[", "\\[" );
+				boost::replace_all( regex, "]", "\\]" );
+				boost::replace_all( regex, "\"", "[\"']" );
+
+				result = boost::regex_replace( result, boost::regex( regex ), replacement, boost::format_literal );
+			}
+
+			return result;
+		}
+
+		std::string defaultExpression( const ValuePlug *output ) const override
+		{
+			const Node *parentNode = output->node() ? output->node()->ancestor<Node>() : nullptr;
+			if( !parentNode || !plugTypeSupported( output ) )
+			{
+				return "";
+			}
+
+			const std::string value = literal( output, /* defaultValue = */ false );
+			if( value.empty() )
+			{
+				return "";
+			}
+
+			return identifier( output->relativeName( parentNode ) ) + " = " + value;
+		}
+
+	private :
+
+		static std::string identifier( const std::string &relativeName )
+		{
+			std::vector<std::string> names;
+			boost::split( names, relativeName, boost::is_any_of( "." ) );
+			std::string result = "parent";
+			for( const auto &n : names )
+			{
+				result += "[\"" + n + "\"]";
+			}
+			return result;
+		}
+
+		static ValuePlug *plug( Expression *node, const std::string &plugPath )
+		{
+			Node *parentNode = node->ancestor<Node>();
+			if( !parentNode )
+			{
+				throw IECore::Exception( "No parent node" );
+			}
+
+			GraphComponent *descendant = parentNode->descendant<GraphComponent>( plugPath );
+			if( !descendant )
+			{
+				throw IECore::Exception( boost::str( boost::format( "\"%s\" does not exist" ) % plugPath ) );
+			}
+
+			ValuePlug *result = runTimeCast<ValuePlug>( descendant );
+			if( !result )
+			{
+				throw IECore::Exception( boost::str( boost::format( "\"%s\" is not a ValuePlug" ) % plugPath ) );
+			}
+
+			if( !plugTypeSupported( result ) )
+			{
+				throw IECore::Exception( boost::str( boost::format( "\"%s\" has unsupported type \"%s\"" ) % plugPath % result->typeName() ) );
+			}
+
+			return result;
+		}
+
+		static Value numericValue( const ValuePlug *plug, const IECore::Object *value )
+		{
+			switch( value->typeId() )
+			{
+				case BoolDataTypeId :
+					return static_cast<const BoolData *>( value )->readable();
+				case IntDataTypeId :
+					return (int64_t)static_cast<const IntData *>( value )->readable();
+				case DoubleDataTypeId :
+					return static_cast<const DoubleData *>( value )->readable();
+				default :
+					throw IECore::Exception( boost::str(
+						boost::format( "Cannot set \"%s\" from value of type \"%s\"" ) % plug->typeName() % value->typeName()
+					) );
+			}
+		}
+
+		std::unique_ptr<const Program> m_program;
+
+		static EngineDescription<NativeExpressionEngine> g_engineDescription;
+
+};
+
+Expression::Engine::EngineDescription<NativeExpressionEngine> NativeExpressionEngine::g_engineDescription( "native" );
+
+} // namespace
@@ -45,14 +45,15 @@ using namespace Gaffer;
 /// then we can use the types defined there directly.
 static IECore::InternedString g_hashType( "computeNode:hash" );
 static IECore::InternedString g_computeType( "computeNode:compute" );
+static IECore::InternedString g_computeWaitType( "computeNode:computeWait" );
 static PerformanceMonitor::Statistics g_emptyStatistics;
 
 //////////////////////////////////////////////////////////////////////////
 // PerformanceMonitor::Statistics
 //////////////////////////////////////////////////////////////////////////
 
-PerformanceMonitor::Statistics::Statistics( size_t hashCount, size_t computeCount, boost::chrono::nanoseconds hashDuration, boost::chrono::nanoseconds computeDuration )
-	:	hashCount( hashCount ), computeCount( computeCount ), hashDuration( hashDuration ), computeDuration( computeDuration )
+PerformanceMonitor::Statistics::Statistics( size_t hashCount, size_t computeCount, boost::chrono::nanoseconds hashDuration, boost::chrono::nanoseconds computeDuration, size_t deduplicatedComputeCount )
+	:	hashCount( hashCount ), computeCount( computeCount ), hashDuration( hashDuration ), computeDuration( computeDuration ), deduplicatedComputeCount( deduplicatedComputeCount )
 {
 }
 
@@ -62,6 +63,7 @@ PerformanceMonitor::Statistics & PerformanceMonitor::Statistics::operator += ( c
 	computeCount += rhs.computeCount;
 	hashDuration += rhs.hashDuration;
 	computeDuration += rhs.computeDuration;
+	deduplicatedComputeCount += rhs.deduplicatedComputeCount;
 	return *this;
 }
 
@@ -71,7 +73,8 @@ bool PerformanceMonitor::Statistics::operator == ( const Statistics &rhs )
 		hashCount == rhs.hashCount &&
 		computeCount == rhs.computeCount &&
 		hashDuration == rhs.hashDuration &&
-		computeDuration == rhs.computeDuration
+		computeDuration == rhs.computeDuration &&
+		deduplicatedComputeCount == rhs.deduplicatedComputeCount
 	;
 }
 
@@ -115,11 +118,29 @@ const PerformanceMonitor::Statistics &PerformanceMonitor::combinedStatistics() c
 	return m_combinedStatistics;
 }
 
+const PerformanceMonitor::CountersMap &PerformanceMonitor::allCounters() const
+{
+	collate();
+	return m_counters;
+}
+
+size_t PerformanceMonitor::counter( const IECore::InternedString &name ) const
+{
+	collate();
+	CountersMap::const_iterator it = m_counters.find( name );
+	return it != m_counters.end() ? it->second : 0;
+}
+
 
 void PerformanceMonitor::processStarted( const Process *process )
 {
 	const IECore::InternedString type = process->type();
-	if( type != g_hashType && type != g_computeType )
+	if( type == g_computeWaitType )
+	{
+		m_threadData.local().statistics[process->plug()].deduplicatedComputeCount++;
+		return;
+	}
+	else if( type != g_hashType && type != g_computeType )
 	{
 		return;
 	}
@@ -161,6 +182,11 @@ void PerformanceMonitor::processFinished( const Process *process )
 	threadData.then = now;
 }
 
+void PerformanceMonitor::counterIncremented( const IECore::InternedString &name, size_t amount )
+{
+	m_threadData.local().counters[name] += amount;
+}
+
 void PerformanceMonitor::collate() const
 {
 	tbb::enumerable_thread_specific<ThreadData, tbb::cache_aligned_allocator<ThreadData>, tbb::ets_key_per_instance>::iterator it, eIt;
@@ -173,5 +199,11 @@ void PerformanceMonitor::collate() const
 			m_combinedStatistics += mIt->second;
 		}
 		m.clear();
+
+		for( const auto &counter : it->counters )
+		{
+			m_counters[counter.first] += counter.second;
+		}
+		it->counters.clear();
 	}
 }
@@ -170,3 +170,11 @@ bool Process::monitorRegistered( const Monitor *monitor )
 	return g_activeMonitors.find( const_cast<Monitor *>( monitor ) ) != g_activeMonitors.end();
 }
 
+void Process::incrementMonitorCounters( const IECore::InternedString &name, size_t amount )
+{
+	for( Monitors::const_iterator it = g_activeMonitors.begin(), eIt = g_activeMonitors.end(); it != eIt; ++it )
+	{
+		(*it)->counterIncremented( name, amount );
+	}
+}
+
@@ -0,0 +1,250 @@
+//////////////////////////////////////////////////////////////////////////
+//
+//  Copyright (c) 2018, Image Engine Design Inc. All rights reserved.
+//
+//  Redistribution and use in source and binary forms, with or without
+//  modification, are permitted provided that the following conditions are
+//  met:
+//
+//      * Redistributions of source code must retain the above
+//        copyright notice, this list of conditions and the following
+//        disclaimer.
+//
+//      * Redistributions in binary form must reproduce the above
+//        copyright notice, this list of conditions and the following
+//        disclaimer in the documentation and/or other materials provided with
+//        the distribution.
+//
+//      * Neither the name of John Haddon nor the names of
+//        any other contributors to this software may be used to endorse or
+//        promote products derived from this software without specific prior
+//        written permission.
+//
+//  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS
+//  IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+//  THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+//  PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+//  CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+//  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+//  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+//  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+//  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+//  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+//  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+//////////////////////////////////////////////////////////////////////////
+
+#include "Gaffer/TraceMonitor.h"
+
+#include "Gaffer/Context.h"
+#include "Gaffer/Node.h"
+#include "Gaffer/Plug.h"
+#include "Gaffer/Process.h"
+#include "Gaffer/ScriptNode.h"
+
+#include "boost/format.hpp"
+
+#include <map>
+#include <ostream>
+
+using namespace Gaffer;
+
+//////////////////////////////////////////////////////////////////////////
+// Internal utilities
+//////////////////////////////////////////////////////////////////////////
+
+namespace
+{
+
+std::string plugName( const Plug *plug )
+{
+	return plug->relativeName( plug->ancestor( (IECore::TypeId)ScriptNodeTypeId ) );
+}
+
+std::string jsonString( const std::string &s )
+{
+	std::string result = "\"";
+	for( const char c : s )
+	{
+		switch( c )
+		{
+			case '"' : result += "\\\""; break;
+			case '\\' : result += "\\\\"; break;
+			case '\n' : result += "\\n"; break;
+			default : result += c;
+		}
+	}
+	return result + "\"";
+}
+
+// Chrome traces are measured in microseconds, but fractional
+// values are allowed, so we don't lose resolution.
+std::string microseconds( boost::chrono::nanoseconds t )
+{
+	return boost::str( boost::format( "%.3f" ) % ( t.count() / 1000.0 ) );
+}
+
+} // namespace
+
+//////////////////////////////////////////////////////////////////////////
+// TraceMonitor
+//////////////////////////////////////////////////////////////////////////
+
+TraceMonitor::ThreadData::ThreadData()
+	:	thread( 0 )
+{
+}
+
+TraceMonitor::TraceMonitor()
+	:	m_startTime( boost::chrono::high_resolution_clock::now() )
+{
+	m_numThreads = 0;
+}
+
+TraceMonitor::~TraceMonitor()
+{
+}
+
+const TraceMonitor::Events &TraceMonitor::events() const
+{
+	collate();
+	return m_events;
+}
+
+void TraceMonitor::clear()
+{
+	for( auto &threadData : m_threadData )
+	{
+		threadData.events.clear();
+	}
+	m_events.clear();
+}
+
+void TraceMonitor::writeChromeTrace( std::ostream &stream ) const
+{
+	collate();
+
+	stream << "{\n\"traceEvents\" : [\n";
+
+	for( size_t i = 0; i < m_events.size(); ++i )
+	{
+		const Event &e = m_events[i];
+		const Node *node = e.plug->node();
+		stream
+			<< "{ \"name\" : " << jsonString( plugName( e.plug.get() ) )
+			<< ", \"cat\" : " << jsonString( e.type.string() )
+			<< ", \"ph\" : \"X\""
+			<< ", \"pid\" : 0"
+			<< ", \"tid\" : " << e.thread
+			<< ", \"ts\" : " << microseconds( e.begin )
+			<< ", \"dur\" : " << microseconds( e.end - e.begin )
+			<< ", \"args\" : { "
+			<< "\"nodeType\" : " << jsonString( node ? node->typeName() : "" )
+			<< ", \"context\" : " << jsonString( e.contextHash.toString() )
+			<< " } }"
+			<< ( i < m_events.size() - 1 ? ",\n" : "\n" )
+		;
+	}
+
+	stream << "],\n\"displayTimeUnit\" : \"ms\"\n}\n";
+}
+
+void TraceMonitor::writeFlameGraph( std::ostream &stream ) const
+{
+	collate();
+
+	// Compute the time spent in each event, excluding
+	// time spent in child events.
+	std::vector<boost::chrono::nanoseconds> selfDurations;
+	selfDurations.reserve( m_events.size() );
+	for( const auto &e : m_events )
+	{
+		selfDurations.push_back( e.end - e.begin );
+	}
+	for( const auto &e : m_events )
+	{
+		if( e.parent >= 0 )
+		{
+			selfDurations[e.parent] -= e.end - e.begin;
+		}
+	}
+
+	// Accumulate the self durations by stack. Event names
+	// are cached as building them is relatively expensive.
+	std::vector<std::string> names( m_events.size() );
+	std::map<std::string, boost::chrono::nanoseconds> stacks;
+	for( size_t i = 0; i < m_events.size(); ++i )
+	{
+		std::string stack;
+		for( int j = i; j >= 0; j = m_events[j].parent )
+		{
+			if( names[j].empty() )
+			{
+				names[j] = plugName( m_events[j].plug.get() ) + " (" + m_events[j].type.string() + ")";
+			}
+			stack = stack.empty() ? names[j] : names[j] + ";" + stack;
+		}
+		stacks[stack] += selfDurations[i];
+	}
+
+	for( const auto &s : stacks )
+	{
+		const auto us = boost::chrono::duration_cast<boost::chrono::microseconds>( s.second ).count();
+		if( us > 0 )
+		{
+			stream << s.first << " " << us << "\n";
+		}
+	}
+}
+
+void TraceMonitor::processStarted( const Process *process )
+{
+	bool exists;
+	ThreadData &threadData = m_threadData.local( exists );
+	if( !exists )
+	{
+		threadData.thread = m_numThreads++;
+	}
+
+	Event event;
+	event.plug = process->plug();
+	event.type = process->type();
+	event.contextHash = process->context()->hash();
+	event.thread = threadData.thread;
+	event.parent = threadData.stack.empty() ? -1 : threadData.stack.back();
+	event.begin = boost::chrono::high_resolution_clock::now() - m_startTime;
+	event.end = event.begin;
+
+	threadData.stack.push_back( threadData.events.size() );
+	threadData.events.push_back( event );
+}
+
+void TraceMonitor::processFinished( const Process *process )
+{
+	ThreadData &threadData = m_threadData.local();
+	if( threadData.stack.empty() )
+	{
+		// Monitor was activated while the process was running.
+		return;
+	}
+
+	threadData.events[threadData.stack.back()].end = boost::chrono::high_resolution_clock::now() - m_startTime;
+	threadData.stack.pop_back();
+}
+
+void TraceMonitor::collate() const
+{
+	for( auto it = m_threadData.begin(), eIt = m_threadData.end(); it != eIt; ++it )
+	{
+		const int offset = m_events.size();
+		for( const auto &e : it->events )
+		{
+			m_events.push_back( e );
+			if( e.parent >= 0 )
+			{
+				m_events.back().parent += offset;
+			}
+		}
+		const_cast<Events &>( it->events ).clear();
+	}
+}
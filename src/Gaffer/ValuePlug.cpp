@@ -42,12 +42,41 @@
 #include "Gaffer/Context.h"
 #include "Gaffer/Private/IECorePreview/LRUCache.h"
 #include "Gaffer/Process.h"
+#include "Gaffer/ScriptNode.h"
+#include "Gaffer/Version.h"
+
+#include "IECore/FileIndexedIO.h"
+#include "IECore/MessageHandler.h"
 
 #include "boost/bind.hpp"
+#include "boost/filesystem.hpp"
 #include "boost/format.hpp"
 #include "boost/unordered_map.hpp"
 
+#include "tbb/concurrent_hash_map.h"
 #include "tbb/enumerable_thread_specific.h"
+#include "tbb/spin_rw_mutex.h"
+#include "tbb/task_arena.h"
+
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <condition_variable>
+#include <ctime>
+#include <list>
+#include <mutex>
+#include <set>
+#include <thread>
+#include <tuple>
+
+// Waiting for a compute being performed by another thread is only
+// safe if the computing thread can't steal unrelated work while it
+// computes, since that work might itself be waiting for the result.
+// We prevent that using TBB's task isolation, and must fall back to
+// duplicating the compute if it is not available.
+#if TBB_INTERFACE_VERSION >= 10000
+#define GAFFER_DEDUPLICATE_COMPUTES
+#endif
 
 using namespace Gaffer;
 
@@ -77,6 +106,482 @@ inline const ValuePlug *sourcePlug( const ValuePlug *p )
 	return p;
 }
 
+// Represents a compute in progress on one thread, so that
+// other threads needing the same value can wait for it rather
+// than compute it again.
+class InFlightCompute : public IECore::RefCounted
+{
+
+	public :
+
+		InFlightCompute()
+			:	m_thread( std::this_thread::get_id() ), m_finished( false )
+		{
+		}
+
+		IE_CORE_DECLAREMEMBERPTR( InFlightCompute )
+
+		// Called by the computing thread, with a null
+		// result if the compute failed.
+		void finish( const IECore::ConstObjectPtr &result )
+		{
+			{
+				std::lock_guard<std::mutex> lock( m_mutex );
+				m_result = result;
+				m_finished = true;
+			}
+			m_condition.notify_all();
+		}
+
+		// Returns the result, or null if the compute failed or
+		// is being performed by the current thread, in which case
+		// the caller must compute the value itself.
+		IECore::ConstObjectPtr wait( const IECore::Canceller *canceller )
+		{
+			if( std::this_thread::get_id() == m_thread )
+			{
+				return nullptr;
+			}
+
+			std::unique_lock<std::mutex> lock( m_mutex );
+			while( !m_finished )
+			{
+				// Wake periodically so that we don't
+				// delay cancellation of the waiting thread.
+				m_condition.wait_for( lock, std::chrono::milliseconds( 100 ) );
+				IECore::Canceller::check( canceller );
+			}
+			return m_result;
+		}
+
+	private :
+
+		const std::thread::id m_thread;
+		std::mutex m_mutex;
+		std::condition_variable m_condition;
+		bool m_finished;
+		IECore::ConstObjectPtr m_result;
+
+};
+
+IE_CORE_DECLAREPTR( InFlightCompute )
+
+// A process representing a wait for an InFlightCompute,
+// so that monitors can count the duplicate computes avoided.
+class ComputeWaitProcess : public Process
+{
+
+	public :
+
+		ComputeWaitProcess( const ValuePlug *plug, const ValuePlug *downstream )
+			:	Process( staticType, plug, downstream )
+		{
+		}
+
+		static const IECore::InternedString staticType;
+
+};
+
+const IECore::InternedString ComputeWaitProcess::staticType( "computeNode:computeWait" );
+
+const IECore::IndexedIO::EntryID g_diskCacheEntryName( "value" );
+
+// A second tier of cache for the ComputeProcess, storing values on disk
+// so that they survive beyond the lifetime of the process, and can be
+// shared between processes. Each value is stored in its own file, and
+// files are evicted in order of last use once the size limit is exceeded.
+class DiskCache
+{
+
+	public :
+
+		static DiskCache &instance()
+		{
+			static DiskCache g_instance;
+			return g_instance;
+		}
+
+		void setDirectory( const std::string &directory )
+		{
+			Mutex::scoped_lock lock( m_mutex, /* write = */ true );
+			m_directory = directory;
+			m_size = directory.empty() ? 0 : scan( nullptr );
+			updateActive();
+		}
+
+		std::string getDirectory() const
+		{
+			Mutex::scoped_lock lock( m_mutex, /* write = */ false );
+			return m_directory;
+		}
+
+		void setSizeLimit( size_t bytes )
+		{
+			m_sizeLimit = bytes;
+			evictIfNecessary();
+		}
+
+		size_t getSizeLimit() const
+		{
+			return m_sizeLimit;
+		}
+
+		void setEnabled( IECore::TypeId plugType, bool enabled )
+		{
+			Mutex::scoped_lock lock( m_mutex, /* write = */ true );
+			if( enabled )
+			{
+				m_plugTypes.insert( plugType );
+			}
+			else
+			{
+				m_plugTypes.erase( plugType );
+			}
+			updateActive();
+		}
+
+		bool getEnabled( IECore::TypeId plugType ) const
+		{
+			Mutex::scoped_lock lock( m_mutex, /* write = */ false );
+			return m_plugTypes.find( plugType ) != m_plugTypes.end();
+		}
+
+		// Returns true if values for the specified type of plug should
+		// be stored in the cache.
+		bool enabled( IECore::TypeId plugType ) const
+		{
+			// Fast path for the common case where the cache is not in use.
+			if( !m_active )
+			{
+				return false;
+			}
+			return getEnabled( plugType );
+		}
+
+		IECore::ConstObjectPtr get( const IECore::MurmurHash &hash, IECore::TypeId plugType )
+		{
+			const boost::filesystem::path path = fileName( hash, plugType );
+			if( path.empty() )
+			{
+				return nullptr;
+			}
+
+			try
+			{
+				boost::system::error_code ec;
+				if( !boost::filesystem::exists( path, ec ) )
+				{
+					return nullptr;
+				}
+				IECore::IndexedIOPtr io = new IECore::FileIndexedIO( path.string(), IECore::IndexedIO::rootPath, IECore::IndexedIO::Read );
+				IECore::ConstObjectPtr result = IECore::Object::load( io, g_diskCacheEntryName );
+				// Update the modification time, which is used as the
+				// time of last use for the purposes of eviction.
+				boost::filesystem::last_write_time( path, std::time( nullptr ), ec );
+				return result;
+			}
+			catch( ... )
+			{
+				// Most likely the file was evicted by another process
+				// while we were reading it. Either way, we can just
+				// compute the value instead.
+				return nullptr;
+			}
+		}
+
+		void set( const IECore::MurmurHash &hash, IECore::TypeId plugType, const IECore::Object *value )
+		{
+			const boost::filesystem::path path = fileName( hash, plugType );
+			if( path.empty() )
+			{
+				return;
+			}
+
+			try
+			{
+				boost::filesystem::create_directories( path.parent_path() );
+				// Write to a temporary file and rename it into place, so
+				// that other processes never see a partially written file.
+				boost::filesystem::path tmpPath = path;
+				tmpPath += boost::filesystem::unique_path( ".%%%%%%%%" );
+				{
+					IECore::IndexedIOPtr io = new IECore::FileIndexedIO( tmpPath.string(), IECore::IndexedIO::rootPath, IECore::IndexedIO::Exclusive | IECore::IndexedIO::Write );
+					value->save( io, g_diskCacheEntryName );
+				}
+				const size_t fileSize = boost::filesystem::file_size( tmpPath );
+				boost::filesystem::rename( tmpPath, path );
+				m_size += fileSize;
+			}
+			catch( const std::exception &e )
+			{
+				IECore::msg( IECore::Msg::Warning, "ValuePlug disk cache", e.what() );
+				return;
+			}
+
+			evictIfNecessary();
+		}
+
+	private :
+
+		DiskCache()
+		{
+			m_sizeLimit = 1024 * 1024 * 1024 * 10ul; // 10 gig
+			m_size = 0;
+			m_active = false;
+			m_evicting = false;
+		}
+
+		typedef tbb::spin_rw_mutex Mutex;
+
+		// Must be called with the mutex locked for writing.
+		void updateActive()
+		{
+			m_active = !m_directory.empty() && !m_plugTypes.empty();
+		}
+
+		boost::filesystem::path fileName( const IECore::MurmurHash &hash, IECore::TypeId plugType ) const
+		{
+			const std::string directory = getDirectory();
+			if( directory.empty() )
+			{
+				return boost::filesystem::path();
+			}
+
+			// Connected plugs of different types may share a hash, so we
+			// must include the type to avoid loading values of the wrong type.
+			// We also include the Gaffer version, since changes to a node's
+			// compute are not necessarily reflected in its hash, and the
+			// cache may outlive any particular Gaffer install.
+			IECore::MurmurHash h = hash;
+			h.append( (int)plugType );
+			h.append( GAFFER_MILESTONE_VERSION );
+			h.append( GAFFER_MAJOR_VERSION );
+			h.append( GAFFER_MINOR_VERSION );
+			h.append( GAFFER_PATCH_VERSION );
+			const std::string name = h.toString();
+			// Use subdirectories to avoid overwhelming the filesystem
+			// with a single enormous directory.
+			return boost::filesystem::path( directory ) / name.substr( 0, 2 ) / name;
+		}
+
+		// Returns the total size of the files in the cache, optionally
+		// filling `files` with their modification times, sizes and paths.
+		typedef std::tuple<std::time_t, size_t, boost::filesystem::path> FileInfo;
+		size_t scan( std::vector<FileInfo> *files ) const
+		{
+			size_t result = 0;
+			boost::system::error_code ec;
+			for( boost::filesystem::recursive_directory_iterator it( m_directory, ec ), eIt; it != eIt; it.increment( ec ) )
+			{
+				if( ec || !boost::filesystem::is_regular_file( it->status() ) )
+				{
+					continue;
+				}
+				const size_t size = boost::filesystem::file_size( it->path(), ec );
+				if( ec )
+				{
+					continue;
+				}
+				result += size;
+				if( files )
+				{
+					files->push_back( FileInfo( boost::filesystem::last_write_time( it->path(), ec ), size, it->path() ) );
+				}
+			}
+			return result;
+		}
+
+		void evictIfNecessary()
+		{
+			if( m_size <= m_sizeLimit || m_evicting.compare_and_swap( true, false ) )
+			{
+				// Within the limit, or another thread is already evicting.
+				return;
+			}
+
+			Mutex::scoped_lock lock( m_mutex, /* write = */ false );
+
+			// Our own record of the size doesn't account for files written
+			// by other processes, so we rescan the directory to get the true
+			// state, and then remove the least recently used files until we
+			// have room to spare.
+			std::vector<FileInfo> files;
+			size_t size = scan( &files );
+			std::sort( files.begin(), files.end() );
+			const size_t targetSize = m_sizeLimit * 3 / 4;
+			for( std::vector<FileInfo>::const_iterator it = files.begin(), eIt = files.end(); it != eIt && size > targetSize; ++it )
+			{
+				boost::system::error_code ec;
+				if( boost::filesystem::remove( std::get<2>( *it ), ec ) )
+				{
+					size -= std::get<1>( *it );
+				}
+			}
+
+			m_size = size;
+			m_evicting = false;
+		}
+
+		mutable Mutex m_mutex;
+		std::string m_directory;
+		std::set<IECore::TypeId> m_plugTypes;
+		tbb::atomic<size_t> m_sizeLimit;
+		tbb::atomic<size_t> m_size;
+		tbb::atomic<bool> m_active;
+		tbb::atomic<bool> m_evicting;
+
+};
+
+// Attributes the usage of the compute cache to the nodes and plug
+// types responsible for it. All operations are guarded by a single
+// mutex, which is acceptable because recording is only enabled while
+// diagnosing memory usage.
+class CacheStatisticsRecorder
+{
+
+	public :
+
+		static CacheStatisticsRecorder &instance()
+		{
+			static CacheStatisticsRecorder *g_instance = new CacheStatisticsRecorder;
+			return *g_instance;
+		}
+
+		void setEnabled( bool enabled )
+		{
+			std::lock_guard<std::mutex> lock( m_mutex );
+			if( enabled && !m_enabled )
+			{
+				for( auto &s : m_nodeStatistics )
+				{
+					s.second.hits = s.second.misses = s.second.evictions = 0;
+				}
+				for( auto &s : m_plugTypeStatistics )
+				{
+					s.second.hits = s.second.misses = s.second.evictions = 0;
+				}
+			}
+			m_enabled = enabled;
+		}
+
+		bool getEnabled() const
+		{
+			return m_enabled;
+		}
+
+		void hit( const ValuePlug *plug )
+		{
+			const Key key = this->key( plug );
+			std::lock_guard<std::mutex> lock( m_mutex );
+			m_nodeStatistics[key.first].hits++;
+			m_plugTypeStatistics[key.second].hits++;
+		}
+
+		void miss( const ValuePlug *plug )
+		{
+			const Key key = this->key( plug );
+			std::lock_guard<std::mutex> lock( m_mutex );
+			m_nodeStatistics[key.first].misses++;
+			m_plugTypeStatistics[key.second].misses++;
+		}
+
+		// Must be called before the entry is stored in the cache,
+		// so that `removed()` will find it even if the cache evicts
+		// it immediately. Returns false if the entry was already
+		// recorded.
+		bool stored( const ValuePlug *plug, const IECore::MurmurHash &hash, size_t bytes )
+		{
+			const Key key = this->key( plug );
+			std::lock_guard<std::mutex> lock( m_mutex );
+			if( !m_entries.insert( std::make_pair( hash, Entry( key, bytes ) ) ).second )
+			{
+				// Already attributed to another plug which
+				// computed an identical value.
+				return false;
+			}
+			m_numEntries = m_entries.size();
+			adjust( m_nodeStatistics[key.first], 1, bytes );
+			adjust( m_plugTypeStatistics[key.second], 1, bytes );
+			return true;
+		}
+
+		// Called by the cache when an entry is removed.
+		void removed( const IECore::MurmurHash &hash, bool evicted )
+		{
+			if( !m_numEntries )
+			{
+				// Avoid locking when nothing has been recorded.
+				return;
+			}
+
+			std::lock_guard<std::mutex> lock( m_mutex );
+			auto it = m_entries.find( hash );
+			if( it == m_entries.end() )
+			{
+				return;
+			}
+
+			const Key &key = it->second.key;
+			adjust( m_nodeStatistics[key.first], -1, -it->second.bytes, evicted );
+			adjust( m_plugTypeStatistics[key.second], -1, -it->second.bytes, evicted );
+			m_entries.erase( it );
+			m_numEntries = m_entries.size();
+		}
+
+		void statistics( ValuePlug::CacheStatisticsMap &nodeStatistics, ValuePlug::CacheStatisticsMap &plugTypeStatistics ) const
+		{
+			std::lock_guard<std::mutex> lock( m_mutex );
+			nodeStatistics = m_nodeStatistics;
+			plugTypeStatistics = m_plugTypeStatistics;
+		}
+
+	private :
+
+		CacheStatisticsRecorder()
+			:	m_enabled( false ), m_numEntries( 0 )
+		{
+		}
+
+		// Node name and plug type name.
+		typedef std::pair<std::string, std::string> Key;
+
+		static Key key( const ValuePlug *plug )
+		{
+			std::string nodeName;
+			if( const Node *node = plug->node() )
+			{
+				const GraphComponent *script = node->ancestor( (IECore::TypeId)ScriptNodeTypeId );
+				nodeName = script ? node->relativeName( script ) : node->fullName();
+			}
+			return Key( nodeName, plug->typeName() );
+		}
+
+		static void adjust( ValuePlug::CacheStatistics &s, int entries, ptrdiff_t bytes, bool evicted = false )
+		{
+			s.entries += entries;
+			s.bytes += bytes;
+			if( evicted )
+			{
+				s.evictions++;
+			}
+		}
+
+		struct Entry
+		{
+			Entry( const Key &key, size_t bytes ) : key( key ), bytes( bytes ) {}
+			Key key;
+			ptrdiff_t bytes;
+		};
+
+		mutable std::mutex m_mutex;
+		std::atomic<bool> m_enabled;
+		std::atomic<size_t> m_numEntries;
+		boost::unordered_map<IECore::MurmurHash, Entry> m_entries;
+		ValuePlug::CacheStatisticsMap m_nodeStatistics;
+		ValuePlug::CacheStatisticsMap m_plugTypeStatistics;
+
+};
+
 } // namespace
 
 //////////////////////////////////////////////////////////////////////////
@@ -119,26 +624,10 @@ class ValuePlug::HashProcess : public Process
 			// from our cache, and if we can't we'll compute it using a HashProcess instance.
 
 			ThreadData &threadData = g_threadData.local();
-			if( !Process::current() )
-			{
-				// Starting a new root computation.
-				if( ++(threadData.cacheClearCount) == 3200 )
-				{
-					// Prevent unbounded growth in the hash cache
-					// if many computations are being performed
-					// without any plugs being dirtied in between,
-					// by clearing it after every Nth computation.
-					// N == 3200 was observed to be 6x faster than
-					// N == 100 for a procedural instancing scene at
-					// a memory cost of about 100 mb.
-					threadData.clearCache = 1;
-				}
-			}
-
 			if( threadData.clearCache )
 			{
 				threadData.cache.clear();
-				threadData.cacheClearCount = 0;
+				threadData.entries.clear();
 				threadData.clearCache = 0;
 			}
 
@@ -147,14 +636,63 @@ class ValuePlug::HashProcess : public Process
 			Cache::iterator it = threadData.cache.find( key );
 			if( it != threadData.cache.end() )
 			{
-				return it->second;
+				// Move the entry to the front of the list,
+				// marking it as the most recently used.
+				threadData.entries.splice( threadData.entries.begin(), threadData.entries, it->second );
+				threadData.hits++;
+				return it->second->second;
 			}
 
+			threadData.misses++;
 			HashProcess process( p, plug, currentContext );
-			threadData.cache[key] = process.m_result;
+
+			// The process may have added entries of its own, but not
+			// for our key, since we would have recursed infinitely in
+			// that case. So it is safe to insert the entry now, and then
+			// discard the least recently used entries to stay within
+			// the limit.
+			threadData.entries.push_front( Entry( key, process.m_result ) );
+			threadData.cache[key] = threadData.entries.begin();
+			const size_t sizeLimit = g_cacheSizeLimit;
+			while( threadData.entries.size() > sizeLimit )
+			{
+				threadData.cache.erase( threadData.entries.back().first );
+				threadData.entries.pop_back();
+				threadData.evictions++;
+			}
+
 			return process.m_result;
 		}
 
+		static size_t getCacheSizeLimit()
+		{
+			return g_cacheSizeLimit;
+		}
+
+		static void setCacheSizeLimit( size_t entries )
+		{
+			// Threads will trim their caches to the new
+			// limit the next time they add an entry.
+			g_cacheSizeLimit = entries;
+		}
+
+		static ValuePlug::HashCacheStatistics cacheStatistics()
+		{
+			// As for `clearCache()`, we are reading from the data of other
+			// threads here, so the result may be slightly stale if computations
+			// are running concurrently.
+			ValuePlug::HashCacheStatistics result;
+			tbb::enumerable_thread_specific<ThreadData, tbb::cache_aligned_allocator<ThreadData>, tbb::ets_key_per_instance >::iterator it, eIt;
+			for( it = g_threadData.begin(), eIt = g_threadData.end(); it != eIt; ++it )
+			{
+				result.entries += it->entries.size();
+				result.hits += it->hits;
+				result.misses += it->misses;
+				result.evictions += it->evictions;
+			}
+			return result;
+		}
+
 		static void clearCache()
 		{
 			// The docs for enumerable_thread_specific aren't particularly clear
@@ -217,22 +755,31 @@ class ValuePlug::HashProcess : public Process
 		// by the plug the hash is for and the context the hash was performed in. The
 		// typedefs below describe that data structure. We use Plug::dirty() to empty
 		// the caches, because they are invalidated whenever an upstream value or
-		// connection is changed. We also clear the cache unconditionally every N
-		// computations, to prevent unbounded growth.
+		// connection is changed. To prevent unbounded growth, each cache is limited
+		// to a maximum number of entries, evicting the least recently used entries
+		// first. The entries are held in a list ordered from most to least recently
+		// used, and the map points into the list.
 		typedef std::pair<const ValuePlug *, IECore::MurmurHash> CacheKey;
-		typedef boost::unordered_map<CacheKey, IECore::MurmurHash> Cache;
+		typedef std::pair<CacheKey, IECore::MurmurHash> Entry;
+		typedef std::list<Entry> Entries;
+		typedef boost::unordered_map<CacheKey, Entries::iterator> Cache;
 
 		// To support multithreading, each thread has it's own state.
 		struct ThreadData
 		{
-			ThreadData() : cacheClearCount( 0 ) {}
-			int cacheClearCount;
+			ThreadData() : hits( 0 ), misses( 0 ), evictions( 0 ) { clearCache = 0; }
 			Cache cache;
+			Entries entries;
 			// Flag to request that hashCache be cleared.
 			tbb::atomic<int> clearCache;
+			// Statistics.
+			size_t hits;
+			size_t misses;
+			size_t evictions;
 		};
 
 		static tbb::enumerable_thread_specific<ThreadData, tbb::cache_aligned_allocator<ThreadData>, tbb::ets_key_per_instance > g_threadData;
+		static std::atomic<size_t> g_cacheSizeLimit;
 
 		IECore::MurmurHash m_result;
 
@@ -240,6 +787,8 @@ class ValuePlug::HashProcess : public Process
 
 const IECore::InternedString ValuePlug::HashProcess::staticType( "computeNode:hash" );
 tbb::enumerable_thread_specific<ValuePlug::HashProcess::ThreadData, tbb::cache_aligned_allocator<ValuePlug::HashProcess::ThreadData>, tbb::ets_key_per_instance > ValuePlug::HashProcess::g_threadData;
+// The 100000 entries held by each thread cost about 15 mb.
+std::atomic<size_t> ValuePlug::HashProcess::g_cacheSizeLimit( 100000 );
 
 //////////////////////////////////////////////////////////////////////////
 // The ComputeProcess manages the task of calling ComputeNode::compute()
@@ -268,7 +817,15 @@ class ValuePlug::ComputeProcess : public Process
 
 		static void clearCache()
 		{
+			// Entries removed by clearing are not counted
+			// as evictions. Note that `g_clearing` is global,
+			// so evictions made by other threads while we are
+			// clearing will also not be counted. This is
+			// acceptable since the statistics are only for
+			// diagnostics, and clearing is rare.
+			g_clearing = true;
 			g_cache.clear();
+			g_clearing = false;
 		}
 
 		static IECore::ConstObjectPtr value( const ValuePlug *plug, const IECore::MurmurHash *precomputedHash, bool cachedOnly )
@@ -297,11 +854,62 @@ class ValuePlug::ComputeProcess : public Process
 				IECore::ConstObjectPtr result = g_cache.get( hash );
 				if( result || cachedOnly )
 				{
+					if( result && CacheStatisticsRecorder::instance().getEnabled() )
+					{
+						CacheStatisticsRecorder::instance().hit( p );
+					}
 					return result;
 				}
 
-				// Otherwise, use a ComputeProcess instance to do the work.
-				ComputeProcess process( p, plug );
+				CacheStatisticsRecorder &statisticsRecorder = CacheStatisticsRecorder::instance();
+				const bool recordStatistics = statisticsRecorder.getEnabled();
+				if( recordStatistics )
+				{
+					statisticsRecorder.miss( p );
+				}
+
+#ifdef GAFFER_DEDUPLICATE_COMPUTES
+				// If another thread is already computing the same value,
+				// then wait for it to finish rather than duplicate the work.
+				// Otherwise, register our own compute so others can do the same.
+				InFlightComputePtr inFlightCompute;
+				{
+					InFlightComputes::accessor accessor;
+					if( g_inFlightComputes.insert( accessor, hash ) )
+					{
+						inFlightCompute = new InFlightCompute;
+						accessor->second = inFlightCompute;
+					}
+					else
+					{
+						InFlightComputePtr otherCompute = accessor->second;
+						accessor.release();
+						ComputeWaitProcess waitProcess( p, plug );
+						if( IECore::ConstObjectPtr otherResult = otherCompute->wait( waitProcess.context()->canceller() ) )
+						{
+							return otherResult;
+						}
+						// The other compute failed, so we fall through to
+						// compute it ourselves, reporting any error as usual.
+					}
+				}
+
+				try
+				{
+					result = computeOrLoad( p, plug, hash );
+				}
+				catch( ... )
+				{
+					if( inFlightCompute )
+					{
+						g_inFlightComputes.erase( hash );
+						inFlightCompute->finish( nullptr );
+					}
+					throw;
+				}
+#else
+				result = computeOrLoad( p, plug, hash );
+#endif
 				// Store the value in the cache, after first checking that this hasn't
 				// been done already. The check is useful because it's common for an
 				// upstream compute triggered by to have already
@@ -315,9 +923,23 @@ class ValuePlug::ComputeProcess : public Process
 				/// overhead, and at some point we'll need to address that.
 				if( !g_cache.get( hash ) )
 				{
-					g_cache.set( hash, process.m_result, process.m_result->memoryUsage() );
+					const size_t cost = result->memoryUsage();
+					const bool recorded = recordStatistics && statisticsRecorder.stored( p, hash, cost );
+					if( !g_cache.set( hash, result, cost ) && recorded )
+					{
+						statisticsRecorder.removed( hash, /* evicted = */ false );
+					}
+				}
+#ifdef GAFFER_DEDUPLICATE_COMPUTES
+				// Now the result is in the cache, new arrivals will find
+				// it there, and we can release anyone already waiting.
+				if( inFlightCompute )
+				{
+					g_inFlightComputes.erase( hash );
+					inFlightCompute->finish( result );
 				}
-				return process.m_result;
+#endif
+				return result;
 			}
 			else
 			{
@@ -355,6 +977,43 @@ class ValuePlug::ComputeProcess : public Process
 
 	private :
 
+		// Loads the value from the disk cache if possible, and otherwise
+		// uses a ComputeProcess instance to do the work, storing the result
+		// in the disk cache if appropriate.
+		static IECore::ConstObjectPtr computeOrLoad( const ValuePlug *p, const ValuePlug *plug, const IECore::MurmurHash &hash )
+		{
+			DiskCache &diskCache = DiskCache::instance();
+			const bool diskCacheable = diskCache.enabled( p->typeId() );
+			if( diskCacheable )
+			{
+				if( IECore::ConstObjectPtr result = diskCache.get( hash, p->typeId() ) )
+				{
+					return result;
+				}
+			}
+
+			IECore::ConstObjectPtr result;
+#ifdef GAFFER_DEDUPLICATE_COMPUTES
+			// Isolate the compute so that while waiting on its own
+			// internal tasks, this thread can't pick up unrelated tasks
+			// which themselves wait on the compute we're performing.
+			tbb::this_task_arena::isolate(
+				[&result, p, plug] {
+					result = ComputeProcess( p, plug ).m_result;
+				}
+			);
+#else
+			result = ComputeProcess( p, plug ).m_result;
+#endif
+
+			if( diskCacheable )
+			{
+				diskCache.set( hash, p->typeId(), result.get() );
+			}
+
+			return result;
+		}
+
 		ComputeProcess( const ValuePlug *plug, const ValuePlug *downstream )
 			:	Process( staticType, plug, downstream )
 		{
@@ -397,17 +1056,33 @@ class ValuePlug::ComputeProcess : public Process
 			return nullptr;
 		}
 
+		static void cacheRemoved( const IECore::MurmurHash &h, const IECore::ConstObjectPtr &value )
+		{
+			CacheStatisticsRecorder::instance().removed( h, /* evicted = */ !g_clearing );
+		}
+
 		// A cache mapping from ValuePlug::hash() to the result of the previous computation
 		// for that hash. This allows us to cache results for faster repeat evaluation
 		typedef IECorePreview::LRUCache<IECore::MurmurHash, IECore::ConstObjectPtr> Cache;
 		static Cache g_cache;
+		static std::atomic<bool> g_clearing;
+
+#ifdef GAFFER_DEDUPLICATE_COMPUTES
+		// The computes currently in progress, indexed by hash.
+		typedef tbb::concurrent_hash_map<IECore::MurmurHash, InFlightComputePtr> InFlightComputes;
+		static InFlightComputes g_inFlightComputes;
+#endif
 
 		IECore::ConstObjectPtr m_result;
 
 };
 
 const IECore::InternedString ValuePlug::ComputeProcess::staticType( "computeNode:compute" );
-ValuePlug::ComputeProcess::Cache ValuePlug::ComputeProcess::g_cache( nullGetter, 1024 * 1024 * 1024 * 1 ); // 1 gig
+ValuePlug::ComputeProcess::Cache ValuePlug::ComputeProcess::g_cache( nullGetter, cacheRemoved, 1024 * 1024 * 1024 * 1 ); // 1 gig
+std::atomic<bool> ValuePlug::ComputeProcess::g_clearing( false );
+#ifdef GAFFER_DEDUPLICATE_COMPUTES
+ValuePlug::ComputeProcess::InFlightComputes ValuePlug::ComputeProcess::g_inFlightComputes;
+#endif
 
 //////////////////////////////////////////////////////////////////////////
 // SetValueAction implementation
@@ -776,7 +1451,72 @@ size_t ValuePlug::cacheMemoryUsage()
 	return ComputeProcess::cacheMemoryUsage();
 }
 
+size_t ValuePlug::getHashCacheSizeLimit()
+{
+	return HashProcess::getCacheSizeLimit();
+}
+
+void ValuePlug::setHashCacheSizeLimit( size_t entries )
+{
+	HashProcess::setCacheSizeLimit( entries );
+}
+
+void ValuePlug::clearHashCache()
+{
+	HashProcess::clearCache();
+}
+
+ValuePlug::HashCacheStatistics ValuePlug::hashCacheStatistics()
+{
+	return HashProcess::cacheStatistics();
+}
+
+void ValuePlug::setDiskCacheDirectory( const std::string &directory )
+{
+	DiskCache::instance().setDirectory( directory );
+}
+
+std::string ValuePlug::getDiskCacheDirectory()
+{
+	return DiskCache::instance().getDirectory();
+}
+
+void ValuePlug::setDiskCacheSizeLimit( size_t bytes )
+{
+	DiskCache::instance().setSizeLimit( bytes );
+}
+
+size_t ValuePlug::getDiskCacheSizeLimit()
+{
+	return DiskCache::instance().getSizeLimit();
+}
+
+void ValuePlug::setDiskCacheEnabled( IECore::TypeId plugType, bool enabled )
+{
+	DiskCache::instance().setEnabled( plugType, enabled );
+}
+
+bool ValuePlug::getDiskCacheEnabled( IECore::TypeId plugType )
+{
+	return DiskCache::instance().getEnabled( plugType );
+}
+
 void ValuePlug::clearCache()
 {
 	ComputeProcess::clearCache();
 }
+
+void ValuePlug::setCacheStatisticsEnabled( bool enabled )
+{
+	CacheStatisticsRecorder::instance().setEnabled( enabled );
+}
+
+bool ValuePlug::getCacheStatisticsEnabled()
+{
+	return CacheStatisticsRecorder::instance().getEnabled();
+}
+
+void ValuePlug::cacheStatistics( CacheStatisticsMap &nodeStatistics, CacheStatisticsMap &plugTypeStatistics )
+{
+	CacheStatisticsRecorder::instance().statistics( nodeStatistics, plugTypeStatistics );
+}
@@ -53,11 +53,125 @@
 #include "boost/python/suite/indexing/container_utils.hpp"
 #include "boost/tokenizer.hpp"
 
+#include <unordered_map>
+
 using namespace IECore;
 using namespace Gaffer;
 using namespace GafferBindings;
 using namespace boost::python;
 
+//////////////////////////////////////////////////////////////////////////
+// Internal utilities
+//////////////////////////////////////////////////////////////////////////
+
+namespace
+{
+
+// Module and class paths are needed for every GraphComponent and
+// plug value we serialise, and computing them requires several Python
+// attribute lookups. The results depend only on the type, so we cache
+// them, holding a reference to each type so that its address can't be
+// reused by another.
+typedef std::unordered_map<PyObject *, std::string> PathCache;
+
+PathCache &modulePathCache()
+{
+	// Deliberately leaked, since it holds references to Python
+	// objects which can't be released after the interpreter has
+	// been finalised.
+	static PathCache *g_cache = new PathCache;
+	return *g_cache;
+}
+
+PathCache &classPathCache()
+{
+	static PathCache *g_cache = new PathCache;
+	return *g_cache;
+}
+
+// Returns the key under which the paths for `o` may be cached, or
+// null if they must not be cached. Types are cached directly, and
+// instances are cached under their type provided it is a class
+// defined in Python or via boost::python (a heap type). All other
+// objects, such as functions and instances of old-style classes,
+// share a type with unrelated objects, so can't be cached.
+PyObject *pathCacheKey( const boost::python::object &o )
+{
+	if( PyType_Check( o.ptr() ) )
+	{
+		return o.ptr();
+	}
+
+	PyTypeObject *type = Py_TYPE( o.ptr() );
+	if( PyType_HasFeature( type, Py_TPFLAGS_HEAPTYPE ) )
+	{
+		return (PyObject *)type;
+	}
+
+	return nullptr;
+}
+
+void addToPathCache( PathCache &cache, PyObject *key, const std::string &path )
+{
+	if( !key )
+	{
+		return;
+	}
+
+	if( cache.insert( PathCache::value_type( key, path ) ).second )
+	{
+		Py_INCREF( key );
+	}
+}
+
+std::string modulePathInternal( boost::python::object &o )
+{
+	if( !PyObject_HasAttrString( o.ptr(), "__module__" ) )
+	{
+		return "";
+	}
+	std::string modulePath = extract<std::string>( o.attr( "__module__" ) );
+	std::string objectName;
+	if( PyType_Check( o.ptr() ) )
+	{
+		objectName = extract<std::string>( o.attr( "__name__" ) );
+	}
+	else
+	{
+		objectName = extract<std::string>( o.attr( "__class__" ).attr( "__name__" ) );
+	}
+
+	typedef boost::tokenizer<boost::char_separator<char> > Tokenizer;
+	std::string sanitisedModulePath;
+	Tokenizer tokens( modulePath, boost::char_separator<char>( "." ) );
+
+	for( Tokenizer::iterator tIt=tokens.begin(); tIt!=tokens.end(); tIt++ )
+	{
+		if( tIt->compare( 0, 1, "_" )==0 )
+		{
+			// assume that module path components starting with _ are bogus, and are used only to bring
+			// binary components into a namespace.
+			continue;
+		}
+		Tokenizer::iterator next = tIt; next++;
+		if( next==tokens.end() && *tIt == objectName )
+		{
+			// if the last module name is the same as the class name then assume this is just the file the
+			// class has been implemented in.
+			continue;
+		}
+		if( sanitisedModulePath.size() )
+		{
+			sanitisedModulePath += ".";
+		}
+		sanitisedModulePath += *tIt;
+	}
+
+	return sanitisedModulePath;
+}
+
+} // namespace
+
 //////////////////////////////////////////////////////////////////////////
 // Serialisation
 //////////////////////////////////////////////////////////////////////////
@@ -91,6 +205,9 @@ const Gaffer::GraphComponent *Serialisation::parent() const
 std::string Serialisation::result() const
 {
 	std::string result;
+	// Reserve enough space up front, so that we don't repeatedly
+	// reallocate and copy what can be a very large string.
+	result.reserve( m_hierarchyScript.size() + m_connectionScript.size() + m_postScript.size() + 1024 );
 	for( std::set<std::string>::const_iterator it=m_modules.begin(); it!=m_modules.end(); it++ )
 	{
 		result += "import " + *it + "\n";
@@ -130,48 +247,17 @@ std::string Serialisation::modulePath( const IECore::RefCounted *object )
 
 std::string Serialisation::modulePath( boost::python::object &o )
 {
-	if( !PyObject_HasAttrString( o.ptr(), "__module__" ) )
-	{
-		return "";
-	}
-	std::string modulePath = extract<std::string>( o.attr( "__module__" ) );
-	std::string objectName;
-	if( PyType_Check( o.ptr() ) )
-	{
-		objectName = extract<std::string>( o.attr( "__name__" ) );
-	}
-	else
-	{
-		objectName = extract<std::string>( o.attr( "__class__" ).attr( "__name__" ) );
-	}
-
-	typedef boost::tokenizer<boost::char_separator<char> > Tokenizer;
-	std::string sanitisedModulePath;
-	Tokenizer tokens( modulePath, boost::char_separator<char>( "." ) );
-
-	for( Tokenizer::iterator tIt=tokens.begin(); tIt!=tokens.end(); tIt++ )
+	PathCache &cache = modulePathCache();
+	PyObject *key = pathCacheKey( o );
+	PathCache::const_iterator it = key ? cache.find( key ) : cache.end();
+	if( it != cache.end() )
 	{
-		if( tIt->compare( 0, 1, "_" )==0 )
-		{
-			// assume that module path components starting with _ are bogus, and are used only to bring
-			// binary components into a namespace.
-			continue;
-		}
-		Tokenizer::iterator next = tIt; next++;
-		if( next==tokens.end() && *tIt == objectName )
-		{
-			// if the last module name is the same as the class name then assume this is just the file the
-			// class has been implemented in.
-			continue;
-		}
-		if( sanitisedModulePath.size() )
-		{
-			sanitisedModulePath += ".";
-		}
-		sanitisedModulePath += *tIt;
+		return it->second;
 	}
 
-	return sanitisedModulePath;
+	const std::string result = modulePathInternal( o );
+	addToPathCache( cache, key, result );
+	return result;
 }
 
 std::string Serialisation::classPath( const IECore::RefCounted *object )
@@ -182,6 +268,14 @@ std::string Serialisation::classPath( const IECore::RefCounted *object )
 
 std::string Serialisation::classPath( boost::python::object &object )
 {
+	PathCache &cache = classPathCache();
+	PyObject *key = pathCacheKey( object );
+	PathCache::const_iterator it = key ? cache.find( key ) : cache.end();
+	if( it != cache.end() )
+	{
+		return it->second;
+	}
+
 	std::string result = modulePath( object );
 	if( result.size() )
 	{
@@ -214,6 +308,7 @@ std::string Serialisation::classPath( boost::python::object &object )
 		result += extract<std::string>( cls.attr( "__name__" ) );
 	}
 
+	addToPathCache( cache, key, result );
 	return result;
 }
 
@@ -52,6 +52,8 @@
 #include "boost/algorithm/string/replace.hpp"
 #include "boost/format.hpp"
 
+#include <map>
+
 using namespace std;
 using namespace boost::python;
 using namespace GafferBindings;
@@ -104,8 +106,48 @@ std::string valueRepr( boost::python::object &o )
 	// We use IECore.repr() because it correctly prefixes the imath
 	// types with the module name, and also works around problems
 	// when round-tripping empty Box2fs.
-	object repr = boost::python::import( "IECore" ).attr( "repr" );
-	return extract<std::string>( repr( o ) );
+	// The function is looked up once only, and deliberately leaked
+	// because it can't be released after the interpreter is finalised.
+	static object *g_repr = new object( boost::python::import( "IECore" ).attr( "repr" ) );
+	return extract<std::string>( (*g_repr)( o ) );
+}
+
+struct PythonMethods
+{
+	bool getValue;
+	bool defaultValue;
+};
+
+// Returns the value accessors provided by the Python binding for the plug.
+// We look them up once per type rather than once per plug, so that plugs at
+// their default value can be serialised without any Python calls at all.
+PythonMethods pythonMethods( const Gaffer::ValuePlug *plug )
+{
+	typedef std::map<IECore::TypeId, PythonMethods> MethodsMap;
+	static MethodsMap g_methods;
+
+	MethodsMap::const_iterator it = g_methods.find( plug->typeId() );
+	if( it != g_methods.end() )
+	{
+		return it->second;
+	}
+
+	object pythonPlug( ValuePlugPtr( const_cast<ValuePlug *>( plug ) ) );
+	PythonMethods methods;
+	methods.getValue = PyObject_HasAttrString( pythonPlug.ptr(), "getValue" );
+	methods.defaultValue = PyObject_HasAttrString( pythonPlug.ptr(), "defaultValue" );
+
+	// Python subclasses which haven't registered a TypeId of their own
+	// share one with their base class, but may provide different methods.
+	// We only cache the results for the class bound for the TypeId itself.
+	const std::string typeName = plug->typeName();
+	const size_t colon = typeName.rfind( ':' );
+	if( typeName.compare( colon == std::string::npos ? 0 : colon + 1, std::string::npos, Py_TYPE( pythonPlug.ptr() )->tp_name ) == 0 )
+	{
+		g_methods.insert( MethodsMap::value_type( plug->typeId(), methods ) );
+	}
+
+	return methods;
 }
 
 std::string valueSerialisationWalk( const Gaffer::ValuePlug *plug, const Serialisation &serialisation, bool &canCondense )
@@ -137,8 +179,8 @@ std::string valueSerialisationWalk( const Gaffer::ValuePlug *plug, const Seriali
 		return childSerialisations;
 	}
 
-	object pythonPlug( ValuePlugPtr( const_cast<ValuePlug *>( plug ) ) );
-	if( !PyObject_HasAttrString( pythonPlug.ptr(), "getValue" ) )
+	const PythonMethods methods = pythonMethods( plug );
+	if( !methods.getValue )
 	{
 		// Can't condense, because can't get value at this level.
 		// We also disable condensing at outer levels in this case,
@@ -160,11 +202,20 @@ std::string valueSerialisationWalk( const Gaffer::ValuePlug *plug, const Seriali
 		}
 	}
 
-	// Emit the `setValue()` call for this plug.
+	// Emit the `setValue()` call for this plug, unless it is at the default
+	// value. Most plugs are, so we first perform a cheap test in C++, and
+	// only fall back to comparing values in Python if that fails.
 
+	const bool omitDefaultValue = shouldOmitDefaultValue( plug ) && methods.defaultValue;
+	if( omitDefaultValue && plug->isSetToDefault() )
+	{
+		return "";
+	}
+
+	object pythonPlug( ValuePlugPtr( const_cast<ValuePlug *>( plug ) ) );
 	object pythonValue = pythonPlug.attr( "getValue" )();
 
-	if( shouldOmitDefaultValue( plug ) && PyObject_HasAttrString( pythonPlug.ptr(), "defaultValue" ) )
+	if( omitDefaultValue )
 	{
 		object pythonDefaultValue = pythonPlug.attr( "defaultValue" )();
 		if( pythonValue == pythonDefaultValue )
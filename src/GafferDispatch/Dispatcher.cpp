@@ -43,9 +43,20 @@
 
 #include "IECore/FrameRange.h"
 #include "IECore/MessageHandler.h"
+#include "IECore/SimpleTypedData.h"
 
 #include "boost/algorithm/string/predicate.hpp"
+#include "boost/chrono.hpp"
 #include "boost/filesystem.hpp"
+#include "boost/filesystem/fstream.hpp"
+#include "boost/unordered_map.hpp"
+#include "boost/unordered_set.hpp"
+
+#include "tbb/concurrent_hash_map.h"
+#include "tbb/parallel_for.h"
+
+#include <algorithm>
+#include <memory>
 
 using namespace IECore;
 using namespace Gaffer;
@@ -60,6 +71,11 @@ static InternedString g_sizeBlindDataName( "dispatcher:size" );
 static InternedString g_executedBlindDataName( "dispatcher:executed" );
 static InternedString g_visitedBlindDataName( "dispatcher:visited" );
 static InternedString g_jobDirectoryContextEntry( "dispatcher:jobDirectory" );
+static InternedString g_taskManifestDirectoryContextEntry( "dispatcher:taskManifestDirectory" );
+static InternedString g_taskTimingsDirectoryContextEntry( "dispatcher:taskTimingsDirectory" );
+static InternedString g_estimatedDurationBlindDataName( "dispatcher:estimatedDuration" );
+static InternedString g_criticalPathBlindDataName( "dispatcher:criticalPath" );
+static InternedString g_fileNamePlugName( "fileName" );
 static IECore::BoolDataPtr g_trueBoolData = new BoolData( true );
 
 size_t Dispatcher::g_firstPlugIndex = 0;
@@ -79,6 +95,11 @@ Dispatcher::Dispatcher( const std::string &name )
 	addChild( new StringPlug( "frameRange", Plug::In, "1-100x10" ) );
 	addChild( new StringPlug( "jobName", Plug::In, "" ) );
 	addChild( new StringPlug( "jobsDirectory", Plug::In, "" ) );
+	addChild( new BoolPlug( "skipUpToDateTasks", Plug::In, false ) );
+	addChild( new StringPlug( "taskManifestDirectory", Plug::In, "" ) );
+	addChild( new BoolPlug( "useTaskTimings", Plug::In, false ) );
+	addChild( new StringPlug( "taskTimingsDirectory", Plug::In, "" ) );
+	addChild( new FloatPlug( "targetBatchDuration", Plug::In, 60.0f, 0.0f ) );
 }
 
 Dispatcher::~Dispatcher()
@@ -125,11 +146,100 @@ const StringPlug *Dispatcher::jobsDirectoryPlug() const
 	return getChild<StringPlug>( g_firstPlugIndex + 3 );
 }
 
+BoolPlug *Dispatcher::skipUpToDateTasksPlug()
+{
+	return getChild<BoolPlug>( g_firstPlugIndex + 4 );
+}
+
+const BoolPlug *Dispatcher::skipUpToDateTasksPlug() const
+{
+	return getChild<BoolPlug>( g_firstPlugIndex + 4 );
+}
+
+StringPlug *Dispatcher::taskManifestDirectoryPlug()
+{
+	return getChild<StringPlug>( g_firstPlugIndex + 5 );
+}
+
+const StringPlug *Dispatcher::taskManifestDirectoryPlug() const
+{
+	return getChild<StringPlug>( g_firstPlugIndex + 5 );
+}
+
+BoolPlug *Dispatcher::useTaskTimingsPlug()
+{
+	return getChild<BoolPlug>( g_firstPlugIndex + 6 );
+}
+
+const BoolPlug *Dispatcher::useTaskTimingsPlug() const
+{
+	return getChild<BoolPlug>( g_firstPlugIndex + 6 );
+}
+
+StringPlug *Dispatcher::taskTimingsDirectoryPlug()
+{
+	return getChild<StringPlug>( g_firstPlugIndex + 7 );
+}
+
+const StringPlug *Dispatcher::taskTimingsDirectoryPlug() const
+{
+	return getChild<StringPlug>( g_firstPlugIndex + 7 );
+}
+
+FloatPlug *Dispatcher::targetBatchDurationPlug()
+{
+	return getChild<FloatPlug>( g_firstPlugIndex + 8 );
+}
+
+const FloatPlug *Dispatcher::targetBatchDurationPlug() const
+{
+	return getChild<FloatPlug>( g_firstPlugIndex + 8 );
+}
+
 const std::string Dispatcher::jobDirectory() const
 {
 	return m_jobDirectory;
 }
 
+const IECore::CompoundData *Dispatcher::dispatchStatistics() const
+{
+	return m_dispatchStatistics.get();
+}
+
+std::string Dispatcher::createTaskManifestDirectory( const Context *context ) const
+{
+	boost::filesystem::path manifestDirectory( context->substitute( taskManifestDirectoryPlug()->getValue() ) );
+	if( manifestDirectory.empty() )
+	{
+		manifestDirectory = context->substitute( jobsDirectoryPlug()->getValue() );
+		if( manifestDirectory.empty() )
+		{
+			manifestDirectory = boost::filesystem::current_path();
+		}
+		manifestDirectory /= "taskManifest";
+	}
+
+	boost::filesystem::create_directories( manifestDirectory );
+	return manifestDirectory.string();
+}
+
+std::string Dispatcher::createTaskTimingsDirectory( const Context *context ) const
+{
+	boost::filesystem::path timingsDirectory( context->substitute( taskTimingsDirectoryPlug()->getValue() ) );
+	if( timingsDirectory.empty() )
+	{
+		timingsDirectory = context->substitute( jobsDirectoryPlug()->getValue() );
+		if( timingsDirectory.empty() )
+		{
+			timingsDirectory = boost::filesystem::current_path();
+		}
+		timingsDirectory /= "taskTimings";
+	}
+
+	boost::filesystem::create_directories( timingsDirectory );
+	return timingsDirectory.string();
+}
+
 std::string Dispatcher::createJobDirectory( const Context *context ) const
 {
 	boost::filesystem::path jobDirectory( context->substitute( jobsDirectoryPlug()->getValue() ) );
@@ -331,11 +441,32 @@ class Dispatcher::Batcher
 
 	public :
 
-		Batcher()
-			:	m_rootBatch( new TaskBatch() )
+		Batcher( const std::string &taskManifestDirectory = "", const std::string &taskTimingsDirectory = "", float targetBatchDuration = 0.0f )
+			:	m_rootBatch( new TaskBatch() ), m_numBatches( 0 ), m_taskManifestDirectory( taskManifestDirectory ),
+				m_taskTimingsDirectory( taskTimingsDirectory ), m_targetBatchDuration( targetBatchDuration )
 		{
 		}
 
+		// Evaluates the preTasks and postTasks of every task reachable from
+		// `tasks`, visiting independent subtrees in parallel. The results are
+		// cached so that the subsequent serial calls to `addTask()` needn't
+		// evaluate them again. Calling this is optional, but it is much faster
+		// than leaving `addTask()` to evaluate everything serially.
+		void evaluateTasks( const std::vector<const TaskNode::Task *> &tasks )
+		{
+			tbb::task_group_context taskGroupContext( tbb::task_group_context::isolated );
+			tbb::parallel_for(
+				tbb::blocked_range<size_t>( 0, tasks.size() ),
+				[this, &tasks]( const tbb::blocked_range<size_t> &r ) {
+					for( size_t i = r.begin(); i != r.end(); ++i )
+					{
+						evaluateTasksWalk( *tasks[i] );
+					}
+				},
+				taskGroupContext // Prevents outer tasks silently cancelling our tasks
+			);
+		}
+
 		void addTask( const TaskNode::Task &task )
 		{
 			addPreTask( m_rootBatch.get(), batchTasksWalk( task ) );
@@ -346,8 +477,101 @@ class Dispatcher::Batcher
 			return m_rootBatch.get();
 		}
 
+		// Sorts the preTasks of every batch so that those with the
+		// longest critical path come first. Dispatchers generally launch
+		// preTasks in order, so this starts the longest chains of work
+		// earliest, minimising the overall duration of the job. Has no
+		// effect unless timings are in use.
+		void orderBatches()
+		{
+			if( !m_taskTimingsDirectory.empty() )
+			{
+				criticalPathWalk( m_rootBatch.get() );
+			}
+		}
+
+		size_t numTasks() const
+		{
+			return m_tasksToBatches.size();
+		}
+
+		size_t numBatches() const
+		{
+			return m_numBatches;
+		}
+
 	private :
 
+		struct Dependencies
+		{
+			TaskNode::Tasks preTasks;
+			TaskNode::Tasks postTasks;
+		};
+
+		typedef tbb::concurrent_hash_map<IECore::MurmurHash, Dependencies> DependenciesMap;
+
+		void evaluateTasksWalk( const TaskNode::Task &task )
+		{
+			const Dependencies *dependencies;
+			{
+				DependenciesMap::accessor accessor;
+				if( !m_dependencies.insert( accessor, dependenciesKey( task ) ) )
+				{
+					// Already visited via another path, possibly on
+					// another thread.
+					return;
+				}
+
+				Context::Scope scopedTaskContext( task.context() );
+				task.plug()->preTasks( accessor->second.preTasks );
+				task.plug()->postTasks( accessor->second.postTasks );
+				// Elements are never moved or erased from the map, so it
+				// is safe to keep a pointer once the accessor is released.
+				// We must release it before recursing, or a cyclic graph
+				// would deadlock rather than being reported as an error
+				// by `batchTasksWalk()`.
+				dependencies = &accessor->second;
+			}
+
+			tbb::parallel_for(
+				tbb::blocked_range<size_t>( 0, dependencies->preTasks.size() + dependencies->postTasks.size() ),
+				[this, dependencies]( const tbb::blocked_range<size_t> &r ) {
+					for( size_t i = r.begin(); i != r.end(); ++i )
+					{
+						const size_t numPreTasks = dependencies->preTasks.size();
+						evaluateTasksWalk(
+							i < numPreTasks ? dependencies->preTasks[i] : dependencies->postTasks[i-numPreTasks]
+						);
+					}
+				}
+			);
+		}
+
+		const Dependencies &dependencies( const TaskNode::Task &task )
+		{
+			DependenciesMap::accessor accessor;
+			if( m_dependencies.insert( accessor, dependenciesKey( task ) ) )
+			{
+				// Not evaluated by `evaluateTasks()`, so
+				// evaluate it now.
+				Context::Scope scopedTaskContext( task.context() );
+				task.plug()->preTasks( accessor->second.preTasks );
+				task.plug()->postTasks( accessor->second.postTasks );
+			}
+			return accessor->second;
+		}
+
+		// Unlike `taskHash()`, this distinguishes between identical
+		// tasks in different contexts, since those may still have
+		// different preTasks and postTasks.
+		IECore::MurmurHash dependenciesKey( const TaskNode::Task &task ) const
+		{
+			MurmurHash result = task.hash();
+			result.append( (uint64_t)task.node() );
+			result.append( task.context()->hash() );
+			return result;
+		}
+
 		TaskBatchPtr batchTasksWalk( const TaskNode::Task &task, const std::set<const TaskBatch *> &ancestors = std::set<const TaskBatch *>() )
 		{
 			// Acquire a batch with this task placed in it,
@@ -359,15 +583,19 @@ class Dispatcher::Batcher
 				throw IECore::Exception( ( boost::format( "Dispatched tasks cannot have cyclic dependencies but %s is involved in a cycle." ) % batch->plug()->relativeName( batch->plug()->ancestor<ScriptNode>() ) ).str() );
 			}
 
-			// Ask the task what preTasks and postTasks it would like.
-			TaskNode::Tasks preTasks;
-			TaskNode::Tasks postTasks;
+			// If we've walked this exact task before, then walking
+			// it again would add nothing new.
+			const MurmurHash walkKey = dependenciesKey( task );
+			if( m_walkedTasks.find( walkKey ) != m_walkedTasks.end() )
 			{
-				Context::Scope scopedTaskContext( task.context() );
-				task.plug()->preTasks( preTasks );
-				task.plug()->postTasks( postTasks );
+				return batch;
 			}
 
+			// Ask the task what preTasks and postTasks it would like.
+			const Dependencies &taskDependencies = dependencies( task );
+			const TaskNode::Tasks &preTasks = taskDependencies.preTasks;
+			const TaskNode::Tasks &postTasks = taskDependencies.postTasks;
+
 			// Collect all the batches the postTasks belong in.
 			// We grab these first because they need to be included
 			// in the ancestors for cycle detection when getting
@@ -393,6 +621,14 @@ class Dispatcher::Batcher
 				addPreTask( batch.get(), batchTasksWalk( *it, preTaskAncestors ) );
 			}
 
+			if( !m_taskManifestDirectory.empty() )
+			{
+				// When skipping up to date tasks, `acquireBatch()` defers
+				// adding frames until now, because we must know whether any
+				// preTasks are being executed before we can skip the task.
+				skipOrAddFrame( batch.get(), task, preTasks );
+			}
+
 			// As far as TaskBatch and doDispatch() are concerned, there
 			// is no such thing as a postTask, so we emulate them by making
 			// this batch a preTask of each of the postTask batches. We also
@@ -404,6 +640,8 @@ class Dispatcher::Batcher
 				addPreTask( m_rootBatch.get(), *it );
 			}
 
+			m_walkedTasks.insert( walkKey );
+
 			return batch;
 		}
 
@@ -413,16 +651,7 @@ class Dispatcher::Batcher
 			// have placed it in a batch already, which we can return
 			// unchanged. The `taskToBatchMapHash` is used as the unique
 			// identity of a task.
-			MurmurHash taskToBatchMapHash = task.hash();
-			// Prevent identical tasks from different nodes from being
-			// coalesced.
-			taskToBatchMapHash.append( (uint64_t)task.node() );
-			if( task.hash() == IECore::MurmurHash() )
-			{
-				// Prevent no-ops from coalescing into a single batch, as this
-				// would break parallelism - see `DispatcherTest.testNoOpDoesntBreakFrameParallelism()`
-				taskToBatchMapHash.append( contextHash( task.context() ) );
-			}
+			const MurmurHash taskToBatchMapHash = taskHash( task );
 			const TaskToBatchMap::const_iterator it = m_tasksToBatches.find( taskToBatchMapHash );
 			if( it != m_tasksToBatches.end() )
 			{
@@ -447,7 +676,18 @@ class Dispatcher::Batcher
 				IntDataPtr batchSizeData = candidateBatch->blindData()->member<IntData>( g_sizeBlindDataName );
 				const IntPlug *batchSizePlug = task.node()->dispatcherPlug()->getChild<const IntPlug>( g_batchSize );
 				const int batchSizeLimit = ( batchSizePlug ) ? batchSizePlug->getValue() : 1;
-				if( requiresSequenceExecution || ( batchSizeData->readable() < batchSizeLimit ) )
+				bool accept = requiresSequenceExecution || ( batchSizeData->readable() < batchSizeLimit );
+				if( !accept && batchSizeLimit == 0 && !m_taskTimingsDirectory.empty() )
+				{
+					// Automatic batch size. We keep adding tasks until the
+					// batch is estimated to take the target duration. Tasks
+					// which have never been timed are each given their own
+					// batch, so that the first dispatch is as parallel as possible,
+					// and timings are gathered for the next.
+					const FloatData *durationData = candidateBatch->blindData()->member<FloatData>( g_estimatedDurationBlindDataName );
+					accept = estimatedDuration( task ) >= 0.0f && durationData->readable() < m_targetBatchDuration;
+				}
+				if( accept )
 				{
 					batch = candidateBatch;
 					batchSizeData->writable()++;
@@ -458,24 +698,29 @@ class Dispatcher::Batcher
 			{
 				batch = new TaskBatch( task.plug(), task.context() );
 				batch->blindData()->writable()[g_sizeBlindDataName] = new IntData( 1 );
+				if( !m_taskTimingsDirectory.empty() )
+				{
+					batch->blindData()->writable()[g_estimatedDurationBlindDataName] = new FloatData( 0.0f );
+				}
 				m_currentBatches[batchMapHash] = batch;
+				m_numBatches++;
+			}
+
+			if( !m_taskTimingsDirectory.empty() )
+			{
+				const float duration = estimatedDuration( task );
+				if( duration > 0.0f )
+				{
+					batch->blindData()->member<FloatData>( g_estimatedDurationBlindDataName )->writable() += duration;
+				}
 			}
 
 			// Now we have an appropriate batch, update it to include
 			// the frame for our task, and any other relevant information.
 
-			if( task.hash() != MurmurHash() )
+			if( task.hash() != MurmurHash() && m_taskManifestDirectory.empty() )
 			{
-				float frame = task.context()->getFrame();
-				std::vector<float> &frames = batch->frames();
-				if( requiresSequenceExecution )
-				{
-					frames.insert( std::lower_bound( frames.begin(), frames.end(), frame ), frame );
-				}
-				else
-				{
-					frames.push_back( frame );
-				}
+				addFrame( batch.get(), task, requiresSequenceExecution );
 			}
 
 			const BoolPlug *immediatePlug = task.node()->dispatcherPlug()->getChild<const BoolPlug>( g_immediatePlugName );
@@ -495,6 +740,135 @@ class Dispatcher::Batcher
 			return batch;
 		}
 
+		// Hash used as the unique identity of a task.
+		IECore::MurmurHash taskHash( const TaskNode::Task &task ) const
+		{
+			MurmurHash result = task.hash();
+			// Prevent identical tasks from different nodes from being
+			// coalesced.
+			result.append( (uint64_t)task.node() );
+			if( task.hash() == IECore::MurmurHash() )
+			{
+				// Prevent no-ops from coalescing into a single batch, as this
+				// would break parallelism - see `DispatcherTest.testNoOpDoesntBreakFrameParallelism()`
+				result.append( task.context()->hash() );
+			}
+			return result;
+		}
+
+		void addFrame( TaskBatch *batch, const TaskNode::Task &task, bool requiresSequenceExecution )
+		{
+			float frame = task.context()->getFrame();
+			std::vector<float> &frames = batch->frames();
+			if( requiresSequenceExecution )
+			{
+				frames.insert( std::lower_bound( frames.begin(), frames.end(), frame ), frame );
+			}
+			else
+			{
+				frames.push_back( frame );
+			}
+		}
+
+		void skipOrAddFrame( TaskBatch *batch, const TaskNode::Task &task, const TaskNode::Tasks &preTasks )
+		{
+			const MurmurHash hash = taskHash( task );
+			if( m_tasksExecuted.find( hash ) != m_tasksExecuted.end() )
+			{
+				// Already visited via another path.
+				return;
+			}
+
+			bool executed = false;
+			for( TaskNode::Tasks::const_iterator it = preTasks.begin(); it != preTasks.end(); ++it )
+			{
+				TasksExecutedMap::const_iterator eIt = m_tasksExecuted.find( taskHash( *it ) );
+				if( eIt == m_tasksExecuted.end() || eIt->second )
+				{
+					executed = true;
+					break;
+				}
+			}
+
+			if( task.hash() != MurmurHash() )
+			{
+				if( executed || !Detail::taskIsUpToDate( m_taskManifestDirectory, task.node(), task.hash() ) )
+				{
+					addFrame( batch, task, task.plug()->requiresSequenceExecution() );
+					executed = true;
+				}
+			}
+
+			m_tasksExecuted[hash] = executed;
+		}
+
+		// Returns the estimated duration of the task in seconds, or -1
+		// if the node has never been timed. Tasks which haven't been timed
+		// themselves are assumed to take the average time for their node.
+		float estimatedDuration( const TaskNode::Task &task )
+		{
+			if( task.hash() == MurmurHash() )
+			{
+				return 0.0f;
+			}
+
+			NodeTimingsMap::iterator it = m_nodeTimings.find( task.node() );
+			if( it == m_nodeTimings.end() )
+			{
+				NodeTimings timings;
+				Detail::taskDurations( m_taskTimingsDirectory, task.node(), timings.durations );
+				timings.averageDuration = -1.0f;
+				if( !timings.durations.empty() )
+				{
+					double total = 0;
+					for( const auto &d : timings.durations )
+					{
+						total += d.second;
+					}
+					timings.averageDuration = total / timings.durations.size();
+				}
+				it = m_nodeTimings.insert( NodeTimingsMap::value_type( task.node(), timings ) ).first;
+			}
+
+			std::map<std::string, double>::const_iterator dIt = it->second.durations.find( task.hash().toString() );
+			if( dIt != it->second.durations.end() )
+			{
+				return dIt->second;
+			}
+			return it->second.averageDuration;
+		}
+
+		float criticalPathWalk( TaskBatch *batch )
+		{
+			if( const FloatData *criticalPath = batch->blindData()->member<FloatData>( g_criticalPathBlindDataName ) )
+			{
+				return criticalPath->readable();
+			}
+
+			float longestPreTaskPath = 0.0f;
+			TaskBatches &preTasks = batch->preTasks();
+			for( TaskBatches::const_iterator it = preTasks.begin(), eIt = preTasks.end(); it != eIt; ++it )
+			{
+				longestPreTaskPath = std::max( longestPreTaskPath, criticalPathWalk( it->get() ) );
+			}
+
+			// Sort the preTasks added for postTasks separately from the standard
+			// preTasks, to preserve the ordering established by `addPreTask()`.
+			const IntData *postTaskIndex = batch->blindData()->member<IntData>( g_postTaskIndexBlindDataName );
+			const TaskBatches::iterator partition = preTasks.begin() + ( postTaskIndex ? postTaskIndex->readable() : 0 );
+			const auto longestFirst = [] ( const TaskBatchPtr &a, const TaskBatchPtr &b ) {
+				return a->blindData()->member<FloatData>( g_criticalPathBlindDataName )->readable() >
+				       b->blindData()->member<FloatData>( g_criticalPathBlindDataName )->readable();
+			};
+			std::stable_sort( preTasks.begin(), partition, longestFirst );
+			std::stable_sort( partition, preTasks.end(), longestFirst );
+
+			const FloatData *estimatedDuration = batch->blindData()->member<FloatData>( g_estimatedDurationBlindDataName );
+			const float criticalPath = longestPreTaskPath + ( estimatedDuration ? estimatedDuration->readable() : 0.0f );
+			batch->blindData()->writable()[g_criticalPathBlindDataName] = new FloatData( criticalPath );
+			return criticalPath;
+		}
+
 		// Hash used to determine how to coalesce tasks into batches.
 		// If `batchHash( task1 ) == batchHash( task2 )` then the two
 		// tasks can be placed in the same batch.
@@ -504,8 +878,19 @@ class Dispatcher::Batcher
 			result.append( (uint64_t)task.node() );
 			// We ignore the frame because the whole point of batching
 			// is to allow multiple frames to be placed in the same
-			// batch if the context is otherwise identical.
-			result.append( contextHash( task.context(), /* ignoreFrame = */ true ) );
+			// batch if the context is otherwise identical. Hashing the
+			// context without the frame is relatively expensive, but
+			// contexts are shared by many tasks, so we cache the result
+			// using the context's own hash.
+			const MurmurHash fullContextHash = task.context()->hash();
+			ContextHashMap::const_iterator it = m_contextHashesWithoutFrame.find( fullContextHash );
+			if( it == m_contextHashesWithoutFrame.end() )
+			{
+				it = m_contextHashesWithoutFrame.insert(
+					ContextHashMap::value_type( fullContextHash, contextHash( task.context(), /* ignoreFrame = */ true ) )
+				).first;
+			}
+			result.append( it->second );
 			return result;
 		}
 
@@ -535,9 +920,11 @@ class Dispatcher::Batcher
 
 		void addPreTask( TaskBatch *batch, TaskBatchPtr preTask, bool forPostTask = false )
 		{
-			TaskBatches &preTasks = batch->preTasks();
-			if( std::find( preTasks.begin(), preTasks.end(), preTask ) == preTasks.end() )
+			// Batches such as the root batch may have very many preTasks,
+			// so we track edges separately rather than searching `preTasks`.
+			if( m_preTaskEdges.insert( PreTaskEdge( batch, preTask.get() ) ).second )
 			{
+				TaskBatches &preTasks = batch->preTasks();
 				if( forPostTask )
 				{
 					// We're adding the preTask because the batch is a postTask
@@ -563,12 +950,35 @@ class Dispatcher::Batcher
 			}
 		}
 
-		typedef std::map<IECore::MurmurHash, TaskBatchPtr> BatchMap;
-		typedef std::map<IECore::MurmurHash, TaskBatchPtr> TaskToBatchMap;
+		typedef boost::unordered_map<IECore::MurmurHash, TaskBatchPtr> BatchMap;
+		typedef boost::unordered_map<IECore::MurmurHash, TaskBatchPtr> TaskToBatchMap;
+		typedef boost::unordered_map<IECore::MurmurHash, bool> TasksExecutedMap;
+		typedef boost::unordered_map<IECore::MurmurHash, IECore::MurmurHash> ContextHashMap;
+		typedef std::pair<const TaskBatch *, const TaskBatch *> PreTaskEdge;
+
+		struct NodeTimings
+		{
+			std::map<std::string, double> durations;
+			float averageDuration;
+		};
+		typedef boost::unordered_map<const TaskNode *, NodeTimings> NodeTimingsMap;
 
 		TaskBatchPtr m_rootBatch;
 		BatchMap m_currentBatches;
 		TaskToBatchMap m_tasksToBatches;
+		size_t m_numBatches;
+
+		DependenciesMap m_dependencies;
+		boost::unordered_set<IECore::MurmurHash> m_walkedTasks;
+		boost::unordered_set<PreTaskEdge> m_preTaskEdges;
+		ContextHashMap m_contextHashesWithoutFrame;
+
+		const std::string m_taskManifestDirectory;
+		TasksExecutedMap m_tasksExecuted;
+
+		const std::string m_taskTimingsDirectory;
+		const float m_targetBatchDuration;
+		NodeTimingsMap m_nodeTimings;
 
 };
 
@@ -622,6 +1032,7 @@ void Dispatcher::dispatch( const std::vector<NodePtr> &nodes ) const
 	// clear job directory, so that if our node validation fails,
 	// jobDirectory() won't return the result from the previous dispatch.
 	m_jobDirectory = "";
+	m_dispatchStatistics = nullptr;
 
 	// validate the nodes we've been given
 
@@ -667,6 +1078,25 @@ void Dispatcher::dispatch( const std::vector<NodePtr> &nodes ) const
 	m_jobDirectory = createJobDirectory( Context::current() );
 	jobScope.set( g_jobDirectoryContextEntry, m_jobDirectory );
 
+	// If requested, make the task manifest available to the tasks
+	// themselves, so that they record their execution in it, whether
+	// they are executed in this process or another.
+	std::string taskManifestDirectory;
+	if( skipUpToDateTasksPlug()->getValue() )
+	{
+		taskManifestDirectory = createTaskManifestDirectory( Context::current() );
+		jobScope.set( g_taskManifestDirectoryContextEntry, taskManifestDirectory );
+	}
+
+	// Likewise for the timings, which are recorded by the tasks
+	// and used by the Batcher to estimate batch durations.
+	std::string taskTimingsDirectory;
+	if( useTaskTimingsPlug()->getValue() )
+	{
+		taskTimingsDirectory = createTaskTimingsDirectory( Context::current() );
+		jobScope.set( g_taskTimingsDirectoryContextEntry, taskTimingsDirectory );
+	}
+
 	// this object calls this->preDispatchSignal() in its constructor and this->postDispatchSignal()
 	// in its destructor, thereby guaranteeing that we always call this->postDispatchSignal().
 
@@ -682,23 +1112,76 @@ void Dispatcher::dispatch( const std::vector<NodePtr> &nodes ) const
 	FrameListPtr frameList = frameRange( script, Context::current() );
 	frameList->asList( frames );
 
-	Batcher batcher;
+	typedef boost::chrono::high_resolution_clock Clock;
+	typedef boost::chrono::duration<double> Seconds;
+	Clock::time_point startTime = Clock::now();
+
+	// Construct the root tasks in parallel, since constructing
+	// a task computes its hash, and that may be expensive.
+
+	std::vector<ConstContextPtr> frameContexts;
 	for( std::vector<FrameList::Frame>::const_iterator fIt = frames.begin(); fIt != frames.end(); ++fIt )
 	{
-		for( std::vector<TaskNodePtr>::const_iterator nIt = taskNodes.begin(); nIt != taskNodes.end(); ++nIt )
-		{
-			jobScope.setFrame( *fIt );
-			batcher.addTask( TaskNode::Task( *nIt, Context::current() ) );
-		}
+		jobScope.setFrame( *fIt );
+		frameContexts.push_back( new Context( *Context::current() ) );
+	}
+
+	std::vector<std::unique_ptr<TaskNode::Task>> rootTasks( frames.size() * taskNodes.size() );
+	tbb::task_group_context taskGroupContext( tbb::task_group_context::isolated );
+	tbb::parallel_for(
+		tbb::blocked_range<size_t>( 0, rootTasks.size() ),
+		[&rootTasks, &frameContexts, &taskNodes]( const tbb::blocked_range<size_t> &r ) {
+			for( size_t i = r.begin(); i != r.end(); ++i )
+			{
+				const size_t numNodes = taskNodes.size();
+				rootTasks[i].reset( new TaskNode::Task( taskNodes[i % numNodes], frameContexts[i / numNodes].get() ) );
+			}
+		},
+		taskGroupContext // Prevents outer tasks silently cancelling our tasks
+	);
+
+	// Then evaluate the rest of the task graph in parallel, before
+	// building the batches serially.
+
+	Batcher batcher( taskManifestDirectory, taskTimingsDirectory, targetBatchDurationPlug()->getValue() );
+
+	std::vector<const TaskNode::Task *> rootTaskPointers;
+	for( const auto &task : rootTasks )
+	{
+		rootTaskPointers.push_back( task.get() );
+	}
+	batcher.evaluateTasks( rootTaskPointers );
+
+	Clock::time_point evaluatedTime = Clock::now();
+
+	for( const auto &task : rootTasks )
+	{
+		batcher.addTask( *task );
 	}
 
+	Clock::time_point batchedTime = Clock::now();
+
 	executeAndPruneImmediateBatches( batcher.rootBatch() );
+	batcher.orderBatches();
+
+	Clock::time_point immediateTime = Clock::now();
+
+	CompoundDataPtr statistics = new CompoundData;
+	statistics->writable()["numTasks"] = new UInt64Data( batcher.numTasks() );
+	statistics->writable()["numBatches"] = new UInt64Data( batcher.numBatches() );
+	statistics->writable()["taskEvaluationTime"] = new DoubleData( Seconds( evaluatedTime - startTime ).count() );
+	statistics->writable()["batchingTime"] = new DoubleData( Seconds( batchedTime - evaluatedTime ).count() );
+	statistics->writable()["immediateExecutionTime"] = new DoubleData( Seconds( immediateTime - batchedTime ).count() );
+	statistics->writable()["doDispatchTime"] = new DoubleData( 0 );
+	m_dispatchStatistics = statistics;
 
 	if( !batcher.rootBatch()->preTasks().empty() )
 	{
 		doDispatch( batcher.rootBatch() );
 	}
 
+	statistics->writable()["doDispatchTime"] = new DoubleData( Seconds( Clock::now() - immediateTime ).count() );
+
 	// inform the guard that the process has been completed, so it can pass this info to
 	// postDispatchSignal():
 
@@ -737,6 +1220,199 @@ void Dispatcher::executeAndPruneImmediateBatches( TaskBatch *batch, bool immedia
 	batch->blindData()->writable()[g_visitedBlindDataName] = g_trueBoolData;
 }
 
+//////////////////////////////////////////////////////////////////////////
+// Task manifest
+//////////////////////////////////////////////////////////////////////////
+
+namespace
+{
+
+boost::filesystem::path manifestFileName( const std::string &manifestDirectory, const TaskNode *node, const IECore::MurmurHash &taskHash )
+{
+	// Task hashes don't distinguish between identical tasks on different
+	// nodes, and since the manifest must persist beyond the lifetime of
+	// the nodes, we use the node name to make the distinction.
+	IECore::MurmurHash h = taskHash;
+	h.append( node->relativeName( node->scriptNode() ) );
+	return boost::filesystem::path( manifestDirectory ) / h.toString();
+}
+
+} // namespace
+
+bool GafferDispatch::Detail::taskIsUpToDate( const std::string &manifestDirectory, const TaskNode *node, const IECore::MurmurHash &taskHash )
+{
+	boost::filesystem::ifstream manifest( manifestFileName( manifestDirectory, node, taskHash ) );
+	if( !manifest )
+	{
+		return false;
+	}
+
+	// We can only vouch for a task if we know what it outputs, so
+	// a task is never up to date unless outputs were recorded.
+	size_t numOutputs = 0;
+	std::time_t recordedTime;
+	std::string output;
+	while( manifest >> recordedTime && std::getline( manifest >> std::ws, output ) )
+	{
+		boost::system::error_code ec;
+		const std::time_t time = boost::filesystem::last_write_time( output, ec );
+		if( ec || time != recordedTime )
+		{
+			return false;
+		}
+		numOutputs++;
+	}
+
+	return numOutputs;
+}
+
+void GafferDispatch::Detail::recordTaskExecuted( const std::string &manifestDirectory, const TaskNode *node, const IECore::MurmurHash &taskHash )
+{
+	const boost::filesystem::path fileName = manifestFileName( manifestDirectory, node, taskHash );
+
+	// Tasks without a known output, such as SystemCommands, can't
+	// be checked for being up to date, so we don't record them at all.
+	// We remove any existing entry in case the output has since gone
+	// missing.
+	std::string output;
+	std::time_t time = 0;
+	if( const StringPlug *fileNamePlug = node->getChild<StringPlug>( g_fileNamePlugName ) )
+	{
+		output = fileNamePlug->getValue();
+		boost::system::error_code ec;
+		time = boost::filesystem::last_write_time( output, ec );
+		if( ec )
+		{
+			output.clear();
+		}
+	}
+
+	if( output.empty() )
+	{
+		boost::system::error_code ec;
+		boost::filesystem::remove( fileName, ec );
+		return;
+	}
+
+	// Write to a temporary file and then rename it, so that concurrent
+	// dispatches never see a partially written manifest entry.
+	boost::filesystem::path tmpFileName = fileName;
+	tmpFileName += boost::filesystem::unique_path( ".%%%%%%%%" );
+	{
+		boost::filesystem::ofstream manifest( tmpFileName );
+		manifest << time << " " << output << "\n";
+	}
+
+	boost::filesystem::rename( tmpFileName, fileName );
+}
+
+//////////////////////////////////////////////////////////////////////////
+// Task timings
+//////////////////////////////////////////////////////////////////////////
+
+namespace
+{
+
+// When a timings file grows beyond this size, it is compacted
+// to contain only the most recent entry for each of the most
+// recently executed tasks.
+const boost::uintmax_t g_maxTimingsFileSize = 256 * 1024;
+const size_t g_maxCompactedTimings = 1000;
+
+boost::filesystem::path timingsFileName( const std::string &timingsDirectory, const TaskNode *node )
+{
+	IECore::MurmurHash h;
+	h.append( node->relativeName( node->scriptNode() ) );
+	return boost::filesystem::path( timingsDirectory ) / h.toString();
+}
+
+void compactTimings( const boost::filesystem::path &fileName )
+{
+	// Read the most recent entry for each hash, ordered
+	// by when that entry was recorded.
+	std::vector<std::pair<std::string, double>> entries;
+	boost::unordered_map<std::string, size_t> indices;
+	{
+		boost::filesystem::ifstream timings( fileName );
+		std::string hash;
+		double seconds;
+		while( timings >> hash >> seconds )
+		{
+			auto inserted = indices.insert( std::make_pair( hash, entries.size() ) );
+			if( !inserted.second )
+			{
+				entries[inserted.first->second].first.clear();
+				inserted.first->second = entries.size();
+			}
+			entries.push_back( std::make_pair( hash, seconds ) );
+		}
+	}
+
+	std::vector<std::pair<std::string, double>> compacted;
+	for( auto it = entries.rbegin(), eIt = entries.rend(); it != eIt && compacted.size() < g_maxCompactedTimings; ++it )
+	{
+		if( !it->first.empty() )
+		{
+			compacted.push_back( *it );
+		}
+	}
+
+	// Replace the file atomically. Entries appended by other processes
+	// while we were compacting will be lost, but timings are only used
+	// as estimates, so that is preferable to locking.
+	boost::filesystem::path tmpFileName = fileName;
+	tmpFileName += boost::filesystem::unique_path( ".%%%%%%%%" );
+	{
+		boost::filesystem::ofstream timings( tmpFileName );
+		for( auto it = compacted.rbegin(), eIt = compacted.rend(); it != eIt; ++it )
+		{
+			timings << it->first << " " << std::to_string( it->second ) << "\n";
+		}
+	}
+
+	boost::filesystem::rename( tmpFileName, fileName );
+}
+
+} // namespace
+
+void GafferDispatch::Detail::recordTaskDuration( const std::string &timingsDirectory, const TaskNode *node, const IECore::MurmurHash &taskHash, double seconds )
+{
+	// Many processes may be recording timings for the same node
+	// concurrently, so we append each entry with a single write,
+	// which the filesystem will not interleave with others.
+	const boost::filesystem::path fileName = timingsFileName( timingsDirectory, node );
+	const std::string entry = taskHash.toString() + " " + std::to_string( seconds ) + "\n";
+	{
+		boost::filesystem::ofstream timings( fileName, std::ios::app );
+		timings.write( entry.c_str(), entry.size() );
+	}
+
+	boost::system::error_code ec;
+	const boost::uintmax_t size = boost::filesystem::file_size( fileName, ec );
+	if( !ec && size > g_maxTimingsFileSize )
+	{
+		compactTimings( fileName );
+	}
+}
+
+void GafferDispatch::Detail::taskDurations( const std::string &timingsDirectory, const TaskNode *node, std::map<std::string, double> &durations )
+{
+	boost::filesystem::ifstream timings( timingsFileName( timingsDirectory, node ) );
+	if( !timings )
+	{
+		return;
+	}
+
+	std::string hash;
+	double seconds;
+	while( timings >> hash >> seconds )
+	{
+		// Later entries take precedence, since they reflect
+		// the most recent execution.
+		durations[hash] = seconds;
+	}
+}
+
 //////////////////////////////////////////////////////////////////////////
 // Registration
 //////////////////////////////////////////////////////////////////////////
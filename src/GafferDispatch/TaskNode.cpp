@@ -45,6 +45,13 @@
 #include "Gaffer/ScriptNode.h"
 #include "Gaffer/SubGraph.h"
 
+#include "IECore/MessageHandler.h"
+
+#include "boost/chrono.hpp"
+#include "boost/format.hpp"
+
+#include <algorithm>
+
 using namespace IECore;
 using namespace Gaffer;
 using namespace GafferDispatch;
@@ -148,6 +155,53 @@ InternedString TaskNodeProcess::requiresSequenceExecutionProcessType( "taskNode:
 InternedString TaskNodeProcess::preTasksProcessType( "taskNode:preTasks" );
 InternedString TaskNodeProcess::postTasksProcessType( "taskNode:postTasks" );
 
+InternedString g_taskManifestDirectoryContextEntry( "dispatcher:taskManifestDirectory" );
+InternedString g_taskTimingsDirectoryContextEntry( "dispatcher:taskTimingsDirectory" );
+
+typedef boost::chrono::high_resolution_clock Clock;
+typedef boost::chrono::duration<double> Seconds;
+
+// Records the execution of the task for the current context in the manifest
+// used by `Dispatcher::skipUpToDateTasksPlug()` and the timings used by
+// `Dispatcher::useTaskTimingsPlug()`, if the dispatcher requested them.
+// This is just bookkeeping, so failures are reported as warnings rather
+// than failing a task that executed successfully.
+void recordExecution( const TaskNode *node, double seconds )
+{
+	const Context *context = Context::current();
+	const std::string manifestDirectory = context->get<std::string>( g_taskManifestDirectoryContextEntry, "" );
+	const std::string timingsDirectory = context->get<std::string>( g_taskTimingsDirectoryContextEntry, "" );
+	if( manifestDirectory.empty() && timingsDirectory.empty() )
+	{
+		return;
+	}
+
+	try
+	{
+		const MurmurHash hash = node->hash( context );
+		if( hash == MurmurHash() )
+		{
+			return;
+		}
+
+		if( !manifestDirectory.empty() )
+		{
+			Detail::recordTaskExecuted( manifestDirectory, node, hash );
+		}
+		if( !timingsDirectory.empty() )
+		{
+			Detail::recordTaskDuration( timingsDirectory, node, hash, seconds );
+		}
+	}
+	catch( const std::exception &e )
+	{
+		IECore::msg(
+			IECore::Msg::Warning, "TaskNode::execute",
+			boost::str( boost::format( "Failed to record execution of \"%s\" : %s" ) % node->relativeName( node->scriptNode() ) % e.what() )
+		);
+	}
+}
+
 } // namespace
 
 IE_CORE_DEFINERUNTIMETYPED( TaskNode::TaskPlug );
@@ -226,29 +280,46 @@ IECore::MurmurHash TaskNode::TaskPlug::hash() const
 void TaskNode::TaskPlug::execute() const
 {
 	TaskNodeProcess p( TaskNodeProcess::executeProcessType, this );
+	double seconds = 0;
 	try
 	{
+		const Clock::time_point startTime = Clock::now();
 		p.taskNode()->execute();
+		seconds = Seconds( Clock::now() - startTime ).count();
 	}
 	catch( ... )
 	{
 		p.handleException();
 		return;
 	}
+
+	recordExecution( p.taskNode(), seconds );
 }
 
 void TaskNode::TaskPlug::executeSequence( const std::vector<float> &frames ) const
 {
 	TaskNodeProcess p( TaskNodeProcess::executeSequenceProcessType, this );
+	double seconds = 0;
 	try
 	{
+		const Clock::time_point startTime = Clock::now();
 		p.taskNode()->executeSequence( frames );
+		// We can't know how the time was divided between the frames,
+		// so attribute an equal share to each.
+		seconds = Seconds( Clock::now() - startTime ).count() / std::max<size_t>( frames.size(), 1 );
 	}
 	catch( ... )
 	{
 		p.handleException();
 		return;
 	}
+
+	Context::EditableScope frameScope( p.context() );
+	for( std::vector<float>::const_iterator it = frames.begin(); it != frames.end(); ++it )
+	{
+		frameScope.setFrame( *it );
+		recordExecution( p.taskNode(), seconds );
+	}
 }
 
 bool TaskNode::TaskPlug::requiresSequenceExecution() const
@@ -249,6 +249,12 @@ void dispatch( Dispatcher &dispatcher, object pythonNodes )
 	dispatcher.dispatch( nodes );
 }
 
+IECore::CompoundDataPtr dispatchStatistics( const Dispatcher &dispatcher )
+{
+	const IECore::CompoundData *statistics = dispatcher.dispatchStatistics();
+	return statistics ? statistics->copy() : nullptr;
+}
+
 IECore::FrameListPtr frameRange( Dispatcher &n, const ScriptNode *script, const Context *context )
 {
 	return n.Dispatcher::frameRange( script, context );
@@ -356,6 +362,7 @@ void GafferDispatchModule::bindDispatcher()
 	scope s = NodeClass<Dispatcher, DispatcherWrapper>()
 		.def( "dispatch", &dispatch )
 		.def( "jobDirectory", &Dispatcher::jobDirectory )
+		.def( "dispatchStatistics", &dispatchStatistics )
 		.def( "frameRange", &frameRange )
 		.def( "create", &Dispatcher::create ).staticmethod( "create" )
 		.def( "createMatching", &createMatching, ( arg( "matchPattern" ) ) ).staticmethod( "createMatching" )
@@ -172,6 +172,49 @@ class EngineWrapper : public IECorePython::RefCountedWrapper<Expression::Engine>
 			throw IECore::Exception( "Engine::execute() python method not defined" );
 		}
 
+		void executeBatch( const std::vector<const Context *> &contexts, const std::vector<const ValuePlug *> &proxyInputs, std::vector<IECore::ConstObjectVectorPtr> &results ) const override
+		{
+			if( isSubclassed() )
+			{
+				// Acquire the GIL once for the whole batch, rather
+				// than once per execution.
+				IECorePython::ScopedGILLock gilLock;
+				try
+				{
+					object f = this->methodOverride( "execute" );
+					if( f )
+					{
+						list pythonProxyInputs;
+						for( std::vector<const ValuePlug *>::const_iterator it = proxyInputs.begin(); it!=proxyInputs.end(); it++ )
+						{
+							pythonProxyInputs.append( PlugPtr( const_cast<ValuePlug *>( *it ) ) );
+						}
+
+						results.reserve( results.size() + contexts.size() );
+						for( std::vector<const Context *>::const_iterator it = contexts.begin(); it!=contexts.end(); it++ )
+						{
+							Context::Scope scope( *it );
+							object result = f( ContextPtr( const_cast<Context *>( *it ) ), pythonProxyInputs );
+							results.push_back( extract<IECore::ConstObjectVectorPtr>( result ) );
+						}
+						return;
+					}
+				}
+				catch( const error_already_set &e )
+				{
+					IECorePython::ExceptionAlgo::translatePythonException();
+				}
+			}
+
+			Expression::Engine::executeBatch( contexts, proxyInputs, results );
+		}
+
+		bool executesSerially() const override
+		{
+			// Python engines can only execute while holding the GIL.
+			return isSubclassed();
+		}
+
 		void apply( ValuePlug *proxyOutput, const ValuePlug *topLevelProxyOutput, const IECore::Object *value ) const override
 		{
 			if( isSubclassed() )
@@ -294,6 +337,38 @@ class EngineWrapper : public IECorePython::RefCountedWrapper<Expression::Engine>
 
 };
 
+// Engine::executeBatch() is protected, but may be called via
+// a pointer to member named through a derived class.
+struct EngineAccessor : public Expression::Engine
+{
+	typedef void (Expression::Engine::*ExecuteBatchFn)( const std::vector<const Context *> &, const std::vector<const ValuePlug *> &, std::vector<IECore::ConstObjectVectorPtr> & ) const;
+	static ExecuteBatchFn executeBatchFn() { return &EngineAccessor::executeBatch; }
+};
+
+list executeBatch( const Expression::Engine &engine, object pythonContexts, object pythonProxyInputs )
+{
+	std::vector<ContextPtr> contextPtrs;
+	container_utils::extend_container( contextPtrs, pythonContexts );
+	const std::vector<const Context *> contexts( contextPtrs.begin(), contextPtrs.end() );
+
+	std::vector<ValuePlugPtr> proxyInputPtrs;
+	container_utils::extend_container( proxyInputPtrs, pythonProxyInputs );
+	const std::vector<const ValuePlug *> proxyInputs( proxyInputPtrs.begin(), proxyInputPtrs.end() );
+
+	std::vector<IECore::ConstObjectVectorPtr> results;
+	{
+		IECorePython::ScopedGILRelease gilRelease;
+		(engine.*EngineAccessor::executeBatchFn())( contexts, proxyInputs, results );
+	}
+
+	list l;
+	for( std::vector<IECore::ConstObjectVectorPtr>::const_iterator it = results.begin(); it!=results.end(); it++ )
+	{
+		l.append( boost::const_pointer_cast<IECore::ObjectVector>( *it ) );
+	}
+	return l;
+}
+
 static tuple languages()
 {
 	std::vector<std::string> languages;
@@ -314,7 +389,7 @@ class ExpressionSerialiser : public NodeSerialiser
 		const Expression *e = static_cast<const Expression *>( graphComponent );
 		std::string language;
 		e->getExpression( language );
-		if( !language.empty() && language != "python" )
+		if( !language.empty() && language != "python" && language != "native" )
 		{
 			/// \todo Consider a virtual method on the Engine
 			/// to provide this information.
@@ -370,6 +445,7 @@ void GafferModule::bindExpression()
 		.def( init<>() )
 		.def( "registerEngine", &EngineWrapper::registerEngine ).staticmethod( "registerEngine" )
 		.def( "registeredEngines", &EngineWrapper::registeredEngines ).staticmethod( "registeredEngines" )
+		.def( "executeBatch", &executeBatch )
 	;
 
 	SignalClass<Expression::ExpressionChangedSignal, DefaultSignalCaller<Expression::ExpressionChangedSignal>, ExpressionChangedSlotCaller >( "ExpressionChangedSignal" );
@@ -43,10 +43,15 @@
 #include "Gaffer/MonitorAlgo.h"
 #include "Gaffer/PerformanceMonitor.h"
 #include "Gaffer/Plug.h"
+#include "Gaffer/TraceMonitor.h"
 #include "Gaffer/VTuneMonitor.h"
 
+#include "IECore/Exception.h"
+
 #include "boost/format.hpp"
 
+#include <fstream>
+
 using namespace boost::python;
 using namespace Gaffer;
 using namespace Gaffer::MonitorAlgo;
@@ -67,11 +72,12 @@ void exitScope( Monitor &m, object type, object value, object traceBack )
 std::string repr( PerformanceMonitor::Statistics &s )
 {
 	return boost::str(
-		boost::format( "Gaffer.PerformanceMonitor.Statistics( hashCount = %d, computeCount = %d, hashDuration = %d, computeDuration = %d )" )
+		boost::format( "Gaffer.PerformanceMonitor.Statistics( hashCount = %d, computeCount = %d, hashDuration = %d, computeDuration = %d, deduplicatedComputeCount = %d )" )
 			% s.hashCount
 			% s.computeCount
 			% s.hashDuration.count()
 			% s.computeDuration.count()
+			% s.deduplicatedComputeCount
 	);
 }
 
@@ -79,10 +85,11 @@ PerformanceMonitor::Statistics *statisticsConstructor(
 	size_t hashCount,
 	size_t computeCount,
 	boost::chrono::nanoseconds::rep hashDuration,
-	boost::chrono::nanoseconds::rep computeDuration
+	boost::chrono::nanoseconds::rep computeDuration,
+	size_t deduplicatedComputeCount
 )
 {
-	return new PerformanceMonitor::Statistics( hashCount, computeCount, boost::chrono::nanoseconds( hashDuration ), boost::chrono::nanoseconds( computeDuration ) );
+	return new PerformanceMonitor::Statistics( hashCount, computeCount, boost::chrono::nanoseconds( hashDuration ), boost::chrono::nanoseconds( computeDuration ), deduplicatedComputeCount );
 }
 
 boost::chrono::nanoseconds::rep getHashDuration( PerformanceMonitor::Statistics &s )
@@ -117,6 +124,16 @@ dict allStatistics( T &m )
 	return result;
 }
 
+dict allCounters( const PerformanceMonitor &m )
+{
+	dict result;
+	for( const auto &counter : m.allCounters() )
+	{
+		result[counter.first.string()] = counter.second;
+	}
+	return result;
+}
+
 list contextMonitorVariableNames( const ContextMonitor::Statistics &s )
 {
 	std::vector<IECore::InternedString> names = s.variableNames();
@@ -128,6 +145,61 @@ list contextMonitorVariableNames( const ContextMonitor::Statistics &s )
 	return result;
 }
 
+list traceMonitorEvents( const TraceMonitor &m )
+{
+	list result;
+	for( const auto &e : m.events() )
+	{
+		result.append( e );
+	}
+	return result;
+}
+
+PlugPtr eventPlug( const TraceMonitor::Event &e )
+{
+	return boost::const_pointer_cast<Plug>( e.plug );
+}
+
+std::string eventType( const TraceMonitor::Event &e )
+{
+	return e.type.string();
+}
+
+IECore::MurmurHash eventContextHash( const TraceMonitor::Event &e )
+{
+	return e.contextHash;
+}
+
+boost::chrono::nanoseconds::rep eventBegin( const TraceMonitor::Event &e )
+{
+	return e.begin.count();
+}
+
+boost::chrono::nanoseconds::rep eventEnd( const TraceMonitor::Event &e )
+{
+	return e.end.count();
+}
+
+void writeChromeTrace( const TraceMonitor &m, const std::string &fileName )
+{
+	std::ofstream f( fileName.c_str() );
+	if( !f.good() )
+	{
+		throw IECore::IOException( "Unable to open \"" + fileName + "\" for writing" );
+	}
+	m.writeChromeTrace( f );
+}
+
+void writeFlameGraph( const TraceMonitor &m, const std::string &fileName )
+{
+	std::ofstream f( fileName.c_str() );
+	if( !f.good() )
+	{
+		throw IECore::IOException( "Unable to open \"" + fileName + "\" for writing" );
+	}
+	m.writeFlameGraph( f );
+}
+
 } // namespace
 
 void GafferModule::bindMonitor()
@@ -173,6 +245,8 @@ void GafferModule::bindMonitor()
 	class_<Monitor, boost::noncopyable>( "Monitor", no_init )
 		.def( "setActive", &Monitor::setActive )
 		.def( "getActive", &Monitor::getActive )
+		.def( "incrementCounter", &Monitor::incrementCounter, ( arg( "name" ), arg( "amount" ) = 1 ) )
+		.staticmethod( "incrementCounter" )
 		.def( "__enter__", &enterScope, return_self<>() )
 		.def( "__exit__", &exitScope )
 	;
@@ -182,6 +256,8 @@ void GafferModule::bindMonitor()
 			.def( "allStatistics", &allStatistics<PerformanceMonitor> )
 			.def( "plugStatistics", &PerformanceMonitor::plugStatistics, return_value_policy<copy_const_reference>() )
 			.def( "combinedStatistics", &PerformanceMonitor::combinedStatistics, return_value_policy<copy_const_reference>() )
+			.def( "allCounters", &allCounters )
+			.def( "counter", &PerformanceMonitor::counter )
 		;
 
 		class_<PerformanceMonitor::Statistics>( "Statistics" )
@@ -190,12 +266,14 @@ void GafferModule::bindMonitor()
 						arg( "hashCount" ) = 0,
 						arg( "computeCount" ) = 0,
 						arg( "hashDuration" ) = 0,
-						arg( "computeDuration" ) = 0
+						arg( "computeDuration" ) = 0,
+						arg( "deduplicatedComputeCount" ) = 0
 					)
 				)
 			)
 			.def_readwrite( "hashCount", &PerformanceMonitor::Statistics::hashCount )
 			.def_readwrite( "computeCount", &PerformanceMonitor::Statistics::computeCount )
+			.def_readwrite( "deduplicatedComputeCount", &PerformanceMonitor::Statistics::deduplicatedComputeCount )
 			.add_property( "hashDuration", &getHashDuration, &setHashDuration )
 			.add_property( "computeDuration", &getComputeDuration, &setComputeDuration )
 			.def( self == self )
@@ -221,6 +299,25 @@ void GafferModule::bindMonitor()
 		;
 	}
 
+	{
+		scope s = class_<TraceMonitor, bases<Monitor>, boost::noncopyable>( "TraceMonitor" )
+			.def( "events", &traceMonitorEvents )
+			.def( "clear", &TraceMonitor::clear )
+			.def( "writeChromeTrace", &writeChromeTrace )
+			.def( "writeFlameGraph", &writeFlameGraph )
+		;
+
+		class_<TraceMonitor::Event>( "Event", no_init )
+			.add_property( "plug", &eventPlug )
+			.add_property( "type", &eventType )
+			.add_property( "contextHash", &eventContextHash )
+			.def_readonly( "thread", &TraceMonitor::Event::thread )
+			.add_property( "begin", &eventBegin )
+			.add_property( "end", &eventEnd )
+			.def_readonly( "parent", &TraceMonitor::Event::parent )
+		;
+	}
+
 #ifdef GAFFER_VTUNE
 	{
 		scope s = class_<VTuneMonitor, bases<Monitor>, boost::noncopyable>( "VTuneMonitor" )
@@ -53,12 +53,17 @@
 #include "IECorePython/ScopedGILLock.h"
 #include "IECorePython/ScopedGILRelease.h"
 
+#include "IECore/Exception.h"
 #include "IECore/MessageHandler.h"
+#include "IECore/MurmurHash.h"
 
 #include "boost/algorithm/string/replace.hpp"
+#include "boost/filesystem.hpp"
 #include "boost/lexical_cast.hpp"
 #include "boost/regex.hpp"
 
+#include <fstream>
+#include <list>
 #include <memory>
 
 using namespace Gaffer;
@@ -70,24 +75,12 @@ using namespace GafferBindings;
 
 extern "C"
 {
+#include "marshal.h"
 // essential to include this last, since it defines macros which
 // clash with other headers.
 #include "Python-ast.h"
 };
 
-namespace boost {
-namespace python {
-
-// Specialisation to allow use of handle<PyCodeObject>
-template<>
-struct base_type_traits<PyCodeObject>
-{
-	typedef PyObject type;
-};
-
-} // namespace python
-} // namespace boost
-
 //////////////////////////////////////////////////////////////////////////
 // Serialisation
 //////////////////////////////////////////////////////////////////////////
@@ -105,11 +98,22 @@ const std::string formattedErrorContext( int lineNumber, const std::string &cont
 	);
 }
 
-// Execute the script one top level statement at a time,
-// reporting errors that occur, but otherwise continuing
-// with execution.
-bool tolerantExec( const char *pythonScript, boost::python::object globals, boost::python::object locals, const std::string &context )
+// Compiles the script into a code object, or when `tolerant` is true,
+// a tuple of code objects, one per top level statement. The latter
+// allows us to execute the statements one at a time, reporting errors
+// that occur, but otherwise continuing with execution.
+boost::python::object compileScript( const std::string &pythonScript, bool tolerant )
 {
+	if( !tolerant )
+	{
+		PyObject *code = Py_CompileString( pythonScript.c_str(), "<string>", Py_file_input );
+		if( !code )
+		{
+			boost::python::throw_error_already_set();
+		}
+		return boost::python::object( boost::python::handle<>( code ) );
+	}
+
 	// The python parsing framework uses an arena to simplify memory allocation,
 	// which is handy for us, since we're going to manipulate the AST a little.
 	std::unique_ptr<PyArena, decltype( &PyArena_Free )> arena( PyArena_New(), PyArena_Free );
@@ -117,7 +121,7 @@ bool tolerantExec( const char *pythonScript, boost::python::object globals, boos
 	// Parse the whole script, getting an abstract syntax tree for a
 	// module which would execute everything.
 	mod_ty mod = PyParser_ASTFromString(
-		pythonScript,
+		pythonScript.c_str(),
 		"<string>",
 		Py_file_input,
 		nullptr,
@@ -126,17 +130,14 @@ bool tolerantExec( const char *pythonScript, boost::python::object globals, boos
 
 	if( !mod )
 	{
-		int lineNumber = 0;
-		std::string message = IECorePython::ExceptionAlgo::formatPythonException( /* withTraceback = */ false, &lineNumber );
-		IECore::msg( IECore::Msg::Error, formattedErrorContext( lineNumber, context ), message );
-		return false;
+		boost::python::throw_error_already_set();
 	}
 
 	assert( mod->kind == Module_kind );
 
 	// Loop over the top-level statements in the module body,
-	// executing one at a time.
-	bool result = false;
+	// compiling one at a time.
+	boost::python::list result;
 	int numStatements = asdl_seq_LEN( mod->v.Module.body );
 	for( int i=0; i<numStatements; ++i )
 	{
@@ -149,20 +150,215 @@ bool tolerantExec( const char *pythonScript, boost::python::object globals, boos
 		);
 
 		// Compile it.
-		boost::python::handle<PyCodeObject> code( PyAST_Compile( newModule, "<string>", nullptr, arena.get() ) );
-
-		// And execute it.
-		boost::python::handle<> v( boost::python::allow_null(
-			PyEval_EvalCode(
-				code.get(),
-				globals.ptr(),
-				locals.ptr()
-			)
-		) );
-
-		// Report any errors.
-		if( v == nullptr)
+		PyCodeObject *code = PyAST_Compile( newModule, "<string>", nullptr, arena.get() );
+		if( !code )
+		{
+			boost::python::throw_error_already_set();
+		}
+		result.append( boost::python::object( boost::python::handle<>( (PyObject *)code ) ) );
+	}
+
+	return boost::python::tuple( result );
+}
+
+// Compiled script cache
+// =====================
+//
+// Parsing and compiling is a significant part of the cost of loading
+// a large script, so we cache the compiled code objects, keyed on a
+// hash of the script contents. A small number are kept in memory, and
+// if the `GAFFER_SCRIPT_CACHE_PATH` environment variable is set they
+// are also stored on disk in marshalled form, so that subsequent
+// processes loading the same file can skip compilation entirely.
+
+const size_t g_compiledScriptsMemoryLimit = 5;
+
+typedef std::list<std::pair<IECore::MurmurHash, boost::python::object>> CompiledScripts;
+
+CompiledScripts &compiledScripts()
+{
+	// Deliberately leaked, since the Python objects it holds can't
+	// be destroyed once the interpreter has been finalised.
+	static CompiledScripts *g_compiledScripts = new CompiledScripts;
+	return *g_compiledScripts;
+}
+
+boost::filesystem::path compiledScriptPath( const IECore::MurmurHash &hash )
+{
+	const char *cachePath = getenv( "GAFFER_SCRIPT_CACHE_PATH" );
+	if( !cachePath || !*cachePath )
+	{
+		return boost::filesystem::path();
+	}
+	return boost::filesystem::path( cachePath ) / ( hash.toString() + ".gfrc" );
+}
+
+bool validCompiledScript( PyObject *o, bool tolerant )
+{
+	if( !tolerant )
+	{
+		return PyCode_Check( o );
+	}
+
+	if( !PyTuple_Check( o ) )
+	{
+		return false;
+	}
+
+	for( Py_ssize_t i = 0, s = PyTuple_GET_SIZE( o ); i < s; ++i )
+	{
+		if( !PyCode_Check( PyTuple_GET_ITEM( o, i ) ) )
+		{
+			return false;
+		}
+	}
+
+	return true;
+}
+
+boost::python::object loadCompiledScript( const boost::filesystem::path &path, bool tolerant )
+{
+	std::ifstream file( path.c_str(), std::ios::binary );
+	if( !file.good() )
+	{
+		return boost::python::object();
+	}
+
+	std::string data( ( std::istreambuf_iterator<char>( file ) ), std::istreambuf_iterator<char>() );
+	PyObject *o = PyMarshal_ReadObjectFromString( const_cast<char *>( data.c_str() ), data.size() );
+	if( !o )
+	{
+		// Corrupt file. We'll just recompile and overwrite it.
+		PyErr_Clear();
+		return boost::python::object();
+	}
+
+	boost::python::object result( ( boost::python::handle<>( o ) ) );
+	if( !validCompiledScript( result.ptr(), tolerant ) )
+	{
+		return boost::python::object();
+	}
+
+	return result;
+}
+
+void saveCompiledScript( const boost::python::object &compiledScript, const boost::filesystem::path &path )
+{
+	boost::python::handle<> data( boost::python::allow_null(
+		PyMarshal_WriteObjectToString( compiledScript.ptr(), Py_MARSHAL_VERSION )
+	) );
+
+	if( !data )
+	{
+		PyErr_Clear();
+		return;
+	}
+
+	try
+	{
+		boost::filesystem::create_directories( path.parent_path() );
+		// Write to a temporary file and rename, so that concurrent
+		// processes never see a partially written file.
+		const boost::filesystem::path tempPath = path.string() + boost::filesystem::unique_path( ".%%%%-%%%%-%%%%" ).string();
+		{
+			std::ofstream file( tempPath.c_str(), std::ios::binary );
+			file.write( PyString_AS_STRING( data.get() ), PyString_GET_SIZE( data.get() ) );
+			if( !file.good() )
+			{
+				throw IECore::IOException( "Failed to write \"" + tempPath.string() + "\"" );
+			}
+		}
+		boost::filesystem::rename( tempPath, path );
+	}
+	catch( const std::exception &e )
+	{
+		IECore::msg( IECore::Msg::Warning, "ScriptNode", boost::str( boost::format( "Unable to cache compiled script : %s" ) % e.what() ) );
+	}
+}
+
+boost::python::object compiledScript( const std::string &pythonScript, bool tolerant )
+{
+	IECore::MurmurHash hash;
+	hash.append( pythonScript );
+	hash.append( tolerant ? 1 : 0 );
+	// Bytecode is specific to the version of Python in use.
+	hash.append( (int64_t)PyImport_GetMagicNumber() );
+
+	CompiledScripts &cache = compiledScripts();
+	for( CompiledScripts::iterator it = cache.begin(); it != cache.end(); ++it )
+	{
+		if( it->first == hash )
+		{
+			cache.splice( cache.begin(), cache, it );
+			return it->second;
+		}
+	}
+
+	const boost::filesystem::path path = compiledScriptPath( hash );
+	boost::python::object result;
+	if( !path.empty() )
+	{
+		result = loadCompiledScript( path, tolerant );
+	}
+
+	if( result.is_none() )
+	{
+		result = compileScript( pythonScript, tolerant );
+		if( !path.empty() )
+		{
+			saveCompiledScript( result, path );
+		}
+	}
+
+	cache.push_front( CompiledScripts::value_type( hash, result ) );
+	if( cache.size() > g_compiledScriptsMemoryLimit )
+	{
+		cache.pop_back();
+	}
+
+	return result;
+}
+
+boost::python::object evalCode( const boost::python::object &code, boost::python::object globals, boost::python::object locals )
+{
+	return boost::python::object( boost::python::handle<>(
+		PyEval_EvalCode(
+			(PyCodeObject *)code.ptr(),
+			globals.ptr(),
+			locals.ptr()
+		)
+	) );
+}
+
+// Execute the script one top level statement at a time,
+// reporting errors that occur, but otherwise continuing
+// with execution.
+bool tolerantExec( const std::string &pythonScript, boost::python::object globals, boost::python::object locals, const std::string &context )
+{
+	boost::python::object statements;
+	try
+	{
+		statements = compiledScript( pythonScript, /* tolerant = */ true );
+	}
+	catch( boost::python::error_already_set &e )
+	{
+		int lineNumber = 0;
+		std::string message = IECorePython::ExceptionAlgo::formatPythonException( /* withTraceback = */ false, &lineNumber );
+		IECore::msg( IECore::Msg::Error, formattedErrorContext( lineNumber, context ), message );
+		return false;
+	}
+
+	bool result = false;
+	const boost::python::ssize_t numStatements = boost::python::len( statements );
+	for( boost::python::ssize_t i = 0; i < numStatements; ++i )
+	{
+		try
+		{
+			evalCode( boost::python::object( statements[i] ), globals, locals );
+		}
+		catch( boost::python::error_already_set &e )
 		{
+			// Report any errors.
 			int lineNumber = 0;
 			std::string message = IECorePython::ExceptionAlgo::formatPythonException( /* withTraceback = */ false, &lineNumber );
 			IECore::msg( IECore::Msg::Error, formattedErrorContext( lineNumber, context ), message );
@@ -289,7 +485,7 @@ bool execute( ScriptNode *script, const std::string &serialisation, Node *parent
 		{
 			try
 			{
-				exec( toExecute.c_str(), e, e );
+				evalCode( compiledScript( toExecute, /* tolerant = */ false ), e, e );
 			}
 			catch( boost::python::error_already_set &e )
 			{
@@ -300,7 +496,7 @@ bool execute( ScriptNode *script, const std::string &serialisation, Node *parent
 		}
 		else
 		{
-			result = tolerantExec( toExecute.c_str(), e, e, context );
+			result = tolerantExec( toExecute, e, e, context );
 		}
 	}
 	catch( boost::python::error_already_set &e )
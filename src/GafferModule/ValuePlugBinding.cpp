@@ -49,6 +49,8 @@
 #include "Gaffer/Reference.h"
 #include "Gaffer/Metadata.h"
 
+#include "IECorePython/ScopedGILRelease.h"
+
 #include "boost/format.hpp"
 
 using namespace boost::python;
@@ -63,6 +65,57 @@ std::string repr( const ValuePlug *plug )
 	return ValuePlugSerialiser::repr( plug );
 }
 
+boost::python::dict hashCacheStatistics()
+{
+	const ValuePlug::HashCacheStatistics statistics = ValuePlug::hashCacheStatistics();
+	boost::python::dict result;
+	result["entries"] = statistics.entries;
+	result["hits"] = statistics.hits;
+	result["misses"] = statistics.misses;
+	result["evictions"] = statistics.evictions;
+	return result;
+}
+
+boost::python::dict cacheStatisticsDict( const ValuePlug::CacheStatisticsMap &statistics )
+{
+	boost::python::dict result;
+	for( const auto &s : statistics )
+	{
+		boost::python::dict d;
+		d["entries"] = s.second.entries;
+		d["bytes"] = s.second.bytes;
+		d["hits"] = s.second.hits;
+		d["misses"] = s.second.misses;
+		d["evictions"] = s.second.evictions;
+		result[s.first] = d;
+	}
+	return result;
+}
+
+boost::python::dict cacheStatistics()
+{
+	ValuePlug::CacheStatisticsMap nodeStatistics, plugTypeStatistics;
+	ValuePlug::cacheStatistics( nodeStatistics, plugTypeStatistics );
+	boost::python::dict result;
+	result["nodes"] = cacheStatisticsDict( nodeStatistics );
+	result["plugTypes"] = cacheStatisticsDict( plugTypeStatistics );
+	return result;
+}
+
+void setDiskCacheDirectory( const std::string &directory )
+{
+	// Scans the directory to find the size of the cache.
+	IECorePython::ScopedGILRelease gilRelease;
+	ValuePlug::setDiskCacheDirectory( directory );
+}
+
+void setDiskCacheSizeLimit( size_t bytes )
+{
+	// May scan the directory to evict files.
+	IECorePython::ScopedGILRelease gilRelease;
+	ValuePlug::setDiskCacheSizeLimit( bytes );
+}
+
 } // namespace
 
 void GafferModule::bindValuePlug()
@@ -90,6 +143,32 @@ void GafferModule::bindValuePlug()
 		.staticmethod( "cacheMemoryUsage" )
 		.def( "clearCache", &ValuePlug::clearCache )
 		.staticmethod( "clearCache" )
+		.def( "getHashCacheSizeLimit", &ValuePlug::getHashCacheSizeLimit )
+		.staticmethod( "getHashCacheSizeLimit" )
+		.def( "setHashCacheSizeLimit", &ValuePlug::setHashCacheSizeLimit )
+		.staticmethod( "setHashCacheSizeLimit" )
+		.def( "clearHashCache", &ValuePlug::clearHashCache )
+		.staticmethod( "clearHashCache" )
+		.def( "hashCacheStatistics", &hashCacheStatistics )
+		.staticmethod( "hashCacheStatistics" )
+		.def( "setCacheStatisticsEnabled", &ValuePlug::setCacheStatisticsEnabled )
+		.staticmethod( "setCacheStatisticsEnabled" )
+		.def( "getCacheStatisticsEnabled", &ValuePlug::getCacheStatisticsEnabled )
+		.staticmethod( "getCacheStatisticsEnabled" )
+		.def( "cacheStatistics", &cacheStatistics )
+		.staticmethod( "cacheStatistics" )
+		.def( "setDiskCacheDirectory", &setDiskCacheDirectory )
+		.staticmethod( "setDiskCacheDirectory" )
+		.def( "getDiskCacheDirectory", &ValuePlug::getDiskCacheDirectory )
+		.staticmethod( "getDiskCacheDirectory" )
+		.def( "setDiskCacheSizeLimit", &setDiskCacheSizeLimit )
+		.staticmethod( "setDiskCacheSizeLimit" )
+		.def( "getDiskCacheSizeLimit", &ValuePlug::getDiskCacheSizeLimit )
+		.staticmethod( "getDiskCacheSizeLimit" )
+		.def( "setDiskCacheEnabled", &ValuePlug::setDiskCacheEnabled )
+		.staticmethod( "setDiskCacheEnabled" )
+		.def( "getDiskCacheEnabled", &ValuePlug::getDiskCacheEnabled )
+		.staticmethod( "getDiskCacheEnabled" )
 		.def( "__repr__", &repr )
 	;
 
@@ -141,10 +141,11 @@ void Encapsulate::hashObject( const ScenePath &path, const Gaffer::Context *cont
 		// expensive. Instead we resort to a "poor man's hash" based on our
 		// identity, the number of times our input has been dirtied and
 		// the _entire_ context. This is less accurate and not stable
-		// between processes, but much faster.
-		/// \todo Is this the right approach? Should we just suck it
-		/// up and compute the accurate hash? Or at least provide the
-		/// option?
+		// between processes, but much faster. The capsule also renders
+		// using the globals and sets, but edits to those dirty our output
+		// too, so are accounted for by the dirty count.
+		/// \todo Use `ScenePlug::hierarchyHash()` instead, once it is
+		/// cached rather than traversing the hierarchy on every call.
 		h.append( reinterpret_cast<uint64_t>( this ) );
 		h.append( m_dirtyCount );
 		h.append( context->hash() );
@@ -116,9 +116,9 @@ void FilterResults::hash( const Gaffer::ValuePlug *output, const Gaffer::Context
 
 	if( output == outPlug() )
 	{
-		/// \todo This is potentially incredibly expensive, because depending
-		/// on the filter it might visit every single location of a scene.
-		/// Do better. Possibilities include :
+		/// \todo This still visits every location matched by the filter,
+		/// and every ancestor of those locations. Possibilities for doing
+		/// better include :
 		///
 		/// - Using an __internalOut plug to do the work, and ensuring that the
 		///   computation of the out plug pulls on __internalOut with a context
@@ -129,14 +129,7 @@ void FilterResults::hash( const Gaffer::ValuePlug *output, const Gaffer::Context
 		///   and exposing them via public methods on FilterPlug. Filters such
 		///   as SetFilter could then have much faster implementations given
 		///   their specific knowledge of the situation.
-		/// - Using David Minor's "poor man's hash" trick whereby the dirty
-		///   count of the input scene is used as a substitute for the true
-		///   hash.
-		/// - Coming up with a way of cheaply computing a hierarchy hash,
-		///   that mythical beast that solves all our problems.
-		PathMatcherDataPtr data = new PathMatcherData;
-		SceneAlgo::matchingPaths( filterPlug(), scenePlug(), data->writable() );
-		data->hash( h );
+		h.append( SceneAlgo::matchingPathsHash( filterPlug(), scenePlug() ) );
 	}
 }
 
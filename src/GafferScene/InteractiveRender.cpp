@@ -165,7 +165,7 @@ class InteractiveRender::SceneGraph
 
 		// Called by SceneGraphUpdateTask to update this location. Returns a bitmask
 		// of the components which were changed.
-		unsigned update( const ScenePlug *scene, const ScenePlug::ScenePath &path, unsigned dirtyComponents, unsigned changedParentComponents, Type type, IECoreScenePreview::Renderer *renderer, const IECore::CompoundObject *globals, const RendererAlgo::RenderSets &renderSets )
+		unsigned update( const ScenePlug *scene, const ScenePlug::ScenePath &path, unsigned dirtyComponents, unsigned changedParentComponents, Type type, IECoreScenePreview::Renderer *renderer, RendererAlgo::AttributesCache *attributesCache, const IECore::CompoundObject *globals, const RendererAlgo::RenderSets &renderSets )
 		{
 			unsigned changedComponents = 0;
 
@@ -223,7 +223,7 @@ class InteractiveRender::SceneGraph
 
 			// Object
 
-			if( ( dirtyComponents & ObjectComponent ) && updateObject( scene->objectPlug(), type, renderer, globals ) )
+			if( ( dirtyComponents & ObjectComponent ) && updateObject( scene->objectPlug(), type, renderer, attributesCache, globals ) )
 			{
 				changedComponents |= ObjectComponent;
 			}
@@ -237,11 +237,11 @@ class InteractiveRender::SceneGraph
 					// Apply attribute update to old object if necessary.
 					if( changedComponents & AttributesComponent )
 					{
-						if( !m_objectInterface->attributes( attributesInterface( renderer ) ) )
+						if( !m_objectInterface->attributes( attributesInterface( attributesCache ) ) )
 						{
 							// Failed to apply attributes - must replace entire object.
 							m_objectHash = MurmurHash();
-							if( updateObject( scene->objectPlug(), type, renderer, globals ) )
+							if( updateObject( scene->objectPlug(), type, renderer, attributesCache, globals ) )
 							{
 								changedComponents |= ObjectComponent;
 							}
@@ -356,11 +356,11 @@ class InteractiveRender::SceneGraph
 			return true;
 		}
 
-		IECoreScenePreview::Renderer::AttributesInterface *attributesInterface( IECoreScenePreview::Renderer *renderer )
+		IECoreScenePreview::Renderer::AttributesInterface *attributesInterface( RendererAlgo::AttributesCache *attributesCache )
 		{
 			if( !m_attributesInterface )
 			{
-				m_attributesInterface = renderer->attributes( m_fullAttributes.get() );
+				m_attributesInterface = attributesCache->get( m_fullAttributes.get() );
 			}
 			return m_attributesInterface.get();
 		}
@@ -389,7 +389,7 @@ class InteractiveRender::SceneGraph
 		}
 
 		// Returns true if the object changed.
-		bool updateObject( const ObjectPlug *objectPlug, Type type, IECoreScenePreview::Renderer *renderer, const IECore::CompoundObject *globals )
+		bool updateObject( const ObjectPlug *objectPlug, Type type, IECoreScenePreview::Renderer *renderer, RendererAlgo::AttributesCache *attributesCache, const IECore::CompoundObject *globals )
 		{
 			const bool hadObjectInterface = static_cast<bool>( m_objectInterface );
 			if( type == NoType )
@@ -423,16 +423,16 @@ class InteractiveRender::SceneGraph
 				{
 					IECoreScene::CameraPtr cameraCopy = camera->copy();
 					RendererAlgo::applyCameraGlobals( cameraCopy.get(), globals );
-					m_objectInterface = renderer->camera( name, cameraCopy.get(), attributesInterface( renderer ) );
+					m_objectInterface = renderer->camera( name, cameraCopy.get(), attributesInterface( attributesCache ) );
 				}
 			}
 			else if( type == LightType )
 			{
-				m_objectInterface = renderer->light( name, nullObject ? nullptr : object.get(), attributesInterface( renderer ) );
+				m_objectInterface = renderer->light( name, nullObject ? nullptr : object.get(), attributesInterface( attributesCache ) );
 			}
 			else
 			{
-				m_objectInterface = renderer->object( name, object.get(), attributesInterface( renderer ) );
+				m_objectInterface = renderer->object( name, object.get(), attributesInterface( attributesCache ) );
 			}
 
 			return true;
@@ -577,6 +577,7 @@ class InteractiveRender::SceneGraphUpdateTask : public tbb::task
 				m_changedParentComponents,
 				sceneGraphMatch & IECore::PathMatcher::ExactMatch ? m_sceneGraphType : SceneGraph::NoType,
 				m_interactiveRender->m_renderer.get(),
+				m_interactiveRender->m_attributesCache.get(),
 				m_interactiveRender->m_globals.get(),
 				m_interactiveRender->m_renderSets
 			);
@@ -850,6 +851,7 @@ void InteractiveRender::update()
 			rendererName,
 			IECoreScenePreview::Renderer::Interactive
 		);
+		m_attributesCache.reset( new RendererAlgo::AttributesCache( m_renderer.get() ) );
 	}
 
 	// We need to pause to make edits, even if we want to
@@ -901,6 +903,11 @@ void InteractiveRender::update()
 		updateDefaultCamera();
 	}
 
+	// Release attributes which are no longer used by
+	// any location, so that the renderer can free them.
+	m_attributesCache->clearUnused();
+	m_attributesCache->reportStatistics();
+
 	m_dirtyComponents = SceneGraph::NoComponent;
 	m_state = requiredState;
 
@@ -965,6 +972,7 @@ void InteractiveRender::stop()
 		m_sceneGraphs.push_back( unique_ptr<SceneGraph>( new SceneGraph ) );
 	}
 	m_defaultCamera = nullptr;
+	m_attributesCache.reset();
 	m_renderer = nullptr;
 
 	m_globals = adaptedInPlug()->globalsPlug()->defaultValue();
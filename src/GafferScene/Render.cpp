@@ -251,9 +251,13 @@ void Render::execute() const
 
 	RendererAlgo::RenderSets renderSets( adaptedInPlug() );
 
-	RendererAlgo::outputCameras( adaptedInPlug(), globals.get(), renderSets, renderer.get() );
-	RendererAlgo::outputLights( adaptedInPlug(), globals.get(), renderSets, renderer.get() );
-	RendererAlgo::outputObjects( adaptedInPlug(), globals.get(), renderSets, renderer.get() );
+	{
+		// Share attributes between cameras, lights and objects.
+		RendererAlgo::AttributesCache attributesCache( renderer.get() );
+		RendererAlgo::outputCameras( adaptedInPlug(), globals.get(), renderSets, renderer.get(), &attributesCache );
+		RendererAlgo::outputLights( adaptedInPlug(), globals.get(), renderSets, renderer.get(), &attributesCache );
+		RendererAlgo::outputObjects( adaptedInPlug(), globals.get(), renderSets, renderer.get(), ScenePlug::ScenePath(), &attributesCache );
+	}
 
 	// Now we have generated the scene, flush Cortex and Gaffer caches to
 	// provide more memory to the renderer.
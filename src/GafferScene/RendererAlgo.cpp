@@ -42,6 +42,7 @@
 
 #include "Gaffer/Context.h"
 #include "Gaffer/Metadata.h"
+#include "Gaffer/Monitor.h"
 
 #include "IECoreScene/Camera.h"
 #include "IECoreScene/ClippingPlane.h"
@@ -63,6 +64,8 @@
 #include "tbb/parallel_reduce.h"
 #include "tbb/task.h"
 
+#include <memory>
+
 using namespace std;
 using namespace Imath;
 using namespace IECore;
@@ -464,6 +467,86 @@ ConstInternedStringVectorDataPtr RenderSets::setsAttribute( const std::vector<IE
 
 } // namespace GafferScene
 
+//////////////////////////////////////////////////////////////////////////
+// AttributesCache class
+//////////////////////////////////////////////////////////////////////////
+
+namespace
+{
+
+InternedString g_attributesCacheHitsCounterName( "RendererAlgo:attributesCacheHits" );
+InternedString g_attributesCacheMissesCounterName( "RendererAlgo:attributesCacheMisses" );
+
+} // namespace
+
+namespace GafferScene
+{
+
+namespace RendererAlgo
+{
+
+AttributesCache::AttributesCache( IECoreScenePreview::Renderer *renderer )
+	:	m_renderer( renderer ), m_hits( 0 ), m_misses( 0 )
+{
+}
+
+AttributesCache::~AttributesCache()
+{
+}
+
+IECoreScenePreview::Renderer::AttributesInterfacePtr AttributesCache::get( const IECore::CompoundObject *attributes )
+{
+	Cache::accessor a;
+	m_cache.insert( a, attributes->Object::hash() );
+	if( !a->second )
+	{
+		a->second = m_renderer->attributes( attributes );
+		m_misses++;
+	}
+	else
+	{
+		m_hits++;
+	}
+	return a->second;
+}
+
+void AttributesCache::clearUnused()
+{
+	vector<IECore::MurmurHash> toErase;
+	for( Cache::iterator it = m_cache.begin(), eIt = m_cache.end(); it != eIt; ++it )
+	{
+		if( !it->second || it->second->refCount() == 1 )
+		{
+			// Only one reference - this is ours, so
+			// nothing outside of the cache is using the
+			// attributes.
+			toErase.push_back( it->first );
+		}
+	}
+	for( vector<IECore::MurmurHash>::const_iterator it = toErase.begin(), eIt = toErase.end(); it != eIt; ++it )
+	{
+		m_cache.erase( *it );
+	}
+}
+
+void AttributesCache::reportStatistics()
+{
+	const size_t hits = m_hits.exchange( 0 );
+	const size_t misses = m_misses.exchange( 0 );
+	if( hits )
+	{
+		Monitor::incrementCounter( g_attributesCacheHitsCounterName, hits );
+	}
+	if( misses )
+	{
+		Monitor::incrementCounter( g_attributesCacheMissesCounterName, misses );
+	}
+}
+
+} // namespace RendererAlgo
+
+} // namespace GafferScene
+
 //////////////////////////////////////////////////////////////////////////
 // Internal utilities
 ///////////////////////////////////////////////////////////////////////////
@@ -501,8 +584,8 @@ IECore::InternedString optionName( const IECore::InternedString &globalsName )
 struct LocationOutput
 {
 
-	LocationOutput( IECoreScenePreview::Renderer *renderer, const IECore::CompoundObject *globals, const GafferScene::RendererAlgo::RenderSets &renderSets, const ScenePlug::ScenePath &root )
-		:	m_renderer( renderer ), m_attributes( SceneAlgo::globalAttributes( globals ) ), m_renderSets( renderSets ), m_root( root )
+	LocationOutput( IECoreScenePreview::Renderer *renderer, const IECore::CompoundObject *globals, const GafferScene::RendererAlgo::RenderSets &renderSets, const ScenePlug::ScenePath &root, GafferScene::RendererAlgo::AttributesCache *attributesCache )
+		:	m_renderer( renderer ), m_attributes( SceneAlgo::globalAttributes( globals ) ), m_renderSets( renderSets ), m_root( root ), m_attributesCache( attributesCache )
 	{
 		const BoolData *transformBlurData = globals->member<BoolData>( g_transformBlurOptionName );
 		m_options.transformBlur = transformBlurData ? transformBlurData->readable() : false;
@@ -574,13 +657,15 @@ struct LocationOutput
 
 		IECoreScenePreview::Renderer::AttributesInterfacePtr attributes()
 		{
-			/// \todo Should we keep a cache of AttributesInterfaces so we can share
-			/// them between multiple objects, or should we rely on the renderers to
-			/// do something similar? Since renderers might cache some attributes
-			/// (e.g. "ai:surface") separately from others, they can do a better job,
-			/// but perhaps there might be some value in caching here at the higher
-			/// level too?
-			return m_renderer->attributes( m_attributes.get() );
+			// Locations without attributes of their own inherit the
+			// interface from their parent, because we are copied to
+			// make the functors for our children. This saves us hashing
+			// the attributes to look them up in the cache.
+			if( !m_attributesInterface )
+			{
+				m_attributesInterface = m_attributesCache->get( m_attributes.get() );
+			}
+			return m_attributesInterface;
 		}
 
 		void applyTransform( IECoreScenePreview::Renderer::ObjectInterface *objectInterface )
@@ -644,6 +729,7 @@ struct LocationOutput
 			}
 
 			m_attributes = updatedAttributes;
+			m_attributesInterface = nullptr;
 		}
 
 		void updateTransform( const ScenePlug *scene )
@@ -721,6 +807,9 @@ struct LocationOutput
 		const GafferScene::RendererAlgo::RenderSets &m_renderSets;
 		const ScenePlug::ScenePath &m_root;
 
+		GafferScene::RendererAlgo::AttributesCache *m_attributesCache;
+		IECoreScenePreview::Renderer::AttributesInterfacePtr m_attributesInterface;
+
 		std::vector<M44f> m_transformSamples;
 		std::vector<float> m_transformTimes;
 
@@ -729,8 +818,8 @@ struct LocationOutput
 struct CameraOutput : public LocationOutput
 {
 
-	CameraOutput( IECoreScenePreview::Renderer *renderer, const IECore::CompoundObject *globals, const GafferScene::RendererAlgo::RenderSets &renderSets, const ScenePlug::ScenePath &root )
-		:	LocationOutput( renderer, globals, renderSets, root ), m_globals( globals ), m_cameraSet( renderSets.camerasSet() )
+	CameraOutput( IECoreScenePreview::Renderer *renderer, const IECore::CompoundObject *globals, const GafferScene::RendererAlgo::RenderSets &renderSets, const ScenePlug::ScenePath &root, GafferScene::RendererAlgo::AttributesCache *attributesCache )
+		:	LocationOutput( renderer, globals, renderSets, root, attributesCache ), m_globals( globals ), m_cameraSet( renderSets.camerasSet() )
 	{
 	}
 
@@ -774,8 +863,8 @@ struct CameraOutput : public LocationOutput
 struct LightOutput : public LocationOutput
 {
 
-	LightOutput( IECoreScenePreview::Renderer *renderer, const IECore::CompoundObject *globals, const GafferScene::RendererAlgo::RenderSets &renderSets, const ScenePlug::ScenePath &root )
-		:	LocationOutput( renderer, globals, renderSets, root ), m_lightSet( renderSets.lightsSet() )
+	LightOutput( IECoreScenePreview::Renderer *renderer, const IECore::CompoundObject *globals, const GafferScene::RendererAlgo::RenderSets &renderSets, const ScenePlug::ScenePath &root, GafferScene::RendererAlgo::AttributesCache *attributesCache )
+		:	LocationOutput( renderer, globals, renderSets, root, attributesCache ), m_lightSet( renderSets.lightsSet() )
 	{
 	}
 
@@ -810,8 +899,8 @@ struct LightOutput : public LocationOutput
 struct ObjectOutput : public LocationOutput
 {
 
-	ObjectOutput( IECoreScenePreview::Renderer *renderer, const IECore::CompoundObject *globals, const GafferScene::RendererAlgo::RenderSets &renderSets, const ScenePlug::ScenePath &root )
-		:	LocationOutput( renderer, globals, renderSets, root ), m_cameraSet( renderSets.camerasSet() ), m_lightSet( renderSets.lightsSet() )
+	ObjectOutput( IECoreScenePreview::Renderer *renderer, const IECore::CompoundObject *globals, const GafferScene::RendererAlgo::RenderSets &renderSets, const ScenePlug::ScenePath &root, GafferScene::RendererAlgo::AttributesCache *attributesCache )
+		:	LocationOutput( renderer, globals, renderSets, root, attributesCache ), m_cameraSet( renderSets.camerasSet() ), m_lightSet( renderSets.lightsSet() )
 	{
 	}
 
@@ -862,6 +951,38 @@ struct ObjectOutput : public LocationOutput
 
 };
 
+// Used by the output functions to provide a temporary
+// AttributesCache when one hasn't been supplied.
+struct AttributesCacheScope : boost::noncopyable
+{
+
+	AttributesCacheScope( IECoreScenePreview::Renderer *renderer, GafferScene::RendererAlgo::AttributesCache *attributesCache )
+		:	m_attributesCache( attributesCache )
+	{
+		if( !m_attributesCache )
+		{
+			m_temporaryAttributesCache.reset( new GafferScene::RendererAlgo::AttributesCache( renderer ) );
+			m_attributesCache = m_temporaryAttributesCache.get();
+		}
+	}
+
+	~AttributesCacheScope()
+	{
+		m_attributesCache->reportStatistics();
+	}
+
+	GafferScene::RendererAlgo::AttributesCache *attributesCache()
+	{
+		return m_attributesCache;
+	}
+
+	private :
+
+		GafferScene::RendererAlgo::AttributesCache *m_attributesCache;
+		std::unique_ptr<GafferScene::RendererAlgo::AttributesCache> m_temporaryAttributesCache;
+
+};
+
 } // namespace
 
 //////////////////////////////////////////////////////////////////////////
@@ -1000,7 +1121,7 @@ void outputOutputs( const IECore::CompoundObject *globals, const IECore::Compoun
 	}
 }
 
-void outputCameras( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer )
+void outputCameras( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer, AttributesCache *attributesCache )
 {
 	const StringData *cameraOption = globals->member<StringData>( g_cameraOptionLegacyName );
 	if( cameraOption && !cameraOption->readable().empty() )
@@ -1016,31 +1137,35 @@ void outputCameras( const ScenePlug *scene, const IECore::CompoundObject *global
 		}
 	}
 
+	AttributesCacheScope attributesCacheScope( renderer, attributesCache );
+
 	const ScenePlug::ScenePath root;
-	CameraOutput output( renderer, globals, renderSets, root );
+	CameraOutput output( renderer, globals, renderSets, root, attributesCacheScope.attributesCache() );
 	SceneAlgo::parallelProcessLocations( scene, output );
 
 	if( !cameraOption || cameraOption->readable().empty() )
 	{
 		CameraPtr defaultCamera = new IECoreScene::Camera;
 		RendererAlgo::applyCameraGlobals( defaultCamera.get(), globals );
-		IECoreScenePreview::Renderer::AttributesInterfacePtr defaultAttributes = renderer->attributes( scene->attributesPlug()->defaultValue() );
+		IECoreScenePreview::Renderer::AttributesInterfacePtr defaultAttributes = attributesCacheScope.attributesCache()->get( scene->attributesPlug()->defaultValue() );
 		ConstStringDataPtr name = new StringData( "gaffer:defaultCamera" );
 		renderer->camera( name->readable(), defaultCamera.get(), defaultAttributes.get() );
 		renderer->option( "camera", name.get() );
 	}
 }
 
-void outputLights( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer )
+void outputLights( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer, AttributesCache *attributesCache )
 {
+	AttributesCacheScope attributesCacheScope( renderer, attributesCache );
 	const ScenePlug::ScenePath root;
-	LightOutput output( renderer, globals, renderSets, root );
+	LightOutput output( renderer, globals, renderSets, root, attributesCacheScope.attributesCache() );
 	SceneAlgo::parallelProcessLocations( scene, output );
 }
 
-void outputObjects( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer, const ScenePlug::ScenePath &root )
+void outputObjects( const ScenePlug *scene, const IECore::CompoundObject *globals, const RenderSets &renderSets, IECoreScenePreview::Renderer *renderer, const ScenePlug::ScenePath &root, AttributesCache *attributesCache )
 {
-	ObjectOutput output( renderer, globals, renderSets, root );
+	AttributesCacheScope attributesCacheScope( renderer, attributesCache );
+	ObjectOutput output( renderer, globals, renderSets, root, attributesCacheScope.attributesCache() );
 	SceneAlgo::parallelProcessLocations( scene, output, root );
 }
 
@@ -141,6 +141,58 @@ void GafferScene::SceneAlgo::matchingPaths( const PathMatcher &filter, const Sce
 	GafferScene::SceneAlgo::filteredParallelTraverse( scene, filter, f );
 }
 
+namespace
+{
+
+IECore::MurmurHash matchingPathsHashWalk( const Gaffer::IntPlug *filterPlug, const ScenePlug *scene, const Context *context, const ScenePlug::ScenePath &path )
+{
+	ScenePlug::PathScope pathScope( context, path );
+
+	const unsigned match = filterPlug->getValue();
+
+	IECore::MurmurHash result;
+	result.append( (int)( match & PathMatcher::ExactMatch ) );
+	if( !( match & PathMatcher::DescendantMatch ) )
+	{
+		return result;
+	}
+
+	ConstInternedStringVectorDataPtr childNamesData = scene->childNamesPlug()->getValue();
+	const vector<InternedString> &childNames = childNamesData->readable();
+
+	vector<IECore::MurmurHash> childHashes( childNames.size() );
+	tbb::task_group_context taskGroupContext( tbb::task_group_context::isolated ); // Prevents outer tasks silently cancelling our tasks
+	parallel_for(
+		tbb::blocked_range<size_t>( 0, childNames.size() ),
+		[filterPlug, scene, context, &path, &childNames, &childHashes]( const tbb::blocked_range<size_t> &range ) {
+			ScenePlug::ScenePath childPath = path;
+			childPath.push_back( InternedString() ); // space for the child name
+			for( size_t i = range.begin(); i != range.end(); ++i )
+			{
+				childPath.back() = childNames[i];
+				childHashes[i] = matchingPathsHashWalk( filterPlug, scene, context, childPath );
+			}
+		},
+		taskGroupContext
+	);
+
+	for( size_t i = 0, e = childNames.size(); i < e; ++i )
+	{
+		result.append( childNames[i] );
+		result.append( childHashes[i] );
+	}
+
+	return result;
+}
+
+} // namespace
+
+IECore::MurmurHash GafferScene::SceneAlgo::matchingPathsHash( const Gaffer::IntPlug *filterPlug, const ScenePlug *scene )
+{
+	FilterPlug::SceneScope sceneScope( Context::current(), scene );
+	return matchingPathsHashWalk( filterPlug, scene, Context::current(), ScenePlug::ScenePath() );
+}
+
 IECore::ConstCompoundObjectPtr GafferScene::SceneAlgo::globalAttributes( const IECore::CompoundObject *globals )
 {
 	static const std::string prefix( "attribute:" );
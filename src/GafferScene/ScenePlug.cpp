@@ -44,6 +44,8 @@
 #include "IECore/NullObject.h"
 #include "IECore/StringAlgo.h"
 
+#include "tbb/parallel_for.h"
+
 using namespace Gaffer;
 using namespace GafferScene;
 
@@ -441,6 +443,61 @@ IECore::MurmurHash ScenePlug::childNamesHash( const ScenePath &scenePath ) const
 	return childNamesPlug()->hash();
 }
 
+namespace
+{
+
+IECore::MurmurHash hierarchyHashWalk( const ScenePlug *scene, const Context *context, const ScenePlug::ScenePath &path )
+{
+	ScenePlug::PathScope scope( context, path );
+
+	IECore::MurmurHash result;
+	scene->boundPlug()->hash( result );
+	scene->transformPlug()->hash( result );
+	scene->attributesPlug()->hash( result );
+	scene->objectPlug()->hash( result );
+	scene->childNamesPlug()->hash( result );
+
+	IECore::ConstInternedStringVectorDataPtr childNamesData = scene->childNamesPlug()->getValue();
+	const std::vector<IECore::InternedString> &childNames = childNamesData->readable();
+	if( childNames.empty() )
+	{
+		return result;
+	}
+
+	// Hash the children in parallel, but combine their hashes in
+	// order so that the result is deterministic. The child names
+	// themselves are already accounted for by the childNames hash.
+	std::vector<IECore::MurmurHash> childHashes( childNames.size() );
+	tbb::task_group_context taskGroupContext( tbb::task_group_context::isolated ); // Prevents outer tasks silently cancelling our tasks
+	tbb::parallel_for(
+		tbb::blocked_range<size_t>( 0, childNames.size() ),
+		[scene, context, &path, &childNames, &childHashes]( const tbb::blocked_range<size_t> &range ) {
+			ScenePlug::ScenePath childPath = path;
+			childPath.push_back( IECore::InternedString() ); // space for the child name
+			for( size_t i = range.begin(); i != range.end(); ++i )
+			{
+				childPath.back() = childNames[i];
+				childHashes[i] = hierarchyHashWalk( scene, context, childPath );
+			}
+		},
+		taskGroupContext
+	);
+
+	for( const auto &h : childHashes )
+	{
+		result.append( h );
+	}
+
+	return result;
+}
+
+} // namespace
+
+IECore::MurmurHash ScenePlug::hierarchyHash( const ScenePath &scenePath ) const
+{
+	return hierarchyHashWalk( this, Context::current(), scenePath );
+}
+
 IECore::MurmurHash ScenePlug::globalsHash() const
 {
 	GlobalScope scope( Context::current() );
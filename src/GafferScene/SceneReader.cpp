@@ -40,13 +40,18 @@
 #include "Gaffer/StringPlug.h"
 
 #include "IECoreScene/SceneCache.h"
-#include "IECoreScene/SharedSceneInterfaces.h"
 
 #include "IECore/InternedString.h"
+#include "IECore/LRUCache.h"
 #include "IECore/StringAlgo.h"
 
 #include "boost/bind.hpp"
 
+#include "tbb/task.h"
+
+#include <atomic>
+#include <functional>
+
 using namespace std;
 using namespace Imath;
 using namespace IECore;
@@ -58,6 +63,150 @@ typedef boost::tokenizer<boost::char_separator<char> > Tokenizer;
 
 IE_CORE_DEFINERUNTIMETYPED( SceneReader );
 
+//////////////////////////////////////////////////////////////////////////
+// Internal utilities
+//////////////////////////////////////////////////////////////////////////
+
+namespace
+{
+
+// File handles are shared between all SceneReaders. We use our own cache
+// rather than SharedSceneInterfaces so that we can invalidate individual
+// files when a SceneReader is refreshed.
+
+ConstSceneInterfacePtr fileGetter( const std::string &fileName, size_t &cost )
+{
+	cost = 1;
+	return SceneInterface::create( fileName, IndexedIO::Read );
+}
+
+typedef IECore::LRUCache<std::string, ConstSceneInterfacePtr> FileCache;
+
+const size_t g_fileCacheSize = 200;
+
+FileCache &fileCache()
+{
+	static FileCache *c = new FileCache( fileGetter, g_fileCacheSize );
+	return *c;
+}
+
+// The maximum number of entries in each per-thread cache.
+const size_t g_threadCacheSize = 16;
+
+// Prefetching
+// ===========
+//
+// Prefetches are enqueued as background tasks, and simply read data
+// from the SceneInterface and discard it. This warms the file system
+// cache and any caches internal to the SceneInterface (SceneCache
+// stores objects in the ObjectPool, for instance), so that the "real"
+// read is quicker when it arrives.
+
+class PrefetchTask : public tbb::task
+{
+
+	public :
+
+		typedef std::function<void ()> Function;
+
+		PrefetchTask( const Function &f )
+			:	m_f( f )
+		{
+		}
+
+		tbb::task *execute() override
+		{
+			try
+			{
+				m_f();
+			}
+			catch( ... )
+			{
+				// Errors will be reported when the location
+				// is read for real.
+			}
+			g_pendingPrefetches--;
+			return nullptr;
+		}
+
+		static void enqueue( const Function &f )
+		{
+			// Bound the number of outstanding prefetches so
+			// we don't queue up more work than can possibly
+			// be useful.
+			if( g_pendingPrefetches++ >= g_maxPendingPrefetches )
+			{
+				g_pendingPrefetches--;
+				return;
+			}
+			tbb::task::enqueue( *new( tbb::task::allocate_root() ) PrefetchTask( f ) );
+		}
+
+	private :
+
+		Function m_f;
+
+		static std::atomic_int g_pendingPrefetches;
+		static const int g_maxPendingPrefetches = 1000;
+
+};
+
+std::atomic_int PrefetchTask::g_pendingPrefetches( 0 );
+
+void prefetchLocation( const SceneInterface *s, double time )
+{
+	if( s->hasBound() )
+	{
+		s->readBound( time );
+	}
+	s->readTransform( time );
+
+	SceneInterface::NameList attributeNames;
+	s->attributeNames( attributeNames );
+	for( const auto &attributeName : attributeNames )
+	{
+		s->readAttribute( attributeName, time );
+	}
+
+	if( s->hasObject() )
+	{
+		s->readObject( time );
+	}
+}
+
+void prefetchChildren( const ConstSceneInterfacePtr &s, double time )
+{
+	// Even looking up the children has a cost, so we defer
+	// that to the background too.
+	PrefetchTask::enqueue(
+		[s, time] {
+			SceneInterface::NameList childNames;
+			s->childNames( childNames );
+			for( const auto &childName : childNames )
+			{
+				ConstSceneInterfacePtr child = s->child( childName );
+				PrefetchTask::enqueue(
+					[child, time] {
+						prefetchLocation( child.get(), time );
+					}
+				);
+			}
+		}
+	);
+}
+
+void prefetchObject( const ConstSceneInterfacePtr &s, double time )
+{
+	PrefetchTask::enqueue(
+		[s, time] {
+			s->readObject( time );
+		}
+	);
+}
+
+} // namespace
+
+
 //////////////////////////////////////////////////////////////////////////
 // SceneReader implementation
 //////////////////////////////////////////////////////////////////////////
@@ -67,12 +216,13 @@ size_t SceneReader::g_firstPlugIndex = 0;
 static IECore::BoolDataPtr g_trueBoolData = new IECore::BoolData( true );
 
 SceneReader::SceneReader( const std::string &name )
-	:	SceneNode( name )
+	:	SceneNode( name ), m_fileNamesOverflowed( false )
 {
 	storeIndexOfNextChild( g_firstPlugIndex );
 	addChild( new StringPlug( "fileName" ) );
 	addChild( new IntPlug( "refreshCount" ) );
 	addChild( new StringPlug( "tags" ) );
+	addChild( new BoolPlug( "prefetch" ) );
 	plugSetSignal().connect( boost::bind( &SceneReader::plugSet, this, ::_1 ) );
 }
 
@@ -110,6 +260,16 @@ const Gaffer::StringPlug *SceneReader::tagsPlug() const
 	return getChild<StringPlug>( g_firstPlugIndex + 2 );
 }
 
+Gaffer::BoolPlug *SceneReader::prefetchPlug()
+{
+	return getChild<BoolPlug>( g_firstPlugIndex + 3 );
+}
+
+const Gaffer::BoolPlug *SceneReader::prefetchPlug() const
+{
+	return getChild<BoolPlug>( g_firstPlugIndex + 3 );
+}
+
 void SceneReader::affects( const Gaffer::Plug *input, AffectedPlugsContainer &outputs ) const
 {
 	SceneNode::affects( input, outputs );
@@ -290,6 +450,11 @@ IECore::ConstObjectPtr SceneReader::computeObject( const ScenePath &path, const
 		return parent->objectPlug()->defaultValue();
 	}
 
+	if( prefetchPlug()->getValue() )
+	{
+		prefetchObject( s, context->getTime() + 1.0 / context->getFramesPerSecond() );
+	}
+
 	return s->readObject( context->getTime() );
 }
 
@@ -322,6 +487,11 @@ IECore::ConstInternedStringVectorDataPtr SceneReader::computeChildNames( const S
 
 	// get the child names
 
+	if( prefetchPlug()->getValue() )
+	{
+		prefetchChildren( s, context->getTime() );
+	}
+
 	InternedStringVectorDataPtr resultData = new InternedStringVectorData;
 	vector<InternedString> &result = resultData->writable();
 	s->childNames( result );
@@ -447,14 +617,50 @@ IECore::ConstPathMatcherDataPtr SceneReader::computeSet( const IECore::InternedS
 
 void SceneReader::plugSet( Gaffer::Plug *plug )
 {
-	// this clears the cache every time the refresh count is updated, so you don't get entries
-	// from old files hanging around and screwing up the hierarchy.
-	/// \todo The fact that this clears the cache for all nodes, ever is a problem - find a better
-	// way of doing this!
+	// Invalidate the cached file handles every time the refresh count is updated,
+	// so you don't get entries from old files hanging around and screwing up the
+	// hierarchy. We only invalidate the files this node is responsible for, so
+	// that refreshing one reader doesn't force all the others to reopen their
+	// files.
 	if( plug == refreshCountPlug() )
 	{
-		SharedSceneInterfaces::clear();
-		m_lastScene.clear();
+		std::set<std::string> fileNames;
+		bool fileNamesOverflowed;
+		{
+			tbb::spin_mutex::scoped_lock lock( m_fileNamesMutex );
+			fileNames.swap( m_fileNames );
+			fileNamesOverflowed = m_fileNamesOverflowed;
+			m_fileNamesOverflowed = false;
+		}
+
+		if( fileNamesOverflowed )
+		{
+			// We've read more files than we're prepared to keep
+			// track of, so we must invalidate everything.
+			fileCache().clear();
+			m_threadCache.clear();
+			return;
+		}
+
+		// A freshly created node won't have read anything yet, but
+		// may be refreshing a file that another node has read.
+		try
+		{
+			fileNames.insert( fileNamePlug()->getValue() );
+		}
+		catch( ... )
+		{
+			// The file name may not be computable outside of a
+			// compute, in which case the files we've already
+			// recorded will have to suffice.
+		}
+
+		for( const auto &fileName : fileNames )
+		{
+			fileCache().erase( fileName );
+		}
+
+		m_threadCache.clear();
 	}
 }
 
@@ -466,26 +672,85 @@ ConstSceneInterfacePtr SceneReader::scene( const ScenePath &path ) const
 		return nullptr;
 	}
 
-	LastScene &lastScene = m_lastScene.local();
-	if( lastScene.fileName == fileName )
+	std::vector<ThreadCache::Entry> &entries = m_threadCache.local().entries;
+
+	// Look for an exact match, keeping track of any entry
+	// for the same file that we can do a cheaper lookup from.
+
+	std::vector<ThreadCache::Entry>::iterator root = entries.end();
+	std::vector<ThreadCache::Entry>::iterator ancestor = entries.end();
+	for( std::vector<ThreadCache::Entry>::iterator it = entries.begin(), eIt = entries.end(); it != eIt; ++it )
 	{
-		if( lastScene.path == path )
+		if( it->fileName != fileName )
+		{
+			continue;
+		}
+
+		if( it->path == path )
 		{
-			return lastScene.pathScene;
+			// Move to front.
+			std::rotate( entries.begin(), it, it + 1 );
+			return entries.front().scene;
 		}
-		else
+
+		if( it->path.empty() )
+		{
+			root = it;
+		}
+		else if(
+			it->path.size() < path.size() &&
+			( ancestor == entries.end() || it->path.size() > ancestor->path.size() ) &&
+			std::equal( it->path.begin(), it->path.end(), path.begin() )
+		)
 		{
-			lastScene.pathScene = lastScene.fileNameScene->scene( path );
-			lastScene.path = path;
-			return lastScene.pathScene;
+			ancestor = it;
 		}
 	}
 
-	lastScene.fileNameScene = SharedSceneInterfaces::get( fileName );
-	lastScene.fileName = fileName;
+	// Look up the scene, starting from the closest
+	// ancestor we have available.
+
+	ThreadCache::Entry entry;
+	entry.fileName = fileName;
+	entry.path = path;
 
-	lastScene.pathScene = lastScene.fileNameScene->scene( path );
-	lastScene.path = path;
+	if( ancestor != entries.end() )
+	{
+		entry.scene = ancestor->scene;
+		for( ScenePath::const_iterator it = path.begin() + ancestor->path.size(), eIt = path.end(); it != eIt; ++it )
+		{
+			entry.scene = entry.scene->child( *it );
+		}
+	}
+	else
+	{
+		ConstSceneInterfacePtr rootScene;
+		if( root != entries.end() )
+		{
+			rootScene = root->scene;
+		}
+		else
+		{
+			rootScene = fileCache().get( fileName );
+			tbb::spin_mutex::scoped_lock lock( m_fileNamesMutex );
+			if( !m_fileNamesOverflowed )
+			{
+				m_fileNames.insert( fileName );
+				if( m_fileNames.size() > g_fileCacheSize )
+				{
+					m_fileNames.clear();
+					m_fileNamesOverflowed = true;
+				}
+			}
+		}
+		entry.scene = path.empty() ? rootScene : rootScene->scene( path );
+	}
+
+	if( entries.size() >= g_threadCacheSize )
+	{
+		entries.pop_back();
+	}
+	entries.insert( entries.begin(), entry );
 
-	return lastScene.pathScene;
+	return entries.front().scene;
 }
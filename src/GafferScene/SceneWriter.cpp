@@ -43,10 +43,18 @@
 
 #include "IECoreScene/SceneInterface.h"
 
+#include "boost/bind.hpp"
 #include "boost/filesystem.hpp"
 
-#include "tbb/concurrent_unordered_map.h"
-#include "tbb/mutex.h"
+#include "tbb/parallel_for.h"
+
+#include <atomic>
+#include <condition_variable>
+#include <future>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <thread>
 
 using namespace std;
 using namespace IECore;
@@ -57,34 +65,77 @@ using namespace GafferScene;
 namespace
 {
 
-struct LocationWriter
+//////////////////////////////////////////////////////////////////////////
+// Location buffers
+//////////////////////////////////////////////////////////////////////////
+
+// Writing is split between TBB worker threads, which compute the data
+// for each location and store it in a Location buffer, and a single
+// writer thread which drains the buffers into the SceneInterface in
+// hierarchy order. This means that SceneInterface access is serial
+// without needing a lock, and that computation is never stalled waiting
+// for I/O.
+
+struct Location;
+typedef std::shared_ptr<Location> LocationPtr;
+
+struct Location
 {
-	LocationWriter(SceneInterfacePtr output, ConstCompoundDataPtr sets, float time, tbb::mutex& mutex) : m_output( output ), m_sets(sets), m_time( time ), m_mutex( mutex )
+
+	Location( const InternedString &name )
+		:	name( name )
 	{
 	}
 
-	/// first half of this function can be lock free reading data from ScenePlug
-	/// once all the data has been read then we take a global lock and write
-	/// into the SceneInterface
-	bool operator()( const ScenePlug *scene, const ScenePlug::ScenePath &scenePath )
-	{
-		ConstCompoundObjectPtr attributes = scene->attributesPlug()->getValue();
+	const InternedString name;
 
-		ConstCompoundObjectPtr globals;
+	// Filled in by a worker thread, before `computed` is fulfilled.
+	// The data members are released by the writer thread as soon as
+	// they have been written.
+	ConstCompoundObjectPtr attributes;
+	ConstCompoundObjectPtr globals;
+	ConstObjectPtr object;
+	Imath::Box3f bound;
+	M44dDataPtr transform;
+	SceneInterface::NameList tags;
+	std::vector<LocationPtr> children;
 
-		ConstObjectPtr object = scene->objectPlug()->getValue();
-		Imath::Box3f bound = scene->boundPlug()->getValue();
+	// Fulfilled when the data above is available, or holds the
+	// exception thrown while computing it.
+	std::promise<void> computed;
+
+};
+
+void computeLocation( const ScenePlug *scene, const Context *context, const ScenePlug::ScenePath &path, const LocationPtr &location, const CompoundData *sets, const std::atomic_bool &cancelled )
+{
+	if( cancelled )
+	{
+		// The writer has failed and nobody is waiting
+		// for this location any more.
+		return;
+	}
+
+	try
+	{
+		ScenePlug::PathScope pathScope( context, path );
 
-		IECore::M44dDataPtr transformData;
+		location->attributes = scene->attributesPlug()->getValue();
+		location->bound = scene->boundPlug()->getValue();
 
-		if( scenePath.empty() )
+		if( path.empty() )
 		{
-			globals = scene->globalsPlug()->getValue();
+			location->globals = scene->globalsPlug()->getValue();
 		}
 		else
 		{
-			Imath::M44f t = scene->transformPlug()->getValue();
-			transformData = new IECore::M44dData( Imath::M44d (
+			ConstObjectPtr object = scene->objectPlug()->getValue();
+			if( object->typeId() != IECore::NullObjectTypeId )
+			{
+				location->object = object;
+			}
+
+			const Imath::M44f t = scene->transformPlug()->getValue();
+			location->transform = new IECore::M44dData( Imath::M44d (
 				t[0][0], t[0][1], t[0][2], t[0][3],
 				t[1][0], t[1][1], t[1][2], t[1][3],
 				t[2][0], t[2][1], t[2][2], t[2][3],
@@ -92,74 +143,292 @@ struct LocationWriter
 			) );
 		}
 
-		SceneInterface::NameList locationSets;
-		const CompoundDataMap &setsMap = m_sets->readable();
-		locationSets.reserve( setsMap.size() );
-
-		for( CompoundDataMap::const_iterator it = setsMap.begin(); it != setsMap.end(); ++it)
+		const CompoundDataMap &setsMap = sets->readable();
+		location->tags.reserve( setsMap.size() );
+		for( CompoundDataMap::const_iterator it = setsMap.begin(); it != setsMap.end(); ++it )
 		{
-			ConstPathMatcherDataPtr pathMatcher = IECore::runTimeCast<PathMatcherData>( it->second );
-
-			if( pathMatcher->readable().match( scenePath ) & IECore::PathMatcher::ExactMatch )
+			const PathMatcherData *pathMatcher = static_cast<const PathMatcherData *>( it->second.get() );
+			if( pathMatcher->readable().match( path ) & IECore::PathMatcher::ExactMatch )
 			{
-				locationSets.push_back( it->first );
+				location->tags.push_back( it->first );
 			}
 		}
 
-		tbb::mutex::scoped_lock scopedLock( m_mutex );
-
-		if( !scenePath.empty() )
+		ConstInternedStringVectorDataPtr childNamesData = scene->childNamesPlug()->getValue();
+		const vector<InternedString> &childNames = childNamesData->readable();
+		location->children.reserve( childNames.size() );
+		for( const auto &childName : childNames )
 		{
-			m_output = m_output->child( scenePath.back(), SceneInterface::CreateIfMissing );
+			location->children.push_back( std::make_shared<Location>( childName ) );
 		}
+	}
+	catch( ... )
+	{
+		location->computed.set_exception( std::current_exception() );
+		return;
+	}
 
-		for( CompoundObject::ObjectMap::const_iterator it = attributes->members().begin(), eIt = attributes->members().end(); it != eIt; it++ )
-		{
-			m_output->writeAttribute( it->first, it->second.get(), m_time );
-		}
+	location->computed.set_value();
 
-		if( globals )
-		{
-			m_output->writeAttribute( "gaffer:globals", globals.get(), m_time );
-		}
+	if( location->children.empty() )
+	{
+		return;
+	}
+
+	tbb::task_group_context taskGroupContext( tbb::task_group_context::isolated ); // Prevents outer tasks silently cancelling our tasks
+	tbb::parallel_for(
+		tbb::blocked_range<size_t>( 0, location->children.size() ),
+		[scene, context, &path, &location, sets, &cancelled]( const tbb::blocked_range<size_t> &r ) {
+			ScenePlug::ScenePath childPath = path;
+			childPath.push_back( InternedString() );
+			for( size_t i = r.begin(); i != r.end(); ++i )
+			{
+				const LocationPtr &child = location->children[i];
+				childPath.back() = child->name;
+				computeLocation( scene, context, childPath, child, sets, cancelled );
+			}
+		},
+		taskGroupContext
+	);
+}
+
+void writeLocation( Location *location, SceneInterface *output, double time )
+{
+	// Blocks until a worker has computed the location, and
+	// rethrows any exception encountered in doing so.
+	location->computed.get_future().get();
+
+	for( CompoundObject::ObjectMap::const_iterator it = location->attributes->members().begin(), eIt = location->attributes->members().end(); it != eIt; it++ )
+	{
+		output->writeAttribute( it->first, it->second.get(), time );
+	}
+
+	if( location->globals )
+	{
+		output->writeAttribute( "gaffer:globals", location->globals.get(), time );
+	}
+
+	if( location->object )
+	{
+		output->writeObject( location->object.get(), time );
+	}
+
+	output->writeBound( Imath::Box3d( Imath::V3f( location->bound.min ), Imath::V3f( location->bound.max ) ), time );
+
+	if( location->transform )
+	{
+		output->writeTransform( location->transform.get(), time );
+	}
+
+	output->writeTags( location->tags );
+
+	// We're done with the data, so free it now rather than
+	// waiting for the whole hierarchy to be written.
+	location->attributes = nullptr;
+	location->globals = nullptr;
+	location->object = nullptr;
+	location->transform = nullptr;
+	SceneInterface::NameList().swap( location->tags );
+
+	for( const auto &child : location->children )
+	{
+		SceneInterfacePtr childOutput = output->child( child->name, SceneInterface::CreateIfMissing );
+		writeLocation( child.get(), childOutput.get(), time );
+	}
+}
 
-		if( object->typeId() != IECore::NullObjectTypeId && scenePath.size() > 0 )
+//////////////////////////////////////////////////////////////////////////
+// Set computation
+//////////////////////////////////////////////////////////////////////////
+
+// Computes the sets for successive frames, reusing the result from
+// the previous frame for any set whose hash hasn't changed. Since sets
+// are rarely animated, this avoids almost all set computation after
+// the first frame.
+class IncrementalSets
+{
+
+	public :
+
+		ConstCompoundDataPtr update( const ScenePlug *scene )
 		{
-			m_output->writeObject( object.get(), m_time );
+			ConstInternedStringVectorDataPtr setNamesData = scene->setNames();
+
+			CompoundDataPtr result = new CompoundData;
+			Sets sets;
+			vector<InternedString> changedSetNames;
+			for( const auto &setName : setNamesData->readable() )
+			{
+				const MurmurHash h = scene->setHash( setName );
+				Sets::const_iterator it = m_sets.find( setName );
+				if( it != m_sets.end() && it->second.hash == h )
+				{
+					sets[setName] = it->second;
+					result->writable()[setName] = boost::const_pointer_cast<Data>( it->second.set );
+				}
+				else
+				{
+					sets[setName].hash = h;
+					changedSetNames.push_back( setName );
+				}
+			}
+
+			if( changedSetNames.size() )
+			{
+				ConstCompoundDataPtr changedSets = SceneAlgo::sets( scene, changedSetNames );
+				for( const auto &setName : changedSetNames )
+				{
+					ConstDataPtr set = changedSets->member<Data>( setName );
+					sets[setName].set = set;
+					result->writable()[setName] = boost::const_pointer_cast<Data>( set );
+				}
+			}
+
+			m_sets.swap( sets );
+			return result;
 		}
 
-		m_output->writeBound( Imath::Box3d( Imath::V3f( bound.min ), Imath::V3f( bound.max ) ), m_time );
+	private :
 
-		if( transformData )
+		struct Set
 		{
-			m_output->writeTransform( transformData.get(), m_time );
+			MurmurHash hash;
+			ConstDataPtr set;
+		};
+
+		typedef std::map<InternedString, Set> Sets;
+		Sets m_sets;
+
+};
+
+//////////////////////////////////////////////////////////////////////////
+// File writing
+//////////////////////////////////////////////////////////////////////////
+
+// Writes a sequence of frames to a single file. Computation of each frame
+// overlaps with the writing of the previous one, but no further, so that
+// we never buffer more than two frames when computation outpaces writing.
+void writeFile( const ScenePlug *scene, const std::string &fileName, const std::vector<float> &frames, const Context *context )
+{
+	SceneInterfacePtr output = SceneInterface::create( fileName, IndexedIO::Write );
+
+	std::vector<LocationPtr> roots;
+	std::vector<double> times;
+	for( size_t i = 0; i < frames.size(); ++i )
+	{
+		roots.push_back( std::make_shared<Location>( InternedString() ) );
+	}
+
+	ContextPtr frameContext = new Context( *context );
+	for( auto frame : frames )
+	{
+		frameContext->setFrame( frame );
+		times.push_back( frameContext->getTime() );
+	}
+
+	std::atomic_bool cancelled( false );
+	std::exception_ptr writeException;
+
+	// Guarded by `writtenMutex`, and used to notify the main
+	// thread of the writer's progress.
+	size_t numFramesWritten = 0;
+	std::mutex writtenMutex;
+	std::condition_variable writtenCondition;
+
+	std::thread writer(
+		[&output, &roots, &times, &cancelled, &writeException, &numFramesWritten, &writtenMutex, &writtenCondition] {
+			try
+			{
+				for( size_t i = 0; i < roots.size(); ++i )
+				{
+					writeLocation( roots[i].get(), output.get(), times[i] );
+					// Release the buffers for this frame.
+					roots[i] = nullptr;
+					std::lock_guard<std::mutex> lock( writtenMutex );
+					numFramesWritten++;
+					writtenCondition.notify_one();
+				}
+			}
+			catch( ... )
+			{
+				writeException = std::current_exception();
+				std::lock_guard<std::mutex> lock( writtenMutex );
+				cancelled = true;
+				writtenCondition.notify_one();
+			}
 		}
+	);
 
-		m_output->writeTags( locationSets );
+	size_t i = 0;
+	try
+	{
+		Context::Scope scopedContext( frameContext.get() );
+		IncrementalSets incrementalSets;
+		for( ; i < frames.size() && !cancelled; ++i )
+		{
+			if( i >= 2 )
+			{
+				// Wait for frame `i - 2` to be written before
+				// computing frame `i`.
+				std::unique_lock<std::mutex> lock( writtenMutex );
+				writtenCondition.wait( lock, [&numFramesWritten, &cancelled, i] { return numFramesWritten >= i - 1 || cancelled; } );
+				if( cancelled )
+				{
+					break;
+				}
+			}
 
-		return true;
+			frameContext->setFrame( frames[i] );
+			ConstCompoundDataPtr sets = incrementalSets.update( scene );
+			// Take a reference to the root, because the
+			// writer may release it as soon as it has
+			// been written.
+			LocationPtr root = roots[i];
+			computeLocation( scene, frameContext.get(), ScenePlug::ScenePath(), root, sets.get(), cancelled );
+		}
+	}
+	catch( ... )
+	{
+		// Make sure the writer doesn't wait forever for the
+		// remaining frames. The writer can't have released
+		// them, because it can't get past frame `i`.
+		for( ; i < frames.size(); ++i )
+		{
+			try
+			{
+				roots[i]->computed.set_exception( std::current_exception() );
+			}
+			catch( const std::future_error & )
+			{
+				// Already computed.
+			}
+		}
 	}
 
-	SceneInterfacePtr m_output;
-	ConstCompoundDataPtr m_sets;
-	float m_time;
-	tbb::mutex &m_mutex;
-};
+	writer.join();
 
+	if( writeException )
+	{
+		std::rethrow_exception( writeException );
+	}
 }
 
+} // namespace
+
 IE_CORE_DEFINERUNTIMETYPED( SceneWriter );
 
 size_t SceneWriter::g_firstPlugIndex = 0;
 
 SceneWriter::SceneWriter( const std::string &name )
-	: TaskNode( name )
+	: TaskNode( name ), m_dirtyCount( 0 )
 {
 	storeIndexOfNextChild( g_firstPlugIndex );
 	addChild( new ScenePlug( "in", Plug::In ) );
 	addChild( new StringPlug( "fileName" ) );
 	addChild( new ScenePlug( "out", Plug::Out, Plug::Default & ~Plug::Serialisable ) );
 	outPlug()->setInput( inPlug() );
+
+	plugDirtiedSignal().connect( 0, boost::bind( &SceneWriter::plugDirtied, this, ::_1 ) );
 }
 
 SceneWriter::~SceneWriter()
@@ -207,8 +476,15 @@ IECore::MurmurHash SceneWriter::hash( const Gaffer::Context *context ) const
 
 	IECore::MurmurHash h = TaskNode::hash( context );
 	h.append( fileNamePlug()->hash() );
-	/// \todo hash the actual scene when we have a hierarchyHash
+	// Hashing the scene itself would require a traversal of the entire
+	// hierarchy, which is too expensive to do every time the dispatcher
+	// hashes the task. Instead we use our input, the number of times
+	// it has been dirtied, and the entire context. This is not stable
+	// between processes, but it does account for edits to the scene.
+	/// \todo Use `ScenePlug::hierarchyHash()` instead, once it is
+	/// cached rather than traversing the hierarchy on every call.
 	h.append( (uint64_t)scenePlug );
+	h.append( m_dirtyCount );
 	h.append( context->hash() );
 
 	return h;
@@ -228,22 +504,46 @@ void SceneWriter::executeSequence( const std::vector<float> &frames ) const
 		throw IECore::Exception( "No input scene" );
 	}
 
-	const std::string fileName = fileNamePlug()->getValue();
-	createDirectories( fileName );
-	SceneInterfacePtr output = SceneInterface::create( fileName, IndexedIO::Write );
-	tbb::mutex mutex;
-	ContextPtr context = new Context( *Context::current() );
-	Context::Scope scopedContext( context.get() );
+	// Group the frames by file name. When the file name contains a frame
+	// token, each frame has its own file, and we write them concurrently.
+
+	typedef std::map<std::string, std::vector<float>> FileFrames;
 
-	for( std::vector<float>::const_iterator it = frames.begin(); it != frames.end(); ++it )
+	ContextPtr context = new Context( *Context::current() );
+	FileFrames files;
 	{
-		context->setFrame( *it );
+		Context::Scope scopedContext( context.get() );
+		for( auto frame : frames )
+		{
+			context->setFrame( frame );
+			files[fileNamePlug()->getValue()].push_back( frame );
+		}
+	}
 
-		ConstCompoundDataPtr sets = SceneAlgo::sets( scene );
-		LocationWriter locationWriter( output, sets, context->getTime(), mutex );
+	std::vector<FileFrames::const_iterator> fileList;
+	for( FileFrames::const_iterator it = files.begin(), eIt = files.end(); it != eIt; ++it )
+	{
+		createDirectories( it->first );
+		fileList.push_back( it );
+	}
 
-		SceneAlgo::parallelProcessLocations( scene, locationWriter );
+	if( fileList.size() == 1 )
+	{
+		writeFile( scene, fileList[0]->first, fileList[0]->second, context.get() );
+		return;
 	}
+
+	tbb::task_group_context taskGroupContext( tbb::task_group_context::isolated ); // Prevents outer tasks silently cancelling our tasks
+	tbb::parallel_for(
+		tbb::blocked_range<size_t>( 0, fileList.size(), 1 ),
+		[scene, &fileList, &context]( const tbb::blocked_range<size_t> &r ) {
+			for( size_t i = r.begin(); i != r.end(); ++i )
+			{
+				writeFile( scene, fileList[i]->first, fileList[i]->second, context.get() );
+			}
+		},
+		taskGroupContext
+	);
 }
 
 bool SceneWriter::requiresSequenceExecution() const
@@ -261,3 +561,11 @@ void SceneWriter::createDirectories( const std::string &fileName ) const
 		boost::filesystem::create_directories( directory );
 	}
 }
+
+void SceneWriter::plugDirtied( const Gaffer::Plug *plug )
+{
+	if( plug->parent() == inPlug() )
+	{
+		++m_dirtyCount;
+	}
+}
@@ -40,6 +40,9 @@
 
 #include "GafferScene/SetAlgo.h"
 
+#include "Gaffer/Context.h"
+
+#include "IECore/LRUCache.h"
 #include "IECore/MessageHandler.h"
 
 #include "boost/algorithm/string/predicate.hpp"
@@ -50,6 +53,10 @@
 #include "boost/variant/apply_visitor.hpp"
 #include "boost/variant/recursive_variant.hpp"
 
+#include "tbb/parallel_for.h"
+
+#include <memory>
+
 using namespace IECore;
 using namespace Gaffer;
 using namespace GafferScene;
@@ -213,6 +220,73 @@ std::ostream& operator<<( std::ostream& stream, const ExpressionAst& expr )
 
 // Evaluating the AST
 // ------------------
+
+// Gathers the operands of a chain of identical operators, so that they
+// can all be evaluated concurrently. Since `|` and `&` are associative,
+// we can gather from both sides. For `-` we only gather along the left,
+// since `a - b - c` is equivalent to `a - ( b | c )`.
+void gatherOperands( const ExpressionAst &ast, Op op, std::vector<const ExpressionAst *> &operands )
+{
+	const BinaryOp *binaryOp = boost::get<BinaryOp>( &ast.expr );
+	if( !binaryOp || binaryOp->op != op )
+	{
+		operands.push_back( &ast );
+		return;
+	}
+
+	gatherOperands( binaryOp->left, op, operands );
+	if( op == AndNot )
+	{
+		operands.push_back( &binaryOp->right );
+	}
+	else
+	{
+		gatherOperands( binaryOp->right, op, operands );
+	}
+}
+
+// Combines PathMatchers pairwise in parallel, until only one remains.
+template<typename Combiner>
+PathMatcher parallelReduce( std::vector<PathMatcher> &matchers, Combiner combiner )
+{
+	while( matchers.size() > 1 )
+	{
+		std::vector<PathMatcher> combined( matchers.size() / 2 + matchers.size() % 2 );
+		if( matchers.size() % 2 )
+		{
+			combined.back() = matchers.back();
+		}
+
+		tbb::task_group_context taskGroupContext( tbb::task_group_context::isolated ); // Prevents outer tasks silently cancelling our tasks
+		tbb::parallel_for(
+			tbb::blocked_range<size_t>( 0, matchers.size() / 2 ),
+			[&matchers, &combined, &combiner]( const tbb::blocked_range<size_t> &range ) {
+				for( size_t i = range.begin(); i != range.end(); ++i )
+				{
+					combined[i] = combiner( matchers[i*2], matchers[i*2+1] );
+				}
+			},
+			taskGroupContext
+		);
+
+		matchers.swap( combined );
+	}
+
+	return matchers.empty() ? PathMatcher() : matchers.front();
+}
+
+PathMatcher unionOf( const PathMatcher &a, const PathMatcher &b )
+{
+	PathMatcher result( a );
+	result.addPaths( b );
+	return result;
+}
+
+PathMatcher intersectionOf( const PathMatcher &a, const PathMatcher &b )
+{
+	return a.intersection( b );
+}
+
 struct AstEvaluator
 {
 	typedef PathMatcher result_type;
@@ -247,25 +321,52 @@ struct AstEvaluator
 
 	result_type operator()( const BinaryOp &expr ) const
 	{
-		PathMatcher left = boost::apply_visitor( *this, expr.left.expr );
-		PathMatcher right = boost::apply_visitor( *this, expr.right.expr );
+		std::vector<const ExpressionAst *> operands;
+		gatherOperands( expr.left, expr.op, operands );
+		if( expr.op == AndNot )
+		{
+			operands.push_back( &expr.right );
+		}
+		else
+		{
+			gatherOperands( expr.right, expr.op, operands );
+		}
+
+		// Evaluate all the operands concurrently. The sets are
+		// computed in the current context, so we must scope it
+		// explicitly on the worker threads.
+
+		std::vector<PathMatcher> results( operands.size() );
+		const Context *context = Context::current();
+
+		tbb::task_group_context taskGroupContext( tbb::task_group_context::isolated ); // Prevents outer tasks silently cancelling our tasks
+		tbb::parallel_for(
+			tbb::blocked_range<size_t>( 0, operands.size() ),
+			[this, context, &operands, &results]( const tbb::blocked_range<size_t> &range ) {
+				Context::Scope scopedContext( context );
+				for( size_t i = range.begin(); i != range.end(); ++i )
+				{
+					results[i] = boost::apply_visitor( *this, operands[i]->expr );
+				}
+			},
+			taskGroupContext
+		);
 
 		switch( expr.op )
 		{
 			case Or :
 			{
-				PathMatcher result = PathMatcher( left );
-				result.addPaths( right );
-				return result;
+				return parallelReduce( results, unionOf );
 			}
 			case And :
 			{
-				return left.intersection( right );
+				return parallelReduce( results, intersectionOf );
 			}
 			case AndNot :
 			{
-				PathMatcher result = PathMatcher( left );
-				result.removePaths( right );
+				PathMatcher result = results.front();
+				std::vector<PathMatcher> subtrahends( results.begin() + 1, results.end() );
+				result.removePaths( parallelReduce( subtrahends, unionOf ) );
 				return result;
 			}
 			default:
@@ -432,6 +533,59 @@ void expressionToAST( const std::string &setExpression, ExpressionAst &ast)
 	}
 }
 
+// Caching the AST
+// ---------------
+//
+// Set expressions are typically evaluated and hashed once per location
+// by the SetFilter, so we cache the parsed form to avoid repeating
+// the relatively expensive parsing process.
+
+typedef std::shared_ptr<const ExpressionAst> ConstExpressionAstPtr;
+
+// The LRUCache reports only a generic message for getters that
+// failed previously, so we store parse errors ourselves, to be
+// rethrown with their original message on every lookup.
+struct CachedAst
+{
+	ConstExpressionAstPtr ast;
+	std::string error;
+};
+
+CachedAst astGetter( const std::string &setExpression, size_t &cost )
+{
+	cost = 1;
+	CachedAst result;
+	try
+	{
+		std::shared_ptr<ExpressionAst> ast = std::make_shared<ExpressionAst>();
+		expressionToAST( setExpression, *ast );
+		result.ast = ast;
+	}
+	catch( const std::exception &e )
+	{
+		result.error = e.what();
+	}
+	return result;
+}
+
+typedef IECore::LRUCache<std::string, CachedAst> AstCache;
+
+AstCache &astCache()
+{
+	static AstCache *c = new AstCache( astGetter, 1000 );
+	return *c;
+}
+
+ConstExpressionAstPtr parsedExpression( const std::string &setExpression )
+{
+	const CachedAst cached = astCache().get( setExpression );
+	if( !cached.ast )
+	{
+		throw IECore::Exception( cached.error );
+	}
+	return cached.ast;
+}
+
 } // namespace
 
 BOOST_FUSION_ADAPT_STRUCT(
@@ -452,20 +606,18 @@ namespace SetAlgo
 
 PathMatcher evaluateSetExpression( const std::string &setExpression, const ScenePlug *scene )
 {
-	ExpressionAst ast;
-	expressionToAST( setExpression, ast );
+	ConstExpressionAstPtr ast = parsedExpression( setExpression );
 
 	AstEvaluator eval( scene );
-	return eval( ast );
+	return eval( *ast );
 }
 
 void setExpressionHash( const std::string &setExpression, const ScenePlug* scene, IECore::MurmurHash &h )
 {
-	ExpressionAst ast;
-	expressionToAST( setExpression, ast );
+	ConstExpressionAstPtr ast = parsedExpression( setExpression );
 
 	AstHasher hasher = AstHasher( scene, h );
-	hasher(ast);
+	hasher( *ast );
 }
 
 IECore::MurmurHash setExpressionHash( const std::string &setExpression, const ScenePlug* scene)
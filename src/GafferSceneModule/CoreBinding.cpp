@@ -225,6 +225,12 @@ IECore::MurmurHash childNamesHashWrapper( const ScenePlug &plug, const ScenePlug
 	return plug.childNamesHash( scenePath );
 }
 
+IECore::MurmurHash hierarchyHashWrapper( const ScenePlug &plug, const ScenePlug::ScenePath &scenePath )
+{
+	IECorePython::ScopedGILRelease gilRelease;
+	return plug.hierarchyHash( scenePath );
+}
+
 IECore::MurmurHash attributesHashWrapper( const ScenePlug &plug, const ScenePlug::ScenePath &scenePath )
 {
 	IECorePython::ScopedGILRelease gilRelease;
@@ -300,6 +306,7 @@ void GafferSceneModule::bindCore()
 		.def( "fullTransformHash", &fullTransformHashWrapper )
 		.def( "objectHash", &objectHashWrapper )
 		.def( "childNamesHash", &childNamesHashWrapper )
+		.def( "hierarchyHash", &hierarchyHashWrapper )
 		.def( "attributesHash", &attributesHashWrapper )
 		.def( "fullAttributesHash", &fullAttributesHashWrapper )
 		.def( "globalsHash", &globalsHashWrapper )
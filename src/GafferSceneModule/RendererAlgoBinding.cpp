@@ -38,10 +38,12 @@
 
 #include "RendererAlgoBinding.h"
 
+#include "GafferScene/Private/IECoreScenePreview/Renderer.h"
 #include "GafferScene/RendererAlgo.h"
 #include "GafferScene/SceneProcessor.h"
 
 #include "IECorePython/ScopedGILLock.h"
+#include "IECorePython/ScopedGILRelease.h"
 
 using namespace boost::python;
 using namespace GafferScene;
@@ -75,6 +77,12 @@ void registerAdaptorWrapper( const std::string &name, object adaptor )
 	RendererAlgo::registerAdaptor( name, AdaptorWrapper( adaptor ) );
 }
 
+IECoreScenePreview::Renderer::AttributesInterfacePtr attributesCacheGet( RendererAlgo::AttributesCache &cache, const IECore::CompoundObject *attributes )
+{
+	IECorePython::ScopedGILRelease gilRelease;
+	return cache.get( attributes );
+}
+
 } // namespace
 
 namespace GafferSceneModule
@@ -87,6 +95,12 @@ void bindRendererAlgo()
 	def( "deregisterAdaptor", &RendererAlgo::deregisterAdaptor );
 	def( "createAdaptors", &RendererAlgo::createAdaptors );
 
+	class_<RendererAlgo::AttributesCache, boost::noncopyable>( "AttributesCache", init<IECoreScenePreview::Renderer *>()[ with_custodian_and_ward<1, 2>() ] )
+		.def( "get", &attributesCacheGet )
+		.def( "clearUnused", &RendererAlgo::AttributesCache::clearUnused )
+		.def( "reportStatistics", &RendererAlgo::AttributesCache::reportStatistics )
+	;
+
 }
 
 } // namespace GafferSceneModule
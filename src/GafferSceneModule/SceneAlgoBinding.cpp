@@ -89,6 +89,13 @@ void matchingPathsWrapper3( const PathMatcher &filter, const ScenePlug *scene, P
 	SceneAlgo::matchingPaths( filter, scene, paths );
 }
 
+IECore::MurmurHash matchingPathsHashWrapper( const Gaffer::IntPlug *filterPlug, const ScenePlug *scene )
+{
+	// gil release in case the scene traversal dips back into python:
+	IECorePython::ScopedGILRelease r;
+	return SceneAlgo::matchingPathsHash( filterPlug, scene );
+}
+
 Imath::V2f shutterWrapper( const IECore::CompoundObject *globals )
 {
 	IECorePython::ScopedGILRelease r;
@@ -134,6 +141,7 @@ void bindSceneAlgo()
 	def( "matchingPaths", &matchingPathsWrapper1 );
 	def( "matchingPaths", &matchingPathsWrapper2 );
 	def( "matchingPaths", &matchingPathsWrapper3 );
+	def( "matchingPathsHash", &matchingPathsHashWrapper );
 	def( "shutter", &shutterWrapper );
 	def( "setExists", &setExistsWrapper );
 	def(
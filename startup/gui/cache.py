@@ -44,9 +44,11 @@ preferences = application.root()["preferences"]
 preferences["cache"] = Gaffer.Plug()
 preferences["cache"]["enabled"] = Gaffer.BoolPlug( defaultValue = True )
 preferences["cache"]["memoryLimit"] = Gaffer.IntPlug( defaultValue = Gaffer.ValuePlug.getCacheMemoryLimit() / ( 1024 * 1024 ) )
+preferences["cache"]["recordStatistics"] = Gaffer.BoolPlug( defaultValue = Gaffer.ValuePlug.getCacheStatisticsEnabled() )
 
 Gaffer.Metadata.registerValue( preferences["cache"], "plugValueWidget:type", "GafferUI.LayoutPlugValueWidget", persistent = False )
 Gaffer.Metadata.registerValue( preferences["cache"], "layout:section", "Cache", persistent = False )
+Gaffer.Metadata.registerValue( preferences["cache"], "layout:customWidget:statistics:widgetType", "GafferUI.PreferencesUI.CacheStatisticsWidget", persistent = False )
 
 Gaffer.Metadata.registerPlugValue(
 	preferences["cache"]["memoryLimit"],
@@ -57,6 +59,18 @@ Gaffer.Metadata.registerPlugValue(
 	persistent = False
 )
 
+Gaffer.Metadata.registerPlugValue(
+	preferences["cache"]["recordStatistics"],
+	"description",
+	"""
+	Records which nodes are responsible for the contents of
+	the cache, so that the largest consumers can be shown
+	below. This has a small performance cost, so should only
+	be turned on while investigating memory usage.
+	""",
+	persistent = False
+)
+
 # update cache settings when they change
 
 def __plugSet( plug ) :
@@ -69,5 +83,6 @@ def __plugSet( plug ) :
 		memoryLimit = 0
 
 	Gaffer.ValuePlug.setCacheMemoryLimit( memoryLimit )
+	Gaffer.ValuePlug.setCacheStatisticsEnabled( plug["recordStatistics"].getValue() )
 
 preferences.plugSetSignal().connect( __plugSet, scoped = False )